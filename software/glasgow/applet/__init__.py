@@ -4,17 +4,19 @@ import shlex
 import unittest
 import argparse
 import functools
+import contextlib
 import asyncio
 
-from ..support.plugin import PluginMetadata
+from ..plugins import GlasgowAppletMetadata, GlasgowAppletToolMetadata
 from ..support.asyncio import asyncio_run_in_thread
 from ..support.arepl import AsyncInteractiveConsole
-from ..support.mock import MockRecorder, MockReplayer
+from ..support.mock import MockRecorder, MockReplayer, open_fixture
 from ..abstract import GlasgowVio, GlasgowPin, AbstractAssembly
 from ..hardware.toolchain import find_toolchain
 from ..hardware.device import GlasgowDevice
 from ..hardware.assembly import HardwareAssembly
 from ..simulation.assembly import SimulationAssembly
+from ..simulation.trace import trace_files
 from ..gateware.clockgen import ClockGen
 
 
@@ -29,22 +31,6 @@ __all__ = [
 ]
 
 
-class GlasgowAppletMetadata(PluginMetadata):
-    # A Glasgow applet is defined by a class; known applets are taken from a
-    # list of entry points in package metadata.  (In the Glasgow package, they
-    # are enumerated in the `[project.entry-points."glasgow.applet"]` section of
-    # the pyproject.toml.
-    GROUP_NAME = "glasgow.applet"
-
-
-class GlasgowAppletToolMetadata(PluginMetadata):
-    # A Glasgow applet tool is defined by a class; known applets are taken from a
-    # list of entry points in package metadata.  (In the Glasgow package, they
-    # are enumerated in the `[project.entry-points."glasgow.applet.tool"]` section of
-    # the pyproject.toml.
-    GROUP_NAME = "glasgow.applet.tool"
-
-
 class GlasgowAppletError(Exception):
     """An exception raised when an applet encounters an error."""
 
@@ -336,7 +322,8 @@ def applet_v2_simulation_test(*, prepare=None, args=None):
             async def launch(ctx):
                 await applet.setup(parsed_args)
                 await case(self, applet, ctx)
-            assembly.run(launch, vcd_file=f"{case.__name__}.vcd")
+            with trace_files(case.__name__) as (vcd_file, gtkw_file):
+                assembly.run(launch, vcd_file=vcd_file, gtkw_file=gtkw_file)
         return wrapper
     return decorator
 
@@ -347,17 +334,24 @@ def applet_v2_hardware_test(*, prepare=None, args=None, mocks: list[str]):
         @async_test
         async def wrapper(self):
             parsed_args = self._parse_args(args)
-            fixture_path = os.path.join(
-                os.path.dirname(case.__code__.co_filename), "fixtures",
-                case.__name__ + ".json")
-            if not os.path.exists(fixture_path):
+            fixture_base = os.path.join(
+                os.path.dirname(case.__code__.co_filename), "fixtures", case.__name__)
+            # Binary fixtures (see `python -m glasgow.support.mock`) take precedence over
+            # JSON fixtures, since the former are much faster to replay.
+            for fixture_path in (f"{fixture_base}.mock", f"{fixture_base}.json"):
+                if os.path.exists(fixture_path):
+                    break
+            else:
+                fixture_path = None
+            if fixture_path is None:
                 # Record mode
                 assembly = HardwareAssembly.find_device()
                 applet: GlasgowAppletV2 = self.applet_cls(assembly)
                 applet.build(parsed_args)
                 async with assembly:
+                    fixture_path = f"{fixture_base}.json"
                     os.makedirs(os.path.dirname(fixture_path), exist_ok=True)
-                    with open(f"{fixture_path}.new", "w") as fixture:
+                    with contextlib.closing(open_fixture(f"{fixture_path}.new", "w")) as fixture:
                         await applet.setup(parsed_args)
                         if prepare is not None:
                             await prepare(self, assembly)
@@ -376,7 +370,7 @@ def applet_v2_hardware_test(*, prepare=None, args=None, mocks: list[str]):
                 assembly = HardwareAssembly(revision=self.applet_cls.required_revision)
                 applet: GlasgowAppletV2 = self.applet_cls(assembly)
                 applet.build(parsed_args)
-                with open(fixture_path, "r") as fixture:
+                with contextlib.closing(open_fixture(fixture_path, "r")) as fixture:
                     for mock in mocks:
                         mock_obj = applet
                         *mock_path, mock_attr = mock.split(".")
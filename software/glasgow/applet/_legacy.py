@@ -10,6 +10,7 @@ from ..support.asyncio import asyncio_run_in_thread
 from ..support.arepl import AsyncInteractiveConsole
 from ..support.mock import MockRecorder, MockReplayer
 from ..simulation.assembly import SimulationAssembly
+from ..simulation.trace import trace_files
 from ..abstract import AbstractAssembly
 from ..hardware.assembly import HardwareAssembly
 from ..hardware.device import GlasgowDevice
@@ -183,9 +184,8 @@ def applet_simulation_test(setup, args=[]):
 
             async def launch(ctx):
                 await case(self, device, parsed_args, ctx)
-            vcd_name = f"{case.__name__}.vcd"
-            assembly.run(launch, vcd_file=vcd_name)
-            os.remove(vcd_name)
+            with trace_files(case.__name__) as (vcd_file, gtkw_file):
+                assembly.run(launch, vcd_file=vcd_file, gtkw_file=gtkw_file)
 
         return wrapper
 
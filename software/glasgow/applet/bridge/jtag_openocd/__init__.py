@@ -1,16 +1,35 @@
+from collections import deque
+import enum
+import struct
 import logging
 import asyncio
 from amaranth import *
 from amaranth.lib import wiring, stream, io, cdc
 from amaranth.lib.wiring import In, Out
 
+from glasgow.support.logging import dump_hex
 from glasgow.support.endpoint import ServerEndpoint
-from glasgow.applet import GlasgowAppletV2
+from glasgow.applet import GlasgowAppletError, GlasgowAppletV2
+from ..jtag_xvc import JTAGXVCInterface
 
 
 __all__ = []
 
 
+class _VPICommand(enum.IntEnum):
+    Reset            = 0
+    TMSSequence      = 1
+    ScanChain        = 2
+    ScanChainFlipTMS = 3
+    StopSimulation   = 4
+
+
+# `struct vpi_cmd` from OpenOCD `src/jtag/drivers/jtag_vpi.c`: command, TDI (or TMS) bits,
+# TDO bits, length in bytes, and length in bits. Every request and response has this size.
+_VPI_XFER_SIZE = 512
+_vpi_cmd = struct.Struct(f"<L{_VPI_XFER_SIZE}s{_VPI_XFER_SIZE}sLL")
+
+
 class JTAGOpenOCDComponent(wiring.Component):
     i_stream: In(stream.Signature(8))
     o_stream: Out(stream.Signature(8))
@@ -94,7 +113,7 @@ class JTAGOpenOCDApplet(GlasgowAppletV2):
     logger = logging.getLogger(__name__)
     help = "expose JTAG via OpenOCD remote bitbang interface"
     description = """
-    Expose JTAG via a socket using the OpenOCD remote bitbang protocol.
+    Expose JTAG via a socket using the OpenOCD remote bitbang or JTAG VPI protocol.
 
     Usage with TCP sockets:
 
@@ -116,6 +135,16 @@ class JTAGOpenOCDApplet(GlasgowAppletV2):
 
     If you use TRST# and/or SRST# pins, the 'reset_config none' option above must be
     replaced with 'reset_config trst', 'reset_config srst', or 'reset_config trst_and_srst'.
+
+    The remote bitbang protocol transfers a byte for every TCK edge, and makes a round trip for
+    every TDO sample. The JTAG VPI protocol transfers entire scans instead, and is much faster;
+    it only supports TCP sockets and does not support the TRST# and SRST# pins:
+
+    ::
+
+        glasgow run jtag-openocd --protocol jtag-vpi tcp:localhost:5555
+        openocd -c 'adapter driver jtag_vpi; transport select jtag' \\
+            -c 'jtag_vpi set_port 5555'
     """
 
     @classmethod
@@ -131,27 +160,117 @@ class JTAGOpenOCDApplet(GlasgowAppletV2):
         parser.add_argument(
             "-f", "--frequency", metavar="FREQ", type=int, default=100,
             help="set TCK frequency to FREQ kHz (default: %(default)s)")
+        parser.add_argument(
+            "--protocol", metavar="PROTOCOL",
+            choices=("remote-bitbang", "jtag-vpi"), default="remote-bitbang",
+            help="communicate with OpenOCD using PROTOCOL (default: %(default)s)")
 
     def build(self, args):
         with self.assembly.add_applet(self):
             self.assembly.use_voltage(args.voltage)
-            ports = self.assembly.add_port_group(
-                tck=args.tck, tms=args.tms, tdi=args.tdi, tdo=args.tdo,
-                trst=args.trst, srst=args.srst
-            )
-            component = self.assembly.add_submodule(JTAGOpenOCDComponent(ports,
-                period_cyc=round(1 / (self.assembly.sys_clk_period * args.frequency * 1000)),
-                us_cyc=round(1 / (self.assembly.sys_clk_period * 1_000_000)),
-            ))
-            self.__pipe = self.assembly.add_inout_pipe(component.o_stream, component.i_stream)
+            if args.protocol == "jtag-vpi":
+                if args.trst is not None or args.srst is not None:
+                    raise GlasgowAppletError(
+                        "the JTAG VPI protocol does not support the TRST# and SRST# pins")
+                self.xvc_iface = JTAGXVCInterface(self.logger, self.assembly,
+                    tck=args.tck, tms=args.tms, tdi=args.tdi, tdo=args.tdo)
+            else:
+                ports = self.assembly.add_port_group(
+                    tck=args.tck, tms=args.tms, tdi=args.tdi, tdo=args.tdo,
+                    trst=args.trst, srst=args.srst
+                )
+                component = self.assembly.add_submodule(JTAGOpenOCDComponent(ports,
+                    period_cyc=round(1 / (self.assembly.sys_clk_period * args.frequency * 1000)),
+                    us_cyc=round(1 / (self.assembly.sys_clk_period * 1_000_000)),
+                ))
+                self.__pipe = self.assembly.add_inout_pipe(component.o_stream, component.i_stream)
 
     @classmethod
     def add_run_arguments(cls, parser):
         ServerEndpoint.add_argument(parser, "endpoint")
 
+    async def setup(self, args):
+        if args.protocol == "jtag-vpi":
+            await self.xvc_iface.clock.set_frequency(args.frequency * 1000)
+
     async def run(self, args):
         endpoint = await ServerEndpoint("socket", self.logger, args.endpoint)
-        await endpoint.attach_to_pipe(self.__pipe)
+        if args.protocol == "jtag-vpi":
+            while True:
+                await self.serve_jtag_vpi(endpoint)
+        else:
+            await endpoint.attach_to_pipe(self.__pipe)
+
+    async def serve_jtag_vpi(self, endpoint):
+        """Process JTAG VPI requests received from :py:`endpoint` until the client disconnects.
+
+        Shifts are submitted to the device as soon as they are received, without waiting for
+        the preceding ones to complete. Responses are sent, in order, once the client has no more
+        requests in flight.
+        """
+        pending = deque() # (response, bit count) of submitted shifts
+
+        async def complete():
+            if pending:
+                await self.xvc_iface.flush()
+            while pending:
+                response, nb_bits = pending.popleft()
+                tdo_bytes = await self.xvc_iface.recv_shift(nb_bits)
+                if response is not None:
+                    # OpenOCD copies entire bytes, so the bits past the end must be cleared.
+                    tdo_bytes = bytearray(tdo_bytes)
+                    tdo_bytes[-1] &= 0xff >> (-nb_bits % 8)
+                    self.logger.debug("  tdo=<%s>", dump_hex(tdo_bytes))
+                    command, buffer_out, length = response
+                    await endpoint.send(_vpi_cmd.pack(
+                        command, buffer_out, tdo_bytes, length, nb_bits))
+
+        async def submit(nb_bits, tms_bytes, tdi_bytes, response=None):
+            if nb_bits > 0:
+                await self.xvc_iface.send_shift(nb_bits, tms_bytes, tdi_bytes)
+                pending.append((response, nb_bits))
+            elif response is not None:
+                await complete()
+                command, buffer_out, length = response
+                await endpoint.send(_vpi_cmd.pack(command, buffer_out, b"", length, nb_bits))
+
+        try:
+            while True:
+                if not endpoint.readable:
+                    await complete()
+                command, buffer_out, _, length, nb_bits = \
+                    _vpi_cmd.unpack(await endpoint.recv(_vpi_cmd.size))
+                self.logger.debug(f"cmd={command} length={length} nb_bits={nb_bits}")
+                match command:
+                    case _VPICommand.Reset:
+                        await submit(5, b"\x1f", b"\x00")
+
+                    case _VPICommand.TMSSequence | _VPICommand.ScanChain | \
+                            _VPICommand.ScanChainFlipTMS:
+                        if length != (nb_bits + 7) // 8 or length > _VPI_XFER_SIZE:
+                            raise GlasgowAppletError(
+                                f"invalid JTAG VPI request length {length} for {nb_bits} bits")
+                        data_bytes = buffer_out[:length]
+                        self.logger.debug("  data=<%s>", dump_hex(data_bytes))
+                        if command == _VPICommand.TMSSequence:
+                            await submit(nb_bits, data_bytes, bytes(length))
+                        else:
+                            tms_bytes = bytearray(length)
+                            if command == _VPICommand.ScanChainFlipTMS and nb_bits > 0:
+                                tms_bytes[(nb_bits - 1) // 8] = 1 << ((nb_bits - 1) % 8)
+                            await submit(nb_bits, tms_bytes, data_bytes,
+                                response=(command, buffer_out, length))
+
+                    case _VPICommand.StopSimulation:
+                        pass
+
+                    case command:
+                        raise GlasgowAppletError(f"unrecognized JTAG VPI command {command}")
+
+        except EOFError:
+            # The responses to the remaining shifts are discarded, but they still have to be
+            # received to keep the pipe in sync.
+            await complete()
 
     @classmethod
     def tests(cls):
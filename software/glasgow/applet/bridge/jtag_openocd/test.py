@@ -1,5 +1,50 @@
-from glasgow.applet import GlasgowAppletV2TestCase, synthesis_test
-from . import JTAGOpenOCDApplet
+from glasgow.simulation.assembly import SimulationAssembly
+from glasgow.applet import GlasgowAppletV2TestCase, synthesis_test, applet_v2_simulation_test
+from . import JTAGOpenOCDApplet, _VPICommand, _vpi_cmd
+
+
+class VPIClientModel:
+    """A scripted JTAG VPI client that has sent all of :py:`requests` at once, standing in for
+    a :class:`ServerEndpoint`."""
+
+    def __init__(self, requests):
+        self._requests = bytearray(b"".join(
+            _vpi_cmd.pack(command, data, b"", len(data), nb_bits)
+            for command, data, nb_bits in requests))
+        self.responses = bytearray()
+
+    @property
+    def readable(self):
+        return len(self._requests)
+
+    async def recv(self, length):
+        if len(self._requests) < length:
+            raise EOFError
+        data = self._requests[:length]
+        del self._requests[:length]
+        return data
+
+    async def send(self, data):
+        self.responses += data
+        return True
+
+    def unpack_responses(self):
+        return [(command, buffer_in[:length], nb_bits)
+                for command, _, buffer_in, length, nb_bits in _vpi_cmd.iter_unpack(self.responses)]
+
+
+def prepare_loopback(self, assembly: SimulationAssembly):
+    assembly.connect_pins("A2", "A3") # TDI to TDO
+
+    self.cycles = [] # (tms, tdi) at each rising edge of TCK
+    async def testbench(ctx):
+        tck, tms, tdi = (assembly.get_pin(name) for name in ("A0", "A1", "A2"))
+        prev_tck = 0
+        async for _ in ctx.tick():
+            if not prev_tck and ctx.get(tck.o):
+                self.cycles.append((ctx.get(tms.o), ctx.get(tdi.o)))
+            prev_tck = ctx.get(tck.o)
+    assembly.add_testbench(testbench, background=True)
 
 
 class JTAGOpenOCDAppletTestCase(GlasgowAppletV2TestCase, applet=JTAGOpenOCDApplet):
@@ -10,3 +55,32 @@ class JTAGOpenOCDAppletTestCase(GlasgowAppletV2TestCase, applet=JTAGOpenOCDApple
     @synthesis_test
     def test_build_trst_srst(self):
         self.assertBuilds("--trst A6 --srst A7")
+
+    @synthesis_test
+    def test_build_jtag_vpi(self):
+        self.assertBuilds("--protocol jtag-vpi")
+
+    @applet_v2_simulation_test(prepare=prepare_loopback,
+        args=["--tck", "A0", "--tms", "A1", "--tdi", "A2", "--tdo", "A3",
+              "--protocol", "jtag-vpi", "-f", "250"])
+    async def test_jtag_vpi(self, applet: JTAGOpenOCDApplet, ctx):
+        client = VPIClientModel([
+            (_VPICommand.Reset,            b"",                 0),
+            (_VPICommand.TMSSequence,      bytes([0b0010]),     4),
+            (_VPICommand.ScanChain,        bytes([0xa5, 0x03]), 10),
+            (_VPICommand.ScanChainFlipTMS, bytes([0x5a]),       8),
+            (_VPICommand.StopSimulation,   b"",                 0),
+        ])
+        await applet.serve_jtag_vpi(client)
+        self.assertEqual(client.unpack_responses(), [
+            (_VPICommand.ScanChain,        bytes([0xa5, 0x03]), 10),
+            (_VPICommand.ScanChainFlipTMS, bytes([0x5a]),       8),
+        ])
+        def bits(value, count):
+            return [(value >> index) & 1 for index in range(count)]
+        self.assertEqual(self.cycles, [
+            *((1, 0) for _ in range(5)),
+            *zip(bits(0b0010, 4), [0] * 4),
+            *zip([0] * 10, bits(0x3a5, 10)),
+            *zip([0] * 7 + [1], bits(0x5a, 8)),
+        ])
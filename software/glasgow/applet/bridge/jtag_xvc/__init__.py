@@ -1,3 +1,4 @@
+from collections import deque
 import logging
 import asyncio
 import struct
@@ -17,6 +18,14 @@ from glasgow.applet import GlasgowAppletError, GlasgowAppletV2
 __all__ = ["JTAGXVCComponent", "JTAGXVCInterface"]
 
 
+# The component receives the cycle count as a 16-bit number, so longer shifts are split into
+# several requests. Every request except the last one is a whole number of bytes long.
+_MAX_REQUEST_BITS = 0xfff8
+
+# Maximum length of a TMS or TDI vector accepted from an XVC client, in bytes.
+_MAX_VECTOR_BYTES = 0x10000
+
+
 class _ShiftIn(enum.Enum, shape=unsigned(2)):
     Idle = 0
     More = 1
@@ -180,21 +189,40 @@ class JTAGXVCInterface:
         """TCK clock divisor."""
         return self._clock
 
+    async def send_shift(self, count: int, tms: bytes, tdi: bytes):
+        """Submit a shift of :py:`count` cycles without waiting for it to complete.
+
+        The arguments are the same as for :meth:`shift`. Several shifts may be submitted back to
+        back; the state of TDO must then be retrieved with :meth:`recv_shift` for each of them,
+        in the same order, after calling :meth:`flush`.
+        """
+        assert len(tms) == len(tdi) == (count + 7) // 8 and count > 0
+        for offset in range(0, count, _MAX_REQUEST_BITS):
+            chunk_count = min(count - offset, _MAX_REQUEST_BITS)
+            chunk_slice = slice(offset // 8, (offset + chunk_count + 7) // 8)
+            request = bytearray(2 + 2 * (chunk_slice.stop - chunk_slice.start))
+            request[0:2:] = struct.pack(">H", chunk_count)
+            request[2::2] = tms[chunk_slice]
+            request[3::2] = tdi[chunk_slice]
+            await self._pipe.send(request)
+
+    async def flush(self):
+        """Send all submitted shifts to the device."""
+        await self._pipe.flush()
+
+    async def recv_shift(self, count: int) -> bytes:
+        """Retrieve the state of TDO for the earliest submitted shift of :py:`count` cycles."""
+        return await self._pipe.recv((count + 7) // 8)
+
     async def shift(self, count: int, tms: bytes, tdi: bytes) -> bytes:
         """Shift :py:`count` cycles.
 
         State of TMS and TDI is taken from :py:`tms` and :py:`tdi`, where the LSB of the 0th byte
         is transmitted first; state of TDO is serialized in the same way and returned.
         """
-        assert len(tms) == len(tdi) == (count + 7) // 8 and count > 0
-        request = bytearray(2 + len(tms) + len(tdi))
-        request[0:2:] = struct.pack(">H", count)
-        request[2::2] = tms
-        request[3::2] = tdi
-        await self._pipe.send(request)
-        await self._pipe.flush()
-        response = await self._pipe.recv(len(tdi))
-        return response
+        await self.send_shift(count, tms, tdi)
+        await self.flush()
+        return await self.recv_shift(count)
 
 
 class JTAGXVCApplet(GlasgowAppletV2):
@@ -238,17 +266,43 @@ class JTAGXVCApplet(GlasgowAppletV2):
 
         endpoint = await ServerEndpoint("socket", self.logger, args.endpoint)
         while True:
-            try:
+            await self.serve(endpoint, frequency=args.frequency)
+
+    async def serve(self, endpoint, *, frequency=None, depth=64):
+        """Process XVC requests received from :py:`endpoint` until the client disconnects.
+
+        Shift requests are submitted to the device as soon as they are received, without waiting
+        for the preceding ones to complete. Their responses are sent, in order, once the client
+        has no more requests in flight, or once :py:`depth` of them are pending.
+        """
+        pending = deque() # bit counts of submitted shifts
+
+        async def complete():
+            if pending:
+                await self.xvc_iface.flush()
+            while pending:
+                tdo_bytes = await self.xvc_iface.recv_shift(pending.popleft())
+                self.logger.debug("  tdo=<%s>", dump_hex(tdo_bytes))
+                await endpoint.send(tdo_bytes)
+
+        try:
+            while True:
+                if not endpoint.readable or len(pending) >= depth:
+                    await complete()
                 command = await endpoint.recv_until(b":")
                 self.logger.debug(f"cmd={command.decode('ascii')}")
                 match command:
                     case b"getinfo":
-                        await endpoint.send(f"xvcServer_v1.0:{65535 // 8}\n".encode("ascii"))
+                        await complete()
+                        await endpoint.send(f"xvcServer_v1.0:{_MAX_VECTOR_BYTES}\n"
+                                            .encode("ascii"))
 
                     case b"settck":
                         tck_period, = struct.unpack("<L", await endpoint.recv(4))
                         self.logger.debug(f"  tck-i={tck_period}") # in nanoseconds
-                        if args.frequency is None:
+                        # Shifts that are already submitted must complete at the old frequency.
+                        await complete()
+                        if frequency is None:
                             await self.xvc_iface.clock.set_frequency(1e9 / tck_period)
                         tck_period = round(1e9 / await self.xvc_iface.clock.get_frequency())
                         self.logger.debug(f"  tck-o={tck_period}")
@@ -258,19 +312,24 @@ class JTAGXVCApplet(GlasgowAppletV2):
                         bit_count, = struct.unpack("<L", await endpoint.recv(4))
                         self.logger.debug(f"  count={bit_count}")
                         byte_count = (bit_count + 7) // 8
+                        if byte_count > _MAX_VECTOR_BYTES:
+                            raise GlasgowAppletError(
+                                f"shift of {bit_count} cycles exceeds maximum vector length")
                         tms_bytes = await endpoint.recv(byte_count)
                         self.logger.debug("  tms=<%s>", dump_hex(tms_bytes))
                         tdi_bytes = await endpoint.recv(byte_count)
                         self.logger.debug("  tdi=<%s>", dump_hex(tdi_bytes))
-                        tdo_bytes = await self.xvc_iface.shift(bit_count, tms_bytes, tdi_bytes)
-                        self.logger.debug("  tdo=<%s>", dump_hex(tdo_bytes))
-                        await endpoint.send(tdo_bytes)
+                        if bit_count > 0:
+                            await self.xvc_iface.send_shift(bit_count, tms_bytes, tdi_bytes)
+                            pending.append(bit_count)
 
                     case command:
                         raise GlasgowAppletError(f"unrecognized command {command!r}")
 
-            except EOFError:
-                pass
+        except EOFError:
+            # The responses to the remaining shifts are discarded, but they still have to be
+            # received to keep the pipe in sync.
+            await complete()
 
     @classmethod
     def tests(cls):
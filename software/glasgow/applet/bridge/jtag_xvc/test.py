@@ -1,10 +1,14 @@
+import random
+import struct
+
 from amaranth import *
 from amaranth.lib import wiring, stream, io
 from amaranth.sim import Simulator
 
 from glasgow.gateware.ports import PortGroup
 from glasgow.gateware.jtag import tap as jtag_tap
-from glasgow.applet import GlasgowAppletV2TestCase, synthesis_test
+from glasgow.simulation.assembly import SimulationAssembly
+from glasgow.applet import GlasgowAppletV2TestCase, synthesis_test, applet_v2_simulation_test
 from . import JTAGXVCProbe, JTAGXVCApplet
 
 
@@ -51,6 +55,50 @@ class TAPToplevel(Elaboratable):
         return m
 
 
+class XVCClientModel:
+    """A scripted XVC client that has sent all of :py:`requests` at once, standing in for
+    a :class:`ServerEndpoint`."""
+
+    def __init__(self, requests):
+        self._requests = bytearray(requests)
+        self.responses = bytearray()
+
+    @property
+    def readable(self):
+        return len(self._requests)
+
+    async def recv(self, length):
+        if len(self._requests) < length:
+            raise EOFError
+        data = self._requests[:length]
+        del self._requests[:length]
+        return data
+
+    async def recv_until(self, separator):
+        if separator not in self._requests:
+            raise EOFError
+        data, _, self._requests = self._requests.partition(separator)
+        return data
+
+    async def send(self, data):
+        self.responses += data
+        return True
+
+
+def xvc_shift(count, tms, tdi):
+    return b"shift:" + struct.pack("<L", count) + tms + tdi
+
+
+def prepare_loopback(self, assembly: SimulationAssembly):
+    assembly.connect_pins("A2", "A3") # TDI to TDO
+
+    self.cycles = 0
+    async def testbench(ctx):
+        async for _ in ctx.tick():
+            self.cycles += 1
+    assembly.add_testbench(testbench, background=True)
+
+
 class JTAGXVCAppletTestCase(GlasgowAppletV2TestCase, applet=JTAGXVCApplet):
     def test_xvc_probe(self):
         tap_ports = PortGroup()
@@ -111,3 +159,46 @@ class JTAGXVCAppletTestCase(GlasgowAppletV2TestCase, applet=JTAGXVCApplet):
     @synthesis_test
     def test_build(self):
         self.assertBuilds()
+
+    @applet_v2_simulation_test(prepare=prepare_loopback,
+        args=["--tck", "A0", "--tms", "A1", "--tdi", "A2", "--tdo", "A3"])
+    async def test_serve(self, applet: JTAGXVCApplet, ctx):
+        rng = random.Random(0)
+        shifts = []
+        for count in (1, 7, 8, 9, 32, 100):
+            tms = rng.randbytes((count + 7) // 8)
+            tdi = rng.randbytes((count + 7) // 8)
+            shifts.append((count, tms, tdi))
+
+        client = XVCClientModel(b"getinfo:" + b"".join(xvc_shift(*shift) for shift in shifts))
+        await applet.serve(client)
+        info, _, responses = client.responses.partition(b"\n")
+        self.assertEqual(info, b"xvcServer_v1.0:65536")
+        for count, tms, tdi in shifts:
+            # Bits of the last byte past the end of the shift are unspecified.
+            mask = (1 << count) - 1
+            self.assertEqual(int.from_bytes(responses[:len(tdi)], "little") & mask,
+                             int.from_bytes(tdi, "little") & mask)
+            responses = responses[len(tdi):]
+        self.assertEqual(responses, b"")
+
+    @applet_v2_simulation_test(prepare=prepare_loopback,
+        args=["--tck", "A0", "--tms", "A1", "--tdi", "A2", "--tdo", "A3"])
+    async def test_serve_pipelined(self, applet: JTAGXVCApplet, ctx):
+        shifts = [(32, bytes(4), bytes([n, n, n, n])) for n in range(32)]
+
+        started = self.cycles
+        sequential = []
+        for shift in shifts:
+            sequential.append(bytes(await applet.xvc_iface.shift(*shift)))
+        sequential_cycles = self.cycles - started
+
+        started = self.cycles
+        client = XVCClientModel(b"".join(xvc_shift(*shift) for shift in shifts))
+        await applet.serve(client)
+        pipelined_cycles = self.cycles - started
+
+        self.assertEqual(client.responses, b"".join(sequential))
+        self.assertEqual(client.responses, b"".join(tdi for count, tms, tdi in shifts))
+        # Each sequential shift waits for the simulated USB latency of the IN pipe.
+        self.assertLess(pipelined_cycles * 2, sequential_cycles)
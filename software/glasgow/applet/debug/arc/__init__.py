@@ -19,6 +19,7 @@
 import logging
 import argparse
 
+from ....support.bits import *
 from ....arch.jtag import *
 from ....arch.arc import *
 from ....database.arc import *
@@ -30,7 +31,38 @@ class ARCDebugError(GlasgowAppletError):
     pass
 
 
+class ARCDebugDeferredResult:
+    """Outcome of a transaction that was queued with :meth:`ARCDebugInterface.queue_read` or
+    :meth:`ARCDebugInterface.queue_write`.
+
+    The transaction status (and the data, for reads) is captured right after the transaction
+    is initiated, without polling; :meth:`get` raises :exc:`ARCDebugError` if the transaction
+    failed or had not completed by then.
+    """
+
+    def __init__(self, status, data=None):
+        self._status = status
+        self._data   = data
+
+    async def get(self):
+        status = DR_STATUS.from_bits(await self._status.get())
+        if status.FL:
+            raise ARCDebugError("transaction failed: %s" % status.bits_repr())
+        if not status.RD:
+            raise ARCDebugError("queued transaction did not complete: %s" % status.bits_repr())
+        if self._data is not None:
+            return DR_DATA.from_bits(await self._data.get()).Data
+
+
 class ARCDebugInterface:
+    # Number of TCK cycles spent in Run-Test/Idle after initiating a queued transaction, before
+    # its status is captured. Extra cycles in Run-Test/Idle do not initiate further transactions.
+    queue_idle_cycles = 8
+
+    # Number of words read or written per batch of queued transactions by :meth:`read_memory`
+    # and :meth:`write_memory`.
+    batch_words = 256
+
     def __init__(self, interface, logger):
         self.lower   = interface
         self._logger = logger
@@ -58,6 +90,59 @@ class ARCDebugInterface:
             if status.FL:
                 raise ARCDebugError("transaction failed: %s" % status.bits_repr())
 
+    async def _queue_txn(self, address, dr_txn_command, data=None):
+        dr_address = DR_ADDRESS(Address=address)
+        await self.lower.write_ir(IR_ADDRESS)
+        await self.lower.write_dr(dr_address.to_bits())
+        if data is not None:
+            await self.lower.write_ir(IR_DATA)
+            dr_data = DR_DATA(Data=data)
+            await self.lower.write_dr(dr_data.to_bits())
+        await self.lower.write_ir(IR_TXN_COMMAND)
+        await self.lower.write_dr(dr_txn_command)
+        await self.lower.run_test_idle(self.queue_idle_cycles)
+        await self.lower.write_ir(IR_STATUS)
+        return await self.lower.exchange_dr(bits(0, 4), defer=True)
+
+    async def queue_read(self, address, space):
+        """Queue a read transaction without waiting for it to complete.
+
+        Any number of transactions can be queued back to back; the results of all of them are
+        retrieved at once when :meth:`ARCDebugDeferredResult.get` is first awaited.
+        """
+        if space == "memory":
+            dr_txn_command = DR_TXN_COMMAND_READ_MEMORY
+        elif space == "core":
+            dr_txn_command = DR_TXN_COMMAND_READ_CORE
+        elif space == "aux":
+            dr_txn_command = DR_TXN_COMMAND_READ_AUX
+        else:
+            assert False
+
+        self._log("queue read %s address=%08x", space, address)
+        status = await self._queue_txn(address, dr_txn_command)
+        await self.lower.write_ir(IR_DATA)
+        data = await self.lower.exchange_dr(bits(0, 32), defer=True)
+        return ARCDebugDeferredResult(status, data)
+
+    async def queue_write(self, address, data, space):
+        """Queue a write transaction without waiting for it to complete.
+
+        See :meth:`queue_read`.
+        """
+        if space == "memory":
+            dr_txn_command = DR_TXN_COMMAND_WRITE_MEMORY
+        elif space == "core":
+            dr_txn_command = DR_TXN_COMMAND_WRITE_CORE
+        elif space == "aux":
+            dr_txn_command = DR_TXN_COMMAND_WRITE_AUX
+        else:
+            assert False
+
+        self._log("queue write %s address=%08x data=%08x", space, address, data)
+        status = await self._queue_txn(address, dr_txn_command, data)
+        return ARCDebugDeferredResult(status)
+
     async def read(self, address, space):
         if space == "memory":
             dr_txn_command = DR_TXN_COMMAND_READ_MEMORY
@@ -104,6 +189,44 @@ class ARCDebugInterface:
         await self.lower.run_test_idle(1)
         await self._wait_txn()
 
+    async def read_memory(self, address, count):
+        """Read :py:`count` consecutive words of memory starting at :py:`address`.
+
+        The transactions are queued in batches of :py:`batch_words` (see :meth:`queue_read`), and
+        their outcome is checked once per batch. Only the transactions that have not completed
+        in time or have failed are retried, one at a time, waiting for each of them to complete.
+        """
+        words = []
+        for batch_offset in range(0, count, self.batch_words):
+            batch_count = min(count - batch_offset, self.batch_words)
+            results = []
+            for index in range(batch_offset, batch_offset + batch_count):
+                results.append(await self.queue_read(address + index * 4, space="memory"))
+            for index, result in enumerate(results, batch_offset):
+                try:
+                    words.append(await result.get())
+                except ARCDebugError as error:
+                    self._log("retry read address=%08x (%s)", address + index * 4, error)
+                    words.append(await self.read(address + index * 4, space="memory"))
+        return words
+
+    async def write_memory(self, address, words):
+        """Write :py:`words` to consecutive words of memory starting at :py:`address`.
+
+        See :meth:`read_memory`.
+        """
+        for batch_offset in range(0, len(words), self.batch_words):
+            batch_words = words[batch_offset:batch_offset + self.batch_words]
+            results = []
+            for index, data in enumerate(batch_words, batch_offset):
+                results.append(await self.queue_write(address + index * 4, data, space="memory"))
+            for (index, data), result in zip(enumerate(batch_words, batch_offset), results):
+                try:
+                    await result.get()
+                except ARCDebugError as error:
+                    self._log("retry write address=%08x (%s)", address + index * 4, error)
+                    await self.write(address + index * 4, data, space="memory")
+
     async def is_halted(self):
         status32 = AUX_STATUS32.from_int(await self.read(AUX_STATUS32_addr, space="aux"))
         return status32.H
@@ -172,3 +295,8 @@ class DebugARCApplet(JTAGProbeApplet):
                                      % idcode.to_int())
         self.logger.info("IDCODE=%08x device=%s rev=%d",
                          idcode.to_int(), device.name, idcode.version)
+
+    @classmethod
+    def tests(cls):
+        from . import test
+        return test.DebugARCAppletTestCase
@@ -0,0 +1,175 @@
+import unittest
+
+from ....support.bits import *
+from ....arch.jtag import *
+from ....arch.arc import *
+from ... import *
+from ...interface.jtag_probe import JTAGProbeInterface, TAPInterface
+from ...interface.jtag_probe.test import JTAGProbeModel
+from . import DebugARCApplet, ARCDebugInterface, ARCDebugError
+
+
+class ARCModel:
+    """A behavioral model of the ARC JTAG debug TAP.
+
+    Transactions are initiated on entry to Run-Test/Idle and complete immediately, unless
+    :py:`pending` is set. Memory is a dictionary of 32-bit words, and is backed by the
+    :py:`read_memory(address)` and :py:`write_memory(address, data)` methods, which may be
+    overridden to model peripherals. The auxiliary register space is a dictionary, :py:`aux`.
+    Accessing an address in :py:`faults` fails the transaction. The first transaction accessing
+    an address in :py:`delays` does not complete.
+    """
+
+    ir_length = 4
+
+    def __init__(self, *, faults=(), delays=()):
+        self.memory  = {}
+        self.aux     = {}
+        self.faults  = set(faults)
+        self.delays  = set(delays)
+        self.pending = False
+
+        self._ir      = IR_IDCODE
+        self._address = 0
+        self._data    = 0
+        self._command = DR_TXN_COMMAND_READ_MEMORY
+        self._status  = DR_STATUS(RD=1)
+
+    def read_memory(self, address):
+        return self.memory.get(address, 0)
+
+    def write_memory(self, address, data):
+        self.memory[address] = data
+
+    def capture_ir(self):
+        return 0b0001
+
+    def update_ir(self, value):
+        self._ir = bits(value, self.ir_length)
+
+    def capture_dr(self):
+        if self._ir == IR_STATUS:
+            return self._status.to_int(), 4
+        elif self._ir == IR_DATA:
+            return self._data, 32
+        elif self._ir == IR_TXN_COMMAND:
+            return self._command.to_int(), 4
+        elif self._ir == IR_ADDRESS:
+            return self._address, 32
+        elif self._ir == IR_IDCODE:
+            return DR_IDCODE(present=1, mfg_id=0x258, part_id=0x0002).to_int(), 32
+        else:
+            return 0, 1
+
+    def update_dr(self, value):
+        if self._ir == IR_ADDRESS:
+            self._address = value
+        elif self._ir == IR_DATA:
+            self._data = value
+        elif self._ir == IR_TXN_COMMAND:
+            self._command = bits(value, 4)
+
+    def enter_run_test_idle(self):
+        if self.pending:
+            self._status = DR_STATUS()
+        elif self._address in self.delays:
+            self.delays.remove(self._address)
+            self._status = DR_STATUS()
+        elif self._address in self.faults:
+            self._status = DR_STATUS(FL=1, RD=1)
+        else:
+            self._status = DR_STATUS(RD=1)
+            if self._command == DR_TXN_COMMAND_READ_MEMORY:
+                self._data = self.read_memory(self._address)
+            elif self._command == DR_TXN_COMMAND_WRITE_MEMORY:
+                self.write_memory(self._address, self._data)
+            elif self._command == DR_TXN_COMMAND_READ_AUX:
+                self._data = self.aux.get(self._address, 0)
+            elif self._command == DR_TXN_COMMAND_WRITE_AUX:
+                self.aux[self._address] = self._data
+
+
+class DebugARCAppletTestCase(GlasgowAppletTestCase, applet=DebugARCApplet):
+    @synthesis_test
+    def test_build(self):
+        self.assertBuilds()
+
+
+class ARCDebugInterfaceTestCase(unittest.TestCase):
+    async def make_iface(self, **kwargs):
+        self.model = ARCModel(**kwargs)
+        self.probe = JTAGProbeModel(self.model)
+        jtag_iface = JTAGProbeInterface(self.probe, DebugARCApplet.logger)
+        tap_iface  = TAPInterface(jtag_iface, ir_length=4)
+        await tap_iface.test_reset()
+        return ARCDebugInterface(tap_iface, DebugARCApplet.logger)
+
+    @async_test
+    async def test_identify(self):
+        iface = await self.make_iface()
+        idcode, device = await iface.identify()
+        self.assertEqual(device.name, "ARC6xx")
+
+    @async_test
+    async def test_read_write(self):
+        iface = await self.make_iface()
+        await iface.write(0x1000, 0x12345678, space="memory")
+        self.assertEqual(self.model.memory, {0x1000: 0x12345678})
+        self.assertEqual(await iface.read(0x1000, space="memory"), 0x12345678)
+
+    @async_test
+    async def test_queue(self):
+        iface = await self.make_iface()
+        writes = [await iface.queue_write(0x1000 + n * 4, n * 0x11, space="memory")
+                  for n in range(16)]
+        reads  = [await iface.queue_read(0x1000 + n * 4, space="memory")
+                  for n in range(16)]
+        self.assertEqual(self.probe.reads, 0)
+        for write in writes:
+            self.assertIsNone(await write.get())
+        self.assertEqual([await read.get() for read in reads], [n * 0x11 for n in range(16)])
+        self.assertEqual(self.probe.reads, 1)
+
+    @async_test
+    async def test_queue_failed(self):
+        iface = await self.make_iface(faults={0x1004})
+        await iface.queue_read(0x1000, space="memory")
+        result = await iface.queue_read(0x1004, space="memory")
+        with self.assertRaisesRegex(ARCDebugError,
+                r"^transaction failed: ST=0 FL=1 RD=1 PC_SEL=0$"):
+            await result.get()
+
+    @async_test
+    async def test_queue_pending(self):
+        iface = await self.make_iface()
+        self.model.pending = True
+        result = await iface.queue_write(0x1000, 0, space="memory")
+        with self.assertRaisesRegex(ARCDebugError,
+                r"^queued transaction did not complete: ST=0 FL=0 RD=0 PC_SEL=0$"):
+            await result.get()
+
+    @async_test
+    async def test_read_write_memory(self):
+        iface = await self.make_iface()
+        iface.batch_words = 16
+        words = [n * 0x01010101 for n in range(40)]
+        await iface.write_memory(0x1000, words)
+        self.assertEqual(self.model.memory, {0x1000 + n * 4: word for n, word in enumerate(words)})
+        self.assertEqual(await iface.read_memory(0x1000, 40), words)
+        # One read per batch.
+        self.assertEqual(self.probe.reads, 3 + 3)
+
+    @async_test
+    async def test_read_write_memory_retry(self):
+        iface = await self.make_iface(delays={0x1004, 0x1008})
+        await iface.write_memory(0x1000, [1, 2, 3, 4])
+        self.assertEqual(self.model.memory, {0x1000: 1, 0x1004: 2, 0x1008: 3, 0x100c: 4})
+        self.model.delays = {0x100c}
+        self.assertEqual(await iface.read_memory(0x1000, 4), [1, 2, 3, 4])
+
+    @async_test
+    async def test_read_memory_failed(self):
+        iface = await self.make_iface(faults={0x1008})
+        with self.assertRaisesRegex(ARCDebugError,
+                r"^transaction failed: ST=0 FL=1 RD=1 PC_SEL=0$"):
+            await iface.read_memory(0x1000, 4)
@@ -2,14 +2,16 @@
 # Document Number: IHI0031C
 # Accession: G00027
 
+import contextlib
 from abc import ABCMeta, abstractmethod
 
+from ....support.lazy import *
 from ....database.jedec import *
 from ....arch.arm.dap import *
 from ... import *
 
 
-__all__ = ["ARMDPInterface", "ARMAPTransactionError", "DebugARMAppletMixin"]
+__all__ = ["ARMDPInterface", "ARMDPTransaction", "ARMAPTransactionError", "DebugARMAppletMixin"]
 
 
 class ARMDPError(GlasgowAppletError):
@@ -20,6 +22,76 @@ class ARMAPTransactionError(GlasgowAppletError):
     pass
 
 
+class ARMDPTransaction:
+    """A queue of DP and AP register accesses, performed all at once when the
+    :meth:`ARMDPInterface.queue` context is exited.
+
+    Reads return :class:`lazy` values that may only be used after the transaction is performed.
+    Whether the accesses succeeded is only checked once all of them have been issued; if any AP
+    access fails, :class:`ARMAPTransactionError` is raised and no results are available.
+    """
+
+    def __init__(self):
+        self._ops     = []
+        self._results = None
+
+    def _op(self, index, addr, value=None):
+        self._ops.append((index, addr, value))
+        if value is None:
+            position = len(self._ops) - 1
+            def _get():
+                assert self._results is not None, \
+                    "Attempted to use results before submitting transaction"
+                return self._results[position]
+            return lazy(_get)
+
+    def write_dp_reg(self, addr, value):
+        self._op(None, addr, value)
+
+    def read_dp_reg(self, addr):
+        return self._op(None, addr)
+
+    def write_ap_reg(self, index, addr, value):
+        self._op(index, addr, value)
+
+    def read_ap_reg(self, index, addr):
+        return self._op(index, addr)
+
+    @staticmethod
+    def _tar_chunks(address, count):
+        # "Automatic address increment is only guaranteed to operate on the bottom 10-bits of
+        # the address held in the TAR."
+        while count > 0:
+            chunk   = min(count, (0x400 - (address & 0x3ff)) // 4)
+            yield address, chunk
+            address = (address + chunk * 4) & 0xffffffff
+            count  -= chunk
+
+    def read_mem_ap_block(self, index, address, count):
+        """Read ``count`` consecutive words starting at ``address`` via MEM-AP ``index``, which
+        must be configured for word sized accesses with single address increment.
+
+        Returns a lazy list of words."""
+        assert address % 4 == 0
+        results = []
+        for chunk_address, chunk_count in self._tar_chunks(address, count):
+            self.write_ap_reg(index, MEM_AP_TAR_addr, chunk_address)
+            for _ in range(chunk_count):
+                results.append(self.read_ap_reg(index, MEM_AP_DRW_addr))
+        return lazy(lambda: [int(result) for result in results])
+
+    def write_mem_ap_block(self, index, address, words):
+        """Write ``words`` to consecutive words starting at ``address`` via MEM-AP ``index``,
+        which must be configured for word sized accesses with single address increment."""
+        assert address % 4 == 0
+        offset = 0
+        for chunk_address, chunk_count in self._tar_chunks(address, len(words)):
+            self.write_ap_reg(index, MEM_AP_TAR_addr, chunk_address)
+            for word in words[offset:offset + chunk_count]:
+                self.write_ap_reg(index, MEM_AP_DRW_addr, word)
+            offset += chunk_count
+
+
 class ARMDPInterface(metaclass=ABCMeta):
     @abstractmethod
     def _log(self, message, *args):
@@ -51,6 +123,18 @@ class ARMDPInterface(metaclass=ABCMeta):
     async def read_ap_reg(self, index, addr):
         """Select AP ``index`` and read ``value`` from the AP register at ``addr``."""
 
+    @abstractmethod
+    async def _perform(self, ops):
+        """Perform the accesses queued in an :class:`ARMDPTransaction`, and return a list with
+        the result of each of them (``None`` for writes)."""
+
+    @contextlib.asynccontextmanager
+    async def queue(self):
+        """Queue DP and AP register accesses in an :class:`ARMDPTransaction`, and perform them
+        when the context is exited."""
+        yield (transaction := ARMDPTransaction())
+        transaction._results = await self._perform(transaction._ops)
+
     # Data link independent interface
 
     async def set_debug_power(self, enabled):
@@ -86,9 +170,20 @@ class DebugARMAppletMixin:
     async def interact(self, device, args, dp_iface):
         await dp_iface.set_debug_power(True)
 
-        for ap_index in range(256):
+        try:
+            async with dp_iface.queue() as txn:
+                ap_idr_values = [txn.read_ap_reg(ap_index, AP_IDR_addr)
+                                 for ap_index in range(256)]
+            ap_idr_values = [int(value) for value in ap_idr_values]
+        except ARMAPTransactionError:
+            # Find out which of the APs doesn't work.
+            ap_idr_values = [None] * 256
+
+        for ap_index, ap_idr_value in enumerate(ap_idr_values):
             try:
-                ap_idr = AP_IDR.from_int(await dp_iface.read_ap_reg(ap_index, AP_IDR_addr))
+                if ap_idr_value is None:
+                    ap_idr_value = await dp_iface.read_ap_reg(ap_index, AP_IDR_addr)
+                ap_idr = AP_IDR.from_int(ap_idr_value)
             except ARMAPTransactionError:
                 # There's an AP at this index but it doesn't work.
                 self.logger.error("AP #%d: IDR read error", ap_index)
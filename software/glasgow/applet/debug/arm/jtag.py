@@ -7,7 +7,7 @@ import argparse
 
 from ....support.aobject import *
 from ....arch.jtag import *
-from ....arch.arm.jtag import *
+from ....arch.arm.jtag.coresight import *
 from ....arch.arm.dap.dp import *
 from ...interface.jtag_probe import JTAGProbeApplet
 from . import *
@@ -20,12 +20,16 @@ class ARMJTAGDPInterface(ARMDPInterface, aobject):
         CDBGRSTREQ=0b1, CDBGRSTACK=0b1,
         CDBGPWRUPREQ=0b1, CDBGPWRUPACK=0b1,
         CSYSPWRUPREQ=0b1, CSYSPWRUPACK=0b1).to_int()
+    # Data link dependent fields in the CTRL/STAT DP register that are managed by this interface.
+    _DP_CTRL_STAT_orun   = DP_CTRL_STAT(ORUNDETECT=1).to_int()
+    _DP_CTRL_STAT_sticky = DP_CTRL_STAT(STICKYORUN=1, STICKYCMP=1, STICKYERR=1).to_int()
 
     async def __init__(self, interface, logger):
         self.lower   = interface
         self._logger = logger
         self._level  = logging.DEBUG if self._logger.name == __name__ else logging.TRACE
-        self._select = DP_SELECT()
+        self._select    = DP_SELECT()
+        self._ctrl_stat = 0
 
         await self.reset()
 
@@ -56,62 +60,22 @@ class ARMJTAGDPInterface(ARMDPInterface, aobject):
 
         return dr_capture.ReadResult
 
-    async def _poll_apacc(self):
-        await self.lower.write_ir(IR_DPACC)
-
-        dp_update_bits = DR_xPACC_update(RnW=1, A=DP_CTRL_STAT_addr >> 2).to_bits()
-        while True:
-            ap_capture = DR_xPACC_capture.from_bits(await self.lower.exchange_dr(dp_update_bits))
-            if ap_capture.ACK != DR_xPACC_ACK.WAIT:
-                break
-            self._log("ap wait")
-        assert ap_capture.ACK == DR_xPACC_ACK.OK_FAULT
-
-        dp_capture = DR_xPACC_capture.from_bits(await self.lower.exchange_dr(dp_update_bits))
-        assert dp_capture.ACK == DR_xPACC_ACK.OK_FAULT
-
-        dp_ctrl_stat = DP_CTRL_STAT.from_int(dp_capture.ReadResult)
-        assert not dp_ctrl_stat.STICKYORUN, "AP transaction overrun"
-        if dp_ctrl_stat.STICKYERR:
-            dp_update_bits = DR_xPACC_update(
-                RnW=0, A=DP_CTRL_STAT_addr >> 2, DATAIN=dp_ctrl_stat.to_int()).to_bits()
-            dp_capture = DR_xPACC_capture.from_bits(await self.lower.exchange_dr(dp_update_bits))
-            assert dp_capture.ACK == DR_xPACC_ACK.OK_FAULT
+    async def _queue_xpacc(self, ir, addr, value):
+        await self.lower.write_ir(ir)
 
-            raise ARMAPTransactionError("AP transaction error")
+        if value is None:
+            dr_update = DR_xPACC_update(RnW=1, A=(addr & 0xf) >> 2)
         else:
-            return ap_capture.ReadResult
-
-    async def _write_apacc(self, addr, value):
-        await self.lower.write_ir(IR_APACC)
-
-        dr_update = DR_xPACC_update(RnW=0, A=(addr & 0xf) >> 2, DATAIN=value)
-        # TODO: use JTAG masked compare when implemented
-        dr_capture = DR_xPACC_capture.from_bits(await self.lower.exchange_dr(dr_update.to_bits()))
-        assert dr_capture.ACK == DR_xPACC_ACK.OK_FAULT
+            dr_update = DR_xPACC_update(RnW=0, A=(addr & 0xf) >> 2, DATAIN=value)
+        return await self.lower.exchange_dr(dr_update.to_bits(), defer=True)
 
-        await self._poll_apacc()
+    # Batched DP and AP register operations
 
-    async def _read_apacc(self, addr):
-        await self.lower.write_ir(IR_APACC)
-
-        dr_update = DR_xPACC_update(RnW=1, A=(addr & 0xf) >> 2)
-        # TODO: use JTAG masked compare when implemented
-        dr_capture = DR_xPACC_capture.from_bits(await self.lower.exchange_dr(dr_update.to_bits()))
-        assert dr_capture.ACK == DR_xPACC_ACK.OK_FAULT
-
-        return await self._poll_apacc()
-
-    # High-level DP and AP register operations
-
-    async def reset(self):
-        self._log("reset")
-        await self.lower.test_reset()
-        # DP registers are not reset by Debug-Logic-Reset (or anything else except power-on reset);
-        # make sure our cached state matches DP's actual state.
-        await self._write_dpacc(DP_SELECT_addr, self._select.to_int())
+    def _scan(self, scans, ir, addr, value=None, key=None):
+        # Every scan records the SELECT register value it relies on, so that it can be replayed.
+        scans.append((ir, addr, value, self._select.to_int(), key))
 
-    async def _prepare_dp_reg(self, addr):
+    def _prepare_dp_reg(self, scans, addr):
         assert addr in range(0x00, 0x100, 4)
         if addr & 0xf != 0x4:
             pass # DP accessible from any bank
@@ -121,31 +85,9 @@ class ARMJTAGDPInterface(ARMDPInterface, aobject):
         else:
             self._log("dp select bank=%#3x", addr >> 4)
             self._select.DPBANKSEL = addr >> 4
-            await self._write_dpacc(DP_SELECT_addr, self._select.to_int())
+            self._scan(scans, IR_DPACC, DP_SELECT_addr, self._select.to_int())
 
-    async def _write_dp_reg(self, addr, value):
-        await self._prepare_dp_reg(addr)
-        self._log("dp write addr=%#04x data=%#010x", addr, value)
-        await self._write_dpacc(addr, value)
-
-    async def _read_dp_reg(self, addr):
-        await self._prepare_dp_reg(addr)
-        self._log("dp read addr=%#04x", addr)
-        value = await self._read_dpacc(addr)
-        self._log("dp read data=%#010x", value)
-        return value
-
-    async def write_dp_reg(self, addr, value):
-        assert addr in (DP_CTRL_STAT_addr,)
-        assert value & ~self._DP_CTRL_STAT_mask == 0, \
-              "Data link defined DP register bits may not be set"
-        await self._write_dp_reg(addr, value)
-
-    async def read_dp_reg(self, addr):
-        assert addr in (DP_CTRL_STAT_addr, DP_DPIDR_addr, DP_TARGETID_addr, DP_EVENTSTAT_addr)
-        return await self._read_dp_reg(addr)
-
-    async def _prepare_ap_reg(self, id, addr):
+    def _prepare_ap_reg(self, scans, id, addr):
         assert id in range(256) and addr in range(0x00, 0x100, 4)
         if self._select.APSEL == id and self._select.APBANKSEL == addr >> 4:
             self._log("ap select (elided)")
@@ -154,19 +96,134 @@ class ARMJTAGDPInterface(ARMDPInterface, aobject):
             self._log("ap select id=%d bank=%#3x", id, addr >> 4)
             self._select.APSEL = id
             self._select.APBANKSEL = addr >> 4
-            await self._write_dpacc(DP_SELECT_addr, self._select.to_int())
+            self._scan(scans, IR_DPACC, DP_SELECT_addr, self._select.to_int())
+
+    def _lower_ops(self, ops):
+        scans = []
+        for key, (index, addr, value) in enumerate(ops):
+            if index is None:
+                if value is None:
+                    assert addr in (DP_CTRL_STAT_addr, DP_DPIDR_addr, DP_TARGETID_addr,
+                                    DP_EVENTSTAT_addr)
+                    self._prepare_dp_reg(scans, addr)
+                    self._log("dp read addr=%#04x", addr)
+                else:
+                    assert addr in (DP_CTRL_STAT_addr,)
+                    assert value & ~self._DP_CTRL_STAT_mask == 0, \
+                          "Data link defined DP register bits may not be set"
+                    self._prepare_dp_reg(scans, addr)
+                    self._log("dp write addr=%#04x data=%#010x", addr, value)
+                    self._ctrl_stat = value
+                    value |= self._DP_CTRL_STAT_orun
+                self._scan(scans, IR_DPACC, addr, value, key)
+            else:
+                self._prepare_ap_reg(scans, index, addr)
+                if value is None:
+                    self._log("ap read id=%d addr=%#04x", index, addr)
+                else:
+                    self._log("ap write id=%d addr=%#04x data=%#010x", index, addr, value)
+                self._scan(scans, IR_APACC, addr, value, key)
+        return scans
+
+    async def _perform(self, ops):
+        scans  = self._lower_ops(ops)
+        status = []
+        self._scan(status, IR_DPACC, DP_CTRL_STAT_addr, key="status")
+        self._scan(status, IR_DPACC, DP_RDBUFF_addr)
+
+        # The ACK of every scan is checked only after all of them have been issued. The result of
+        # a read is captured by the next scan that receives an OK/FAULT response. A WAIT response
+        # means that the previous AP access has not completed yet, and the access was discarded;
+        # since overrun detection is enabled, the DP also discards every AP access after it until
+        # STICKYORUN is cleared. In that case, the scans are replayed starting from the discarded
+        # one, after clearing STICKYORUN and restoring the SELECT register, which may have been
+        # changed by a DP access after the discarded one.
+        values  = {}
+        pending = None
+        offset  = 0
+        retry   = []
+        while True:
+            batch    = retry + scans[offset:] + status
+            captures = [await self._queue_xpacc(ir, addr, value)
+                        for ir, addr, value, select, key in batch]
+            discarded = None
+            for index, ((ir, addr, value, select, key), capture) in enumerate(zip(batch, captures)):
+                dr_capture = DR_xPACC_capture.from_bits(await capture.get())
+                if dr_capture.ACK == DR_xPACC_ACK.WAIT:
+                    if discarded is None:
+                        discarded = index
+                    continue
+                assert dr_capture.ACK == DR_xPACC_ACK.OK_FAULT
+                if pending is not None:
+                    values[pending] = dr_capture.ReadResult
+                if discarded is None and value is None:
+                    pending = key
+                else:
+                    pending = None
+            if discarded is None:
+                break
+
+            offset = min(len(scans), offset + max(0, discarded - len(retry)))
+            self._log("ap wait (replaying %d of %d accesses)", len(scans) - offset, len(scans))
+            retry = []
+            self._scan(retry, IR_DPACC, DP_CTRL_STAT_addr,
+                self._ctrl_stat | self._DP_CTRL_STAT_orun | DP_CTRL_STAT(STICKYORUN=1).to_int())
+            ir, addr, value, select, key = scans[offset] if offset < len(scans) else status[0]
+            retry.append((IR_DPACC, DP_SELECT_addr, select, select, None))
+
+        dp_ctrl_stat = DP_CTRL_STAT.from_int(values["status"])
+        assert not dp_ctrl_stat.STICKYORUN, "AP transaction overrun"
+        if dp_ctrl_stat.STICKYERR:
+            self._log("ap fault")
+            await self._write_dpacc(DP_CTRL_STAT_addr,
+                self._ctrl_stat | self._DP_CTRL_STAT_orun | self._DP_CTRL_STAT_sticky)
+            raise ARMAPTransactionError("AP transaction error")
+
+        results = []
+        for key, (index, addr, value) in enumerate(ops):
+            if value is not None:
+                results.append(None)
+                continue
+            value = values[key]
+            if index is None and addr == DP_CTRL_STAT_addr:
+                value &= self._DP_CTRL_STAT_mask
+            if index is None:
+                self._log("dp read addr=%#04x data=%#010x", addr, value)
+            else:
+                self._log("ap read id=%d addr=%#04x data=%#010x", index, addr, value)
+            results.append(value)
+        return results
+
+    # High-level DP and AP register operations
+
+    async def reset(self):
+        self._log("reset")
+        await self.lower.test_reset()
+        # DP registers are not reset by Debug-Logic-Reset (or anything else except power-on reset);
+        # make sure our cached state matches DP's actual state.
+        await self._write_dpacc(DP_SELECT_addr, self._select.to_int())
+        # Enable overrun detection, which batched accesses rely on, and clear any sticky flags.
+        self._ctrl_stat = await self._read_dpacc(DP_CTRL_STAT_addr) & self._DP_CTRL_STAT_mask
+        await self._write_dpacc(DP_CTRL_STAT_addr,
+            self._ctrl_stat | self._DP_CTRL_STAT_orun | self._DP_CTRL_STAT_sticky)
+
+    async def write_dp_reg(self, addr, value):
+        async with self.queue() as txn:
+            txn.write_dp_reg(addr, value)
+
+    async def read_dp_reg(self, addr):
+        async with self.queue() as txn:
+            value = txn.read_dp_reg(addr)
+        return int(value)
 
     async def write_ap_reg(self, index, addr, value):
-        await self._prepare_ap_reg(index, addr)
-        self._log("ap write id=%d addr=%#04x data=%#010x", index, addr, value)
-        await self._write_apacc(addr, value)
+        async with self.queue() as txn:
+            txn.write_ap_reg(index, addr, value)
 
     async def read_ap_reg(self, index, addr):
-        await self._prepare_ap_reg(index, addr)
-        self._log("ap read id=%d addr=%#04x", index, addr)
-        value = await self._read_apacc(addr)
-        self._log("ap read data=%#010x", value)
-        return value
+        async with self.queue() as txn:
+            value = txn.read_ap_reg(index, addr)
+        return int(value)
 
 
 class DebugARMJTAGApplet(DebugARMAppletMixin, JTAGProbeApplet):
@@ -185,3 +242,8 @@ class DebugARMJTAGApplet(DebugARMAppletMixin, JTAGProbeApplet):
     async def run(self, device, args):
         tap_iface = await self.run_tap(DebugARMJTAGApplet, device, args)
         return await ARMJTAGDPInterface(tap_iface, self.logger)
+
+    @classmethod
+    def tests(cls):
+        from . import test
+        return test.DebugARMJTAGAppletTestCase
@@ -0,0 +1,179 @@
+import itertools
+import unittest
+
+from ....support.bits import *
+from ....arch.arm.jtag.coresight import *
+from ....arch.arm.dap import *
+from ... import *
+from ...interface.jtag_probe import JTAGProbeInterface, TAPInterface
+from ...interface.jtag_probe.test import JTAGProbeModel
+from . import ARMAPTransactionError
+from .jtag import DebugARMJTAGApplet, ARMJTAGDPInterface
+
+
+class JTAGDPModel:
+    """A behavioral model of a JTAG-DP with a single MEM-AP at index 0.
+
+    After every AP access, the AP stays busy for the number of DPACC or APACC scans taken in turn
+    from :py:`ap_waits`; these scans receive a WAIT response and are discarded, and are counted in
+    :py:`waits`. If overrun detection is enabled, a WAIT response also sets STICKYORUN, and while
+    STICKYORUN or STICKYERR is set, AP accesses are discarded. Memory is a dictionary of words;
+    accessing an address in :py:`faults` sets STICKYERR. The TAR only increments its bottom
+    10 bits.
+    """
+
+    ir_length = 4
+    idr       = AP_IDR(TYPE=0x1, CLASS=AP_IDR_CLASS.MEM_AP.value, DESIGNER=0x43B).to_int()
+
+    def __init__(self, *, ap_waits=(0,), faults=()):
+        self.memory    = {}
+        self.faults    = set(faults)
+        self.waits     = 0
+
+        self._ap_waits  = itertools.cycle(ap_waits)
+        self._ir        = IR_IDCODE
+        self._busy      = 0
+        self._accept    = False
+        self._result    = 0
+        self._select    = DP_SELECT()
+        self._ctrl_stat = DP_CTRL_STAT()
+        self._csw       = MEM_AP_CSW()
+        self._tar       = 0
+
+    def capture_ir(self):
+        return 0b0001
+
+    def update_ir(self, value):
+        self._ir = bits(value, self.ir_length)
+
+    def capture_dr(self):
+        if self._ir not in (IR_DPACC, IR_APACC):
+            return 0, 1
+        if self._busy:
+            self._busy  -= 1
+            self._accept = False
+            self.waits  += 1
+            if self._ctrl_stat.ORUNDETECT:
+                self._ctrl_stat.STICKYORUN = 1
+            return DR_xPACC_capture(ACK=DR_xPACC_ACK.WAIT).to_int(), 35
+        self._accept = True
+        return DR_xPACC_capture(ACK=DR_xPACC_ACK.OK_FAULT, ReadResult=self._result).to_int(), 35
+
+    def update_dr(self, value):
+        if self._ir not in (IR_DPACC, IR_APACC) or not self._accept:
+            return
+        dr_update = DR_xPACC_update.from_int(value)
+        if self._ir == IR_DPACC:
+            self._dp_access(dr_update.A << 2, dr_update.RnW, dr_update.DATAIN)
+        elif not (self._ctrl_stat.STICKYORUN or self._ctrl_stat.STICKYERR):
+            self._ap_access((self._select.APBANKSEL << 4) | (dr_update.A << 2),
+                            dr_update.RnW, dr_update.DATAIN)
+            self._busy = next(self._ap_waits)
+
+    def _dp_access(self, addr, read, data):
+        if addr == DP_CTRL_STAT_addr and read:
+            self._result = self._ctrl_stat.to_int()
+        elif addr == DP_CTRL_STAT_addr:
+            sticky = DP_CTRL_STAT.from_int(data)
+            for field in ("STICKYORUN", "STICKYCMP", "STICKYERR"):
+                setattr(sticky, field, getattr(self._ctrl_stat, field) & ~getattr(sticky, field))
+            sticky.CDBGPWRUPACK = sticky.CDBGPWRUPREQ
+            sticky.CSYSPWRUPACK = sticky.CSYSPWRUPREQ
+            self._ctrl_stat = sticky
+        elif addr == DP_SELECT_addr and not read:
+            self._select = DP_SELECT.from_int(data)
+        elif read:
+            self._result = 0
+
+    def _ap_access(self, addr, read, data):
+        if self._select.APSEL != 0:
+            self._result = 0
+        elif addr == AP_IDR_addr and read:
+            self._result = self.idr
+        elif addr == MEM_AP_CSW_addr:
+            if read:
+                self._result = self._csw.to_int()
+            else:
+                self._csw = MEM_AP_CSW.from_int(data)
+        elif addr == MEM_AP_TAR_addr:
+            if read:
+                self._result = self._tar
+            else:
+                self._tar = data
+        elif addr == MEM_AP_DRW_addr:
+            assert self._csw.Size == 0b010
+            if self._tar in self.faults:
+                self._ctrl_stat.STICKYERR = 1
+            elif read:
+                self._result = self.memory.get(self._tar, 0)
+            else:
+                self.memory[self._tar] = data
+            if self._csw.AddrInc == 0b01:
+                self._tar = (self._tar & ~0x3ff) | ((self._tar + 4) & 0x3ff)
+
+
+class DebugARMJTAGAppletTestCase(GlasgowAppletTestCase, applet=DebugARMJTAGApplet):
+    @synthesis_test
+    def test_build(self):
+        self.assertBuilds()
+
+
+class ARMJTAGDPInterfaceTestCase(unittest.TestCase):
+    async def make_iface(self, **kwargs):
+        self.model = JTAGDPModel(**kwargs)
+        self.probe = JTAGProbeModel(self.model)
+        jtag_iface = JTAGProbeInterface(self.probe, DebugARMJTAGApplet.logger)
+        tap_iface  = TAPInterface(jtag_iface, ir_length=4)
+        iface = await ARMJTAGDPInterface(tap_iface, DebugARMJTAGApplet.logger)
+        await iface.set_debug_power(True)
+        await iface.write_ap_reg(0, MEM_AP_CSW_addr, MEM_AP_CSW(Size=0b010, AddrInc=0b01).to_int())
+        return iface
+
+    @async_test
+    async def test_registers(self):
+        iface = await self.make_iface(ap_waits=(2,))
+        self.assertEqual(await iface.read_ap_reg(0, AP_IDR_addr), JTAGDPModel.idr)
+        self.assertEqual(await iface.read_ap_reg(1, AP_IDR_addr), 0)
+        dp_ctrl_stat = DP_CTRL_STAT.from_int(await iface.read_dp_reg(DP_CTRL_STAT_addr))
+        self.assertEqual(dp_ctrl_stat.CDBGPWRUPACK, 1)
+        self.assertEqual(dp_ctrl_stat.ORUNDETECT, 0) # data link dependent bits are masked
+        self.assertEqual(self.model._ctrl_stat.ORUNDETECT, 1)
+
+    @async_test
+    async def test_block(self):
+        iface = await self.make_iface()
+        words = list(range(0x1000_0000, 0x1000_0000 + 300))
+        reads = self.probe.reads
+        async with iface.queue() as txn:
+            txn.write_mem_ap_block(0, 0x2000_0200, words)
+            result = txn.read_mem_ap_block(0, 0x2000_0200, len(words))
+        self.assertEqual(self.probe.reads - reads, 1)
+        self.assertEqual(result, words)
+        self.assertEqual(self.model.memory,
+                         {0x2000_0200 + n * 4: word for n, word in enumerate(words)})
+
+    @async_test
+    async def test_block_wait(self):
+        iface = await self.make_iface(ap_waits=(0, 0, 1, 0, 3, 0, 0, 0, 2))
+        words = list(range(0x2000_0000, 0x2000_0000 + 100))
+        async with iface.queue() as txn:
+            txn.write_mem_ap_block(0, 0x2000_03f0, words)
+            result = txn.read_mem_ap_block(0, 0x2000_03f0, len(words))
+            ap_idr = txn.read_ap_reg(0, AP_IDR_addr)
+        self.assertGreater(self.model.waits, 0)
+        self.assertEqual(result, words)
+        self.assertEqual(ap_idr, JTAGDPModel.idr)
+        self.assertEqual(self.model.memory,
+                         {0x2000_03f0 + n * 4: word for n, word in enumerate(words)})
+        self.assertEqual(self.model._ctrl_stat.STICKYORUN, 0)
+
+    @async_test
+    async def test_fault(self):
+        iface = await self.make_iface(ap_waits=(1,), faults={0x2000_0008})
+        with self.assertRaisesRegex(ARMAPTransactionError, r"^AP transaction error$"):
+            async with iface.queue() as txn:
+                txn.read_mem_ap_block(0, 0x2000_0000, 4)
+        async with iface.queue() as txn:
+            result = txn.read_mem_ap_block(0, 0x2000_0010, 4)
+        self.assertEqual(result, [0] * 4)
+        self.assertEqual(self.model._ctrl_stat.STICKYERR, 0)
@@ -2,7 +2,7 @@
 # Document Number: UM10204
 # Accession: G00101
 
-from typing import Optional
+from typing import Optional, Callable
 import contextlib
 import logging
 import struct
@@ -30,6 +30,7 @@ class _Command(enum.Enum, shape=8):
     Stop  = 0x01
     Write = 0x02
     Read  = 0x03
+    Poll  = 0x04
 
 
 class I2CControllerComponent(wiring.Component):
@@ -49,8 +50,10 @@ class I2CControllerComponent(wiring.Component):
         m.submodules.ctrl = ctrl = I2CInitiator(self._ports, 0)
         m.d.comb += ctrl.divisor.eq(self.divisor)
 
-        cmd   = Signal(_Command)
-        count = Signal(16)
+        cmd     = Signal(_Command)
+        count   = Signal(16)
+        skip    = Signal(16)
+        address = Signal(8)
 
         with m.FSM():
             with m.State("IDLE"):
@@ -67,7 +70,7 @@ class I2CControllerComponent(wiring.Component):
                     with m.Case(_Command.Stop):
                         m.d.comb += ctrl.stop.eq(1)
                         m.next = "SYNC"
-                    with m.Case(_Command.Write, _Command.Read):
+                    with m.Case(_Command.Write, _Command.Read, _Command.Poll):
                         m.next = "COUNT"
 
             with m.State("SYNC"):
@@ -88,6 +91,8 @@ class I2CControllerComponent(wiring.Component):
                                 m.next = "WRITE-FIRST"
                             with m.Case(_Command.Read):
                                 m.next = "READ-FIRST"
+                            with m.Case(_Command.Poll):
+                                m.next = "POLL-ADDRESS"
 
             with m.State("WRITE-FIRST"):
                 with m.If(self.i_stream.valid):
@@ -103,14 +108,25 @@ class I2CControllerComponent(wiring.Component):
                     m.next = "WRITE"
 
             with m.State("WRITE"):
-                with m.If((count == 0) | ~ctrl.ack_o):
+                with m.If(count == 0):
                     m.next = "REPORT"
+                with m.Elif(~ctrl.ack_o):
+                    # Discard the rest of the data, so that it is not interpreted as commands.
+                    m.d.sync += skip.eq(count - 1)
+                    m.next = "WRITE-SKIP"
                 with m.Elif(self.i_stream.valid):
                     m.d.comb += self.i_stream.ready.eq(1)
                     m.d.comb += ctrl.data_i.eq(self.i_stream.payload)
                     m.d.comb += ctrl.write.eq(1)
                     m.next = "WRITE-ACK"
 
+            with m.State("WRITE-SKIP"):
+                with m.If(skip == 0):
+                    m.next = "REPORT"
+                with m.Elif(self.i_stream.valid):
+                    m.d.comb += self.i_stream.ready.eq(1)
+                    m.d.sync += skip.eq(skip - 1)
+
             with m.State("REPORT"):
                 word = Signal(range(2))
                 m.d.comb += self.o_stream.valid.eq(1)
@@ -121,6 +137,36 @@ class I2CControllerComponent(wiring.Component):
                         m.d.sync += count.eq(0)
                         m.next = "IDLE"
 
+            with m.State("POLL-ADDRESS"):
+                m.d.comb += self.i_stream.ready.eq(1)
+                with m.If(self.i_stream.valid):
+                    m.d.sync += address.eq(self.i_stream.payload)
+                    m.next = "POLL-START"
+
+            with m.State("POLL-START"):
+                with m.If(~ctrl.busy):
+                    m.d.comb += ctrl.start.eq(1)
+                    m.next = "POLL-WRITE"
+
+            with m.State("POLL-WRITE"):
+                with m.If(~ctrl.busy):
+                    m.d.comb += ctrl.data_i.eq(address)
+                    m.d.comb += ctrl.write.eq(1)
+                    m.next = "POLL-STOP"
+
+            with m.State("POLL-STOP"):
+                # Reports the number of attempts that remain, which is zero if none were acked.
+                with m.If(~ctrl.busy):
+                    m.d.comb += ctrl.stop.eq(1)
+                    with m.If(ctrl.ack_o):
+                        m.next = "REPORT"
+                    with m.Else():
+                        m.d.sync += count.eq(count - 1)
+                        with m.If(count == 1):
+                            m.next = "REPORT"
+                        with m.Else():
+                            m.next = "POLL-START"
+
             with m.State("READ-FIRST"):
                 m.d.comb += ctrl.ack_i.eq(count != 1)
                 m.d.comb += ctrl.read.eq(1)
@@ -157,6 +203,7 @@ class I2CControllerInterface:
 
         self._multi = False
         self._busy  = False
+        self._batch = None
 
     @staticmethod
     def _chunked(items, *, count=0xffff):
@@ -167,11 +214,19 @@ class I2CControllerInterface:
     def _log(self, message, *args):
         self._logger.log(self._level, "I²C: " + message, *args)
 
-    async def _command(self, cmd: _Command, *, send: bytes | bytearray, recv: int) -> memoryview:
+    async def _command(self, cmd: _Command, *, send: bytes | bytearray, recv: int,
+                       check: Optional[Callable[[memoryview], None]] = None) -> memoryview:
+        # Within a batch, the response is checked once the batch ends, and is not returned.
         await self._pipe.send([cmd.value])
         await self._pipe.send(send)
+        if self._batch is not None:
+            self._batch.append((recv, check))
+            return None
         await self._pipe.flush()
-        return await self._pipe.recv(recv)
+        response = await self._pipe.recv(recv)
+        if check is not None:
+            check(response)
+        return response
 
     async def _do_start(self):
         if not self._busy:
@@ -191,26 +246,29 @@ class I2CControllerInterface:
             self._log(f"read addr={address:#09b}")
         else:
             self._log(f"write addr={address:#09b}")
-        unacked, = struct.unpack("<H",
-            await self._command(_Command.Write,
-                send=struct.pack("<HB", 1, (address << 1) | read),
-                recv=2))
-        if unacked:
-            raise I2CNotAcknowledged(
-                f"address {address:#09b} ({'read' if read else 'write'}) not acknowledged")
+        def check(response):
+            unacked, = struct.unpack("<H", response)
+            if unacked:
+                raise I2CNotAcknowledged(
+                    f"address {address:#09b} ({'read' if read else 'write'}) not acknowledged")
+        await self._command(_Command.Write,
+            send=struct.pack("<HB", 1, (address << 1) | read),
+            recv=2, check=check)
 
     async def _do_write(self, data: bytes | bytearray | memoryview) -> int:
         self._log("write data=<%s>", dump_hex(data))
         acked = 0
         for chunk in self._chunked(data):
-            chunk_unacked, = struct.unpack("<H",
-                await self._command(_Command.Write,
-                    send=struct.pack("<H", len(chunk)) + bytes(chunk),
-                    recv=2))
-            acked += len(chunk) - chunk_unacked
-            if chunk_unacked > 0:
-                raise I2CNotAcknowledged(
-                    f"data not acknowledged ({acked}/{len(data)} written)")
+            def check(response, chunk_len=len(chunk)):
+                nonlocal acked
+                chunk_unacked, = struct.unpack("<H", response)
+                acked += chunk_len - chunk_unacked
+                if chunk_unacked > 0:
+                    raise I2CNotAcknowledged(
+                        f"data not acknowledged ({acked}/{len(data)} written)")
+            await self._command(_Command.Write,
+                send=struct.pack("<H", len(chunk)) + bytes(chunk),
+                recv=2, check=check)
 
     async def _do_read(self, count: int) -> bytes:
         data_chunks = []
@@ -271,6 +329,50 @@ class I2CControllerInterface:
                 await self._do_stop()
             self._multi = False
 
+    @contextlib.asynccontextmanager
+    async def batch(self):
+        """Perform a batch of operations.
+
+        While a batch is active, calls to :meth:`write` and :meth:`poll` (including those within
+        a :meth:`transaction`) only queue the commands; once the batch ends, all of them are
+        submitted at once, and the responses are checked. This allows performing many operations
+        per USB round trip.
+
+        For example, to write two pages of a 24-series EEPROM, waiting for the first page write
+        to complete before starting the next one, use the following code:
+
+        .. code:: python
+
+            async with iface.batch():
+                await iface.write(0x50, [0x00, *page_0])
+                await iface.poll(0x50)
+                await iface.write(0x50, [0x08, *page_1])
+                await iface.poll(0x50)
+
+        Operations that return data (:meth:`read`, :meth:`ping`) cannot be used in a batch.
+
+        Raises
+        ------
+        I2CNotAcknowledged
+            Once the batch ends, for the first operation that failed. All operations in the batch
+            are performed even if one of them fails.
+        """
+        assert self._batch is None, "batch already active"
+
+        self._batch = []
+        try:
+            yield
+        finally:
+            batch, self._batch = self._batch, None
+            if batch:
+                await self._pipe.flush()
+                responses = await self._pipe.recv(sum(length for length, _check in batch))
+        offset = 0
+        for length, check in batch:
+            if check is not None:
+                check(responses[offset:offset + length])
+            offset += length
+
     async def write(self, address: int, data: bytes | bytearray | memoryview):
         """Write bytes.
 
@@ -302,6 +404,7 @@ class I2CControllerInterface:
             If the target address receives a not-acknowledgement.
         """
         assert address in range(0, 128) and count >= 1
+        assert self._batch is None, "cannot read in a batch"
 
         async with self._do_operation():
             await self._do_addr(address, read=True)
@@ -318,6 +421,7 @@ class I2CControllerInterface:
         otherwise.
         """
         assert address in range(0, 128)
+        assert self._batch is None, "cannot ping in a batch"
 
         try:
             async with self._do_operation():
@@ -326,6 +430,37 @@ class I2CControllerInterface:
         except I2CNotAcknowledged:
             return False
 
+    async def poll(self, address: int, *, attempts: int = 0xffff):
+        """Wait for address to be acknowledged.
+
+        Repeatedly generates a START condition followed by a WRITE target address and a STOP
+        condition, until the target address receives an acknowledgement, for at most
+        :py:`attempts` times. This is commonly used to wait for a device to complete an internal
+        operation ("Acknowledge Polling"). Unlike calling :meth:`ping` in a loop, the polling is
+        performed entirely by the gateware, and so can be used in a :meth:`batch`.
+
+        Cannot be used within a transaction.
+
+        Raises
+        ------
+        I2CNotAcknowledged
+            If the target address does not receive an acknowledgement after :py:`attempts`
+            attempts.
+        """
+        assert address in range(0, 128) and attempts in range(1, 0x10000)
+        assert not self._multi, "cannot poll in a transaction"
+
+        self._log(f"poll addr={address:#09b} attempts={attempts}")
+        def check(response):
+            remaining, = struct.unpack("<H", response)
+            if remaining == 0:
+                raise I2CNotAcknowledged(
+                    f"address {address:#09b} not acknowledged after {attempts} attempts")
+            self._log(f"poll addr={address:#09b} acked after {attempts - remaining + 1} attempts")
+        await self._command(_Command.Poll,
+            send=struct.pack("<HB", attempts, address << 1),
+            recv=2, check=check)
+
     async def scan(self, addresses: range = range(0b0001_000, 0b1111_000)) -> set[int]:
         """Scan address range for presence.
 
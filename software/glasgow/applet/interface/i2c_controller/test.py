@@ -146,3 +146,41 @@ class I2CControllerAppletTestCase(GlasgowAppletV2TestCase, applet=I2CControllerA
         device_id = await applet.i2c_iface.device_id(0x50)
         self.assertEqual(device_id, (0xabc, 0x24, 0x5))
         self.assertEqual(self.i2c_events, ['S', 'W', 0x50, 'Sr', 'S', 'R', 'R', 'R', 'P'])
+
+    @applet_v2_simulation_test(prepare=prepare_target, args=simulation_args)
+    async def test_write_nak_skip(self, applet: I2CControllerApplet, ctx):
+        self.i2c_acks = [1, 0]
+        with self.assertRaisesRegex(I2CNotAcknowledged, r"^data not acknowledged \(1/3 written\)$"):
+            await applet.i2c_iface.write(0x50, [0x12, 0x34, 0x56])
+        # The data after the not-acknowledged byte must not be interpreted as commands.
+        self.assertTrue(await applet.i2c_iface.ping(0x50))
+        self.assertEqual(self.i2c_events, ['S', 'W', 0x12, 'W', 0x34, 'P', 'S', 'P'])
+
+    @applet_v2_simulation_test(prepare=prepare_target, args=simulation_args)
+    async def test_poll_ack(self, applet: I2CControllerApplet, ctx):
+        await applet.i2c_iface.poll(0x50)
+        self.assertEqual(self.i2c_events, ['S', 'P'])
+
+    @applet_v2_simulation_test(prepare=prepare_target, args=simulation_args)
+    async def test_poll_nak(self, applet: I2CControllerApplet, ctx):
+        with self.assertRaisesRegex(I2CNotAcknowledged,
+                r"^address 0b1010001 not acknowledged after 3 attempts$"):
+            await applet.i2c_iface.poll(0x51, attempts=3)
+        self.assertEqual(self.i2c_events, [])
+
+    @applet_v2_simulation_test(prepare=prepare_target, args=simulation_args)
+    async def test_batch(self, applet: I2CControllerApplet, ctx):
+        self.i2c_acks = [1, 1, 0, 1]
+        with self.assertRaisesRegex(I2CNotAcknowledged, r"^data not acknowledged \(1/2 written\)$"):
+            async with applet.i2c_iface.batch():
+                await applet.i2c_iface.write(0x50, [0x12])
+                await applet.i2c_iface.poll(0x50)
+                await applet.i2c_iface.write(0x50, [0x34, 0x56])
+                await applet.i2c_iface.poll(0x50)
+                await applet.i2c_iface.write(0x50, [0x78])
+                self.assertEqual(self.i2c_events, [])
+        self.assertEqual(self.i2c_events, [
+            'S', 'W', 0x12, 'P', 'S', 'P',
+            'S', 'W', 0x34, 'W', 0x56, 'P', 'S', 'P',
+            'S', 'W', 0x78, 'P'
+        ])
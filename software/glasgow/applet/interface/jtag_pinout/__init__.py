@@ -20,6 +20,7 @@ class JTAGPinoutCommand(enum.Enum, shape=8):
     SetO0 = 0x03
     SetO1 = 0x04
     GetI  = 0x05
+    Scan  = 0x06
 
 
 class JTAGPinoutComponent(wiring.Component):
@@ -53,6 +54,15 @@ class JTAGPinoutComponent(wiring.Component):
         cmd   = Signal(JTAGPinoutCommand)
         data  = Signal(16)
 
+        # Arguments of the `Scan` command, received least significant byte first.
+        scan_args  = Signal(64)
+        scan_index = Signal(range(8))
+        scan_tck   = scan_args[0:16]
+        scan_tms   = scan_args[16:32]
+        scan_tdi   = scan_args[32:48]
+        scan_count = scan_args[48:64]
+        scan_cycle = Signal(8)
+
         with m.FSM():
             with m.State("RECV-COMMAND"):
                 with m.If(self.i_stream.valid):
@@ -63,6 +73,9 @@ class JTAGPinoutComponent(wiring.Component):
                         m.next = "WAIT"
                     with m.Elif(self.i_stream.payload == JTAGPinoutCommand.GetI):
                         m.next = "SAMPLE"
+                    with m.Elif(self.i_stream.payload == JTAGPinoutCommand.Scan):
+                        m.d.sync += scan_index.eq(0)
+                        m.next = "SCAN-RECV-ARGS"
                     with m.Else():
                         m.next = "RECV-DATA-1"
 
@@ -109,7 +122,56 @@ class JTAGPinoutComponent(wiring.Component):
                 m.d.comb += self.o_stream.valid.eq(1)
                 m.d.comb += self.o_stream.payload.eq(data[8:16])
                 with m.If(self.o_stream.ready):
+                    with m.If(cmd == JTAGPinoutCommand.Scan):
+                        m.next = "SCAN-RECV-CYCLE"
+                    with m.Else():
+                        m.next = "RECV-COMMAND"
+
+            with m.State("SCAN-RECV-ARGS"):
+                with m.If(self.i_stream.valid):
+                    m.d.comb += self.i_stream.ready.eq(1)
+                    m.d.sync += scan_args.eq(Cat(scan_args[8:], self.i_stream.payload))
+                    m.d.sync += scan_index.eq(scan_index + 1)
+                    with m.If(scan_index == 7):
+                        m.next = "SCAN-RECV-CYCLE"
+
+            # Each cycle of a scan is described by one byte: bit 0 is the TMS value, bit 1 is
+            # the TDI value, and bit 2 requests the pin states to be captured (just before
+            # the rising edge of TCK, i.e. when the TDO value is valid) and sent to the host.
+            with m.State("SCAN-RECV-CYCLE"):
+                with m.If(scan_count == 0):
                     m.next = "RECV-COMMAND"
+                with m.Elif(self.i_stream.valid):
+                    m.d.comb += self.i_stream.ready.eq(1)
+                    m.d.sync += [
+                        scan_cycle.eq(self.i_stream.payload),
+                        scan_count.eq(scan_count - 1),
+                        jtag_o.eq((jtag_o & ~(scan_tck | scan_tms | scan_tdi)) |
+                                  Mux(self.i_stream.payload[0], scan_tms, 0) |
+                                  Mux(self.i_stream.payload[1], scan_tdi, 0)),
+                        timer.eq(self._period_cyc - 1),
+                    ]
+                    m.next = "SCAN-TCK-LOW"
+
+            with m.State("SCAN-TCK-LOW"):
+                with m.If(timer == 0):
+                    m.d.sync += [
+                        data.eq(jtag_i),
+                        jtag_o.eq(jtag_o | scan_tck),
+                        timer.eq(self._period_cyc - 1),
+                    ]
+                    m.next = "SCAN-TCK-HIGH"
+                with m.Else():
+                    m.d.sync += timer.eq(timer - 1)
+
+            with m.State("SCAN-TCK-HIGH"):
+                with m.If(timer == 0):
+                    with m.If(scan_cycle[2]):
+                        m.next = "SEND-DATA-1"
+                    with m.Else():
+                        m.next = "SCAN-RECV-CYCLE"
+                with m.Else():
+                    m.d.sync += timer.eq(timer - 1)
 
         return m
 
@@ -168,6 +230,31 @@ class JTAGPinoutInterface:
         self._log("get i= %s", f"{word:016b}")
         return word
 
+    async def scan(self, *, tck, tms, tdi, cycles):
+        """Queue a sequence of TCK cycles.
+
+        Each element of :py:`cycles` is a :py:`(tms, tdi, capture)` tuple; the TMS and TDI pins
+        are set to the given values while TCK is low. If :py:`capture` is true, the state of
+        every pin is sampled just before the rising edge of TCK. Returns the number of samples
+        the sequence will produce; retrieve them with :meth:`get_samples` once every sequence
+        of interest has been queued.
+        """
+        sequence = bytes(bool(tms) << 0 | bool(tdi) << 1 | bool(capture) << 2
+                         for tms, tdi, capture in cycles)
+        assert len(sequence) < 1 << 16
+        self._log("scan tck=%s tms=%s tdi=%s cycles=%d",
+                  f"{tck:016b}", f"{tms:016b}", f"{tdi:016b}", len(sequence))
+        await self._cmd(JTAGPinoutCommand.Scan)
+        await self._pipe.send(struct.pack("<HHHH", tck, tms, tdi, len(sequence)))
+        await self._pipe.send(sequence)
+        return sum(1 for byte in sequence if byte & 0b100)
+
+    async def get_samples(self, count):
+        await self._pipe.flush()
+        words = list(struct.unpack(f"<{count}H", await self._pipe.recv(count * 2)))
+        self._log("get samples=<%s>", " ".join(f"{word:016b}" for word in words))
+        return words
+
 
 class JTAGPinoutApplet(GlasgowAppletV2):
     logger = logging.getLogger(__name__)
@@ -223,21 +310,10 @@ class JTAGPinoutApplet(GlasgowAppletV2):
         pull_down_bits = self._from_word(~after_low & ~after_high & each)
         return high_z_bits, pull_up_bits, pull_down_bits
 
-    async def _strobe_tck(self, tck):
-        await self.jtag_iface.set_o_0(tck)
-        await self.jtag_iface.wait()
-        await self.jtag_iface.set_o_1(tck)
-        await self.jtag_iface.wait()
+    # Number of probes whose commands are queued before reading back any of their results.
+    _PROBES_PER_BATCH = 64
 
-    async def _strobe_tck_input(self, tck):
-        await self.jtag_iface.set_o_0(tck)
-        await self.jtag_iface.wait()
-        word = await self.jtag_iface.get_i()
-        await self.jtag_iface.set_o_1(tck)
-        await self.jtag_iface.wait()
-        return word
-
-    async def _enter_shift_ir(self, *, tck, tms, tdi, trst=0, assert_trst=False):
+    async def _queue_shift_ir(self, *, tck, tms, tdi=0, trst=0, assert_trst=False, tdi_bits):
         await self.jtag_iface.set_o (tck|tms|tdi|trst)
         await self.jtag_iface.set_oe(tck|tms|tdi|trst)
         await self.jtag_iface.wait()
@@ -245,60 +321,69 @@ class JTAGPinoutApplet(GlasgowAppletV2):
         await self.jtag_iface.set_o_0(trst); await self.jtag_iface.wait()
         if not assert_trst:
             await self.jtag_iface.set_o_1(trst); await self.jtag_iface.wait()
-        # Enter Test-Logic-Reset
-        await self.jtag_iface.set_o_1(tms)
-        for _ in range(5):
-            await self._strobe_tck(tck)
-        # Enter Run-Test/Idle
-        await self.jtag_iface.set_o_0(tms)
-        await self._strobe_tck(tck)
-        # Enter Shift-IR
-        await self.jtag_iface.set_o_1(tms); await self._strobe_tck(tck)
-        await self.jtag_iface.set_o_1(tms); await self._strobe_tck(tck)
-        await self.jtag_iface.set_o_0(tms); await self._strobe_tck(tck)
-        await self.jtag_iface.set_o_0(tms); await self._strobe_tck(tck)
-
-    async def _detect_tdo(self, *, tck, tms, trst=0, assert_trst=False):
-        await self._enter_shift_ir(tck=tck, tms=tms, tdi=0, trst=trst,
-                                   assert_trst=assert_trst)
-
-        # Shift IR
-        ir_0 = await self._strobe_tck_input(tck)
-        ir_1 = await self._strobe_tck_input(tck)
+        await self.jtag_iface.scan(tck=tck, tms=tms, tdi=tdi, cycles=[
+            # Enter Test-Logic-Reset
+            *[(1, 1, False)] * 5,
+            # Enter Run-Test/Idle, Select-DR-Scan, Select-IR-Scan, Capture-IR, Shift-IR
+            *[(tms_bit, 1, False) for tms_bit in (0, 1, 1, 0, 0)],
+            # Shift IR
+            *[(0, tdi_bit, True) for tdi_bit in tdi_bits],
+        ])
         # Release the bus
         await self.jtag_iface.set_oe(0)
 
-        tdo_bits = self._from_word(ir_0 & ~ir_1)
-        return set(tdo_bits)
-
-    async def _detect_tdi(self, *, tck, tms, tdi, tdo, trst=0):
-        await self._enter_shift_ir(tck=tck, tms=tms, tdi=tdi, trst=trst)
+    async def _shift_ir(self, probes):
+        # Every probe is a sequence of commands with a fixed number of samples in response, so
+        # the commands for many probes can be queued at once; this avoids a USB roundtrip per
+        # probe, which would otherwise dominate the time it takes to search for the pinout.
+        # The results are read after each batch to limit the amount of buffered data.
+        results = []
+        for start in range(0, len(probes), self._PROBES_PER_BATCH):
+            batch = probes[start:start + self._PROBES_PER_BATCH]
+            for probe in batch:
+                await self._queue_shift_ir(**probe)
+            samples = await self.jtag_iface.get_samples(
+                sum(len(probe["tdi_bits"]) for probe in batch))
+            for probe in batch:
+                results.append(samples[:len(probe["tdi_bits"])])
+                del samples[:len(probe["tdi_bits"])]
+        return results
+
+    async def _detect_tdo(self, probes):
+        results = []
+        for ir_0, ir_1 in await self._shift_ir([
+                {**probe, "tdi_bits": [0, 0]} for probe in probes]):
+            results.append(self._from_word(ir_0 & ~ir_1))
+        return results
 
+    async def _detect_tdi(self, probes):
         pat_bits   = 32
         flush_bits = 64
-        pattern    = random.getrandbits(pat_bits)
-        result     = []
 
-        # Shift IR
-        for bit in range(pat_bits):
-            if pattern & (1 << bit):
-                await self.jtag_iface.set_o_1(tdi)
-            else:
-                await self.jtag_iface.set_o_0(tdi)
-            result.append(await self._strobe_tck_input(tck))
-        await self.jtag_iface.set_o_1(tdi)
-        for bit in range(flush_bits):
-            result.append(await self._strobe_tck_input(tck))
-        # Release the bus
-        await self.jtag_iface.set_oe(0)
+        patterns  = []
+        ir_probes = []
+        for probe in probes:
+            pattern = random.getrandbits(pat_bits)
+            patterns.append(pattern)
+            ir_probes.append({
+                "tck": probe["tck"], "tms": probe["tms"], "tdi": probe["tdi"],
+                "trst": probe["trst"],
+                "tdi_bits": [(pattern >> bit) & 1 for bit in range(pat_bits)] + [1] * flush_bits,
+            })
 
-        for ir_len in range(flush_bits):
-            corr_result = [result[ir_len + bit] if pattern & (1 << bit) else ~result[ir_len + bit]
-                           for bit in range(pat_bits)]
-            if reduce(lambda x, y: x&y, corr_result) & tdo:
-                return ir_len
+        results = []
+        for probe, pattern, result in zip(probes, patterns, await self._shift_ir(ir_probes)):
+            for ir_len in range(flush_bits):
+                corr_result = [result[ir_len + bit] if pattern & (1 << bit) else
+                               ~result[ir_len + bit] for bit in range(pat_bits)]
+                if reduce(lambda x, y: x&y, corr_result) & probe["tdo"]:
+                    results.append(ir_len)
+                    break
+            else:
+                results.append(None)
+        return results
 
-    async def run(self, args):
+    async def _find_interfaces(self):
         def bits_to_str(pins):
             return ", ".join(self.names[pin] for pin in pins)
 
@@ -337,18 +422,20 @@ class JTAGPinoutApplet(GlasgowAppletV2):
                 data_bits = self.bits - {bit_trst}
 
             # Try every TCK, TMS pin combination to detect possible TDO pins in parallel.
+            tck_tms = [(bit_tck, bit_tms)
+                       for bit_tck in data_bits for bit_tms in data_bits - {bit_tck}]
+            tdo_results = await self._detect_tdo([
+                {"tck": 1 << bit_tck, "tms": 1 << bit_tms,
+                 "trst": 0 if bit_trst is None else 1 << bit_trst}
+                for bit_tck, bit_tms in tck_tms])
             tck_tms_tdo = []
-            for bit_tck in data_bits:
-                for bit_tms in data_bits - {bit_tck}:
-                    self.logger.debug("trying TCK=%s TMS=%s",
-                        self.names[bit_tck], self.names[bit_tms])
-                    tdo_bits = await self._detect_tdo(
-                        tck=1 << bit_tck, tms=1 << bit_tms,
-                        trst=0 if bit_trst is None else 1 << bit_trst)
-                    for bit_tdo in tdo_bits - {bit_tck, bit_tms}:
-                        self.logger.info("shifted 10 out of IR with TCK=%s TMS=%s TDO=%s",
-                            self.names[bit_tck], self.names[bit_tms], self.names[bit_tdo])
-                        tck_tms_tdo.append((bit_tck, bit_tms, bit_tdo))
+            for (bit_tck, bit_tms), tdo_bits in zip(tck_tms, tdo_results):
+                self.logger.debug("tried TCK=%s TMS=%s",
+                    self.names[bit_tck], self.names[bit_tms])
+                for bit_tdo in tdo_bits - {bit_tck, bit_tms}:
+                    self.logger.info("shifted 10 out of IR with TCK=%s TMS=%s TDO=%s",
+                        self.names[bit_tck], self.names[bit_tms], self.names[bit_tdo])
+                    tck_tms_tdo.append((bit_tck, bit_tms, bit_tdo))
 
             if not tck_tms_tdo:
                 continue
@@ -356,22 +443,25 @@ class JTAGPinoutApplet(GlasgowAppletV2):
             self.logger.info("detecting TDI")
 
             # Try every TDI pin for every potential TCK, TMS, TDO combination.
+            candidates = [(bit_tck, bit_tms, bit_tdi, bit_tdo)
+                          for (bit_tck, bit_tms, bit_tdo) in tck_tms_tdo
+                          for bit_tdi in data_bits - {bit_tck, bit_tms, bit_tdo}]
+            ir_lens = await self._detect_tdi([
+                {"tck": 1 << bit_tck, "tms": 1 << bit_tms, "tdi": 1 << bit_tdi,
+                 "tdo": 1 << bit_tdo, "trst": 0 if bit_trst is None else 1 << bit_trst}
+                for bit_tck, bit_tms, bit_tdi, bit_tdo in candidates])
             tck_tms_tdi_tdo = []
-            for (bit_tck, bit_tms, bit_tdo) in tck_tms_tdo:
-                for bit_tdi in data_bits - {bit_tck, bit_tms, bit_tdo}:
-                    self.logger.debug("trying TCK=%s TMS=%s TDI=%s TDO=%s",
-                        self.names[bit_tck], self.names[bit_tms],
-                        self.names[bit_tdi], self.names[bit_tdo])
-                    ir_len = await self._detect_tdi(
-                        tck=1 << bit_tck, tms=1 << bit_tms, tdi=1 << bit_tdi, tdo=1 << bit_tdo,
-                        trst=0 if bit_trst is None else 1 << bit_trst)
-                    if ir_len is None or ir_len < 2:
-                        continue
-                    self.logger.info("shifted %d-bit IR with TCK=%s TMS=%s TDI=%s TDO=%s",
-                        ir_len,
-                        self.names[bit_tck], self.names[bit_tms],
-                        self.names[bit_tdi], self.names[bit_tdo])
-                    tck_tms_tdi_tdo.append((bit_tck, bit_tms, bit_tdi, bit_tdo))
+            for (bit_tck, bit_tms, bit_tdi, bit_tdo), ir_len in zip(candidates, ir_lens):
+                self.logger.debug("tried TCK=%s TMS=%s TDI=%s TDO=%s",
+                    self.names[bit_tck], self.names[bit_tms],
+                    self.names[bit_tdi], self.names[bit_tdo])
+                if ir_len is None or ir_len < 2:
+                    continue
+                self.logger.info("shifted %d-bit IR with TCK=%s TMS=%s TDI=%s TDO=%s",
+                    ir_len,
+                    self.names[bit_tck], self.names[bit_tms],
+                    self.names[bit_tdi], self.names[bit_tdo])
+                tck_tms_tdi_tdo.append((bit_tck, bit_tms, bit_tdi, bit_tdo))
 
             if not tck_tms_tdi_tdo:
                 continue
@@ -391,27 +481,28 @@ class JTAGPinoutApplet(GlasgowAppletV2):
             # pins, and disrupt operation of the probe.
             #
             # Try every TRST# pin for every potential TCK, TMS, TDI, TDO combination.
-            for (bit_tck, bit_tms, bit_tdi, bit_tdo) in tck_tms_tdi_tdo:
-                for bit_trst in trst_h_bits:
-                    if bit_trst in {bit_tck, bit_tms, bit_tdi, bit_tdo}:
-                        continue
-                    self.logger.debug("trying TCK=%s TMS=%s TDI=%s TDO=%s TRST#=%s",
+            candidates = [(bit_tck, bit_tms, bit_tdi, bit_tdo, bit_trst)
+                          for (bit_tck, bit_tms, bit_tdi, bit_tdo) in tck_tms_tdi_tdo
+                          for bit_trst in trst_h_bits
+                          if bit_trst not in {bit_tck, bit_tms, bit_tdi, bit_tdo}]
+            tdo_results = await self._detect_tdo([
+                {"tck": 1 << bit_tck, "tms": 1 << bit_tms, "trst": 1 << bit_trst,
+                 "assert_trst": assert_trst}
+                for bit_tck, bit_tms, _bit_tdi, _bit_tdo, bit_trst in candidates
+                for assert_trst in (True, False)])
+            for index, (bit_tck, bit_tms, bit_tdi, bit_tdo, bit_trst) in enumerate(candidates):
+                self.logger.debug("tried TCK=%s TMS=%s TDI=%s TDO=%s TRST#=%s",
+                    self.names[bit_tck], self.names[bit_tms],
+                    self.names[bit_tdi], self.names[bit_tdo],
+                    self.names[bit_trst])
+                tdo_bits_1, tdo_bits_0 = tdo_results[index * 2:index * 2 + 2]
+                if bit_tdo in tdo_bits_0 and bit_tdo not in tdo_bits_1:
+                    self.logger.info("disabled TAP with TCK=%s TMS=%s TDI=%s "
+                                     "TDO=%s TRST#=%s",
                         self.names[bit_tck], self.names[bit_tms],
                         self.names[bit_tdi], self.names[bit_tdo],
                         self.names[bit_trst])
-                    tdo_bits_1 = await self._detect_tdo(
-                        tck=1 << bit_tck, tms=1 << bit_tms, trst=1 << bit_trst,
-                        assert_trst=True)
-                    tdo_bits_0 = await self._detect_tdo(
-                        tck=1 << bit_tck, tms=1 << bit_tms, trst=1 << bit_trst,
-                        assert_trst=False)
-                    if bit_tdo in tdo_bits_0 and bit_tdo not in tdo_bits_1:
-                        self.logger.info("disabled TAP with TCK=%s TMS=%s TDI=%s "
-                                         "TDO=%s TRST#=%s",
-                            self.names[bit_tck], self.names[bit_tms],
-                            self.names[bit_tdi], self.names[bit_tdo],
-                            self.names[bit_trst])
-                        results.append((bit_tck, bit_tms, bit_tdi, bit_tdo, bit_trst))
+                    results.append((bit_tck, bit_tms, bit_tdi, bit_tdo, bit_trst))
 
             if not results:
                 # TRST# is not found.
@@ -419,6 +510,10 @@ class JTAGPinoutApplet(GlasgowAppletV2):
                     results.append((*bits, None))
             break
 
+        return results
+
+    async def run(self, args):
+        results = await self._find_interfaces()
         if len(results) == 0:
             self.logger.warning("no JTAG interface detected")
 
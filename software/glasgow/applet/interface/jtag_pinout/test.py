@@ -1,8 +1,89 @@
-from glasgow.applet import GlasgowAppletV2TestCase, synthesis_test
+from glasgow.simulation.assembly import SimulationAssembly
+from glasgow.applet import GlasgowAppletV2TestCase, synthesis_test, applet_v2_simulation_test
 from . import JTAGPinoutApplet
 
 
+# Next state of the TAP controller for TMS=0 and TMS=1.
+_TAP_TRANSITIONS = {
+    "Test-Logic-Reset": ("Run-Test/Idle",    "Test-Logic-Reset"),
+    "Run-Test/Idle":    ("Run-Test/Idle",    "Select-DR-Scan"),
+    "Select-DR-Scan":   ("Capture-DR",       "Select-IR-Scan"),
+    "Capture-DR":       ("Shift-DR",         "Exit1-DR"),
+    "Shift-DR":         ("Shift-DR",         "Exit1-DR"),
+    "Exit1-DR":         ("Pause-DR",         "Update-DR"),
+    "Pause-DR":         ("Pause-DR",         "Exit2-DR"),
+    "Exit2-DR":         ("Shift-DR",         "Update-DR"),
+    "Update-DR":        ("Run-Test/Idle",    "Select-DR-Scan"),
+    "Select-IR-Scan":   ("Capture-IR",       "Test-Logic-Reset"),
+    "Capture-IR":       ("Shift-IR",         "Exit1-IR"),
+    "Shift-IR":         ("Shift-IR",         "Exit1-IR"),
+    "Exit1-IR":         ("Pause-IR",         "Update-IR"),
+    "Pause-IR":         ("Pause-IR",         "Exit2-IR"),
+    "Exit2-IR":         ("Shift-IR",         "Update-IR"),
+    "Update-IR":        ("Run-Test/Idle",    "Select-DR-Scan"),
+}
+
+
+def prepare_tap(*, tck, tms, tdi, tdo, trst=None, ir_length=5):
+    """Connect a model of a JTAG TAP (with only the BYPASS data register) to the given pins.
+
+    When not driven, TCK is pulled down, TMS, TDI, and TRST# are pulled up, and TDO retains
+    the last value driven onto it. Other pins always read as low.
+    """
+    def prepare(self, assembly: SimulationAssembly):
+        pulls = {tck: 0, tms: 1, tdi: 1}
+        if trst is not None:
+            pulls[trst] = 1
+
+        async def testbench(ctx):
+            ports  = {name: assembly.get_pin(name) for name in (*pulls, tdo)}
+            levels = {name: pulls.get(name, 0) for name in ports}
+            state  = "Test-Logic-Reset"
+            shift  = 0
+            async for _ in ctx.tick():
+                prev_tck = levels[tck]
+                for name, port in ports.items():
+                    if ctx.get(port.oe):
+                        levels[name] = ctx.get(port.o)
+                    elif name in pulls:
+                        levels[name] = pulls[name]
+                if trst is not None and not levels[trst]:
+                    state = "Test-Logic-Reset"
+                elif not prev_tck and levels[tck]:
+                    if state == "Capture-IR":
+                        shift = 0b01
+                    elif state == "Capture-DR":
+                        shift = 0
+                    elif state == "Shift-IR":
+                        shift = (shift >> 1) | (levels[tdi] << (ir_length - 1))
+                    elif state == "Shift-DR":
+                        shift = levels[tdi]
+                    state = _TAP_TRANSITIONS[state][levels[tms]]
+                elif prev_tck and not levels[tck]:
+                    if state in ("Shift-IR", "Shift-DR"):
+                        levels[tdo] = shift & 1
+                for name, port in ports.items():
+                    ctx.set(port.i, levels[name])
+
+        assembly.add_testbench(testbench, background=True)
+    return prepare
+
+
 class JTAGPinoutAppletTestCase(GlasgowAppletV2TestCase, applet=JTAGPinoutApplet):
     @synthesis_test
     def test_build(self):
         self.assertBuilds(args=["--pins", "A0:3"])
+
+    @applet_v2_simulation_test(args=["--pins", "A0:3", "-f", "250"],
+        prepare=prepare_tap(tck="A2", tms="A0", tdi="A3", tdo="A1"))
+    async def test_find_without_trst(self, applet: JTAGPinoutApplet, ctx):
+        self.assertEqual(await applet._find_interfaces(), [(2, 0, 3, 1, None)])
+
+    @applet_v2_simulation_test(args=["--pins", "A0:4", "-f", "250"],
+        prepare=prepare_tap(tck="A3", tms="A1", tdi="A4", tdo="A0", trst="A2"))
+    async def test_find_with_trst(self, applet: JTAGPinoutApplet, ctx):
+        self.assertEqual(await applet._find_interfaces(), [(3, 1, 4, 0, 2)])
+
+    @applet_v2_simulation_test(args=["--pins", "A0:4", "-f", "250"])
+    async def test_find_nothing(self, applet: JTAGPinoutApplet, ctx):
+        self.assertEqual(await applet._find_interfaces(), [])
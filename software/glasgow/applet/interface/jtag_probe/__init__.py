@@ -312,6 +312,36 @@ class JTAGProbeStateTransitionError(JTAGProbeError):
         self.new_state = new_state
 
 
+class JTAGProbeDeferredResult:
+    """Data captured by a shift that was queued with :py:`defer=True`.
+
+    The captured data is retrieved from the device in the same order as the shifts were queued,
+    all at once, when :meth:`get` is first awaited on any of the pending results, or when
+    the interface has to read anything else from the device.
+    """
+
+    def __init__(self, iface, counts, tdo_bits=None):
+        self._iface    = iface
+        self._counts   = counts
+        self._tdo_bits = tdo_bits
+
+    @property
+    def _byte_count(self):
+        return sum((count + 7) // 8 for count in self._counts)
+
+    def _capture(self, tdo_bytes):
+        self._tdo_bits = bits()
+        offset = 0
+        for count in self._counts:
+            self._tdo_bits += bits(tdo_bytes[offset:offset + (count + 7) // 8], count)
+            offset += (count + 7) // 8
+
+    async def get(self):
+        if self._tdo_bits is None:
+            await self._iface._resolve_deferred()
+        return self._tdo_bits
+
+
 class JTAGProbeInterface:
     scan_ir_max_length = 128
     scan_dr_max_length = 1024
@@ -324,15 +354,28 @@ class JTAGProbeInterface:
         self.has_trst    = has_trst
         self._state      = JTAGState.UNKNOWN
         self._current_ir = None
+        self._deferred   = []
 
     def _log_l(self, message, *args):
-        self._logger.log(self._level, "JTAG-L: " + message, *args)
+        if self._logger.isEnabledFor(self._level):
+            self._logger.log(self._level, "JTAG-L: " + message, *args)
 
     def _log_h(self, message, *args):
-        self._logger.log(self._level, "JTAG-H: " + message, *args)
+        if self._logger.isEnabledFor(self._level):
+            self._logger.log(self._level, "JTAG-H: " + message, *args)
 
     # Low-level operations
 
+    async def _resolve_deferred(self):
+        if not self._deferred:
+            return
+        deferred, self._deferred = self._deferred, []
+        tdo_bytes = await self.lower.read(sum(result._byte_count for result in deferred))
+        offset = 0
+        for result in deferred:
+            result._capture(tdo_bytes[offset:offset + result._byte_count])
+            offset += result._byte_count
+
     async def flush(self):
         self._log_l("flush")
         await self.lower.flush()
@@ -343,6 +386,7 @@ class JTAGProbeInterface:
             CMD_SET_AUX, value))
 
     async def get_aux(self):
+        await self._resolve_deferred()
         await self.lower.write(struct.pack("<B",
             CMD_GET_AUX))
         value, = await self.lower.read(1)
@@ -396,23 +440,26 @@ class JTAGProbeInterface:
             await self.lower.write(struct.pack("<BH",
                 CMD_SHIFT_TDIO|(BIT_LAST if chunk_last else 0), count))
 
-    async def shift_tdio(self, tdi_bits, *, prefix=0, suffix=0, last=True):
+    async def shift_tdio(self, tdi_bits, *, prefix=0, suffix=0, last=True, defer=False):
         assert self._state in (JTAGState.IRSHIFT, JTAGState.DRSHIFT)
         tdi_bits = bits(tdi_bits)
-        tdo_bits = bits()
+        counts   = []
         self._log_l("shift tdio-i=%d,<%s>,%d", prefix, dump_bin(tdi_bits), suffix)
         await self._shift_dummy(prefix)
         for tdi_bits, chunk_last in self._chunk_bits(tdi_bits, last and suffix == 0):
             await self.lower.write(struct.pack("<BH",
                 CMD_SHIFT_TDIO|BIT_DATA_IN|BIT_DATA_OUT|(BIT_LAST if chunk_last else 0),
                 len(tdi_bits)))
-            tdi_bytes = bytes(tdi_bits)
-            await self.lower.write(tdi_bytes)
-            tdo_bytes = await self.lower.read(len(tdi_bytes))
-            tdo_bits += bits(tdo_bytes, len(tdi_bits))
+            await self.lower.write(bytes(tdi_bits))
+            counts.append(len(tdi_bits))
         await self._shift_dummy(suffix, last)
-        self._log_l("shift tdio-o=%d,<%s>,%d", prefix, dump_bin(tdo_bits), suffix)
         self._shift_last(last)
+        result = JTAGProbeDeferredResult(self, counts)
+        self._deferred.append(result)
+        if defer:
+            return result
+        tdo_bits = await result.get()
+        self._log_l("shift tdio-o=%d,<%s>,%d", prefix, dump_bin(tdo_bits), suffix)
         return tdo_bits
 
     async def shift_tdi(self, tdi_bits, *, prefix=0, suffix=0, last=True):
@@ -432,6 +479,7 @@ class JTAGProbeInterface:
     async def shift_tdo(self, count, *, prefix=0, suffix=0, last=True):
         assert self._state in (JTAGState.IRSHIFT, JTAGState.DRSHIFT)
         tdo_bits = bits()
+        await self._resolve_deferred()
         await self._shift_dummy(prefix)
         for count, chunk_last in self._chunk_count(count, last and suffix == 0):
             await self.lower.write(struct.pack("<BH",
@@ -677,15 +725,17 @@ class JTAGProbeInterface:
             await self.shift_tdi(data, prefix=prefix, suffix=suffix)
         await self.enter_update_ir()
 
-    async def exchange_dr(self, data, *, prefix=0, suffix=0):
+    async def exchange_dr(self, data, *, prefix=0, suffix=0, defer=False):
         self._log_h("exchange dr-i=%d,<%s>,%d", prefix, dump_bin(data), suffix)
         if not data:
             await self.enter_capture_dr()
-            data = bits()
+            data = JTAGProbeDeferredResult(self, [], bits()) if defer else bits()
         else:
             await self.enter_shift_dr()
-            data = await self.shift_tdio(data, prefix=prefix, suffix=suffix)
+            data = await self.shift_tdio(data, prefix=prefix, suffix=suffix, defer=defer)
         await self.enter_update_dr()
+        if defer:
+            return data
         self._log_h("exchange dr-o=%d,<%s>,%d", prefix, dump_bin(data), suffix)
         return data
 
@@ -710,6 +760,24 @@ class JTAGProbeInterface:
             await self.shift_tdi(data, prefix=prefix, suffix=suffix)
         await self.enter_update_dr()
 
+    async def write_dr_chunks(self, chunks, *, prefix=0, suffix=0):
+        """Shift the concatenation of :py:`chunks` into DR, like :meth:`write_dr`.
+
+        Each chunk is shifted as soon as it is produced, which makes it possible to shift a value
+        that is being read or computed without assembling all of it in memory first.
+        """
+        self._log_h("write dr chunked prefix=%d suffix=%d", prefix, suffix)
+        chunks = (chunk for chunk in map(bits, chunks) if chunk)
+        if (data := next(chunks, None)) is None:
+            await self.enter_capture_dr()
+        else:
+            await self.enter_shift_dr()
+            for next_data in chunks:
+                await self.shift_tdi(data, prefix=prefix, last=False)
+                data, prefix = next_data, 0
+            await self.shift_tdi(data, prefix=prefix, suffix=suffix)
+        await self.enter_update_dr()
+
     # Shift chain introspection
 
     async def _scan_xr(self, xr, *, max_length=None, check=True, idempotent=True):
@@ -957,8 +1025,8 @@ class TAPInterface:
         await self.lower.write_ir(data, elide=elide,
             prefix=self._ir_prefix, suffix=self._ir_suffix)
 
-    async def exchange_dr(self, data):
-        return await self.lower.exchange_dr(data,
+    async def exchange_dr(self, data, *, defer=False):
+        return await self.lower.exchange_dr(data, defer=defer,
             prefix=self._dr_prefix, suffix=self._dr_suffix)
 
     async def read_dr(self, length):
@@ -969,6 +1037,10 @@ class TAPInterface:
         await self.lower.write_dr(data,
             prefix=self._dr_prefix, suffix=self._dr_suffix)
 
+    async def write_dr_chunks(self, chunks):
+        await self.lower.write_dr_chunks(chunks,
+            prefix=self._dr_prefix, suffix=self._dr_suffix)
+
     async def scan_dr(self, *, check=True, max_length=None):
         if max_length is not None:
             max_length = self._dr_prefix + max_length + self._dr_suffix
@@ -1,8 +1,123 @@
+import struct
 import unittest
+import unittest.mock
 
 from ....support.bits import *
 from ... import *
-from . import JTAGProbeApplet, JTAGProbeInterface, JTAGProbeError
+from . import JTAGProbeApplet, JTAGProbeInterface, TAPInterface, JTAGProbeError
+from . import JTAGState, JTAG_TRANSITIONS
+from . import CMD_MASK, CMD_SHIFT_TMS, CMD_SHIFT_TDIO, CMD_GET_AUX, CMD_SET_AUX
+from . import BIT_DATA_OUT, BIT_DATA_IN, BIT_LAST, BIT_TDI
+
+
+class JTAGProbeModel:
+    """A model of the JTAG probe command processor, which drives a model of a single TAP directly.
+
+    The TAP model must have an :py:`ir_length` attribute, a :py:`capture_ir()` method returning
+    the value of the IR capture, a :py:`capture_dr()` method returning a :py:`(value, length)`
+    tuple for the currently selected DR, as well as :py:`update_ir(value)` and
+    :py:`update_dr(value)` methods. If the TAP model has an :py:`enter_run_test_idle()` method,
+    it is called on every entry to the Run-Test/Idle state. Every read from the model is counted
+    in :py:`reads`.
+    """
+
+    def __init__(self, tap):
+        self.tap    = tap
+        self.reads  = 0
+        self._state = JTAGState.RESET
+        self._shreg = 0
+        self._width = 0
+        self._out   = bytearray()
+        self._in    = bytearray()
+
+    def _clock(self, tms, tdi):
+        tdo = self._shreg & 1
+        match self._state:
+            case JTAGState.IRCAPTURE:
+                self._shreg, self._width = self.tap.capture_ir(), self.tap.ir_length
+            case JTAGState.DRCAPTURE:
+                self._shreg, self._width = self.tap.capture_dr()
+            case JTAGState.IRSHIFT | JTAGState.DRSHIFT:
+                self._shreg = (self._shreg >> 1) | (tdi << (self._width - 1))
+            case JTAGState.IRUPDATE:
+                self.tap.update_ir(self._shreg)
+            case JTAGState.DRUPDATE:
+                self.tap.update_dr(self._shreg)
+        next_state = JTAG_TRANSITIONS[self._state][tms]
+        if next_state == JTAGState.IDLE != self._state and hasattr(self.tap, "enter_run_test_idle"):
+            self.tap.enter_run_test_idle()
+        self._state = next_state
+        return tdo
+
+    def _shift(self, cmd, count, tdi_bits):
+        if (cmd & CMD_MASK) == CMD_SHIFT_TDIO and tdi_bits is None and \
+                self._state in (JTAGState.IDLE, JTAGState.IRPAUSE, JTAGState.DRPAUSE):
+            return # TCK pulses in a stable state
+        tdo_bits = []
+        for index in range(count):
+            if (cmd & CMD_MASK) == CMD_SHIFT_TMS:
+                tms, tdi = tdi_bits[index], int(bool(cmd & BIT_TDI))
+            else:
+                tms = int(bool(cmd & BIT_LAST) and index == count - 1)
+                tdi = 1 if tdi_bits is None else tdi_bits[index]
+            tdo_bits.append(self._clock(tms, tdi))
+        if cmd & BIT_DATA_IN:
+            self._in += bytes(bits(tdo_bits))
+
+    async def write(self, data):
+        self._out += bytes(data)
+        while self._out:
+            cmd = self._out[0]
+            if cmd & CMD_MASK in (CMD_SHIFT_TMS, CMD_SHIFT_TDIO):
+                if len(self._out) < 3:
+                    break
+                count, = struct.unpack_from("<H", self._out, 1)
+                length = 3 + ((count + 7) // 8 if cmd & BIT_DATA_OUT else 0)
+                if len(self._out) < length:
+                    break
+                tdi_bits = bits(bytes(self._out[3:length]), count) if cmd & BIT_DATA_OUT else None
+                del self._out[:length]
+                self._shift(cmd, count, tdi_bits)
+            elif cmd & CMD_MASK == CMD_SET_AUX:
+                if len(self._out) < 2:
+                    break
+                del self._out[:2]
+            elif cmd & CMD_MASK == CMD_GET_AUX:
+                del self._out[:1]
+                self._in.append(0)
+            else:
+                assert False, f"unknown command {cmd:#04x}"
+
+    async def read(self, length):
+        assert len(self._in) >= length, "reading more data than was captured"
+        self.reads += 1
+        data, self._in = bytes(self._in[:length]), self._in[length:]
+        return data
+
+    async def flush(self):
+        pass
+
+
+class LoopbackTAPModel:
+    """A TAP whose every DR captures the value that was last updated into it."""
+
+    ir_length = 4
+
+    def __init__(self, dr_length=8):
+        self.dr_length = dr_length
+        self.dr_value  = 0
+
+    def capture_ir(self):
+        return 0b0001
+
+    def update_ir(self, value):
+        pass
+
+    def capture_dr(self):
+        return self.dr_value, self.dr_length
+
+    def update_dr(self, value):
+        self.dr_value = value
 
 
 class JTAGInterrogationTestCase(unittest.TestCase):
@@ -129,3 +244,61 @@ class JTAGProbeAppletTestCase(GlasgowAppletTestCase, applet=JTAGProbeApplet):
     @synthesis_test
     def test_build(self):
         self.assertBuilds()
+
+
+class JTAGDeferredTestCase(unittest.TestCase):
+    def setUp(self):
+        self.model = JTAGProbeModel(LoopbackTAPModel())
+        self.iface = JTAGProbeInterface(self.model, logger=JTAGProbeApplet.logger)
+        self.tap   = TAPInterface(self.iface, ir_length=4)
+
+    @async_test
+    async def test_exchange(self):
+        await self.tap.test_reset()
+        self.assertEqual(await self.tap.exchange_dr(bits(0x12, 8)), bits(0x00, 8))
+        self.assertEqual(await self.tap.exchange_dr(bits(0x34, 8)), bits(0x12, 8))
+        self.assertEqual(self.model.reads, 2)
+
+    @async_test
+    async def test_deferred(self):
+        await self.tap.test_reset()
+        results = []
+        for value in range(1, 100):
+            results.append(await self.tap.exchange_dr(bits(value, 8), defer=True))
+        self.assertEqual(self.model.reads, 0)
+        self.assertEqual([int(await result.get()) for result in results], list(range(0, 99)))
+        self.assertEqual(self.model.reads, 1)
+
+    @async_test
+    async def test_deferred_resolved_in_order(self):
+        await self.tap.test_reset()
+        result = await self.tap.exchange_dr(bits(0x56, 8), defer=True)
+        self.assertEqual(await self.tap.read_dr(8), bits(0x56, 8))
+        self.assertEqual(self.model.reads, 2)
+        self.assertEqual(await result.get(), bits(0x00, 8))
+        self.assertEqual(self.model.reads, 2)
+
+    @async_test
+    async def test_write_dr_chunks(self):
+        self.model.tap.dr_length = 24
+        await self.tap.test_reset()
+        await self.tap.write_dr_chunks([bits(0x56, 8), bits(), bits(0x1234, 16)])
+        self.assertEqual(self.model.reads, 0)
+        self.assertEqual(await self.tap.read_dr(24), bits(0x123456, 24))
+
+    @async_test
+    async def test_trace_disabled(self):
+        formatted = []
+        class Dump:
+            def __init__(self, data):
+                self.data = data
+            def __str__(self):
+                formatted.append(self.data)
+                return ""
+
+        self.assertFalse(JTAGProbeApplet.logger.isEnabledFor(self.iface._level))
+        with unittest.mock.patch(f"{JTAGProbeInterface.__module__}.dump_bin", Dump):
+            await self.tap.test_reset()
+            await self.tap.write_ir(bits(0b0010, 4))
+            self.assertEqual(await self.tap.exchange_dr(bits(0x12, 8)), bits(0x00, 8))
+        self.assertEqual(formatted, [])
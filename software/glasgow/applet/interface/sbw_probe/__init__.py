@@ -172,7 +172,8 @@ class SpyBiWireProbeSubtarget(Elaboratable):
 
 class SpyBiWireProbeInterface(JTAGProbeInterface):
     def _log_s(self, message, *args):
-        self._logger.log(self._level, "SBW: " + message, *args)
+        if self._logger.isEnabledFor(self._level):
+            self._logger.log(self._level, "SBW: " + message, *args)
 
     async def set_tclk(self, active):
         self._log_s("set tclk=%d", active)
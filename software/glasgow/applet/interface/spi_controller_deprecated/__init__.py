@@ -238,7 +238,9 @@ class SPIControllerInterface:
             items = items[count:]
 
     @contextlib.asynccontextmanager
-    async def select(self, index=0):
+    async def select(self, index=0, *, flush=True):
+        # With `flush=False`, the transaction is only sent to the device together with whatever
+        # follows it, which lets many short transactions be sent at once.
         assert self._active is None, "chip already selected"
         assert index == 0, "only one chip is supported"
         try:
@@ -251,7 +253,8 @@ class SPIControllerInterface:
             self._log("deselect")
             await self.lower.write(struct.pack("<B",
                 CMD_SELECT|0))
-            await self.lower.flush()
+            if flush:
+                await self.lower.flush()
             self._active = None
 
     async def exchange(self, octets):
@@ -165,7 +165,8 @@ class SWDProbeInterface:
         self._select = None
 
     def _log(self, message, *args):
-        self._logger.log(self._level, "SWD: " + message, *args)
+        if self._logger.isEnabledFor(self._level):
+            self._logger.log(self._level, "SWD: " + message, *args)
 
     @property
     def clock(self) -> ClockDivisor:
@@ -226,9 +227,9 @@ class SWDProbeInterface:
         try:
             await self._recv_ack()
             data, = struct.unpack("<L", await self._pipe.recv(4))
-            self._log(f"rd {'ap' if ap_ndp else 'dp'} addr={addr:#x} data={data:#010x}")
+            self._log("rd %s addr=%#x data=%#010x", "ap" if ap_ndp else "dp", addr, data)
         except SWDProbeException as exn:
-            self._log(f"rd {'ap' if ap_ndp else 'dp'} addr={addr:#x} {exn.kind.value}")
+            self._log("rd %s addr=%#x %s", "ap" if ap_ndp else "dp", addr, exn.kind.value)
             raise
         return data
 
@@ -238,9 +239,9 @@ class SWDProbeInterface:
         await self._pipe.send(struct.pack("<L", data))
         try:
             await self._recv_ack()
-            self._log(f"wr {'ap' if ap_ndp else 'dp'} addr={addr:#x} data={data:#010x}")
+            self._log("wr %s addr=%#x data=%#010x", "ap" if ap_ndp else "dp", addr, data)
         except SWDProbeException as exn:
-            self._log(f"wr {'ap' if ap_ndp else 'dp'} addr={addr:#x} {exn.kind.value}")
+            self._log("wr %s addr=%#x %s", "ap" if ap_ndp else "dp", addr, exn.kind.value)
             raise
 
     async def _update_select(self, **kwargs):
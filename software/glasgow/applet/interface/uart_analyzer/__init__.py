@@ -1,7 +1,6 @@
 from typing import Literal, Optional
 from functools import reduce
 import re
-import sys
 import logging
 import asyncio
 import argparse
@@ -21,9 +20,10 @@ __all__ = ["UARTAnalyzerError", "UARTAnalyzerInterface"]
 
 
 class UARTAnalyzerError(enum.Enum, shape=2):
-    Good   = 0
-    Frame  = 1
-    Parity = 2
+    Good     = 0
+    Frame    = 1
+    Parity   = 2
+    Overflow = 3
 
 
 class UARTAnalyzerMessage(data.Struct):
@@ -43,7 +43,6 @@ class UARTAnalyzerComponent(wiring.Component):
             "o_stream": Out(stream.Signature(8)),
 
             "periods":  In(20).array(len(port)),
-            "overflow": Out(1),
         })
 
     def elaborate(self, platform):
@@ -58,11 +57,24 @@ class UARTAnalyzerComponent(wiring.Component):
 
         m.submodules.queue = queue = Queue(shape=UARTAnalyzerMessage, depth=512)
 
-        with m.If(0):
-            pass
+        overflow         = Signal() # data was lost, and this has not been reported yet
+        overflow_channel = Signal(6)
+        accepted         = Signal(len(channels))
+        lost             = Signal(len(channels))
+
+        # Overflow is reported in-band, with priority over any data, as soon as there is space
+        # in the queue for the message.
+        with m.If(overflow):
+            m.d.comb += [
+                queue.i.p.error.eq(UARTAnalyzerError.Overflow),
+                queue.i.p.channel.eq(overflow_channel),
+                queue.i.valid.eq(1),
+            ]
+            with m.If(queue.i.ready):
+                m.d.sync += overflow.eq(0)
         for index, channel in enumerate(channels):
             # Note: this condition violates the stream invariant in case of overflow.
-            with m.If(channel.rx_rdy | channel.rx_ferr | channel.rx_perr):
+            with m.Elif(channel.rx_rdy | channel.rx_ferr | channel.rx_perr):
                 with m.If(channel.rx_ferr):
                     m.d.comb += queue.i.p.error.eq(UARTAnalyzerError.Frame)
                 with m.If(channel.rx_perr):
@@ -72,9 +84,20 @@ class UARTAnalyzerComponent(wiring.Component):
                     queue.i.p.channel.eq(index),
                     queue.i.valid.eq(1),
                     channel.rx_ack.eq(queue.i.ready),
+                    accepted[index].eq(queue.i.ready),
                 ]
-                with m.If(~queue.i.ready):
-                    m.d.sync += self.overflow.eq(1)
+
+        # A received byte waits in the UART until it is accepted by the queue, and is lost only if
+        # the next frame starts before that. A frame or parity error is lost if not accepted in
+        # the same cycle.
+        for index, channel in enumerate(channels):
+            m.d.comb += lost[index].eq(channel.rx_ovf |
+                ((channel.rx_ferr | channel.rx_perr) & ~accepted[index]))
+        with m.If(lost.any() & (~overflow | queue.i.ready)):
+            m.d.sync += overflow.eq(1)
+            for index in reversed(range(len(channels))):
+                with m.If(lost[index]):
+                    m.d.sync += overflow_channel.eq(index)
 
         offset = Signal(1)
         m.d.comb += self.o_stream.payload.eq(queue.o.payload.as_value().word_select(offset, 8))
@@ -102,7 +125,6 @@ class UARTAnalyzerInterface:
         self._periods = [assembly.add_clock_divisor(period, ref_period=assembly.sys_clk_period,
                             round_mode="nearest", name="baud")
                          for period in component.periods]
-        self._overflow = assembly.add_ro_register(component.overflow)
 
     def _log(self, message, *args):
         self._logger.log(self._level, "UART analyzer: " + message, *args)
@@ -117,6 +139,51 @@ class UARTAnalyzerInterface:
         """
         return self._periods[self._channels.index(channel)]
 
+    async def capture_raw(self) -> memoryview:
+        """Capture a sequence of messages in the binary format.
+
+        Returns a buffer of 2-byte messages, in the format described in :meth:`decode`. This
+        function is intended for recording traffic with the least possible overhead.
+        """
+        size = 2
+        return await self._pipe.recv((self._pipe.readable - (self._pipe.readable % size)) or size)
+
+    def decode(self, messages: bytes | bytearray | memoryview
+               ) -> list[tuple[str, bytearray | UARTAnalyzerError]]:
+        """Decode a sequence of messages in the binary format.
+
+        Each message is 2 bytes long. Bits 0 to 5 of the first byte are the index of the channel
+        (in the order of the :py:`channels` argument, not counting the ones without a pin),
+        bits 6 to 7 are the :class:`UARTAnalyzerError` code, and the second byte is the received
+        data (if the error code is :py:enum:member:`UARTAnalyzerError.Good`).
+
+        Returns a list in the format described in :meth:`capture`.
+        """
+        assert len(messages) % 2 == 0
+        headers = bytes(memoryview(messages)[0::2])
+        payload = bytes(memoryview(messages)[1::2])
+
+        # Messages are processed in runs with the same header (i.e. same channel and error code),
+        # since most of the time, the same channel receives many bytes in a row. A run of good
+        # messages never directly follows another one from the same channel.
+        results = []
+        for run in re.finditer(rb"(.)\1*", headers, re.DOTALL):
+            header  = run[0][0]
+            channel = self._channels[header & 0x3f]
+            error   = UARTAnalyzerError(header >> 6)
+            if error == UARTAnalyzerError.Good:
+                results.append((channel, bytearray(payload[run.start():run.end()])))
+            else:
+                results.extend((channel, error) for _ in range(run.end() - run.start()))
+
+        if self._logger.isEnabledFor(self._level):
+            for channel, item in results:
+                if isinstance(item, UARTAnalyzerError):
+                    self._log("chan=%s err=%s", channel, item.name)
+                else:
+                    self._log("chan=%s data=<%s>", channel, item.hex())
+        return results
+
     async def capture(self) -> list[tuple[str, bytearray | UARTAnalyzerError]]:
         """Capture a sequence of messages.
 
@@ -125,40 +192,15 @@ class UARTAnalyzerInterface:
         that an error has occurred. (The :py:enum:member:`UARTAnalyzerError.Good` error code will
         never appear in results.)
 
+        The :py:enum:member:`UARTAnalyzerError.Overflow` error indicates that the host was not
+        able to keep up with the incoming data, and some of the data or errors received on
+        :py:`channel` (and possibly other channels) immediately before it were lost.
+
         This function concatenates consecutive data messages to improve readability; despite this,
         protocol decoders must be prepared to handle data being split across any number of messages
         at any boundaries.
         """
-
-        if await self._overflow:
-            raise GlasgowAppletError("overflow")
-
-        results = []
-
-        def add_data(channel, data):
-            self._log(f"chan={channel} data={message.data:02x}")
-            match results:
-                case [*_, (last_channel, bytearray() as last_data)] if channel == last_channel:
-                    last_data.append(data)
-                case _:
-                    results.append((channel, bytearray([data])))
-
-        def add_error(channel, error):
-            self._log(f"chan={channel} err={message.error.name}")
-            results.append((channel, error))
-
-        size = 2
-        data = await self._pipe.recv((self._pipe.readable - (self._pipe.readable % size)) or size)
-        for start in range(len(data))[::size]:
-            message = UARTAnalyzerMessage.from_bits(
-                int.from_bytes(data[start:start + size], "little"))
-            channel = self._channels[message.channel]
-            if message.error == UARTAnalyzerError.Good:
-                add_data(channel, message.data)
-            else:
-                add_error(channel, message.error)
-
-        return results
+        return self.decode(await self.capture_raw())
 
 
 class UARTAnalyzerApplet(GlasgowAppletV2):
@@ -179,6 +221,15 @@ class UARTAnalyzerApplet(GlasgowAppletV2):
       hexadecimal digits. (If ``--ascii`` is used.)
     * ``<CH>,#F``, where <CH> is the same as above, to indicate a frame error on this channel.
     * ``<CH>,#P``, where <CH> is the same as above, to indicate a parity error on this channel.
+    * ``<CH>,#O``, where <CH> is the same as above, to indicate that data was lost because
+      the host could not keep up with the incoming data, starting with this channel.
+
+    If ``--binary`` is used, the capture file contains a sequence of 2-byte messages instead.
+    Bits 0..5 of the first byte are the channel number (0 for ``rx`` and 1 for ``tx``, or 0 if only
+    one of them is used), bits 6..7 of the first byte are the error code (0 for none, 1 for frame
+    error, 2 for parity error, 3 for lost data), and the second byte is the received data (if
+    the error code is 0). This format is much cheaper to record than CSV, and can be decoded later
+    or by another program.
     """
 
     @classmethod
@@ -216,18 +267,33 @@ class UARTAnalyzerApplet(GlasgowAppletV2):
     @classmethod
     def add_run_arguments(cls, parser):
         parser.add_argument("file", metavar="FILE",
-            type=argparse.FileType("w"), nargs="?", default=sys.stdout,
-            help="save communications to FILE as comma separated values")
-        parser.add_argument(
+            nargs="?", default="-",
+            help="save communications to FILE as comma separated values (default: stdout)")
+        g_format = parser.add_mutually_exclusive_group()
+        g_format.add_argument(
             "--ascii", "-A", default=False, action="store_true",
             help="format output data as ASCII with escape sequences")
+        g_format.add_argument(
+            "--binary", "-B", default=False, action="store_true",
+            help="save raw messages in a binary format (see description)")
 
     async def run(self, args):
+        # The file is opened here rather than by the argument parser because the mode depends
+        # on the output format.
+        try:
+            file = argparse.FileType("wb" if args.binary else "w")(args.file)
+        except argparse.ArgumentTypeError as exn:
+            raise GlasgowAppletError(str(exn))
         try:
-            args.file.truncate()
+            file.truncate()
         except OSError:
             pass # pipe, tty/pty, etc
 
+        if args.binary:
+            while True:
+                file.write(await self.uart_analyzer_iface.capture_raw())
+                file.flush()
+
         if args.ascii:
             def escape_data(data: bytearray):
                 data = data.replace(b"\\", b"\\\\")
@@ -246,14 +312,16 @@ class UARTAnalyzerApplet(GlasgowAppletV2):
             for channel, data in await self.uart_analyzer_iface.capture():
                 match data:
                     case bytearray():
-                        args.file.write(f"{channel},{escape_data(data)}\n")
+                        file.write(f"{channel},{escape_data(data)}\n")
                     case UARTAnalyzerError.Frame:
-                        args.file.write(f"{channel},#F\n")
+                        file.write(f"{channel},#F\n")
                     case UARTAnalyzerError.Parity:
-                        args.file.write(f"{channel},#P\n")
+                        file.write(f"{channel},#P\n")
+                    case UARTAnalyzerError.Overflow:
+                        file.write(f"{channel},#O\n")
                     case _:
                         assert False
-            args.file.flush()
+            file.flush()
 
     @classmethod
     def tests(cls):
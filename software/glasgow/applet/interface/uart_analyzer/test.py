@@ -3,7 +3,7 @@ import logging
 from glasgow.applet.interface.uart import UARTInterface
 from glasgow.applet import GlasgowAppletV2TestCase, synthesis_test, applet_v2_simulation_test
 
-from . import UARTAnalyzerError, UARTAnalyzerApplet
+from . import UARTAnalyzerError, UARTAnalyzerComponent, UARTAnalyzerApplet
 
 
 class UARTAnalyzerAppletTestCase(GlasgowAppletV2TestCase, applet=UARTAnalyzerApplet):
@@ -45,3 +45,60 @@ class UARTAnalyzerAppletTestCase(GlasgowAppletV2TestCase, applet=UARTAnalyzerApp
             ("rx", UARTAnalyzerError.Frame),
             ("rx", b"\xC3"),
         ])
+
+    def overflow_prepare(self, assembly):
+        self.loopback_prepare(assembly)
+        self.component, = (module for module, name in assembly._modules
+                           if isinstance(module, UARTAnalyzerComponent))
+
+    @applet_v2_simulation_test(prepare=overflow_prepare, args="--rx A0 --tx A1 -b 100000")
+    async def test_overflow(self, applet, ctx):
+        await self.rx_uart.set_baud(100000)
+
+        # Stall the output until the queue (512 messages) and the byte waiting in the UART are
+        # full; each of the next bytes replaces the one waiting in the UART.
+        ctx.set(self.component.o_stream.ready, 0)
+        sent = bytes(range(256)) * 2 + b"ABCD"
+        await self.rx_uart.write(sent)
+        await ctx.tick().repeat(len(sent) * 100 + 1000)
+        ctx.set(self.component.o_stream.ready, 1)
+        await ctx.tick().repeat(100)
+        await self.rx_uart.write(b"Z")
+
+        received = []
+        while len(received) < 512 + 3:
+            for channel, item in await applet.uart_analyzer_iface.capture():
+                if isinstance(item, UARTAnalyzerError):
+                    received.append((channel, item))
+                else:
+                    received += ((channel, byte) for byte in item)
+        # The overflow is reported once, with priority over the byte waiting in the UART.
+        self.assertEqual(received, [
+            *(("rx", byte) for byte in sent[:512]),
+            ("rx", UARTAnalyzerError.Overflow),
+            ("rx", sent[-1]),
+            ("rx", ord("Z")),
+        ])
+
+    @applet_v2_simulation_test(args="--rx A0 --tx A1")
+    async def test_decode(self, applet, ctx):
+        self.assertEqual(applet.uart_analyzer_iface.decode(bytes([
+            0x00, 0x61, 0x00, 0x62, # rx a, rx b
+            0x01, 0x63,             # tx c
+            0x00, 0x64,             # rx d
+            0x41, 0x00, 0x41, 0x00, # tx #F, tx #F
+            0x81, 0x00,             # tx #P
+            0x01, 0x65, 0x01, 0x66, # tx e, tx f
+            0xc0, 0x00,             # rx #O
+            0x00, 0x67,             # rx g
+        ])), [
+            ("rx", b"ab"),
+            ("tx", b"c"),
+            ("rx", b"d"),
+            ("tx", UARTAnalyzerError.Frame),
+            ("tx", UARTAnalyzerError.Frame),
+            ("tx", UARTAnalyzerError.Parity),
+            ("tx", b"ef"),
+            ("rx", UARTAnalyzerError.Overflow),
+            ("rx", b"g"),
+        ])
@@ -5,7 +5,7 @@
 # Accession: G00105
 
 from typing import Literal
-import asyncio
+import re
 import logging
 import argparse
 
@@ -16,6 +16,22 @@ from glasgow.applet import GlasgowAppletError, GlasgowAppletV2
 __all__ = ["Memory24xInterface"]
 
 
+def _diff(expected: bytes | bytearray | memoryview,
+          actual: bytes | bytearray | memoryview) -> list[range]:
+    """Find the ranges of offsets at which :py:`expected` and :py:`actual` differ.
+
+    Rather than comparing the buffers byte by byte in Python, they are compared as a whole by
+    XORing them as integers, and the runs of non-zero bytes in the result are found by a regular
+    expression; both of these run in native code.
+    """
+    assert len(expected) == len(actual)
+    mask = int.from_bytes(expected, "little") ^ int.from_bytes(actual, "little")
+    if mask == 0:
+        return []
+    return [range(match.start(), match.end())
+            for match in re.finditer(rb"[^\x00]+", mask.to_bytes(len(expected), "little"))]
+
+
 class Memory24xInterface:
     def __init__(self, logger: logging.Logger, interface: I2CControllerInterface, i2c_address: int,
                  address_width: Literal[1, 2], page_size: int):
@@ -88,8 +104,10 @@ class Memory24xInterface:
         reading is done in one long request, but writing is done page-wise, and the address is sent
         anew for each write.
 
-        This method waits for the write to complete by polling the device until it responds to its
-        address ("Acknowledge Polling").
+        This method waits for each page write to complete by polling the device until it responds
+        to its address ("Acknowledge Polling"). The polling is done by the I²C controller gateware,
+        so the writes for every page, including the polling, are submitted as one batch, and the
+        host does not wait for a round trip between pages.
 
         Raises
         ------
@@ -97,21 +115,40 @@ class Memory24xInterface:
             If communication fails; if a previous write hasn't completed yet.
         """
 
-        while len(data) > 0:
-            if address % self._page_size == 0:
-                chunk_size = self._page_size
-            else:
-                chunk_size = self._page_size - address % self._page_size
-            chunk, data = data[:chunk_size], data[chunk_size:]
+        async with self._i2c_iface.batch():
+            while len(data) > 0:
+                if address % self._page_size == 0:
+                    chunk_size = self._page_size
+                else:
+                    chunk_size = self._page_size - address % self._page_size
+                chunk, data = data[:chunk_size], data[chunk_size:]
 
-            i2c_addr, addr_bytes = self._carry_addr(address)
-            self._log("write i2c-addr=%#04x addr=%#06x data=<%s>", i2c_addr, address, chunk.hex())
+                i2c_addr, addr_bytes = self._carry_addr(address)
+                self._log("write i2c-addr=%#04x addr=%#06x data=<%s>",
+                          i2c_addr, address, chunk.hex())
 
-            await self._i2c_iface.write(i2c_addr, addr_bytes + chunk)
-            while not await self._i2c_iface.ping(i2c_addr):
-                await asyncio.sleep(0.050) # 50 ms
+                await self._i2c_iface.write(i2c_addr, addr_bytes + chunk)
+                await self._i2c_iface.poll(i2c_addr)
 
-            address += len(chunk)
+                address += len(chunk)
+
+    async def verify(self, address: int, data: bytes | bytearray | memoryview) -> list[range]:
+        """Compare :py:`data` with the contents of memory at :py:`address`.
+
+        Returns the (possibly empty) list of address ranges at which the contents of memory differ
+        from :py:`data`.
+
+        Raises
+        ------
+        I2CNotAcknowledged
+            If communication fails; if a previous write hasn't completed yet.
+        """
+        actual = await self.read(address, len(data))
+        ranges = [range(address + diff.start, address + diff.stop)
+                  for diff in _diff(data, actual)]
+        for diff in ranges:
+            self._log("verify mismatch addr=%#06x len=%#06x", diff.start, len(diff))
+        return ranges
 
 
 class Memory24xApplet(GlasgowAppletV2):
@@ -261,16 +298,16 @@ class Memory24xApplet(GlasgowAppletV2):
                 gold_data = args.file.read()
 
             live_data = await self.m24x_iface.read(args.address, len(gold_data))
-            if live_data == gold_data:
-                self.logger.info("verify PASS")
-            else:
-                for offset, (gold_byte, live_byte) in enumerate(zip(gold_data, live_data)):
-                    if gold_byte != live_byte:
-                        differs_at = args.address + offset
-                        break
+            if diff := _diff(gold_data, live_data):
+                differs_at = diff[0].start
                 self.logger.error("first differing byte at %#08x (expected %#04x, actual %#04x)",
-                                  differs_at, gold_byte, live_byte)
+                                  args.address + differs_at,
+                                  gold_data[differs_at], live_data[differs_at])
+                self.logger.error("%d bytes differ in %d ranges",
+                                  sum(len(chunk) for chunk in diff), len(diff))
                 raise GlasgowAppletError("verify FAIL")
+            else:
+                self.logger.info("verify PASS")
 
     @classmethod
     def tests(cls):
@@ -1,7 +1,14 @@
 import unittest
 
-from glasgow.applet import GlasgowAppletV2TestCase, synthesis_test, applet_v2_hardware_test
-from . import Memory24xApplet
+from amaranth import *
+from amaranth.lib import io
+
+from glasgow.gateware.ports import PortGroup
+from glasgow.gateware.i2c import I2CTarget
+from glasgow.simulation.assembly import SimulationAssembly
+from glasgow.applet import GlasgowAppletV2TestCase, synthesis_test
+from glasgow.applet import applet_v2_simulation_test, applet_v2_hardware_test
+from . import Memory24xApplet, _diff
 
 
 class Memory24xAppletTestCase(GlasgowAppletV2TestCase, applet=Memory24xApplet):
@@ -9,6 +16,96 @@ class Memory24xAppletTestCase(GlasgowAppletV2TestCase, applet=Memory24xApplet):
     def test_build(self):
         self.assertBuilds("-W 2")
 
+    # The simulated memory is a 24C02-like device with 8-byte pages, which does not respond to
+    # its address while a write cycle is in progress. The system clock is 1 MHz in simulation,
+    # so each cycle is 1 µs.
+    write_cycles = 5000 # tWR = 5 ms
+
+    def prepare_memory(self, assembly: SimulationAssembly):
+        ctl_ports = PortGroup(
+            scl=assembly.get_pin("A0"),
+            sda=assembly.get_pin("A1")
+        )
+        tgt_ports = PortGroup(
+            scl=io.SimulationPort("io", 1),
+            sda=io.SimulationPort("io", 1),
+        )
+
+        m = Module()
+        m.submodules.tgt = tgt = I2CTarget(tgt_ports)
+        m.d.comb += [
+            ctl_ports.scl.i.eq(~(ctl_ports.scl.oe | tgt_ports.scl.oe)),
+            tgt_ports.scl.i.eq(~(ctl_ports.scl.oe | tgt_ports.scl.oe)),
+            ctl_ports.sda.i.eq(~(ctl_ports.sda.oe | tgt_ports.sda.oe)),
+            tgt_ports.sda.i.eq(~(ctl_ports.sda.oe | tgt_ports.sda.oe)),
+        ]
+
+        self.memory = bytearray(b"\xff" * 256)
+        self.cycle  = 0
+        async def testbench(ctx):
+            ctx.set(tgt.address, 0x50)
+            ctx.set(tgt.ack_o, 1)
+            pointer   = 0
+            received  = 0
+            page      = {}
+            busy_till = None
+            async for _ in ctx.tick():
+                self.cycle += 1
+                if busy_till is not None and self.cycle >= busy_till:
+                    ctx.set(tgt.address, 0x50)
+                    busy_till = None
+                if ctx.get(tgt.start):
+                    received = 0
+                if ctx.get(tgt.write):
+                    if received == 0:
+                        pointer = ctx.get(tgt.data_i)
+                    else:
+                        page[pointer] = ctx.get(tgt.data_i)
+                        pointer = (pointer & ~7) | ((pointer + 1) & 7)
+                    received += 1
+                if ctx.get(tgt.read):
+                    ctx.set(tgt.data_o, self.memory[pointer])
+                    pointer = (pointer + 1) & 0xff
+                if ctx.get(tgt.stop) and page:
+                    for address, value in page.items():
+                        self.memory[address] = value
+                    page.clear()
+                    ctx.set(tgt.address, 0) # not acknowledged until the write cycle ends
+                    busy_till = self.cycle + self.write_cycles
+
+        assembly.add_submodule(m)
+        assembly.add_testbench(testbench, background=True)
+
+    @applet_v2_simulation_test(prepare=prepare_memory, args="-f 100 -W 1 -P 8")
+    async def test_sim_write(self, applet, ctx):
+        round_trips = 0
+        pipe_recv = applet.i2c_iface._pipe.recv
+        async def counting_recv(length):
+            nonlocal round_trips
+            round_trips += 1
+            return await pipe_recv(length)
+        applet.i2c_iface._pipe.recv = counting_recv
+
+        data  = bytes(range(3, 32))
+        start = self.cycle
+        await applet.m24x_iface.write(0x05, data)
+        elapsed = self.cycle - start
+        self.assertEqual(self.memory[0x05:0x22], data)
+        # All 5 pages, including acknowledge polling, are written with a single round trip.
+        self.assertEqual(round_trips, 1)
+        # Every page takes tWR plus the time to transfer it, which is about 1.2 ms for a full page
+        # at 83 kHz (the closest to 100 kHz in simulation). Acknowledge polling is performed as
+        # soon as the transfer of the previous page ends, and adds at most one address cycle per
+        # page after tWR.
+        self.assertGreater(elapsed, 5 * self.write_cycles)
+        self.assertLess(elapsed, 5 * (self.write_cycles + 1_500))
+
+        self.assertEqual(await applet.m24x_iface.verify(0x05, data), [])
+        self.memory[0x07] ^= 1
+        self.memory[0x10:0x12] = b"\x00\x00"
+        self.assertEqual(await applet.m24x_iface.verify(0x05, data),
+                         [range(0x07, 0x08), range(0x10, 0x12)])
+
     @applet_v2_hardware_test(args="-V 3.3 -W 1 -P 4", mocks=["m24x_iface._i2c_iface"])
     async def test_hardware_1wide(self, applet):
         await applet.m24x_iface.write(0x100 - 9, b"mary had a little lamb")
@@ -18,3 +115,11 @@ class Memory24xAppletTestCase(GlasgowAppletV2TestCase, applet=Memory24xApplet):
     async def test_hardware_2wide(self, applet):
         await applet.m24x_iface.write(5, b"mary had a little lamb")
         assert await applet.m24x_iface.read(5, 22) == b"mary had a little lamb"
+
+
+class Memory24xDiffTestCase(unittest.TestCase):
+    def test_diff(self):
+        self.assertEqual(_diff(b"", b""), [])
+        self.assertEqual(_diff(b"abcd", b"abcd"), [])
+        self.assertEqual(_diff(b"abcdefgh", b"xbcdeFGh"), [range(0, 1), range(5, 7)])
+        self.assertEqual(_diff(b"\x00" * 1000, b"\x00" * 999 + b"\x80"), [range(999, 1000)])
@@ -79,6 +79,7 @@ import argparse
 import logging
 import asyncio
 import struct
+import re
 from amaranth import *
 from amaranth.lib import io
 from amaranth.lib.cdc import FFSynchronizer
@@ -359,47 +360,195 @@ class ONFIInterface:
         self._log("read unique ID")
         return await self._do_read(command=0xED, address=[0x00], wait=True, length=32)
 
-    async def read(self, row, column, length):
-        self._log("read row=%#08x column=%#06x", row, column)
-        await self._do(command=0x00, address=[
+    @staticmethod
+    def _column_address(column):
+        return [
             (column >>  0) & 0xff,
             (column >>  8) & 0xff,
+        ]
+
+    @staticmethod
+    def _row_address(row):
+        return [
             (row >>  0) & 0xff,
             (row >>  8) & 0xff,
             (row >> 16) & 0xff,
+        ]
+
+    async def _queue_status(self):
+        self._log("read status")
+        await self._do(command=0x70)
+        await self._read(1)
+
+    async def _status_ok(self):
+        status, = await self.lower.read(1)
+        return (status & BIT_STATUS_FAIL) == 0
+
+    async def read(self, row, column, length):
+        self._log("read row=%#08x column=%#06x", row, column)
+        await self._do(command=0x00, address=[
+            *self._column_address(column),
+            *self._row_address(row),
         ])
         return await self._do_read(command=0x30, wait=True, length=length)
 
-    async def program(self, row, chunks):
+    async def _queue_read(self, row, column):
+        self._log("read row=%#08x column=%#06x", row, column)
+        await self._do(command=0x00, address=[
+            *self._column_address(column),
+            *self._row_address(row),
+        ])
+        await self._do(command=0x30, wait=True)
+
+    async def _queue_read_cache(self, row, *, end):
+        if end:
+            self._log("read cache end row=%#08x", row)
+            await self._do(command=0x3F, wait=True)
+        else:
+            self._log("read cache sequential row=%#08x", row)
+            await self._do(command=0x31, wait=True)
+
+    async def read_pages(self, rows, length, *, column=0, block_size=None, depth=8):
+        """Read :py:`length` bytes starting at :py:`column` from each page in :py:`rows`
+        (a sequence, such as a :class:`range`).
+
+        Returns an asynchronous iterator of :py:`(row, data)` tuples. The commands for up to
+        :py:`depth` pages are in flight at any time, so that the latency of the USB roundtrip
+        is not incurred for every page.
+
+        If :py:`block_size` is specified, consecutive pages within a block are read using the Read
+        Cache Sequential and Read Cache End commands, which overlap transferring the data of
+        a page with loading the next one from the array. In this case, :py:`column` must be zero.
+        """
+        assert block_size is None or column == 0
+
+        in_flight = []
+        for index, row in enumerate(rows):
+            if block_size is None:
+                await self._queue_read(row, column)
+            else:
+                first = index == 0 or rows[index - 1] != row - 1 or row % block_size == 0
+                last  = (index == len(rows) - 1 or rows[index + 1] != row + 1 or
+                         (row + 1) % block_size == 0)
+                if first:
+                    await self._queue_read(row, column)
+                if not (first and last):
+                    # After Read, the page is in the data register; Read Cache Sequential moves
+                    # it to the cache register and starts loading the next page, while Read
+                    # Cache End only moves it to the cache register.
+                    await self._queue_read_cache(row, end=last)
+            await self._read(length)
+            in_flight.append(row)
+
+            if len(in_flight) >= depth:
+                data = await self.lower.read(length)
+                self._log("read data=<%s>", dump_hex(data))
+                yield in_flight.pop(0), data
+        while in_flight:
+            data = await self.lower.read(length)
+            self._log("read data=<%s>", dump_hex(data))
+            yield in_flight.pop(0), data
+
+    async def _queue_program(self, row, chunks, *, command=0x10):
         self._log("program row=%#08x", row)
         await self._do_write(command=0x80, address=[
-            0,
-            0,
-            (row >>  0) & 0xff,
-            (row >>  8) & 0xff,
-            (row >> 16) & 0xff,
+            *self._column_address(0),
+            *self._row_address(row),
         ])
 
         for (column, data) in chunks:
             data = bytes(data)
             self._log("column=%#06x data=<%s>", column, dump_hex(data))
-            await self._do_write(command=0x85, address=[
-                (column >>  0) & 0xff,
-                (column >>  8) & 0xff,
-            ], data=data)
+            await self._do_write(command=0x85, address=self._column_address(column), data=data)
 
-        await self._do(command=0x10, wait=True)
-        return (await self.read_status() & BIT_STATUS_FAIL) == 0
+        await self._do(command=command, wait=True)
 
-    async def erase(self, row):
+    async def program(self, row, chunks):
+        await self._queue_program(row, chunks)
+        await self._queue_status()
+        return await self._status_ok()
+
+    async def program_pages(self, groups, *, depth=8):
+        """Program a sequence of page groups.
+
+        Each element of :py:`groups` is a list of :py:`(row, chunks)` tuples, with
+        :py:`chunks` in the format accepted by :meth:`program`. A group with more than one
+        element is programmed with a single interleaved (multi-plane) operation; the rows in
+        such a group must address the same page in blocks that belong to different planes.
+
+        Returns an asynchronous iterator of :py:`(rows, success)` tuples, one for each group.
+        The commands for up to :py:`depth` groups are in flight at any time.
+        """
+        in_flight = []
+        for group in groups:
+            for index, (row, chunks) in enumerate(group):
+                await self._queue_program(row, chunks,
+                    command=0x10 if index == len(group) - 1 else 0x11)
+            await self._queue_status()
+            in_flight.append([row for row, chunks in group])
+            if len(in_flight) >= depth:
+                yield in_flight.pop(0), await self._status_ok()
+        while in_flight:
+            yield in_flight.pop(0), await self._status_ok()
+
+    async def _queue_erase(self, row, *, command=0xD0):
         self._log("erase row=%#08x", row)
-        await self._do(command=0x60, address=[
-            (row >>  0) & 0xff,
-            (row >>  8) & 0xff,
-            (row >> 16) & 0xff,
-        ])
-        await self._do(command=0xD0, wait=True)
-        return (await self.read_status() & BIT_STATUS_FAIL) == 0
+        await self._do(command=0x60, address=self._row_address(row))
+        await self._do(command=command, wait=True)
+
+    async def erase(self, row):
+        await self._queue_erase(row)
+        await self._queue_status()
+        return await self._status_ok()
+
+    async def erase_blocks(self, groups, *, depth=8):
+        """Erase a sequence of block groups.
+
+        Each element of :py:`groups` is a list of rows addressing the blocks to erase. A group
+        with more than one element is erased with a single interleaved (multi-plane) operation;
+        the blocks in such a group must belong to different planes.
+
+        Returns an asynchronous iterator of :py:`(rows, success)` tuples, one for each group.
+        The commands for up to :py:`depth` groups are in flight at any time.
+        """
+        in_flight = []
+        for group in groups:
+            for index, row in enumerate(group):
+                await self._queue_erase(row, command=0xD0 if index == len(group) - 1 else 0xD1)
+            await self._queue_status()
+            in_flight.append(list(group))
+            if len(in_flight) >= depth:
+                yield in_flight.pop(0), await self._status_ok()
+        while in_flight:
+            yield in_flight.pop(0), await self._status_ok()
+
+
+def split_pages(data, page_size, spare_size):
+    """Split :py:`data`, consisting of whole pages including the spare area, into the data areas
+    and the spare areas of every page.
+
+    Returns a :py:`(data, spare)` tuple of :class:`bytes`.
+    """
+    stride = page_size + spare_size
+    assert len(data) % stride == 0
+    data = memoryview(data)
+    return (
+        b"".join(data[start:start + page_size] for start in range(0, len(data), stride)),
+        b"".join(data[start + page_size:start + stride] for start in range(0, len(data), stride)),
+    )
+
+
+def find_bad_block_markers(spares, spare_size):
+    """Find factory bad block markers in :py:`spares`, consisting of spare areas of consecutive
+    pages (or of any other sequence of pages that should be checked).
+
+    ONFI memories mark a block as bad by programming the first byte of the spare area of
+    its first or last page to a value other than 0xFF. Returns a list of indexes of the spare
+    areas that contain such a marker.
+    """
+    assert len(spares) % spare_size == 0
+    markers = bytes(memoryview(spares)[::spare_size])
+    return [match.start() for match in re.finditer(rb"[^\xff]", markers)]
 
 
 class MemoryONFIApplet(GlasgowApplet):
@@ -430,8 +579,15 @@ class MemoryONFIApplet(GlasgowApplet):
 
     * Cmd 0x70: Read Status (all devices)
     * Cmd 0x00 Addr Col1..2,Row1..3 Cmd 0x30: Read (all devices)
+    * Cmd 0x31, Cmd 0x3F: Read Cache Sequential/End (ONFI devices with Read Cache)
     * Cmd 0x60 Addr Row1..3 Cmd 0xD0: Erase (all devices)
+    * Cmd 0x60 Addr Row1..3 Cmd 0xD1: Erase Interleaved (ONFI devices with interleaved operations)
     * Cmd 0x80 Addr Col1..2,Row1..3 [Cmd 0x85 Col1..2]+ Cmd 0x10: Page Program (all devices)
+    * Cmd 0x80 Addr Col1..2,Row1..3 [Cmd 0x85 Col1..2]+ Cmd 0x11: Page Program Interleaved
+      (ONFI devices with interleaved operations)
+
+    When programming whole groups of blocks that belong to different planes, the pages with
+    the same index in each of these blocks are programmed together, in order of page index.
     """
 
     @classmethod
@@ -541,6 +697,15 @@ class MemoryONFIApplet(GlasgowApplet):
             "spare_file", metavar="SPARE-FILE", type=argparse.FileType("rb"),
             help="program bytes to spare area from SPARE-FILE")
 
+        p_scan_bad = p_operation.add_parser(
+            "scan-bad", help="scan blocks containing a page range for factory bad block markers")
+        p_scan_bad.add_argument(
+            "start_page", metavar="PAGE", type=address,
+            help="scan starting at block containing page PAGE")
+        p_scan_bad.add_argument(
+            "count", metavar="COUNT", type=count,
+            help="scan blocks containing the next COUNT pages")
+
         p_erase = p_operation.add_parser(
             "erase", help="erase any blocks containing a page range")
         p_erase.add_argument(
@@ -716,54 +881,110 @@ class MemoryONFIApplet(GlasgowApplet):
                 self.logger.error("device is write-protected")
                 return
 
+        cache  = False
+        planes = 1
+        if onfi_param is not None:
+            cache = bool(onfi_param.opt_commands.read_cache)
+            if onfi_param.features.interleaved_ops:
+                planes = 1 << onfi_param.interleaved_address_bits.count
+
         if args.operation == "read":
-            row   = args.start_page
-            count = args.count
-            while count > 0:
+            rows = range(args.start_page, args.start_page + args.count)
+            batch_rows, batch_chunks = [], []
+            async for row, chunk in onfi_iface.read_pages(rows, length=page_size + spare_size,
+                                                         block_size=block_size if cache else None):
                 self.logger.info("reading page (row) %d", row)
-                chunk = await onfi_iface.read(column=0, row=row, length=page_size + spare_size)
-
+                batch_rows.append(row)
+                batch_chunks.append(chunk)
+                if len(batch_rows) < 64 and row != rows[-1]:
+                    continue
+
+                data, spare = split_pages(b"".join(batch_chunks), page_size, spare_size)
+                for index in find_bad_block_markers(spare, spare_size):
+                    if batch_rows[index] % block_size in (0, block_size - 1):
+                        self.logger.warning("block %d has a bad block marker in page (row) %d",
+                                            batch_rows[index] // block_size, batch_rows[index])
                 if args.spare_file:
-                    args.data_file.write(chunk[:page_size])
+                    args.data_file.write(data)
                     args.data_file.flush()
-                    args.spare_file.write(chunk[-spare_size:])
+                    args.spare_file.write(spare)
                     args.spare_file.flush()
                 else:
-                    args.data_file.write(chunk)
+                    args.data_file.write(b"".join(batch_chunks))
                     args.data_file.flush()
-
-                row   += 1
-                count -= 1
+                batch_rows, batch_chunks = [], []
+
+        if args.operation == "scan-bad":
+            first_block = args.start_page // block_size
+            last_block  = (args.start_page + args.count - 1) // block_size
+            rows = [row
+                    for block in range(first_block, last_block + 1)
+                    for row in (block * block_size, (block + 1) * block_size - 1)]
+            spares = bytearray()
+            async for row, spare in onfi_iface.read_pages(rows, column=page_size, length=1):
+                spares += spare
+            bad_blocks = sorted({rows[index] // block_size
+                                 for index in find_bad_block_markers(spares, 1)})
+            for block in bad_blocks:
+                self.logger.info("block %d (row %d) is marked bad", block, block * block_size)
+            self.logger.info("found %d bad blocks out of %d",
+                             len(bad_blocks), last_block - first_block + 1)
 
         if args.operation == "program":
-            row   = args.start_page
-            count = args.count
-            while count > 0:
+            def read_page():
                 if args.spare_file:
                     data   = args.data_file.read(page_size)
                     spare  = args.spare_file.read(spare_size)
-                    chunks = [(0, data), (page_size, spare)]
+                    return [(0, data), (page_size, spare)]
                 else:
                     chunk  = args.data_file.read(page_size + spare_size)
-                    chunks = [(0, chunk)]
-
-                self.logger.info("programming page (row) %d", row)
-                if not await onfi_iface.program(row=row, chunks=chunks):
-                    self.logger.error("failed to program page (row) %d", row)
-
-                row   += 1
-                count -= 1
+                    return [(0, chunk)]
+
+            def page_groups():
+                row = args.start_page
+                end = args.start_page + args.count
+                group_size = planes * block_size
+                while row < end:
+                    if planes > 1 and row % group_size == 0 and row + group_size <= end:
+                        # Pages are read from the file in order, but the pages with the same index
+                        # in each of the blocks are programmed together.
+                        pages = [read_page() for _ in range(group_size)]
+                        for page in range(block_size):
+                            yield [(row + plane * block_size + page,
+                                    pages[plane * block_size + page])
+                                   for plane in range(planes)]
+                        row += group_size
+                    else:
+                        yield [(row, read_page())]
+                        row += 1
+
+            async for rows, success in onfi_iface.program_pages(page_groups()):
+                self.logger.info("programming page (row) %s",
+                                 ", ".join(str(row) for row in rows))
+                if not success:
+                    self.logger.error("failed to program page (row) %s",
+                                      ", ".join(str(row) for row in rows))
 
         if args.operation == "erase":
-            row   = args.start_page
-            count = args.count
-            while count > 0:
-                self.logger.info("erasing block %d (row %d)", row // block_size, row)
-                if not await onfi_iface.erase(row=row):
-                    self.logger.error("failed to erase block %d (row %d)", row // block_size, row)
-
-                row   += block_size
-                count -= block_size
+            def block_groups():
+                rows = range(args.start_page, args.start_page + args.count, block_size)
+                index = 0
+                while index < len(rows):
+                    if planes > 1 and rows[index] // block_size % planes == 0 and \
+                            index + planes <= len(rows):
+                        yield rows[index:index + planes]
+                        index += planes
+                    else:
+                        yield rows[index:index + 1]
+                        index += 1
+
+            async for rows, success in onfi_iface.erase_blocks(block_groups()):
+                for row in rows:
+                    self.logger.info("erasing block %d (row %d)", row // block_size, row)
+                if not success:
+                    self.logger.error("failed to erase block %s (row %s)",
+                                      ", ".join(str(row // block_size) for row in rows),
+                                      ", ".join(str(row) for row in rows))
 
     @classmethod
     def tests(cls):
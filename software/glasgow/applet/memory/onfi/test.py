@@ -1,8 +1,296 @@
+import io
+import struct
+import logging
+import argparse
+import amaranth.lib.crc
+
 from ... import *
-from . import MemoryONFIApplet
+from . import MemoryONFIApplet, split_pages, find_bad_block_markers
+
+
+_crc_onfi = amaranth.lib.crc.Algorithm(crc_width=16, polynomial=0x8005,
+    initial_crc=0x4f4e, reflect_input=False, reflect_output=False,
+    xor_output=0)(data_width=8).compute
+
+
+class ONFIModel:
+    """A behavioral model of an ONFI 1.0 NAND Flash memory with a single LUN, which supports
+    the Read Cache commands and interleaved operations on two planes.
+
+    Every operation is recorded in :py:`events`, so that tests can check which commands
+    the applet has used.
+    """
+
+    def __init__(self, *, page_size=32, spare_size=8, block_size=4, blocks=8, planes=2):
+        self.page_size  = page_size
+        self.spare_size = spare_size
+        self.block_size = block_size
+        self.blocks     = blocks
+        self.planes     = planes
+        self.array      = {} # {row: bytearray}
+        self.events     = []
+
+        self._command   = None
+        self._address   = []
+        self._row       = 0
+        self._column    = 0
+        self._buffer    = None # page being programmed
+        self._pending   = []   # programs or erases waiting for the final interleaved command
+        self._data_reg  = None # page most recently loaded from the array
+        self._output    = b""
+        self._busy      = 0
+
+    def page(self, row):
+        return self.array.setdefault(row, bytearray(b"\xff" * (self.page_size + self.spare_size)))
+
+    def parameter_page(self):
+        data = bytearray(256)
+        struct.pack_into("<4sHHH", data, 0,
+            b"ONFI",
+            0b10,                   # ONFI 1.0
+            0b1000,                 # interleaved operations
+            0b10)                   # Read Cache commands
+        struct.pack_into("<12s20sB", data, 32,
+            b"GLASGOW     ", b"ONFI MODEL          ", 0x2c)
+        struct.pack_into("<LHLHLLBBBHHBHBBBBB", data, 80,
+            self.page_size, self.spare_size, self.page_size, self.spare_size,
+            self.block_size, self.blocks, 1,
+            0x23,                   # 3 row address cycles, 2 column address cycles
+            1, 0, 0x0105, 1, 0, 1, 0, 1,
+            self.planes.bit_length() - 1, 0)
+        struct.pack_into("<BHHHHHH", data, 128,
+            10, 0b1, 0, 200, 2000, 25, 100)
+        struct.pack_into("<H", data, 254, _crc_onfi(data[:254]))
+        return bytes(data) * 3
+
+    def _check_planes(self, rows):
+        planes = [(row // self.block_size) % self.planes for row in rows]
+        assert len(set(planes)) == len(planes), f"rows {rows} are not in different planes"
+        pages  = [row % self.block_size for row in rows]
+        assert len(set(pages)) == 1, f"rows {rows} do not have the same page index"
+
+    def write_command(self, command):
+        self._command = command
+        self._address = []
+        match command:
+            case 0xff:
+                self._pending.clear()
+                self._busy = 10
+            case 0x70:
+                self._output = bytes([0b11000000])
+            case 0x80:
+                self._buffer = bytearray(b"\xff" * (self.page_size + self.spare_size))
+            case 0x30:
+                self._data_reg = bytes(self.page(self._row))
+                self._output   = self._data_reg[self._column:]
+                self._busy     = 20
+                self.events.append(("read", self._row))
+            case 0x31:
+                assert self._data_reg is not None, "Read Cache Sequential without Read"
+                self._output   = self._data_reg
+                self._row     += 1
+                self._data_reg = bytes(self.page(self._row))
+                self._busy     = 5
+                self.events.append(("read-cache", self._row - 1))
+            case 0x3F:
+                assert self._data_reg is not None, "Read Cache End without Read"
+                self._output   = self._data_reg
+                self._data_reg = None
+                self._busy     = 5
+                self.events.append(("read-cache-end", self._row))
+            case 0x10 | 0x11:
+                self._pending.append((self._row, self._buffer))
+                if command == 0x10:
+                    rows = [row for row, buffer in self._pending]
+                    self._check_planes(rows)
+                    for row, buffer in self._pending:
+                        page = self.page(row)
+                        page[:] = bytes(a & b for a, b in zip(page, buffer))
+                    self._pending.clear()
+                    self.events.append(("program", *rows))
+                    self._busy = 40
+                else:
+                    self._busy = 5
+            case 0xD0 | 0xD1:
+                self._pending.append(self._row)
+                if command == 0xD0:
+                    rows = list(self._pending)
+                    self._check_planes(rows)
+                    for row in rows:
+                        block = row - row % self.block_size
+                        for page in range(block, block + self.block_size):
+                            self.array.pop(page, None)
+                    self._pending.clear()
+                    self.events.append(("erase", *(row // self.block_size for row in rows)))
+                    self._busy = 40
+                else:
+                    self._busy = 5
+            case 0x00 | 0x85 | 0x60 | 0x90 | 0xEC:
+                pass
+            case _:
+                assert False, f"unexpected command {command:#04x}"
+
+    def write_address(self, byte):
+        self._address.append(byte)
+        match self._command, self._address:
+            case 0x00 | 0x80, [col0, col1, row0, row1, row2]:
+                self._column = col0 | (col1 << 8)
+                self._row    = row0 | (row1 << 8) | (row2 << 16)
+                self._data_reg = None
+            case 0x85, [col0, col1]:
+                self._column = col0 | (col1 << 8)
+            case 0x60, [row0, row1, row2]:
+                self._row    = row0 | (row1 << 8) | (row2 << 16)
+            case 0x90, [0x00]:
+                self._output = bytes([0x2c, 0xda, 0x90, 0x95])
+            case 0x90, [0x20]:
+                self._output = b"ONFI"
+            case 0xEC, [0x00]:
+                self._output = self.parameter_page()
+                self._busy   = 20
+
+    def write_data(self, byte):
+        assert self._command in (0x80, 0x85)
+        self._buffer[self._column] = byte
+        self._column += 1
+
+    def read_data(self):
+        return self._output[0] if self._output else 0xff
+
+    def next_data(self):
+        self._output = self._output[1:]
+
+    def add_testbench(self, assembly, args):
+        def pin(glasgow_pin):
+            return assembly.get_pin(f"{glasgow_pin.port}{glasgow_pin.number}")
+        io_pins = [pin(io_pin) for io_pin in args.io]
+        ce_pin  = pin(args.ce[0])
+        cle_pin, ale_pin, re_pin, we_pin, rb_pin = \
+            map(pin, (args.cle, args.ale, args.re, args.we, args.r_b))
+
+        async def testbench(ctx):
+            prev_we = prev_re = 1
+            async for _ in ctx.tick():
+                we = ctx.get(we_pin.o)
+                re = ctx.get(re_pin.o)
+                if not ctx.get(ce_pin.o):
+                    if not prev_we and we:
+                        byte = sum(ctx.get(io_pin.o) << bit for bit, io_pin in enumerate(io_pins))
+                        if ctx.get(cle_pin.o):
+                            self.write_command(byte)
+                        elif ctx.get(ale_pin.o):
+                            self.write_address(byte)
+                        else:
+                            self.write_data(byte)
+                    if prev_re and not re:
+                        byte = self.read_data()
+                        for bit, io_pin in enumerate(io_pins):
+                            ctx.set(io_pin.i, (byte >> bit) & 1)
+                    if not prev_re and re:
+                        self.next_data()
+                prev_we, prev_re = we, re
+                if self._busy:
+                    self._busy -= 1
+                ctx.set(rb_pin.i, not self._busy)
+
+        assembly.add_testbench(testbench, background=True)
 
 
 class MemoryONFIAppletTestCase(GlasgowAppletTestCase, applet=MemoryONFIApplet):
     @synthesis_test
     def test_build(self):
         self.assertBuilds()
+
+    def test_split_pages(self):
+        data = bytes(range(20)) * 2
+        self.assertEqual(split_pages(data, 16, 4), (
+            bytes(range(16)) * 2,
+            bytes(range(16, 20)) * 2,
+        ))
+
+    def test_find_bad_block_markers(self):
+        spares = b"\xff\x00" + b"\x00\xff" + b"\xff\xff" + b"\x12\xff"
+        self.assertEqual(find_bad_block_markers(spares, 2), [1, 3])
+
+    def setup_model(self, target, parsed_args):
+        self.applet.build(target, parsed_args)
+        self.model = ONFIModel()
+        self.model.add_testbench(target.assembly, parsed_args)
+
+    async def interact(self, device, parsed_args, **kwargs):
+        onfi_iface = await self.applet.run(device, parsed_args)
+        args = argparse.Namespace(**vars(parsed_args),
+            page_size=None, spare_size=None, block_size=None, **kwargs)
+        await self.applet.interact(device, args, onfi_iface)
+        return onfi_iface
+
+    @applet_simulation_test("setup_model")
+    async def test_identify(self, device, parsed_args, ctx):
+        with self.assertLogs(self.applet.logger, logging.INFO) as logs:
+            await self.interact(device, parsed_args, operation="identify")
+        self.assertIn("INFO:glasgow.applet.memory.onfi:ONFI revision 1.0", logs.output)
+
+    @applet_simulation_test("setup_model")
+    async def test_read_cache(self, device, parsed_args, ctx):
+        stride = self.model.page_size + self.model.spare_size
+        for row in range(32):
+            self.model.page(row)[:] = bytes((row * 16 + n) & 0xff for n in range(stride))
+            self.model.page(row)[self.model.page_size] = 0xff
+        self.model.page(8)[self.model.page_size] = 0x00 # bad block marker in block 2
+
+        data_file  = io.BytesIO()
+        spare_file = io.BytesIO()
+        with self.assertLogs(self.applet.logger, logging.WARNING) as logs:
+            await self.interact(device, parsed_args, operation="read",
+                start_page=2, count=9, data_file=data_file, spare_file=spare_file)
+        self.assertEqual(logs.output, [
+            "WARNING:glasgow.applet.memory.onfi:block 2 has a bad block marker in page (row) 8"
+        ])
+        data, spare = split_pages(b"".join(self.model.page(row) for row in range(2, 11)),
+                                  self.model.page_size, self.model.spare_size)
+        self.assertEqual(data_file.getvalue(), data)
+        self.assertEqual(spare_file.getvalue(), spare)
+        self.assertEqual([event for event in self.model.events if event[0].startswith("read")], [
+            ("read", 2), ("read-cache", 2), ("read-cache-end", 3),
+            ("read", 4), ("read-cache", 4), ("read-cache", 5), ("read-cache", 6),
+            ("read-cache-end", 7),
+            ("read", 8), ("read-cache", 8), ("read-cache", 9), ("read-cache-end", 10),
+        ])
+
+    @applet_simulation_test("setup_model")
+    async def test_scan_bad(self, device, parsed_args, ctx):
+        self.model.page(4 * 3 + 3)[self.model.page_size] = 0x00
+        self.model.page(4 * 6 + 0)[self.model.page_size] = 0x00
+        self.model.page(4 * 7 + 1)[self.model.page_size] = 0x00 # not the first or last page
+        with self.assertLogs(self.applet.logger, logging.INFO) as logs:
+            await self.interact(device, parsed_args, operation="scan-bad",
+                start_page=0, count=32)
+        self.assertEqual(logs.output[-3:], [
+            "INFO:glasgow.applet.memory.onfi:block 3 (row 12) is marked bad",
+            "INFO:glasgow.applet.memory.onfi:block 6 (row 24) is marked bad",
+            "INFO:glasgow.applet.memory.onfi:found 2 bad blocks out of 8",
+        ])
+
+    @applet_simulation_test("setup_model")
+    async def test_program_interleaved(self, device, parsed_args, ctx):
+        stride = self.model.page_size + self.model.spare_size
+        image  = bytes((n * 7) & 0xff for n in range(stride * 13))
+        await self.interact(device, parsed_args, operation="program",
+            start_page=0, count=13, data_file=io.BytesIO(image), spare_file=None)
+        self.assertEqual(b"".join(self.model.page(row) for row in range(13)), image)
+        self.assertEqual([event for event in self.model.events if event[0] == "program"], [
+            ("program", 0, 4), ("program", 1, 5), ("program", 2, 6), ("program", 3, 7),
+            ("program", 8), ("program", 9), ("program", 10), ("program", 11),
+            ("program", 12),
+        ])
+
+    @applet_simulation_test("setup_model")
+    async def test_erase_interleaved(self, device, parsed_args, ctx):
+        for row in range(32):
+            self.model.page(row)[0] = 0x00
+        await self.interact(device, parsed_args, operation="erase",
+            start_page=4, count=20)
+        self.assertEqual(sorted(self.model.array), [0, 1, 2, 3, 24, 25, 26, 27, 28, 29, 30, 31])
+        self.assertEqual([event for event in self.model.events if event[0] == "erase"], [
+            ("erase", 1), ("erase", 2, 3), ("erase", 4, 5),
+        ])
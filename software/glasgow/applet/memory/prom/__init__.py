@@ -14,6 +14,11 @@ from amaranth import *
 from amaranth.lib import cdc, io
 from amaranth.lib.fifo import SyncFIFOBuffered
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from ....support.logging import *
 from ... import *
 
@@ -360,18 +365,68 @@ class MemoryPROMInterface:
                                        for elem in self),
                               self.dq_bytes, endian)
 
+        def _words(self):
+            # The byte order does not matter, since these words are only compared for equality.
+            return numpy.frombuffer(self.raw_data, dtype=f"u{self.dq_bytes}")
+
         def difference(self, other):
             assert (isinstance(other, type(self)) and len(self) == len(other) and
                     self.endian == other.endian)
-            raw_diff = ((int.from_bytes(self.raw_data,  "little") ^
-                         int.from_bytes(other.raw_data, "little"))
-                        .to_bytes(len(self.raw_data), "little"))
             diff = dict()
-            for m in re.finditer(rb"[^\x00]", raw_diff):
-                index = m.start() // self.dq_bytes
+            if numpy is not None:
+                indexes = numpy.flatnonzero(self._words() != other._words())
+            else:
+                raw_diff = ((int.from_bytes(self.raw_data,  "little") ^
+                             int.from_bytes(other.raw_data, "little"))
+                            .to_bytes(len(self.raw_data), "little"))
+                indexes = dict.fromkeys(m.start() // self.dq_bytes
+                                        for m in re.finditer(rb"[^\x00]", raw_diff))
+            for index in indexes:
+                index = int(index)
                 diff[index] = (self[index], other[index])
             return diff
 
+        def popcount(self):
+            """Total number of bits set to 1 in every word."""
+            return int.from_bytes(self.raw_data, "little").bit_count()
+
+    class StabilityTracker:
+        """Tracks the words that read differently from :py:`initial_data` in any of the samples
+        passed to :meth:`update`, without retaining the samples."""
+
+        def __init__(self, initial_data):
+            self.initial_data = initial_data
+            if numpy is not None:
+                self._unstable = numpy.zeros(len(initial_data), dtype=bool)
+            else:
+                self._unstable = set()
+
+        def update(self, current_data):
+            """Compare :py:`current_data` to the initial data.
+
+            Returns a dictionary mapping the index of every word that became unstable with this
+            sample to a :py:`(initial_word, current_word)` tuple, like
+            :meth:`MemoryPROMInterface.Data.difference`.
+            """
+            if not isinstance(self._unstable, set):
+                differ = self.initial_data._words() != current_data._words()
+                new_indexes = numpy.flatnonzero(differ & ~self._unstable)
+                self._unstable |= differ
+            else:
+                differ = self.initial_data.difference(current_data)
+                new_indexes = sorted(set(differ) - self._unstable)
+                self._unstable.update(differ)
+            return {int(index): (self.initial_data[int(index)], current_data[int(index)])
+                    for index in new_indexes}
+
+        @property
+        def unstable(self):
+            """Indexes of every word that was unstable in any sample, in ascending order."""
+            if not isinstance(self._unstable, set):
+                return [int(index) for index in numpy.flatnonzero(self._unstable)]
+            else:
+                return sorted(self._unstable)
+
     def __init__(self, interface, logger, a_bits, dq_bits):
         self.lower    = interface
         self._logger  = logger
@@ -398,26 +453,50 @@ class MemoryPROMInterface:
                   dump_mapseq(" ", lambda q: f"{q:0{self.dq_bytes * 2}x}", data))
         return data
 
+    def _shuffled_commands(self, address, order):
+        if numpy is not None:
+            addresses = address + numpy.asarray(order, dtype=numpy.uint64)
+            commands  = numpy.empty((len(order), 2 + self.a_bytes), dtype=numpy.uint8)
+            commands[:, 0] = _Command.SEEK
+            for index in range(self.a_bytes):
+                commands[:, 1 + index] = (addresses >> (8 * index)) & 0xff
+            commands[:, 1 + self.a_bytes] = _Command.READ
+            return commands.tobytes()
+        else:
+            commands = []
+            for offset in order:
+                commands += [
+                    _Command.SEEK,
+                    *(address + offset).to_bytes(self.a_bytes, byteorder="little"),
+                    _Command.READ,
+                ]
+            return commands
+
+    def _unshuffle(self, shuffled_raw_data, order):
+        if numpy is not None:
+            shuffled_words = numpy.frombuffer(shuffled_raw_data, dtype=f"u{self.dq_bytes}")
+            linear_words = numpy.empty_like(shuffled_words)
+            linear_words[order] = shuffled_words
+            return linear_words.tobytes()
+        else:
+            linear_raw_chunks = [None for _ in range(len(order))]
+            for shuffled_offset, linear_offset in enumerate(order):
+                linear_raw_chunks[linear_offset] = \
+                    shuffled_raw_data[shuffled_offset * self.dq_bytes:
+                                     (shuffled_offset + 1) * self.dq_bytes]
+            return b"".join(linear_raw_chunks)
+
     async def read_shuffled(self, address, count):
         self._log("read shuffled a=%#x n=%d", address, count)
-        order = [offset for offset in range(count)]
-        random.shuffle(order)
-        commands = []
-        for offset in order:
-            commands += [
-                _Command.SEEK,
-                *(address + offset).to_bytes(self.a_bytes, byteorder="little"),
-                _Command.READ,
-            ]
-        await self.lower.write(commands)
+        if numpy is not None:
+            order = numpy.random.permutation(count)
+        else:
+            order = [offset for offset in range(count)]
+            random.shuffle(order)
+        await self.lower.write(self._shuffled_commands(address, order))
 
-        linear_raw_chunks = [None for _ in range(count)]
         shuffled_raw_data = await self.lower.read(count * self.dq_bytes)
-        for shuffled_offset, linear_offset in enumerate(order):
-            linear_raw_chunks[linear_offset] = \
-                shuffled_raw_data[shuffled_offset * self.dq_bytes:
-                                 (shuffled_offset + 1) * self.dq_bytes]
-        data = self.Data(b"".join(linear_raw_chunks), self.dq_bytes)
+        data = self.Data(self._unshuffle(shuffled_raw_data, order), self.dq_bytes)
         self._log("read shuffled q=<%s>",
                   dump_mapseq(" ", lambda q: f"{q:0{self.dq_bytes * 2}x}", data))
         return data
@@ -681,7 +760,7 @@ class MemoryPROMApplet(GlasgowApplet):
             if actual_data == golden_data:
                 self.logger.info("verify PASS")
             else:
-                differ = sum(a != b for a, b in zip(golden_data, actual_data))
+                differ = len(golden_data.convert(actual_data.endian).difference(actual_data))
                 raise GlasgowAppletError("verify FAIL ({} words differ)"
                                          .format(differ))
 
@@ -705,27 +784,25 @@ class MemoryPROMApplet(GlasgowApplet):
                 offset += length
 
         if args.operation == "health" and args.mode == "check":
-            unstable = set()
             initial_data = await prom_iface.read(0, depth)
+            tracker = prom_iface.StabilityTracker(initial_data)
 
             for sample_num in range(args.samples):
                 self.logger.info("sample %d", sample_num)
 
                 current_data = await prom_iface.read_shuffled(0, depth)
-                current_unstable = initial_data.difference(current_data)
-                for index in sorted(set(current_unstable) - unstable):
+                for index, (initial_word, current_word) in tracker.update(current_data).items():
                     self.logger.warning("word %#x unstable (%#x != %#x)",
-                                        index, initial_data[index], current_data[index])
-                unstable.update(current_unstable)
+                                        index, initial_word, current_word)
 
-                if unstable:
+                if tracker.unstable:
                     raise GlasgowAppletError("health check FAIL")
 
             self.logger.info("health check PASS")
 
         if args.operation == "health" and args.mode == "scan":
-            unstable = set()
             initial_data = await prom_iface.read(0, depth)
+            tracker = prom_iface.StabilityTracker(initial_data)
 
             sample_num = 0
             consecutive = 0
@@ -735,15 +812,14 @@ class MemoryPROMApplet(GlasgowApplet):
                 consecutive += 1
 
                 current_data = await prom_iface.read_shuffled(0, depth)
-                current_unstable = initial_data.difference(current_data)
-                for index in sorted(set(current_unstable) - unstable):
+                for index, (initial_word, current_word) in tracker.update(current_data).items():
                     self.logger.warning("word %#x unstable (%#x != %#x)",
-                                        index, initial_data[index], current_data[index])
+                                        index, initial_word, current_word)
                     consecutive = 0
-                unstable.update(current_unstable)
 
+            unstable = tracker.unstable
             if args.file:
-                for index in sorted(unstable):
+                for index in unstable:
                     args.file.write(f"{index:x}\n")
 
             if not unstable:
@@ -767,9 +843,9 @@ class MemoryPROMApplet(GlasgowApplet):
                     self.logger.info("  sample %d", sample_num)
                     current_data = await prom_iface.read_shuffled(0, depth)
                     unstable = initial_data.difference(current_data)
-                    for index in sorted(unstable):
+                    for index, (initial_word, current_word) in unstable.items():
                         self.logger.warning("word %#x unstable (%#x != %#x)",
-                                            index, initial_data[index], current_data[index])
+                                            index, initial_word, current_word)
                     if unstable:
                         self.logger.warning("step %d FAIL (%d words unstable)",
                                             step_num, len(unstable))
@@ -785,7 +861,6 @@ class MemoryPROMApplet(GlasgowApplet):
 
         if args.operation == "health" and args.mode == "popcount":
             voltage_from, voltage_to = args.sweep
-            popcount_lut = [format(n, "b").count("1") for n in range(1 << dq_bits)]
 
             series = []
             voltage = voltage_from
@@ -798,7 +873,7 @@ class MemoryPROMApplet(GlasgowApplet):
                 for sample_num in range(args.samples):
                     self.logger.info("  sample %d", sample_num)
                     data = await prom_iface.read_shuffled(0, depth)
-                    popcounts.append(sum(popcount_lut[word] for word in data))
+                    popcounts.append(data.popcount())
 
                 series.append((voltage, popcounts))
                 self.logger.info("population %d/%d",
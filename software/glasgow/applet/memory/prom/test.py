@@ -1,8 +1,89 @@
+import random
+import logging
+import unittest
+import unittest.mock
+
 from ... import *
-from . import MemoryPROMApplet
+from . import MemoryPROMApplet, MemoryPROMInterface
+from . import numpy as _numpy
 
 
 class MemoryPROMAppletTestCase(GlasgowAppletTestCase, applet=MemoryPROMApplet):
     @synthesis_test
     def test_build(self):
         self.assertBuilds()
+
+
+@unittest.skipIf(_numpy is None, "numpy is not installed")
+class MemoryPROMAnalysisTestCase(unittest.TestCase):
+    """Checks that the array-based implementations of the analysis routines are equivalent
+    to the pure Python ones."""
+
+    def without_numpy(self):
+        return unittest.mock.patch(f"{MemoryPROMInterface.__module__}.numpy", None)
+
+    def make_iface(self, a_bits, dq_bits):
+        return MemoryPROMInterface(None, logging.getLogger(__name__), a_bits, dq_bits)
+
+    def make_samples(self, rng, dq_bytes, depth, count):
+        initial = bytes(rng.getrandbits(8) for _ in range(depth * dq_bytes))
+        samples = []
+        for _ in range(count):
+            sample = bytearray(initial)
+            for _ in range(rng.randrange(4)):
+                sample[rng.randrange(len(sample))] ^= 1 << rng.randrange(8)
+            samples.append(MemoryPROMInterface.Data(bytes(sample), dq_bytes))
+        return MemoryPROMInterface.Data(initial, dq_bytes), samples
+
+    def test_difference(self):
+        rng = random.Random(0)
+        for dq_bytes in (1, 2):
+            initial, samples = self.make_samples(rng, dq_bytes, 256, 16)
+            for sample in samples:
+                expected = initial.difference(sample)
+                with self.without_numpy():
+                    self.assertEqual(initial.difference(sample), expected)
+                self.assertEqual(list(expected), sorted(expected))
+
+    def test_popcount(self):
+        rng = random.Random(1)
+        for dq_bytes in (1, 2):
+            initial, samples = self.make_samples(rng, dq_bytes, 256, 4)
+            for data in (initial, *samples):
+                self.assertEqual(data.popcount(),
+                                 sum(format(word, "b").count("1") for word in data))
+
+    def test_stability_tracker(self):
+        rng = random.Random(2)
+        for dq_bytes in (1, 2):
+            initial, samples = self.make_samples(rng, dq_bytes, 256, 16)
+            tracker = MemoryPROMInterface.StabilityTracker(initial)
+            with self.without_numpy():
+                reference = MemoryPROMInterface.StabilityTracker(initial)
+            unstable = set()
+            for sample in samples:
+                new = tracker.update(sample)
+                with self.without_numpy():
+                    self.assertEqual(reference.update(sample), new)
+                self.assertEqual(new.keys(), set(initial.difference(sample)) - unstable)
+                unstable.update(new)
+                self.assertEqual(tracker.unstable, sorted(unstable))
+                self.assertEqual(reference.unstable, sorted(unstable))
+
+    def test_shuffled_commands(self):
+        iface = self.make_iface(a_bits=20, dq_bits=16)
+        order = list(range(1000))
+        random.Random(3).shuffle(order)
+        with self.without_numpy():
+            expected = bytes(iface._shuffled_commands(0x1234, order))
+        self.assertEqual(iface._shuffled_commands(0x1234, _numpy.array(order)), expected)
+
+    def test_unshuffle(self):
+        iface = self.make_iface(a_bits=10, dq_bits=16)
+        order = list(range(1024))
+        random.Random(4).shuffle(order)
+        linear = bytes(random.Random(5).getrandbits(8) for _ in range(1024 * 2))
+        shuffled = b"".join(linear[offset * 2:(offset + 1) * 2] for offset in order)
+        self.assertEqual(iface._unshuffle(shuffled, _numpy.array(order)), linear)
+        with self.without_numpy():
+            self.assertEqual(iface._unshuffle(shuffled, order), linear)
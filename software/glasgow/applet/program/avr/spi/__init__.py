@@ -32,6 +32,10 @@ class ProgramAVRSPISubtarget(Elaboratable):
 
 
 class ProgramAVRSPIInterface(ProgramAVRInterface):
+    # Number of ready/busy flag polls queued after a write instruction in the same transfer.
+    # The write is complete as soon as any of them reports that the device is ready.
+    poll_count = 8
+
     def __init__(self, interface, logger, addr_dut_reset):
         self.lower   = interface
         self._logger = logger
@@ -43,14 +47,37 @@ class ProgramAVRSPIInterface(ProgramAVRInterface):
     def _log(self, message, *args):
         self._logger.log(self._level, "AVR SPI: " + message, *args)
 
-    async def _command(self, byte1, byte2, byte3, byte4):
-        command = [byte1, byte2, byte3, byte4]
-        self._log("command %s", "{:08b} {:08b} {:08b} {:08b}".format(*command))
+    async def _commands(self, commands):
+        # The device does not use a chip select, so any number of instructions can be
+        # shifted back to back.
+        if not commands:
+            return []
+        octets = [byte for command in commands for byte in command]
         async with self.lower.select():
-            result = await self.lower.exchange(command)
-        self._log("result  %s", "{:08b} {:08b} {:08b} {:08b}".format(*result))
+            octets = await self.lower.exchange(octets)
+        results = [octets[offset:offset + 4] for offset in range(0, len(octets), 4)]
+        if self._logger.isEnabledFor(self._level):
+            for command, result in zip(commands, results):
+                self._log("command %s", "{:08b} {:08b} {:08b} {:08b}".format(*command))
+                self._log("result  %s", "{:08b} {:08b} {:08b} {:08b}".format(*result))
+        return results
+
+    async def _command(self, byte1, byte2, byte3, byte4):
+        result, = await self._commands([(byte1, byte2, byte3, byte4)])
         return result
 
+    async def _write_commands(self, commands):
+        if self.erase_time is not None:
+            await self._commands(commands)
+            self._log("wait for completion")
+            await self.lower.delay_ms(self.erase_time)
+            return
+        polls   = [(0b1111_0000, 0b0000_0000, 0, 0)] * self.poll_count
+        results = await self._commands([*commands, *polls])
+        while all(busy & 1 for _, _, _, busy in results[-self.poll_count:]):
+            self._log("poll ready/busy flag")
+            results = await self._commands(polls)
+
     async def programming_enable(self):
         self._log("programming enable")
 
@@ -69,36 +96,36 @@ class ProgramAVRSPIInterface(ProgramAVRInterface):
         await self.lower.lower.device.write_register(self._addr_dut_reset, 0)
         await self.lower.delay_ms(20)
 
-    async def _is_busy(self):
-        if self.erase_time is not None:
-            self._log("wait for completion")
-            await self.lower.delay_ms(self.erase_time)
-            return False
-        self._log("poll ready/busy flag")
-        _, _, _, busy = await self._command(0b1111_0000, 0b0000_0000, 0, 0)
-        return bool(busy & 1)
-
     async def read_signature(self):
         self._log("read signature")
-        signature = []
-        for address in range(3):
-            _, _, _, sig_byte = await self._command(0b0011_0000, 0b0000_0000, address & 0b11, 0)
-            signature.append(sig_byte)
-        return tuple(signature)
-
-    async def read_fuse(self, address):
-        self._log("read fuse address %#04x", address)
+        results = await self._commands([
+            (0b0011_0000, 0b0000_0000, address & 0b11, 0)
+            for address in range(3)
+        ])
+        return tuple(sig_byte for _, _, _, sig_byte in results)
+
+    @staticmethod
+    def _read_fuse_command(address):
         a0, a1 = {
             0: (0b0000, 0b0000),
             1: (0b1000, 0b1000),
             2: (0b0000, 0b1000),
         }[address]
-        _, _, _, data = await self._command(
+        return (
             0b0101_0000 | a0,
             0b0000_0000 | a1,
             0,  0)
+
+    async def read_fuse(self, address):
+        self._log("read fuse address %#04x", address)
+        _, _, _, data = await self._command(*self._read_fuse_command(address))
         return data
 
+    async def read_fuse_range(self, addresses):
+        self._log("read fuse addresses %s", ", ".join(f"{address:#04x}" for address in addresses))
+        results = await self._commands([self._read_fuse_command(address) for address in addresses])
+        return bytearray(data for _, _, _, data in results)
+
     async def write_fuse(self, address, data):
         self._log("write fuse address %#04x data %02x", address, data)
         a = {
@@ -106,12 +133,11 @@ class ProgramAVRSPIInterface(ProgramAVRInterface):
             1: 0b1000,
             2: 0b0100,
         }[address]
-        await self._command(
+        await self._write_commands([(
             0b1010_1100,
             0b1010_0000 | a,
             0,
-            data)
-        while await self._is_busy(): pass
+            data)])
 
     async def read_lock_bits(self):
         self._log("read lock bits")
@@ -120,83 +146,163 @@ class ProgramAVRSPIInterface(ProgramAVRInterface):
 
     async def write_lock_bits(self, data):
         self._log("write lock bits data %02x", data)
-        await self._command(
+        await self._write_commands([(
             0b1010_1100,
             0b1110_0000,
             0,
-            0b1100_0000 | data)
-        while await self._is_busy(): pass
+            0b1100_0000 | data)])
 
     async def read_calibration(self, address):
         self._log("read calibration address %#04x", address)
         _, _, _, data = await self._command(0b0011_1000, 0b0000_0000, address, 0)
         return data
 
-    async def load_extended_address_byte(self, address):
+    async def read_calibration_range(self, addresses):
+        self._log("read calibration addresses %s",
+                  ", ".join(f"{address:#04x}" for address in addresses))
+        results = await self._commands([
+            (0b0011_1000, 0b0000_0000, address, 0)
+            for address in addresses
+        ])
+        return bytearray(data for _, _, _, data in results)
+
+    def _extended_address_commands(self, address):
         extended_addr = (address >> 17) & 0xff
         if self._extended_addr != extended_addr:
             self._log("load extended address %#02x", extended_addr)
-            await self._command(0b0100_1101, 0, extended_addr, 0)
             self._extended_addr = extended_addr
+            return [(0b0100_1101, 0, extended_addr, 0)]
+        return []
 
-    async def read_program_memory(self, address):
-        await self.load_extended_address_byte(address)
-        self._log("read program memory address %#06x", address)
-        _, _, _, data = await self._command(
+    async def load_extended_address_byte(self, address):
+        if commands := self._extended_address_commands(address):
+            await self._commands(commands)
+
+    @staticmethod
+    def _read_program_memory_command(address):
+        return (
             0b0010_0000 | (address & 1) << 3,
             (address >> 9) & 0xff,
             (address >> 1) & 0xff,
             0)
+
+    async def read_program_memory(self, address):
+        await self.load_extended_address_byte(address)
+        self._log("read program memory address %#06x", address)
+        _, _, _, data = await self._command(*self._read_program_memory_command(address))
         return data
 
-    async def load_program_memory_page(self, address, data):
-        self._log("load program memory address %#06x data %02x", address, data)
-        await self._command(
+    async def read_program_memory_range(self, addresses):
+        if not addresses:
+            return bytearray()
+        self._log("read program memory addresses %#06x-%#06x", addresses[0], addresses[-1])
+        commands = []
+        indexes  = []
+        for address in addresses:
+            commands += self._extended_address_commands(address)
+            indexes.append(len(commands))
+            commands.append(self._read_program_memory_command(address))
+        results = await self._commands(commands)
+        return bytearray(results[index][3] for index in indexes)
+
+    @staticmethod
+    def _load_program_memory_page_command(address, data):
+        return (
             0b0100_0000 | (address & 1) << 3,
             (address >> 9) & 0xff,
             (address >> 1) & 0xff,
             data)
 
-    async def write_program_memory_page(self, address):
-        await self.load_extended_address_byte(address)
+    def _write_program_memory_page_commands(self, address):
+        commands = self._extended_address_commands(address)
         self._log("write program memory page at %#06x", address)
-        await self._command(
+        return [*commands, (
             0b0100_1100,
             (address >> 9) & 0xff,
             (address >> 1) & 0xff,
-            0)
-        while await self._is_busy(): pass
+            0)]
 
-    async def read_eeprom(self, address):
-        self._log("read EEPROM address %#06x", address)
-        _, _, _, data = await self._command(
+    async def load_program_memory_page(self, address, data):
+        self._log("load program memory address %#06x data %02x", address, data)
+        await self._command(*self._load_program_memory_page_command(address, data))
+
+    async def write_program_memory_page(self, address):
+        await self._write_commands(self._write_program_memory_page_commands(address))
+
+    async def write_program_memory_range(self, address, chunk, page_size):
+        page_mask = page_size - 1
+        commands  = []
+        for offset, byte in enumerate(chunk):
+            byte_address = address + offset
+            if commands and byte_address % page_size == 0:
+                await self._write_commands([*commands,
+                    *self._write_program_memory_page_commands((byte_address - 1) & ~page_mask)])
+                commands = []
+            commands.append(self._load_program_memory_page_command(byte_address & page_mask, byte))
+        if commands:
+            await self._write_commands([*commands,
+                *self._write_program_memory_page_commands(byte_address & ~page_mask)])
+
+    @staticmethod
+    def _read_eeprom_command(address):
+        return (
             0b1010_0000,
             (address >> 8) & 0xff,
             (address >> 0) & 0xff,
             0)
+
+    async def read_eeprom(self, address):
+        self._log("read EEPROM address %#06x", address)
+        _, _, _, data = await self._command(*self._read_eeprom_command(address))
         return data
 
-    async def load_eeprom_page(self, address, data):
-        self._log("load EEPROM address %#06x data %02x", address, data)
-        await self._command(
+    async def read_eeprom_range(self, addresses):
+        if not addresses:
+            return bytearray()
+        self._log("read EEPROM addresses %#06x-%#06x", addresses[0], addresses[-1])
+        results = await self._commands([self._read_eeprom_command(address) for address in addresses])
+        return bytearray(data for _, _, _, data in results)
+
+    @staticmethod
+    def _load_eeprom_page_command(address, data):
+        return (
             0b1100_0001,
             (address >> 8) & 0xff,
             (address >> 0) & 0xff,
             data)
 
-    async def write_eeprom_page(self, address):
+    def _write_eeprom_page_commands(self, address):
         self._log("write EEPROM page at %#06x", address)
-        await self._command(
+        return [(
             0b1100_0010,
             (address >> 8) & 0xff,
             (address >> 0) & 0xff,
-            0)
-        while await self._is_busy(): pass
+            0)]
+
+    async def load_eeprom_page(self, address, data):
+        self._log("load EEPROM address %#06x data %02x", address, data)
+        await self._command(*self._load_eeprom_page_command(address, data))
+
+    async def write_eeprom_page(self, address):
+        await self._write_commands(self._write_eeprom_page_commands(address))
+
+    async def write_eeprom_range(self, address, chunk, page_size):
+        page_mask = page_size - 1
+        commands  = []
+        for offset, byte in enumerate(chunk):
+            byte_address = address + offset
+            if commands and byte_address % page_size == 0:
+                await self._write_commands([*commands,
+                    *self._write_eeprom_page_commands((byte_address - 1) & ~page_mask)])
+                commands = []
+            commands.append(self._load_eeprom_page_command(byte_address & page_mask, byte))
+        if commands:
+            await self._write_commands([*commands,
+                *self._write_eeprom_page_commands(byte_address & ~page_mask)])
 
     async def chip_erase(self):
         self._log("chip erase")
-        await self._command(0b1010_1100, 0b1000_0000, 0, 0)
-        while await self._is_busy(): pass
+        await self._write_commands([(0b1010_1100, 0b1000_0000, 0, 0)])
 
 
 class ProgramAVRSPIApplet(ProgramAVRApplet):
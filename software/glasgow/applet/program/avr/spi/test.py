@@ -1,6 +1,76 @@
+import logging
+import unittest
+import contextlib
+
 from .....database.microchip.avr import *
 from .... import *
-from . import ProgramAVRSPIApplet
+from . import ProgramAVRSPIApplet, ProgramAVRSPIInterface
+
+
+class AVRSPIModel:
+    """A model of the serial programming interface of an AVR device, with the same interface as
+    :class:`SPIControllerInterface`.
+
+    The device reports being busy for :py:`busy_polls` polls after every write instruction.
+    """
+
+    def __init__(self, *, program_size=1024, eeprom_size=256, busy_polls=0):
+        self.program    = bytearray(b"\xff" * program_size)
+        self.eeprom     = bytearray(b"\xff" * eeprom_size)
+        self.busy_polls = busy_polls
+        self.exchanges  = 0
+
+        self._buffer    = {}
+        self._busy      = 0
+        self._last      = 0
+
+    def _execute(self, byte1, byte2, byte3, byte4):
+        word_address = byte2 << 8 | byte3
+        match byte1, byte2:
+            case (0b0100_0000 | 0b0100_1000), _:
+                self._buffer[byte3 << 1 | (byte1 >> 3) & 1] = byte4
+            case 0b0100_1100, _:
+                for offset, data in self._buffer.items():
+                    self.program[word_address << 1 | offset] &= data
+                self._buffer.clear()
+                self._busy = self.busy_polls
+            case (0b0010_0000 | 0b0010_1000), _:
+                return self.program[word_address << 1 | (byte1 >> 3) & 1]
+            case 0b1100_0001, _:
+                self._buffer[byte3] = byte4
+            case 0b1100_0010, _:
+                for offset, data in self._buffer.items():
+                    self.eeprom[word_address | offset] = data
+                self._buffer.clear()
+                self._busy = self.busy_polls
+            case 0b1010_0000, _:
+                return self.eeprom[word_address]
+            case 0b1010_1100, 0b1000_0000:
+                self.program[:] = b"\xff" * len(self.program)
+                self._busy = self.busy_polls
+            case 0b0100_1101, _:
+                assert byte3 == 0, "extended addressing is not modelled"
+            case 0b1111_0000, _:
+                if self._busy:
+                    self._busy -= 1
+                    return 0xff
+                return 0xfe
+            case _:
+                assert False, f"unexpected instruction {byte1:08b} {byte2:08b}"
+        return 0
+
+    @contextlib.asynccontextmanager
+    async def select(self):
+        yield
+
+    async def exchange(self, octets):
+        self.exchanges += 1
+        result = bytearray()
+        for offset in range(0, len(octets), 4):
+            command = octets[offset:offset + 4]
+            result += bytes([self._last, command[0], command[1], self._execute(*command)])
+            self._last = command[3]
+        return bytes(result)
 
 
 class ProgramAVRSPIAppletTestCase(GlasgowAppletTestCase, applet=ProgramAVRSPIApplet):
@@ -86,3 +156,36 @@ class ProgramAVRSPIAppletTestCase(GlasgowAppletTestCase, applet=ProgramAVRSPIApp
         data = await avr_iface.read_eeprom_range(range(page * 2))
         self.assertEqual(data,
             b"\xff" * (page // 2) + bytes([n for n in range(page)]) + b"\xff" * (page // 2))
+
+
+class ProgramAVRSPIInterfaceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.model = AVRSPIModel(busy_polls=10)
+        self.iface = ProgramAVRSPIInterface(self.model, logging.getLogger(__name__), None)
+
+    @async_test
+    async def test_program_memory(self):
+        data = bytes((n * 7) & 0xff for n in range(300))
+        await self.iface.write_program_memory_range(64, data, 128)
+        # Three pages, each completing on the second batch of ready/busy flag polls.
+        self.assertEqual(self.model.exchanges, 6)
+        self.assertEqual(await self.iface.read_program_memory_range(range(512)),
+                         b"\xff" * 64 + data + b"\xff" * 148)
+        self.assertEqual(self.model.exchanges, 7)
+
+    @async_test
+    async def test_eeprom(self):
+        data = bytes(range(10))
+        await self.iface.write_eeprom_range(2, data, 4)
+        self.assertEqual(self.model.exchanges, 6)
+        self.assertEqual(await self.iface.read_eeprom_range(range(16)),
+                         b"\xff" * 2 + data + b"\xff" * 4)
+        self.assertEqual(self.model.exchanges, 7)
+
+    @async_test
+    async def test_chip_erase(self):
+        self.model.busy_polls = 3
+        self.model.program[:] = bytes(len(self.model.program))
+        await self.iface.chip_erase()
+        self.assertEqual(self.model.exchanges, 1)
+        self.assertEqual(self.model.program, b"\xff" * len(self.model.program))
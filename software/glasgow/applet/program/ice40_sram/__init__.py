@@ -3,10 +3,15 @@
 # Accession: G00073
 
 from typing import Optional
+import struct
 import argparse
 import asyncio
 import logging
 
+from amaranth import *
+from amaranth.lib import wiring, stream, io, cdc
+from amaranth.lib.wiring import In, Out
+
 from glasgow.abstract import AbstractAssembly, GlasgowPin, ClockDivisor
 from glasgow.applet.interface.spi_controller import SPIControllerInterface
 from glasgow.applet.control.gpio import GPIOInterface
@@ -20,18 +25,172 @@ class ICE40SRAMError(GlasgowAppletError):
     pass
 
 
+class ICE40SRAMDoneComponent(wiring.Component):
+    """Watches the CDONE pins of several targets for a rising edge.
+
+    Each command byte received on :py:`i_stream` is either a non-zero mask of targets whose
+    CDONE pins are to be watched from now on, or a zero byte followed by a 16-bit timeout in
+    milliseconds. Once CDONE has risen on every watched target, or the timeout expires, a mask
+    of the targets on which it did not rise is sent on :py:`o_stream`, and the targets are no
+    longer watched.
+    """
+
+    def __init__(self, port, *, ms_cycles):
+        assert len(port) in range(1, 9)
+
+        self._port      = port
+        self._ms_cycles = ms_cycles
+
+        super().__init__({
+            "i_stream": In(stream.Signature(8)),
+            "o_stream": Out(stream.Signature(8)),
+            "done":     Out(len(port)),
+        })
+
+    def elaborate(self, platform):
+        m = Module()
+
+        m.submodules.buffer = buffer = io.Buffer("i", self._port)
+        m.submodules.i_sync = cdc.FFSynchronizer(buffer.i, self.done)
+
+        done_prev = Signal.like(self.done)
+        m.d.sync += done_prev.eq(self.done)
+
+        armed   = Signal.like(self.done)
+        risen   = Signal.like(self.done)
+        pending = armed & ~risen
+        m.d.sync += risen.eq(risen | (armed & self.done & ~done_prev))
+
+        timeout = Signal(16)
+        timer   = Signal(range(self._ms_cycles))
+
+        with m.FSM():
+            with m.State("Read-Command"):
+                m.d.comb += self.i_stream.ready.eq(1)
+                with m.If(self.i_stream.valid):
+                    with m.If(self.i_stream.payload != 0):
+                        mask = self.i_stream.payload[:len(armed)]
+                        m.d.sync += armed.eq(armed | mask)
+                        m.d.sync += risen.eq(risen & ~mask)
+                    with m.Else():
+                        m.next = "Read-Timeout-Low"
+
+            with m.State("Read-Timeout-Low"):
+                m.d.comb += self.i_stream.ready.eq(1)
+                with m.If(self.i_stream.valid):
+                    m.d.sync += timeout[0:8].eq(self.i_stream.payload)
+                    m.next = "Read-Timeout-High"
+
+            with m.State("Read-Timeout-High"):
+                m.d.comb += self.i_stream.ready.eq(1)
+                with m.If(self.i_stream.valid):
+                    m.d.sync += timeout[8:16].eq(self.i_stream.payload)
+                    m.d.sync += timer.eq(self._ms_cycles - 1)
+                    m.next = "Wait"
+
+            with m.State("Wait"):
+                with m.If((pending == 0) | (timeout == 0)):
+                    m.d.comb += self.o_stream.payload.eq(pending)
+                    m.d.comb += self.o_stream.valid.eq(1)
+                    with m.If(self.o_stream.ready):
+                        m.d.sync += armed.eq(0)
+                        m.next = "Read-Command"
+                with m.Elif(timer == 0):
+                    m.d.sync += timeout.eq(timeout - 1)
+                    m.d.sync += timer.eq(self._ms_cycles - 1)
+                with m.Else():
+                    m.d.sync += timer.eq(timer - 1)
+
+        return m
+
+
+class ICE40SRAMDoneInterface:
+    def __init__(self, logger: logging.Logger, assembly: AbstractAssembly, *,
+                 pins: tuple[GlasgowPin]):
+        self._logger = logger
+        self._level  = logging.DEBUG if self._logger.name == __name__ else logging.TRACE
+        self._pins   = pins
+
+        component = assembly.add_submodule(ICE40SRAMDoneComponent(
+            assembly.add_port(pins, name="done"),
+            ms_cycles=int(1 / (assembly.sys_clk_period * 1_000))))
+        self._done = assembly.add_ro_register(component.done)
+        self._pipe = assembly.add_inout_pipe(component.o_stream, component.i_stream)
+
+    def _log(self, message: str, *args):
+        self._logger.log(self._level, "iCE40 CDONE: " + message, *args)
+
+    @property
+    def count(self) -> int:
+        """Number of targets."""
+        return len(self._pins)
+
+    async def get(self, index: int) -> bool:
+        """Sample state of CDONE of target :py:`index`."""
+        assert index in range(self.count)
+        state = (await self._done >> index) & 1
+        self._log("target=%d get=%d", index, state)
+        return bool(state)
+
+    async def arm(self, index: int):
+        """Start watching CDONE of target :py:`index` for a rising edge.
+
+        This must be done before the target is reset, since CDONE is deasserted by the reset.
+        """
+        assert index in range(self.count)
+        self._log("target=%d arm", index)
+        await self._pipe.send(struct.pack("<B", 1 << index))
+        await self._pipe.flush()
+
+    async def wait(self, timeout_ms: int) -> list[int]:
+        """Wait until CDONE rises on every watched target, or for at most :py:`timeout_ms`.
+
+        Returns the indexes of the watched targets on which CDONE did not rise.
+        """
+        assert timeout_ms in range(1, 0x10000)
+        self._log("wait timeout=%d ms", timeout_ms)
+        await self._pipe.send(struct.pack("<BH", 0, timeout_ms))
+        await self._pipe.flush()
+        mask, = await self._pipe.recv(1)
+        failed = [index for index in range(self.count) if mask & (1 << index)]
+        self._log("wait failed=%s", failed)
+        return failed
+
+
 class ICE40SRAMInterface:
+    """iCE40 SRAM configuration interface.
+
+    The CS#, RESET#, and (if present) CDONE pins may be provided for up to 8 targets that share
+    the SCK and COPI pins, one pin per target each. If only one target is used, the pins may be
+    provided without wrapping them in a tuple.
+    """
+
     def __init__(self, logger: logging.Logger, assembly: AbstractAssembly, *,
-                 cs: GlasgowPin, sck: GlasgowPin, copi: GlasgowPin,
-                 reset: GlasgowPin, done: Optional[GlasgowPin] = None):
+                 cs: GlasgowPin | tuple[GlasgowPin], sck: GlasgowPin, copi: GlasgowPin,
+                 reset: GlasgowPin | tuple[GlasgowPin],
+                 done: Optional[GlasgowPin | tuple[GlasgowPin]] = None):
         self._logger = logger
         self._level  = logging.DEBUG if self._logger.name == __name__ else logging.TRACE
 
+        if isinstance(cs, GlasgowPin):
+            cs = (cs,)
+        if isinstance(reset, GlasgowPin):
+            reset = (reset,)
+        if isinstance(done, GlasgowPin):
+            done = (done,)
+        if len(reset) != len(cs):
+            raise ICE40SRAMError(
+                f"expected {len(cs)} RESET# pins (one per target), got {len(reset)}")
+        if done and len(done) != len(cs):
+            raise ICE40SRAMError(
+                f"expected {len(cs)} CDONE pins (one per target), got {len(done)}")
+        self._count = len(cs)
+
         self._spi_iface = SPIControllerInterface(logger, assembly,
             cs=cs, sck=sck, copi=copi, mode=3)
-        self._reset_iface = GPIOInterface(logger, assembly, pins=(~reset,))
-        if done is not None:
-            self._done_iface = GPIOInterface(logger, assembly, pins=(done,))
+        self._reset_iface = GPIOInterface(logger, assembly, pins=tuple(~pin for pin in reset))
+        if done:
+            self._done_iface = ICE40SRAMDoneInterface(logger, assembly, pins=done)
         else:
             self._done_iface = None
 
@@ -43,6 +202,11 @@ class ICE40SRAMInterface:
         """SCK clock divisor."""
         return self._spi_iface.clock
 
+    @property
+    def count(self) -> int:
+        """Number of targets."""
+        return self._count
+
     async def load(self, bitstream: bytes | bytearray | memoryview) -> bool:
         """Load :py:`bitstream` into configuration SRAM.
 
@@ -89,22 +253,77 @@ class ICE40SRAMInterface:
         else:
             self._log("waiting for CDONE (absent)")
 
+    async def load_targets(self, bitstreams: dict[int, bytes | bytearray | memoryview], *,
+                           timeout_ms: int = 100):
+        """Load each of :py:`bitstreams` into configuration SRAM of the target with
+        the corresponding index, back to back.
+
+        Unlike :meth:`load`, this method does not wait for any of the targets to configure
+        before shifting in the bitstream for the next one, and does not poll CDONE. Instead,
+        the gateware watches CDONE of every target for a rising edge, and reports the targets
+        that failed to configure once, after every bitstream has been shifted in. Each bitstream
+        is sent directly from a :class:`memoryview` of the provided buffer, in chunks that
+        overlap with shifting out the previous ones.
+
+        Raises
+        ------
+        ICE40SRAMError
+            If the CDONE pins are present and any of them was not asserted within
+            :py:`timeout_ms` after all of the bitstreams have been shifted in.
+        """
+
+        for index, bitstream in bitstreams.items():
+            assert index in range(self.count)
+            if self._done_iface is not None:
+                await self._done_iface.arm(index)
+
+            async with self._spi_iface.select(index):
+                self._log("target=%d resetting", index)
+
+                # See `load` for the reset sequence.
+                await self._spi_iface.dummy(1)
+                await self._spi_iface.synchronize()
+                await self._reset_iface.output(index, True)
+                await self._reset_iface.output(index, False)
+                await self._spi_iface.synchronize()
+                await self._spi_iface.delay_us(1200)
+
+                self._log("target=%d programming", index)
+                await self._spi_iface.write(memoryview(bitstream))
+                await self._spi_iface.dummy(128)
+
+        if self._done_iface is not None:
+            # Make sure the CDONE timeout starts after the last bitstream has been shifted in.
+            await self._spi_iface.synchronize()
+
+            self._log("waiting for CDONE")
+            if failed := await self._done_iface.wait(timeout_ms):
+                raise ICE40SRAMError(
+                    f"FPGA failed to configure (targets: {', '.join(map(str, failed))})")
+
+        else:
+            self._log("waiting for CDONE (absent)")
+
 
 class ProgramICE40SRAMApplet(GlasgowAppletV2):
     logger = logging.getLogger(__name__)
     help = "program SRAM of iCE40 FPGAs"
     description = """
     Program the volatile bitstream memory of iCE40 FPGAs.
+
+    Several FPGAs sharing the SCK and COPI pins may be configured back to back by providing
+    a CS#, RESET#, and CDONE pin for each of them, and a bitstream for each of them (or a single
+    bitstream used for all of them).
     """
 
     @classmethod
     def add_build_arguments(cls, parser, access):
         access.add_voltage_argument(parser)
-        access.add_pins_argument(parser, "cs",    default=True, required=True)
+        access.add_pins_argument(parser, "cs",    width=range(1, 9), default=True, required=True)
         access.add_pins_argument(parser, "sck",   default=True, required=True)
         access.add_pins_argument(parser, "copi",  default=True, required=True)
-        access.add_pins_argument(parser, "reset", default=True, required=True)
-        access.add_pins_argument(parser, "done",  default=True)
+        access.add_pins_argument(parser, "reset", width=range(1, 9), default=True, required=True)
+        access.add_pins_argument(parser, "done",  width=range(0, 9), default=1)
 
     def build(self, args):
         with self.assembly.add_applet(self):
@@ -125,11 +344,18 @@ class ProgramICE40SRAMApplet(GlasgowAppletV2):
     @classmethod
     def add_run_arguments(cls, parser):
         parser.add_argument(
-            "bitstream", metavar="BITSTREAM", type=argparse.FileType("rb"),
-            help="bitstream file")
+            "bitstream", metavar="BITSTREAM", type=argparse.FileType("rb"), nargs="+",
+            help="bitstream file for each target; if only one is given, it is used for all")
 
     async def run(self, args):
-        await self.ice40_iface.load(args.bitstream.read())
+        bitstreams = [file.read() for file in args.bitstream]
+        if len(bitstreams) == 1:
+            bitstreams *= self.ice40_iface.count
+        elif len(bitstreams) != self.ice40_iface.count:
+            raise ICE40SRAMError(
+                f"expected {self.ice40_iface.count} bitstreams (one per target), "
+                f"got {len(bitstreams)}")
+        await self.ice40_iface.load_targets(dict(enumerate(bitstreams)))
         self.logger.info("FPGA successfully configured")
 
     @classmethod
@@ -1,7 +1,8 @@
 import base64
 import zlib
 
-from glasgow.applet import GlasgowAppletV2TestCase, synthesis_test, applet_v2_hardware_test
+from glasgow.applet import GlasgowAppletV2TestCase, synthesis_test
+from glasgow.applet import applet_v2_simulation_test, applet_v2_hardware_test
 from . import ProgramICE40SRAMApplet, ICE40SRAMError
 
 
@@ -14,6 +15,46 @@ class ProgramICE40SRAMAppletTestCase(GlasgowAppletV2TestCase, applet=ProgramICE4
     def test_build_without_done(self):
         self.assertBuilds(args=["--done", "-"])
 
+    @synthesis_test
+    def test_build_targets(self):
+        self.assertBuilds(args=["--cs", "A0:1", "--sck", "A2", "--copi", "A3",
+                                "--reset", "A4:5", "--done", "A6:7"])
+
+    def setup_targets(self, assembly):
+        # Each simulated target asserts CDONE once it has been reset and then deselected.
+        async def testbench(ctx):
+            cs, reset, done = (list(map(assembly.get_pin, names))
+                               for names in (["A0", "A1"], ["A4", "A5"], ["A6", "A7"]))
+            selected = [False, False]
+            while True:
+                await ctx.tick()
+                for index in range(2):
+                    if ctx.get(reset[index].oe) and not ctx.get(cs[index].o):
+                        selected[index] = True
+                    elif selected[index] and ctx.get(cs[index].o):
+                        ctx.set(done[index].i, 1)
+        assembly.add_testbench(testbench, background=True)
+
+    @applet_v2_simulation_test(prepare=setup_targets,
+                               args=["-f", "100",
+                                     "--cs", "A0:1", "--sck", "A2", "--copi", "A3",
+                                     "--reset", "A4:5", "--done", "A6:7"])
+    async def test_sim_targets(self, applet: ProgramICE40SRAMApplet, ctx):
+        await applet.ice40_iface.load_targets({0: b"\x7e\xaa\x99\x7e", 1: b"\x7e\xaa"})
+        self.assertEqual(await applet.ice40_iface._done_iface.get(0), True)
+        self.assertEqual(await applet.ice40_iface._done_iface.get(1), True)
+
+    @applet_v2_simulation_test(args=["-f", "100",
+                                     "--cs", "A0:1", "--sck", "A2", "--copi", "A3",
+                                     "--reset", "A4:5", "--done", "A6:7"])
+    async def test_sim_targets_failure(self, applet: ProgramICE40SRAMApplet, ctx):
+        # CDONE that is already high before the reset is not mistaken for configuration success.
+        ctx.set(applet.assembly.get_pin("A7").i, 1)
+        with self.assertRaisesRegex(ICE40SRAMError,
+                r"^FPGA failed to configure \(targets: 0, 1\)$"):
+            await applet.ice40_iface.load_targets({0: b"\x7e\xaa", 1: b"\x7e\xaa"},
+                                                  timeout_ms=2)
+
     # For the next two tests, the FPGA should configure successfully.
 
     @applet_v2_hardware_test(args=["-V", "3.3", "--done", "A4"],
@@ -37,6 +78,24 @@ class ProgramICE40SRAMAppletTestCase(GlasgowAppletV2TestCase, applet=ProgramICE4
         except ICE40SRAMError:
             pass
 
+    # The next three tests replay the same scenarios with the streaming configuration mode.
+
+    @applet_v2_hardware_test(args=["-V", "3.3", "--done", "A4"],
+            mocks=[f"ice40_iface.{attr}" for attr in ["_spi_iface", "_reset_iface", "_done_iface"]])
+    async def test_hardware_stream_with_done(self, applet: ProgramICE40SRAMApplet):
+        await applet.ice40_iface.load_targets({0: ICE40UP5K_BLINKY_BITSTREAM})
+
+    @applet_v2_hardware_test(args=["-V", "3.3", "--done", "-"],
+            mocks=[f"ice40_iface.{attr}" for attr in ["_spi_iface", "_reset_iface", "_done_iface"]])
+    async def test_hardware_stream_without_done(self, applet: ProgramICE40SRAMApplet):
+        await applet.ice40_iface.load_targets({0: ICE40UP5K_BLINKY_BITSTREAM})
+
+    @applet_v2_hardware_test(args=["-V", "3.3", "--done", "A4"],
+            mocks=[f"ice40_iface.{attr}" for attr in ["_spi_iface", "_reset_iface", "_done_iface"]])
+    async def test_hardware_stream_failure(self, applet: ProgramICE40SRAMApplet):
+        with self.assertRaisesRegex(ICE40SRAMError, r"^FPGA failed to configure \(targets: 0\)$"):
+            await applet.ice40_iface.load_targets({0: ICE40UP5K_BLINKY_BITSTREAM})
+
 
 ICE40UP5K_BLINKY_BITSTREAM = zlib.decompress(base64.b85decode(R"""
 c%1Fs;fo`89mny{Op?9acJDTe_1LPMK`f?f&(JM+lodu0AC>M(MQRIm>4VZfJNAK8kTSgk5iImj%2hnh
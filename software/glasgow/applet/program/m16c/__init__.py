@@ -16,11 +16,15 @@
 # No partial reprogram functionality is provided because it requires knowing the erase block map.
 # In the future, a database may be used to provide these.
 
+import os
+import json
 import logging
 import argparse
 import asyncio
 import enum
+import collections
 from contextlib import contextmanager
+import platformdirs
 from amaranth import *
 from amaranth.lib import io
 
@@ -70,6 +74,39 @@ class M16CBootloaderError(GlasgowAppletError):
     pass
 
 
+def _baud_cache_path():
+    return platformdirs.user_cache_path("GlasgowEmbedded", appauthor=False) / "m16c-baud.json"
+
+
+def _load_cached_baud(path, serial):
+    try:
+        with open(path) as f:
+            baud_rate = json.load(f).get(serial)
+    except (OSError, ValueError, AttributeError):
+        return None
+    if baud_rate in BAUD_RATES:
+        return baud_rate
+
+
+def _store_cached_baud(path, serial, baud_rate):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+        if not isinstance(cache, dict):
+            cache = {}
+    except (OSError, ValueError):
+        cache = {}
+    cache[serial] = baud_rate
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(temp_path, path)
+    except OSError as exn:
+        logging.getLogger(__name__).debug("cannot write baud rate cache %s: %s", path, exn)
+
+
 class ProgramM16CSubtarget(Elaboratable):
     def __init__(self, ports, out_fifo, in_fifo, bit_cyc, reset, mode, max_bit_cyc):
         self.ports    = ports
@@ -121,12 +158,15 @@ class ProgramM16CSubtarget(Elaboratable):
 
 
 class ProgramM16CInterface:
-    def __init__(self, interface, logger, addr_reset, addr_mode, timeout=1.0):
+    def __init__(self, interface, logger, addr_reset, addr_mode, addr_bit_cyc, bit_cyc_for_baud,
+                 timeout=1.0):
         self.lower   = interface
         self._logger = logger
         self._level  = logging.DEBUG if self._logger.name == __name__ else logging.TRACE
-        self._addr_reset = addr_reset
-        self._addr_mode  = addr_mode
+        self._addr_reset   = addr_reset
+        self._addr_mode    = addr_mode
+        self._addr_bit_cyc = addr_bit_cyc
+        self._bit_cyc_for_baud = bit_cyc_for_baud
         self.timeout = timeout
 
     def _log(self, message, *args):
@@ -164,7 +204,12 @@ class ProgramM16CInterface:
         except asyncio.TimeoutError:
             raise M16CBootloaderError("cannot synchronize with ROM bootloader")
 
+    async def _set_uart_baud(self, baud_rate):
+        await self.lower.device.write_register(
+            self._addr_bit_cyc, self._bit_cyc_for_baud[baud_rate], width=3)
+
     async def sync_bootloader(self):
+        await self._set_uart_baud(9600)
         await self.reset_bootloader()
         await self._sync_autobaud()
 
@@ -179,6 +224,28 @@ class ProgramM16CInterface:
         except asyncio.TimeoutError:
             raise M16CBootloaderError(f"bootloader does not support baud rate {baud_rate}")
 
+    async def set_baud(self, baud_rate):
+        await self.bootloader_set_baud(baud_rate)
+        await self._set_uart_baud(baud_rate)
+
+    async def negotiate_baud(self, baud_rates, reconnect):
+        """Switch to the fastest of ``baud_rates`` that the bootloader accepts, trying each of them
+        in turn. Since the bootloader may be left in an unknown state after rejecting a baud rate,
+        ``reconnect()`` is awaited before trying the next one.
+
+        Returns the chosen baud rate, which is 9600 if none of ``baud_rates`` are accepted.
+        """
+        for baud_rate in sorted(baud_rates, reverse=True):
+            if baud_rate == 9600:
+                break
+            try:
+                await self.set_baud(baud_rate)
+                return baud_rate
+            except M16CBootloaderError as error:
+                self._logger.warning("%s", error)
+                await reconnect()
+        return 9600
+
     async def bootloader_version(self):
         self._log("command version")
         await self.lower.write([Command.VERSION])
@@ -191,9 +258,11 @@ class ProgramM16CInterface:
         except asyncio.TimeoutError:
             raise M16CBootloaderError("command timeout")
 
-    async def _bootloader_read_status(self):
+    async def _command_read_status(self):
         self._log("command read-status")
         await self.lower.write([Command.READ_STATUS])
+
+    async def _response_read_status(self):
         async def response():
             srd1, srd2 = await self.lower.read(2)
             self._log("response srd1=%s srd2=%s", f"{srd1:08b}", f"{srd2:08b}")
@@ -203,6 +272,10 @@ class ProgramM16CInterface:
         except asyncio.TimeoutError:
             raise M16CBootloaderError("command timeout")
 
+    async def _bootloader_read_status(self):
+        await self._command_read_status()
+        return await self._response_read_status()
+
     async def _bootloader_poll_status(self, timeout):
         while timeout >= 0:
             self._log("command read-status")
@@ -244,7 +317,7 @@ class ProgramM16CInterface:
             return False
         assert False
 
-    async def read_page(self, address):
+    async def _command_read_page(self, address):
         assert address % PAGE_SIZE == 0
         self._log("command read-page page=%04x", (address >> 8) & 0xFFFF)
         await self.lower.write([Command.READ_PAGE])
@@ -252,6 +325,8 @@ class ProgramM16CInterface:
             (address >> 8)  & 0xFF,
             (address >> 16) & 0xFF,
         ])
+
+    async def _response_read_page(self, address):
         async def response():
             data = await self.lower.read(0x100)
             self._log("response data=<%s>", dump_hex(data))
@@ -261,7 +336,30 @@ class ProgramM16CInterface:
         except asyncio.TimeoutError:
             raise M16CBootloaderError(f"cannot read page {address:06x}")
 
-    async def program_page(self, address, data):
+    async def read_page(self, address):
+        await self._command_read_page(address)
+        return await self._response_read_page(address)
+
+    async def read_pages(self, address, length, *, window=1):
+        """Read ``length`` bytes starting at ``address``, sending the commands for up to
+        ``window`` pages before waiting for the response to the first of them.
+
+        The ROM bootloader only buffers a single received byte while it is busy, so a ``window``
+        larger than 1 is only safe if the target (or its bootloader) can buffer several commands.
+        """
+        assert address % PAGE_SIZE == 0 and length % PAGE_SIZE == 0 and window >= 1
+        data    = bytearray()
+        pending = collections.deque()
+        for page_address in range(address, address + length, PAGE_SIZE):
+            await self._command_read_page(page_address)
+            pending.append(page_address)
+            if len(pending) == window:
+                data += await self._response_read_page(pending.popleft())
+        while pending:
+            data += await self._response_read_page(pending.popleft())
+        return data
+
+    async def _command_program_page(self, address, data):
         assert address % PAGE_SIZE == 0 and len(data) == PAGE_SIZE
         self._log("command program-page page=%04x data=<%s>",
                   (address >> 8) & 0xFFFF, dump_hex(data))
@@ -271,6 +369,15 @@ class ProgramM16CInterface:
             (address >> 16) & 0xFF,
         ])
         await self.lower.write(data)
+
+    async def _response_program_page(self, address):
+        srd1, srd2 = await self._response_read_status()
+        assert (srd1 & ST_READY) != 0
+        if (srd1 & ST_PROGRAM_FAIL) != 0:
+            raise M16CBootloaderError(f"cannot program page {address:06x}")
+
+    async def program_page(self, address, data):
+        await self._command_program_page(address, data)
         try:
             srd1, srd2 = await self._bootloader_poll_status(1.0)
             assert (srd1 & ST_READY) != 0
@@ -279,6 +386,24 @@ class ProgramM16CInterface:
         except asyncio.TimeoutError:
             raise M16CBootloaderError("page program timeout")
 
+    async def program_pages(self, address, data, *, window=1):
+        """Program ``data`` starting at ``address``, sending the commands for up to ``window``
+        pages before waiting for the status of the first of them.
+
+        The status is requested once per page, right after the page data, rather than polled;
+        see :meth:`read_pages` for the restrictions on ``window``.
+        """
+        assert address % PAGE_SIZE == 0 and len(data) % PAGE_SIZE == 0 and window >= 1
+        pending = collections.deque()
+        for offset in range(0, len(data), PAGE_SIZE):
+            await self._command_program_page(address + offset, data[offset:offset + PAGE_SIZE])
+            await self._command_read_status()
+            pending.append(address + offset)
+            if len(pending) == window:
+                await self._response_program_page(pending.popleft())
+        while pending:
+            await self._response_program_page(pending.popleft())
+
     async def erase_block(self, address):
         assert address % PAGE_SIZE == 0
         self._log("command erase-block block=%04x", (address >> 8) & 0xFFFF)
@@ -362,14 +487,17 @@ class ProgramM16CApplet(GlasgowApplet):
         access.add_run_arguments(parser)
 
         parser.add_argument(
-            "-b", "--baud", metavar="RATE", type=int, default=9600, choices=BAUD_RATES.keys(),
-            help="set baud rate to RATE bits per second (default: %(default)s)")
+            "-b", "--baud", metavar="RATE", type=int, choices=BAUD_RATES.keys(),
+            help="set baud rate to RATE bits per second (default: fastest supported rate, "
+                 "which is remembered for each Glasgow device)")
 
     async def run(self, device, args):
         iface = await device.demultiplexer.claim_interface(self, self.mux_interface, args)
         return ProgramM16CInterface(iface, self.logger,
             addr_reset=self.__addr_reset,
-            addr_mode=self.__addr_mode)
+            addr_mode=self.__addr_mode,
+            addr_bit_cyc=self.__addr_bit_cyc,
+            bit_cyc_for_baud=self.__bit_cyc_for_baud)
 
     @classmethod
     def add_interact_arguments(cls, parser):
@@ -385,6 +513,16 @@ class ProgramM16CApplet(GlasgowApplet):
         parser.add_argument(
             "-k", "--key", metavar="HEX-ID", type=unlock_key, action="append",
             help="unlock bootloader with key(s) HEX-ID (default: 00000000000000, FFFFFFFFFFFFFF)")
+        def window_size(arg):
+            pages = int(arg, 0)
+            if pages < 1:
+                raise argparse.ArgumentTypeError(f"{arg} is not a positive page count")
+            return pages
+
+        parser.add_argument(
+            "-w", "--window", metavar="PAGES", type=window_size, default=1,
+            help="send commands for up to PAGES pages before waiting for a response; values "
+                 "larger than 1 require a bootloader that buffers commands (default: %(default)s)")
 
         def page_address(arg):
             address = int(arg, 0)
@@ -431,9 +569,7 @@ class ProgramM16CApplet(GlasgowApplet):
             help="erase block at address ADDRESS, which must be page-aligned")
 
     async def interact(self, device, args, iface):
-        try:
-            await device.write_register(
-                self.__addr_bit_cyc, self.__bit_cyc_for_baud[9600], width=3)
+        async def connect():
             await iface.sync_bootloader()
             self.logger.info("bootloader identification %s", await iface.bootloader_version())
 
@@ -451,15 +587,28 @@ class ProgramM16CApplet(GlasgowApplet):
                 else:
                     raise M16CBootloaderError("cannot unlock bootloader")
 
-            if args.baud != 9600:
-                await iface.bootloader_set_baud(args.baud)
-                await device.write_register(
-                    self.__addr_bit_cyc, self.__bit_cyc_for_baud[args.baud], width=3)
+        try:
+            await connect()
+
+            if args.baud is not None:
+                if args.baud != 9600:
+                    await iface.set_baud(args.baud)
+            else:
+                # Negotiating the baud rate requires reconnecting after every rejected rate, so
+                # the outcome is remembered, and only rates up to the remembered one are tried.
+                cache_path  = _baud_cache_path()
+                cached_baud = _load_cached_baud(cache_path, device.serial)
+                baud_rates  = [baud for baud in BAUD_RATES if cached_baud is None or
+                               baud <= cached_baud]
+                baud_rate   = await iface.negotiate_baud(baud_rates, connect)
+                if baud_rate != cached_baud:
+                    _store_cached_baud(cache_path, device.serial, baud_rate)
+                self.logger.info("using baud rate %d", baud_rate)
 
             if args.operation == "read":
-                for address in range(args.address, args.address + args.length, PAGE_SIZE):
-                    self.logger.info("reading page %0.*x", 5, address)
-                    args.file.write(await iface.read_page(address))
+                self.logger.info("reading %#x bytes at %0.*x", args.length, 5, args.address)
+                args.file.write(await iface.read_pages(args.address, args.length,
+                                                       window=args.window))
 
             if args.operation == "program":
                 firmware = args.file.read()
@@ -467,15 +616,14 @@ class ProgramM16CApplet(GlasgowApplet):
                     raise M16CBootloaderError("file size ({}) is not a multiple of page size"
                                               .format(len(firmware)))
 
+                self.logger.info("programming %#x bytes at %0.*x", len(firmware), 5, args.address)
+                await iface.program_pages(args.address, firmware, window=args.window)
+                self.logger.info("verifying %#x bytes at %0.*x", len(firmware), 5, args.address)
+                readback = await iface.read_pages(args.address, len(firmware), window=args.window)
                 for offset in range(0, len(firmware), PAGE_SIZE):
-                    address   = args.address + offset
-                    page_data = firmware[offset:offset + PAGE_SIZE]
-
-                    self.logger.info("programming page %0.*x", 5, address)
-                    await iface.program_page(address, page_data)
-                    if await iface.read_page(address) != page_data:
+                    if readback[offset:offset + PAGE_SIZE] != firmware[offset:offset + PAGE_SIZE]:
                         raise M16CBootloaderError("verifying page {:0{}x} failed"
-                                                  .format(address, 5))
+                                                  .format(args.address + offset, 5))
 
             if args.operation == "erase":
                 self.logger.info("erasing array")
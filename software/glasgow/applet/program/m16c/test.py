@@ -1,8 +1,259 @@
+import asyncio
+import pathlib
+import tempfile
+import unittest
+
 from ... import *
-from . import ProgramM16CApplet
+from . import ProgramM16CApplet, ProgramM16CInterface, M16CBootloaderError
+from . import BAUD_RATES, PAGE_SIZE, Command, ST_READY, ST_PROGRAM_FAIL, ID_CORRECT
+from . import _load_cached_baud, _store_cached_baud
+
+
+ADDR_RESET   = 0
+ADDR_MODE    = 1
+ADDR_BIT_CYC = 2
+BIT_CYC_FOR_BAUD = {baud: 48_000_000 // baud for baud in BAUD_RATES}
+
+
+class M16CBootloaderModel:
+    """A timing-aware behavioral model of the M16C ROM bootloader, which stands in for both
+    the UART pipe and the device registers of the applet.
+
+    Every byte takes 10 bit periods to transfer at the current baud rate, and is lost if the baud
+    rates of the host and the bootloader differ. The bootloader handles received bytes one at
+    a time; while it is busy, it holds at most :py:`rx_buffer` received bytes, and any further
+    bytes are lost and counted in :py:`overruns`. Programming a page takes :py:`program_time`
+    seconds. Every read from the model adds :py:`latency` seconds to the elapsed :py:`time`.
+    """
+
+    latency      = 0.001
+    program_time = 0.003
+
+    def __init__(self, *, synced=True, baud_rates=BAUD_RATES, rx_buffer=1, failed_pages=()):
+        self.baud_rates   = set(baud_rates)
+        self.rx_buffer    = rx_buffer
+        self.failed_pages = set(failed_pages)
+        self.memory       = bytearray(b"\xff" * 0x10_0000)
+        self.overruns     = 0
+        self.time         = 0.0
+        self.device       = self
+        self.serial       = "C3-20240101T000000Z"
+
+        self._host_baud   = 9600
+        self._mode        = 0
+        self._line_free   = 0.0   # time at which the host may start sending the next byte
+        self._pending     = bytearray()
+        self._received    = []    # [(time, byte)] received by the host
+        self._start(synced=synced)
+
+    def _start(self, *, synced):
+        self._synced      = synced
+        self._zeros       = 0
+        self._baud        = 9600
+        self._busy_until  = 0.0   # time at which the bootloader reads the next byte
+        self._rx_reads    = []    # times at which the bootloader has read or will read a byte
+        self._command     = bytearray()
+        self._srd1        = ST_READY
+
+    # Device interface.
+
+    async def write_register(self, address, value, width=1):
+        match address:
+            case 0: # ADDR_RESET
+                if not value and self._mode:
+                    self._start(synced=False)
+            case 1: # ADDR_MODE
+                self._mode = value
+            case 2: # ADDR_BIT_CYC
+                self._host_baud, = (baud for baud, bit_cyc in BIT_CYC_FOR_BAUD.items()
+                                    if bit_cyc == value)
+
+    # Pipe interface.
+
+    async def reset(self):
+        self._pending.clear()
+        self._received.clear()
+
+    async def write(self, data):
+        self._pending += bytes(data)
+
+    async def flush(self):
+        for byte in self._pending:
+            start = max(self.time, self._line_free)
+            self._line_free = start + 10 / self._host_baud
+            self._receive(self._line_free, byte)
+        self._pending.clear()
+
+    async def read(self, length):
+        await self.flush()
+        if len(self._received) < length:
+            await asyncio.Future() # never arrives
+        self.time = max(self.time, self._received[length - 1][0]) + self.latency
+        data, self._received = self._received[:length], self._received[length:]
+        return bytes(byte for time, byte in data)
+
+    # Bootloader.
+
+    def _transmit(self, data):
+        for byte in data:
+            self._busy_until += 10 / self._baud
+            self._received.append((self._busy_until, byte))
+
+    def _receive(self, arrival, byte):
+        if self._host_baud != self._baud:
+            return # framing error
+        waiting = sum(1 for read_time in self._rx_reads if read_time > arrival)
+        if waiting >= self.rx_buffer:
+            self.overruns += 1
+            return
+        self._busy_until = max(self._busy_until, arrival)
+        self._rx_reads = [read_time for read_time in self._rx_reads if read_time > arrival]
+        self._rx_reads.append(self._busy_until)
+
+        if not self._synced:
+            if byte == 0x00:
+                self._zeros += 1
+            elif byte == BAUD_RATES[9600] and self._zeros >= 16:
+                self._synced = True
+                self._transmit([byte])
+            return
+
+        self._command.append(byte)
+        match list(self._command):
+            case [code] if code in BAUD_RATES.values():
+                baud, = (baud for baud, baud_code in BAUD_RATES.items() if baud_code == code)
+                if baud in self.baud_rates:
+                    self._transmit([code])
+                    self._baud = baud
+            case [Command.VERSION]:
+                self._transmit(b"VER.1.00")
+            case [Command.READ_STATUS]:
+                self._transmit([self._srd1, ID_CORRECT])
+            case [Command.CLEAR_STATUS]:
+                self._srd1 = ST_READY
+            case [Command.READ_PAGE, page_lo, page_hi]:
+                address = (page_lo << 8) | (page_hi << 16)
+                self._transmit(self.memory[address:address + PAGE_SIZE])
+            case [Command.PROGRAM_PAGE, page_lo, page_hi, *data] if len(data) == PAGE_SIZE:
+                address = (page_lo << 8) | (page_hi << 16)
+                if address in self.failed_pages:
+                    self._srd1 |= ST_PROGRAM_FAIL
+                else:
+                    for offset, value in enumerate(data):
+                        self.memory[address + offset] &= value
+                self._busy_until += self.program_time
+            case [Command.PROGRAM_PAGE | Command.READ_PAGE, *_]:
+                return # incomplete
+            case _:
+                pass # unknown command, ignored
+        self._command.clear()
 
 
 class ProgramM16CAppletTestCase(GlasgowAppletTestCase, applet=ProgramM16CApplet):
     @synthesis_test
     def test_build(self):
         self.assertBuilds()
+
+
+class ProgramM16CInterfaceTestCase(unittest.TestCase):
+    def make_iface(self, **kwargs):
+        self.model = M16CBootloaderModel(**kwargs)
+        return ProgramM16CInterface(self.model, ProgramM16CApplet.logger,
+            addr_reset=ADDR_RESET, addr_mode=ADDR_MODE,
+            addr_bit_cyc=ADDR_BIT_CYC, bit_cyc_for_baud=BIT_CYC_FOR_BAUD,
+            timeout=0.05)
+
+    def fill(self, address, length):
+        data = bytes((n * 7 + 3) & 0xff for n in range(length))
+        self.model.memory[address:address + length] = data
+        return data
+
+    async def timed_read(self, baud, window=1, **kwargs):
+        iface = self.make_iface(**kwargs)
+        if baud != 9600:
+            await iface.set_baud(baud)
+        data  = self.fill(0x0F_0000, 16 * PAGE_SIZE)
+        start = self.model.time
+        self.assertEqual(await iface.read_pages(0x0F_0000, 16 * PAGE_SIZE, window=window), data)
+        self.assertEqual(self.model.overruns, 0)
+        return self.model.time - start
+
+    @async_test
+    async def test_read_pages_baud(self):
+        slow = await self.timed_read(9600)
+        fast = await self.timed_read(115200)
+        self.assertAlmostEqual(slow, 16 * (259 * 10 / 9600 + 0.001), places=3)
+        self.assertLess(fast * 10, slow)
+
+    @async_test
+    async def test_read_pages_window(self):
+        serial   = await self.timed_read(115200, window=1, rx_buffer=16)
+        windowed = await self.timed_read(115200, window=4, rx_buffer=16)
+        # Only the first command and the last round trip are not overlapped with a response.
+        self.assertAlmostEqual(windowed, 3 * 10 / 115200 + 16 * 256 * 10 / 115200 + 0.001,
+                               places=4)
+        self.assertLess(windowed, serial)
+
+    @async_test
+    async def test_read_pages_window_overrun(self):
+        iface = self.make_iface()
+        # The second command is corrupted by an overrun, which desynchronizes the responses.
+        with self.assertRaisesRegex(M16CBootloaderError, r"^cannot read page 0f0300$"):
+            await iface.read_pages(0x0F_0000, 4 * PAGE_SIZE, window=2)
+        self.assertGreater(self.model.overruns, 0)
+
+    @async_test
+    async def test_program_pages(self):
+        iface = self.make_iface()
+        data  = bytes(range(256)) * 4
+        await iface.program_pages(0x0F_0000, data)
+        self.assertEqual(self.model.memory[0x0F_0000:0x0F_0400], data)
+        self.assertEqual(self.model.overruns, 0)
+        # The status request is sent while the page is being programmed.
+        self.assertAlmostEqual(self.model.time,
+            4 * ((260 + 2) * 10 / 9600 + self.model.program_time + 0.001), places=4)
+
+    @async_test
+    async def test_program_pages_failed(self):
+        iface = self.make_iface(failed_pages={0x0F_0100})
+        with self.assertRaisesRegex(M16CBootloaderError, r"^cannot program page 0f0100$"):
+            await iface.program_pages(0x0F_0000, bytes(4 * PAGE_SIZE))
+
+    @async_test
+    async def test_negotiate_baud(self):
+        iface = self.make_iface(synced=False, baud_rates={9600, 19200, 57600})
+        await iface.sync_bootloader()
+        with self.assertLogs(ProgramM16CApplet.logger) as logs:
+            self.assertEqual(await iface.negotiate_baud(BAUD_RATES, iface.sync_bootloader),
+                             57600)
+        self.assertEqual(logs.output, [
+            "WARNING:glasgow.applet.program.m16c:bootloader does not support baud rate 115200"
+        ])
+        self.assertEqual(await iface.read_pages(0x0F_0000, PAGE_SIZE), b"\xff" * PAGE_SIZE)
+
+    @async_test
+    async def test_negotiate_baud_none(self):
+        iface = self.make_iface(baud_rates={9600})
+        self.assertEqual(await iface.negotiate_baud([9600], iface.sync_bootloader), 9600)
+
+    def test_baud_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / "cache" / "m16c-baud.json"
+            self.assertIsNone(_load_cached_baud(path, "C3-1"))
+            _store_cached_baud(path, "C3-1", 57600)
+            _store_cached_baud(path, "C3-2", 115200)
+            self.assertEqual(_load_cached_baud(path, "C3-1"), 57600)
+            self.assertEqual(_load_cached_baud(path, "C3-2"), 115200)
+            path.write_text("[]")
+            self.assertIsNone(_load_cached_baud(path, "C3-1"))
+            _store_cached_baud(path, "C3-1", 9600)
+            self.assertEqual(_load_cached_baud(path, "C3-1"), 9600)
+
+    def test_baud_cache_unwritable(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / "file" / "m16c-baud.json"
+            path.parent.write_text("")
+            with self.assertLogs(ProgramM16CApplet.logger, "DEBUG") as logs:
+                _store_cached_baud(path, "C3-1", 57600)
+            self.assertIn("cannot write baud rate cache", logs.output[0])
+            self.assertIsNone(_load_cached_baud(path, "C3-1"))
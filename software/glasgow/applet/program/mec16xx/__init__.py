@@ -15,7 +15,7 @@ import textwrap
 from ....support.aobject import *
 from ....arch.arc import *
 from ....arch.arc.mec16xx import *
-from ...debug.arc import DebugARCApplet
+from ...debug.arc import DebugARCApplet, ARCDebugError
 from ... import *
 
 
@@ -28,6 +28,9 @@ class MEC16xxError(GlasgowAppletError):
 
 
 class MEC16xxInterface(aobject):
+    # Number of words read or programmed per batch of queued debug transactions.
+    batch_words = 256
+
     async def __init__(self, interface, logger):
         self.lower   = interface
         self._logger = logger
@@ -45,11 +48,8 @@ class MEC16xxInterface(aobject):
         self._logger.log(self._level, "MEC16xx: " + message, *args)
 
     async def read_firmware_mapped(self, size):
-        words = []
-        for offset in range(0, size, 4):
-            self._log("read firmware mapped offset=%05x", offset)
-            words.append(await self.lower.read(offset, space="memory"))
-        return words
+        self._log("read firmware mapped size=%05x", size)
+        return await self.lower.read_memory(0, (size + 3) // 4)
 
     async def emergency_mass_erase(self):
         tap_iface = self.lower.lower
@@ -179,17 +179,19 @@ class MEC16xxInterface(aobject):
 
         await self._flash_wait_for_not_busy(f"Flash command {flash_command.bits_repr(omit_zero=True)} failed")
 
+    def _flash_check_status(self, flash_status, fail_msg="Failure detected"):
+        if flash_status.Busy_Err or flash_status.CMD_Err or flash_status.Protect_Err:
+            raise MEC16xxError("%s with status %s"
+                               % (fail_msg,
+                                  flash_status.bits_repr(omit_zero=True)))
+
     async def _flash_wait_for_not_busy(self, fail_msg="Failure detected"):
         flash_status = Flash_Status(Busy=1)
         while flash_status.Busy:
             flash_status = Flash_Status.from_int(
                 await self.lower.read(Flash_Status_addr, space="memory"))
             self._log("read Flash_Status %s", flash_status.bits_repr(omit_zero=True))
-
-            if flash_status.Busy_Err or flash_status.CMD_Err or flash_status.Protect_Err:
-                raise MEC16xxError("%s with status %s"
-                                   % (fail_msg,
-                                      flash_status.bits_repr(omit_zero=True)))
+            self._flash_check_status(flash_status, fail_msg)
 
     async def _flash_wait_for_data_not_full(self, fail_msg="Failure detected"):
         flash_status = Flash_Status(Data_Full=1)
@@ -197,54 +199,81 @@ class MEC16xxInterface(aobject):
             flash_status = Flash_Status.from_int(
                 await self.lower.read(Flash_Status_addr, space="memory"))
             self._log("read Flash_Status %s", flash_status.bits_repr(omit_zero=True))
+            self._flash_check_status(flash_status, fail_msg)
 
-            if flash_status.Busy_Err or flash_status.CMD_Err or flash_status.Protect_Err:
-                raise MEC16xxError("%s with status %s"
-                                   % (fail_msg,
-                                      flash_status.bits_repr(omit_zero=True)))
+    async def _read_flash_data(self, flash_address):
+        await self.lower.write(Flash_Address_addr, flash_address, space="memory")
+        return await self.lower.read(Flash_Data_addr, space="memory")
 
     async def read_flash(self, address, count):
         await self._flash_clean_start()
+        await self._flash_command(mode=Flash_Mode_Read, address=address)
         words = []
-        for offset in range(count):
-            await self._flash_command(mode=Flash_Mode_Read, address=address + offset * 4)
-            data_1 = await self.lower.read(Flash_Data_addr, space="memory")
-            self._log("read Flash_Address=%05x Flash_Data=%08x",
-                      address + offset * 4, data_1)
+        for batch_offset in range(0, count, self.batch_words):
+            batch_count = min(count - batch_offset, self.batch_words)
 
             # This is hella cursed. In theory, we should be able to just enable Burst in
             # Flash_Command and do a long series of reads from Flash_Data. However, sometimes
             # we silently get zeroes back for no discernible reason. Since data never gets
             # corrupted during programming, the most likely explanation is a silicon bug where
             # the debug interface is not correctly waiting for the Flash memory to acknowledge
-            # the read.
-            await self.lower.write(Flash_Address_addr, address + offset * 4, space="memory")
-            data_2 = await self.lower.read(Flash_Data_addr, space="memory")
-            self._log("read Flash_Address=%05x Flash_Data=%08x",
-                      address + offset * 4, data_2)
-
-            if data_1 == data_2:
-                data = data_1
-            else:
-                # Third time's the charm.
-                await self.lower.write(Flash_Address_addr, address + offset * 4, space="memory")
-                data_3 = await self.lower.read(Flash_Data_addr, space="memory")
-                self._log("read Flash_Address=%05x Flash_Data=%08x",
-                          address + offset * 4, data_3)
+            # the read. So, every word is read twice (rewriting Flash_Address each time), and
+            # the reads for the entire batch are queued and retrieved at once.
+            # Any read whose queued transactions did not complete in time or failed is retried
+            # one transaction at a time.
+            queued = []
+            for offset in range(batch_offset, batch_offset + batch_count):
+                for _ in range(2):
+                    write = await self.lower.queue_write(
+                        Flash_Address_addr, address + offset * 4, space="memory")
+                    read  = await self.lower.queue_read(
+                        Flash_Data_addr, space="memory")
+                    queued.append((address + offset * 4, write, read))
+            status = await self.lower.queue_read(Flash_Status_addr, space="memory")
+
+            reads = []
+            for flash_address, write, read in queued:
+                try:
+                    await write.get()
+                    reads.append(await read.get())
+                except ARCDebugError as error:
+                    self._log("retry read Flash_Address=%05x (%s)", flash_address, error)
+                    reads.append(await self._read_flash_data(flash_address))
+            try:
+                flash_status = Flash_Status.from_int(await status.get())
+            except ARCDebugError as error:
+                self._log("retry read Flash_Status (%s)", error)
+                flash_status = Flash_Status.from_int(
+                    await self.lower.read(Flash_Status_addr, space="memory"))
+            self._log("read Flash_Status %s", flash_status.bits_repr(omit_zero=True))
+            self._flash_check_status(flash_status, "Flash read failed")
 
-                self._logger.warning("read glitch Flash_Address=%05x Flash_Data=%08x/%08x/%08x",
-                                     address + offset * 4, data_1, data_2, data_3)
+            for index, offset in enumerate(range(batch_offset, batch_offset + batch_count)):
+                data_1 = reads[index * 2 + 0]
+                data_2 = reads[index * 2 + 1]
+                self._log("read Flash_Address=%05x Flash_Data=%08x/%08x",
+                          address + offset * 4, data_1, data_2)
 
                 if data_1 == data_2:
                     data = data_1
-                elif data_2 == data_3:
-                    data = data_2
-                elif data_1 == data_3:
-                    data = data_3
                 else:
-                    raise MEC16xxError("cannot select a read by majority")
-
-            words.append(data)
+                    # Third time's the charm.
+                    data_3 = await self._read_flash_data(address + offset * 4)
+                    self._log("read Flash_Address=%05x Flash_Data=%08x",
+                              address + offset * 4, data_3)
+
+                    self._logger.warning(
+                        "read glitch Flash_Address=%05x Flash_Data=%08x/%08x/%08x",
+                        address + offset * 4, data_1, data_2, data_3)
+
+                    if data_2 == data_3:
+                        data = data_2
+                    elif data_1 == data_3:
+                        data = data_3
+                    else:
+                        raise MEC16xxError("cannot select a read by majority")
+
+                words.append(data)
         await self._flash_command(mode=Flash_Mode_Standby)
         return words
 
@@ -287,13 +316,47 @@ class MEC16xxInterface(aobject):
     async def program_flash(self, address, words):
         await self._flash_clean_start()
         await self._flash_command(mode=Flash_Mode_Program, address=address, burst=1)
+        # Only one word fits in Flash_Data, so Flash_Status must be sampled before every word is
+        # written, and the writes cannot be queued ahead of the samples. However, the sample is
+        # queued after the write of the previous word, and both are retrieved at once.
+        queued = None
         for offset, data in enumerate(words):
-            await self._flash_wait_for_data_not_full()
-            await self.lower.write(Flash_Data_addr, data, space="memory")
-            self._log("program Flash_Address=%05x Flash_Data=%08x", address + offset * 4, data)
+            status = await self.lower.queue_read(Flash_Status_addr, space="memory")
+            if queued is not None and not await self._flash_check_data_write(*queued):
+                # The retried write has filled Flash_Data again.
+                await self._flash_wait_for_data_not_full()
+            else:
+                try:
+                    flash_status = Flash_Status.from_int(await status.get())
+                    self._log("read Flash_Status %s", flash_status.bits_repr(omit_zero=True))
+                    self._flash_check_status(flash_status)
+                    data_full = flash_status.Data_Full
+                except ARCDebugError as error:
+                    self._log("retry read Flash_Status (%s)", error)
+                    data_full = True
+                if data_full:
+                    await self._flash_wait_for_data_not_full()
+            write  = await self.lower.queue_write(Flash_Data_addr, data, space="memory")
+            queued = (address + offset * 4, data, write)
+        if queued is not None:
+            await self._flash_check_data_write(*queued)
         await self._flash_wait_for_not_busy()
         await self._flash_command(mode=Flash_Mode_Standby)
 
+    async def _flash_check_data_write(self, flash_address, data, write):
+        """Check a queued write to Flash_Data, and retry it if it did not complete in time or
+        failed. Returns ``False`` if the write was retried."""
+        try:
+            await write.get()
+            self._log("program Flash_Address=%05x Flash_Data=%08x", flash_address, data)
+            return True
+        except ARCDebugError as error:
+            self._log("retry program Flash_Address=%05x (%s)", flash_address, error)
+            await self._flash_wait_for_data_not_full()
+            await self.lower.write(Flash_Data_addr, data, space="memory")
+            self._log("program Flash_Address=%05x Flash_Data=%08x", flash_address, data)
+            return False
+
     async def is_eeprom_blocked(self):
         eeprom_status = EEPROM_Status.from_int(
                 await self.lower.read(EEPROM_Status_addr, space="memory"))
@@ -676,3 +739,8 @@ class ProgramMEC16xxApplet(DebugARCApplet):
                 Boot_Block = {flash_status.Boot_Block}
                 Data_Block = {flash_status.Data_Block}
                 EEPROM_Block = {await mec_iface.is_eeprom_blocked()}"""))
+
+    @classmethod
+    def tests(cls):
+        from . import test
+        return test.ProgramMEC16xxAppletTestCase
@@ -0,0 +1,169 @@
+import random
+import logging
+import unittest
+
+from ....arch.arc import *
+from ....arch.arc.mec16xx import *
+from ... import *
+from ...interface.jtag_probe import JTAGProbeInterface, TAPInterface
+from ...interface.jtag_probe.test import JTAGProbeModel
+from ...debug.arc import ARCDebugInterface
+from ...debug.arc.test import ARCModel
+from . import ProgramMEC16xxApplet, MEC16xxInterface, MEC16xxError
+
+
+class MEC16xxModel(ARCModel):
+    """A behavioral model of the MEC16xx Flash controller, accessed via the ARC debug TAP.
+
+    Writing Flash_Address in read mode loads Flash_Data from the Flash array. For every
+    :py:`(address, data)` pair in :py:`glitches`, one load from that address silently produces
+    :py:`data` instead. After every write to Flash_Data, Flash_Status reports Data_Full for
+    the next :py:`data_full_reads` reads; a word written while Data_Full is set is lost, and
+    counted in :py:`overruns`.
+    """
+
+    def __init__(self, *, flash_size=0x1000, glitches=(), data_full_reads=0):
+        super().__init__()
+        self.aux[AUX_STATUS32_addr] = AUX_STATUS32(H=1).to_int()
+        self.flash    = [random.getrandbits(32) for _ in range(flash_size // 4)]
+        self.glitches = list(glitches)
+        self.overruns = 0
+        self.data_full_reads = data_full_reads
+
+        self._data_full_reads = 0
+
+        self._flash_command = Flash_Command()
+        self._flash_status  = Flash_Status()
+        self._flash_address = 0
+        self._flash_data    = 0
+
+    def read_memory(self, address):
+        if address == Flash_Data_addr:
+            if self._flash_command.Flash_Mode == Flash_Mode_Read and self._flash_command.Burst:
+                self._load()
+            return self._flash_data
+        elif address == Flash_Status_addr:
+            if self._data_full_reads:
+                self._data_full_reads -= 1
+            else:
+                self._flash_status.Data_Full = 0
+            return self._flash_status.to_int()
+        elif address == Flash_Command_addr:
+            return self._flash_command.to_int()
+        return super().read_memory(address)
+
+    def write_memory(self, address, data):
+        if address == Flash_Data_addr:
+            if self._flash_command.Flash_Mode != Flash_Mode_Program:
+                self._flash_status.CMD_Err = 1
+            elif self._flash_status.Data_Full:
+                self.overruns += 1
+            else:
+                self.flash[self._flash_address // 4] &= data
+                self._flash_address += 4
+                if self.data_full_reads:
+                    self._flash_status.Data_Full = 1
+                    self._data_full_reads = self.data_full_reads
+        elif address == Flash_Address_addr:
+            self._flash_address = data
+            if self._flash_command.Flash_Mode == Flash_Mode_Read and not self._flash_command.Burst:
+                self._load()
+        elif address == Flash_Command_addr:
+            self._flash_command = Flash_Command.from_int(data)
+            if self._flash_command.Flash_Mode == Flash_Mode_Erase:
+                self.flash = [0xffff_ffff] * len(self.flash)
+        elif address == Flash_Status_addr:
+            self._flash_status = Flash_Status.from_int(self._flash_status.to_int() & ~data)
+        else:
+            super().write_memory(address, data)
+
+    def _load(self):
+        for address, data in self.glitches:
+            if address == self._flash_address:
+                self.glitches.remove((address, data))
+                self._flash_data = data
+                break
+        else:
+            self._flash_data = self.flash[self._flash_address // 4]
+        if self._flash_command.Burst:
+            self._flash_address += 4
+
+
+class ProgramMEC16xxAppletTestCase(GlasgowAppletTestCase, applet=ProgramMEC16xxApplet):
+    @synthesis_test
+    def test_build(self):
+        self.assertBuilds()
+
+
+class MEC16xxInterfaceTestCase(unittest.TestCase):
+    async def make_iface(self, **kwargs):
+        self.model = MEC16xxModel(**kwargs)
+        self.probe = JTAGProbeModel(self.model)
+        jtag_iface = JTAGProbeInterface(self.probe, ProgramMEC16xxApplet.logger)
+        tap_iface  = TAPInterface(jtag_iface, ir_length=4)
+        arc_iface  = ARCDebugInterface(tap_iface, ProgramMEC16xxApplet.logger)
+        iface = await MEC16xxInterface(arc_iface, ProgramMEC16xxApplet.logger)
+        iface.batch_words = 64
+        return iface
+
+    @async_test
+    async def test_read_flash(self):
+        iface = await self.make_iface()
+        reads = self.probe.reads
+        self.assertEqual(await iface.read_flash(0x100, 200), self.model.flash[0x40:0x108])
+        # Entering and leaving read mode takes 9 transactions, followed by 1 read per batch.
+        self.assertEqual(self.probe.reads - reads, 9 + 4)
+
+    @async_test
+    async def test_read_flash_glitch(self):
+        iface = await self.make_iface(glitches=[(0x104, 0), (0x200, 0), (0x204, 0)])
+        with self.assertLogs(ProgramMEC16xxApplet.logger, logging.WARNING) as logs:
+            self.assertEqual(await iface.read_flash(0x100, 0x80), self.model.flash[0x40:0xc0])
+        self.assertEqual(len(logs.output), 3)
+        self.assertRegex(logs.output[0], r"read glitch Flash_Address=00104 "
+                                         r"Flash_Data=00000000/([0-9a-f]{8})/\1$")
+
+    @async_test
+    async def test_read_flash_no_majority(self):
+        iface = await self.make_iface(glitches=[(0x104, 0), (0x104, 1)])
+        with self.assertLogs(ProgramMEC16xxApplet.logger, logging.WARNING):
+            with self.assertRaisesRegex(MEC16xxError, r"^cannot select a read by majority$"):
+                await iface.read_flash(0x100, 4)
+
+    @async_test
+    async def test_read_flash_retry(self):
+        iface = await self.make_iface()
+        self.model.delays = {Flash_Data_addr}
+        with self.assertNoLogs(ProgramMEC16xxApplet.logger, logging.WARNING):
+            self.assertEqual(await iface.read_flash(0x100, 8), self.model.flash[0x40:0x48])
+
+    async def program_flash(self, **kwargs):
+        iface = await self.make_iface(**kwargs)
+        await iface.erase_flash()
+        words = [random.getrandbits(32) for _ in range(100)]
+        reads = self.probe.reads
+        await iface.program_flash(0x200, words)
+        self.assertEqual(self.model.flash[0x80:0x80 + 100], words)
+        self.assertEqual(self.model.overruns, 0)
+        return self.probe.reads - reads
+
+    @async_test
+    async def test_program_flash(self):
+        # Entering and leaving program mode takes 11 transactions. Every write is checked along
+        # with the Flash_Status sample for the next word, followed by 1 read for the last write.
+        self.assertEqual(await self.program_flash(), 11 + 100 + 1)
+
+    @async_test
+    async def test_program_flash_data_full(self):
+        # Every Flash_Status sample after the first word reports Data_Full, and is followed by
+        # polling it until it is clear (2 reads per poll).
+        self.assertEqual(await self.program_flash(data_full_reads=2),
+                         11 + 1 + 99 * (1 + 2 * 2) + 1)
+
+    @async_test
+    async def test_program_flash_retry(self):
+        iface = await self.make_iface()
+        await iface.erase_flash()
+        self.model.delays = {Flash_Data_addr}
+        await iface.program_flash(0x200, [1, 2, 3])
+        self.assertEqual(self.model.flash[0x80:0x83], [1, 2, 3])
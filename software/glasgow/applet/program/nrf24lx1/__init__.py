@@ -76,6 +76,11 @@ class ProgramNRF24Lx1Subtarget(Elaboratable):
 
 
 class ProgramNRF24Lx1Interface:
+    # Upper bounds on the duration of Flash operations. The device is not polled while these
+    # elapse, which lets erase and program commands for many pages be sent back to back.
+    page_erase_time_ms   = 25
+    byte_program_time_us = 50
+
     def __init__(self, interface, logger, device, addr_dut_prog, addr_dut_reset):
         self.lower   = interface
         self._logger = logger
@@ -108,9 +113,12 @@ class ProgramNRF24Lx1Interface:
 
     async def _command(self, cmd, arg=[], ret=0):
         self._log("cmd=%02X arg=<%s> ret=%d", cmd, dump_hex(arg), ret)
-        async with self.lower.select():
+        # Commands without a response are sent together with the next command that has one
+        # (or with the next synchronization), rather than individually.
+        async with self.lower.select(flush=False):
             await self.lower.write(bytes([cmd, *arg]))
-            result = await self.lower.read(ret)
+            if ret > 0:
+                result = await self.lower.read(ret)
         if ret > 0:
             self._log("res=<%s>", dump_hex(result))
             return result
@@ -159,6 +167,47 @@ class ProgramNRF24Lx1Interface:
         self._log("erase all")
         await self._command(0x62)
 
+    async def write_pages(self, address, data, *, page_size, buffer_size, erase_pages=()):
+        """Program ``data`` at ``address``, first erasing each of the ``erase_pages`` right
+        before the first write to that page.
+
+        Every erase and program command is followed by a delay that is long enough for it to
+        complete, so that the entire sequence is sent to the device without waiting for
+        a response; the status is only polled once, at the end.
+        """
+        self._log("write pages address=%#06x length=%#06x", address, len(data))
+        erase_pages = set(erase_pages)
+        offset = 0
+        while offset < len(data):
+            page = (address + offset) // page_size
+            if page in erase_pages:
+                await self.write_enable()
+                await self.erase_page(page)
+                await self.lower.delay_ms(self.page_erase_time_ms)
+                erase_pages.remove(page)
+
+            # Never cross a page boundary, so that the next page can be erased beforehand.
+            chunk_size = min(buffer_size, (page + 1) * page_size - (address + offset))
+            chunk_data = data[offset:offset + chunk_size]
+            await self.write_enable()
+            await self.program(address + offset, chunk_data)
+            await self.lower.delay_us(self.byte_program_time_us * len(chunk_data))
+            offset += chunk_size
+        await self.wait_status()
+
+    async def verify(self, chunks):
+        """Read back the range spanned by ``chunks``, a list of ``(address, data)`` tuples, with
+        a single command, and compare it with ``chunks``.
+
+        Returns the address of the first mismatching chunk, or ``None``.
+        """
+        start = min(address for address, data in chunks)
+        end   = max(address + len(data) for address, data in chunks)
+        contents = memoryview(await self.read(start, end - start))
+        for address, data in chunks:
+            if contents[address - start:address - start + len(data)] != data:
+                return address
+
     async def read_unprotected_pages(self):
         pages, = await self._command(0x89, ret=1)
         self._log("read unprotected pages=%#04x", pages)
@@ -321,6 +370,7 @@ class ProgramNRF24Lx1Applet(GlasgowApplet):
                 area_index   = 0
                 memory_area  = memory_map[area_index]
                 erased_pages = set()
+                programmed_chunks = {}
                 for chunk_mem_addr, chunk_data in sorted(input_data(args.file, fmt="ihex"),
                                                          key=lambda c: c[0]):
                     if len(chunk_data) == 0:
@@ -356,24 +406,32 @@ class ProgramNRF24Lx1Applet(GlasgowApplet):
                         (chunk_spi_addr // page_size),
                         (chunk_spi_addr + len(chunk_data) + page_size - 1) // page_size))
                     need_erase_pages = overwrite_pages - erased_pages
-                    if need_erase_pages:
-                        for page in need_erase_pages:
-                            page_addr = (memory_area.spi_addr & 0x10000) | (page * page_size)
-                            self.logger.log(level, "erasing %s memory at %#06x+%#06x",
-                                            memory_area.name, page_addr, page_size)
-                            await nrf24lx1_iface.write_enable()
-                            await nrf24lx1_iface.erase_page(page)
-                            await nrf24lx1_iface.wait_status()
-                        erased_pages.update(need_erase_pages)
+                    for page in sorted(need_erase_pages):
+                        page_addr = (memory_area.spi_addr & 0x10000) | (page * page_size)
+                        self.logger.log(level, "erasing %s memory at %#06x+%#06x",
+                                        memory_area.name, page_addr, page_size)
+                    erased_pages.update(need_erase_pages)
 
                     self.logger.log(level, "programming %s memory at %#06x+%#06x",
                                     memory_area.name, chunk_mem_addr, len(chunk_data))
-                    while len(chunk_data) > 0:
-                        await nrf24lx1_iface.write_enable()
-                        await nrf24lx1_iface.program(chunk_spi_addr, chunk_data[:buffer_size])
-                        await nrf24lx1_iface.wait_status()
-                        chunk_data  = chunk_data[buffer_size:]
-                        chunk_spi_addr += buffer_size
+                    await nrf24lx1_iface.write_pages(chunk_spi_addr, chunk_data,
+                        page_size=page_size, buffer_size=buffer_size,
+                        erase_pages=need_erase_pages)
+                    programmed_chunks.setdefault(memory_area, []).append(
+                        (chunk_spi_addr, chunk_data))
+
+                for memory_area, chunks in programmed_chunks.items():
+                    self.logger.info("verifying %s memory", memory_area.name)
+                    if memory_area.spi_addr & 0x10000:
+                        await nrf24lx1_iface.write_status(FSR_BIT_INFEN)
+                    else:
+                        await nrf24lx1_iface.write_status(0)
+                    if (failed_spi_addr := await nrf24lx1_iface.verify(chunks)) is not None:
+                        raise ProgramNRF24Lx1Error("verification failed for {} memory at {:#06x}"
+                                                 .format(memory_area.name,
+                                                         failed_spi_addr
+                                                         - (memory_area.spi_addr & 0xffff)
+                                                         + memory_area.mem_addr))
 
             if args.operation == "erase":
                 if args.info_page:
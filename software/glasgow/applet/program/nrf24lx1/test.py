@@ -1,5 +1,101 @@
+import unittest
+import contextlib
+
 from ... import *
-from . import ProgramNRF24Lx1Applet
+from . import ProgramNRF24Lx1Applet, ProgramNRF24Lx1Interface, FSR_BIT_WEN, FSR_BIT_RDYN
+from . import FSR_BIT_INFEN
+
+
+class NRF24Lx1Model:
+    """A behavioral model of the nRF24LE1 SPI programming interface, standing in for
+    the SPI controller interface.
+
+    Time advances by 8 µs per byte transferred and by the duration of every delay. Erasing a page
+    takes :py:`page_erase_time_us` and programming takes :py:`byte_program_time_us` per byte;
+    while an operation is in progress, every command except reading the status is ignored. Every
+    read from the model is counted in :py:`reads`.
+    """
+
+    page_erase_time_us   = 20_000
+    byte_program_time_us = 40
+
+    def __init__(self, *, page_size=512):
+        self.page_size = page_size
+        self.memory    = bytearray(b"\xff" * 0x8000)
+        self.info      = bytearray(b"\xff" * 0x200)
+        self.reads     = 0
+        self.ignored   = 0
+
+        self._time_us  = 0
+        self._busy_us  = 0
+        self._fsr      = 0
+        self._out      = bytearray()
+
+    def _tick(self, duration_us):
+        self._time_us += duration_us
+        if self._busy_us and self._time_us >= self._busy_us:
+            self._busy_us = 0
+            self._fsr &= ~(FSR_BIT_WEN|FSR_BIT_RDYN)
+
+    def _array(self):
+        return self.info if self._fsr & FSR_BIT_INFEN else self.memory
+
+    def _execute(self, command):
+        if not command or command[0] == 0x05 or command[0] == 0x03:
+            return
+        if self._busy_us:
+            self.ignored += 1
+            return
+        match command[0]:
+            case 0x06:
+                self._fsr |= FSR_BIT_WEN
+            case 0x04:
+                self._fsr &= ~FSR_BIT_WEN
+            case 0x01:
+                self._fsr = (self._fsr & ~FSR_BIT_INFEN) | (command[1] & FSR_BIT_INFEN)
+            case 0x02 if self._fsr & FSR_BIT_WEN:
+                address = (command[1] << 8) | command[2]
+                data    = command[3:]
+                array   = self._array()
+                array[address:address + len(data)] = \
+                    bytes(a & b for a, b in zip(array[address:address + len(data)], data))
+                self._busy_us = self._time_us + self.byte_program_time_us * len(data)
+                self._fsr    |= FSR_BIT_RDYN
+            case 0x52 if self._fsr & FSR_BIT_WEN:
+                address = command[1] * self.page_size
+                self._array()[address:address + self.page_size] = b"\xff" * self.page_size
+                self._busy_us = self._time_us + self.page_erase_time_us
+                self._fsr    |= FSR_BIT_RDYN
+            case _:
+                self.ignored += 1
+
+    @contextlib.asynccontextmanager
+    async def select(self, *, flush=True):
+        self._out.clear()
+        yield
+        self._execute(bytes(self._out))
+
+    async def write(self, octets):
+        self._tick(8 * len(octets))
+        self._out += octets
+
+    async def read(self, count):
+        self._tick(8 * count)
+        self.reads += 1
+        match self._out[0]:
+            case 0x05:
+                return bytes([self._fsr])
+            case 0x03:
+                address = (self._out[1] << 8) | self._out[2]
+                return bytes(self._array()[address:address + count])
+            case _:
+                return bytes(count)
+
+    async def delay_us(self, duration):
+        self._tick(duration)
+
+    async def delay_ms(self, duration):
+        self._tick(duration * 1000)
 
 # -------------------------------------------------------------------------------------------------
 
@@ -7,3 +103,38 @@ class ProgramNRF24Lx1AppletTestCase(GlasgowAppletTestCase, applet=ProgramNRF24Lx
     @synthesis_test
     def test_build(self):
         self.assertBuilds()
+
+
+class ProgramNRF24Lx1InterfaceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.model = NRF24Lx1Model()
+        self.iface = ProgramNRF24Lx1Interface(self.model, ProgramNRF24Lx1Applet.logger,
+            device=None, addr_dut_prog=None, addr_dut_reset=None)
+
+    @async_test
+    async def test_write_pages(self):
+        self.model.memory[0x0000:0x0800] = bytes(0x800)
+        data = bytes(range(256)) * 6
+        await self.iface.write_pages(0x0100, data, page_size=512, buffer_size=512,
+                                     erase_pages={0, 1, 2, 3})
+        self.assertEqual(self.model.ignored, 0)
+        self.assertEqual(self.model.reads, 1)
+        self.assertEqual(self.model.memory[0x0000:0x0100], b"\xff" * 0x100)
+        self.assertEqual(self.model.memory[0x0100:0x0700], data)
+        self.assertEqual(self.model.memory[0x0700:0x0800], b"\xff" * 0x100)
+
+    @async_test
+    async def test_write_pages_info(self):
+        self.model._fsr = FSR_BIT_INFEN
+        await self.iface.write_pages(0x0000, b"\x5a" * 32, page_size=512, buffer_size=256,
+                                     erase_pages={0})
+        self.assertEqual(self.model.info[:33], b"\x5a" * 32 + b"\xff")
+
+    @async_test
+    async def test_verify(self):
+        self.model.memory[0x0100:0x0200] = bytes(range(256))
+        chunks = [(0x0100, bytes(range(16))), (0x01f0, bytes(range(0xf0, 0x100)))]
+        self.assertIsNone(await self.iface.verify(chunks))
+        self.model.memory[0x01f8] = 0
+        self.assertEqual(await self.iface.verify(chunks), 0x01f0)
+        self.assertEqual(self.model.reads, 2)
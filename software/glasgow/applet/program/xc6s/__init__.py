@@ -9,6 +9,7 @@
 
 import logging
 import argparse
+import contextlib
 
 from ... import *
 from ....arch.jtag import *
@@ -18,11 +19,18 @@ from ....support.bits import *
 from ...interface.jtag_probe import JTAGProbeApplet
 
 
+# Configuration data is shifted into CFG_IN MSB first, while JTAG shifts LSB first.
+_BYTE_REVERSE = bytes(int(f"{byte:08b}"[::-1], 2) for byte in range(256))
+
+
 class XC6SJTAGError(GlasgowAppletError):
     pass
 
 
 class XC6SJTAGInterface:
+    # Number of bytes shifted at once by `load_bitstream`; this fits in a single probe command.
+    chunk_size = 0xffff // 8
+
     def __init__(self, interface, logger):
         self.lower   = interface
         self._logger = logger
@@ -50,27 +58,48 @@ class XC6SJTAGInterface:
     async def reconfigure(self):
         self._log("reconfigure")
         await self.lower.write_ir(IR_JPROGRAM)
-        async for status in self._poll(IR_CFG_IN, limit=16):
-            if status.INIT_B:
-                return
+        async with contextlib.aclosing(self._poll(IR_CFG_IN, limit=16)) as statuses:
+            async for status in statuses:
+                if status.INIT_B:
+                    return
         raise GlasgowAppletError(f"configuration reset failed: {status.bits_repr()}")
 
+    def _chunks(self, bitstream, byte_reverse):
+        if isinstance(bitstream, (bytes, bytearray, memoryview)):
+            bitstream = memoryview(bitstream)
+            for offset in range(0, len(bitstream), self.chunk_size):
+                chunk = bytes(bitstream[offset:offset + self.chunk_size])
+                yield chunk.translate(_BYTE_REVERSE) if byte_reverse else chunk
+        else:
+            while chunk := bitstream.read(self.chunk_size):
+                yield chunk.translate(_BYTE_REVERSE) if byte_reverse else chunk
+
     async def load_bitstream(self, bitstream, *, byte_reverse=True):
-        bitstream = bits(bitstream)
-        if byte_reverse:
-            bitstream = bitstream.byte_reversed()
-        self._log("load size=%d [bits]", len(bitstream))
+        """Shift :py:`bitstream` into the configuration logic.
+
+        The bitstream may be a bytes-like object or a binary file. It is byte-reversed and shifted
+        in chunks; a file is read one chunk at a time, each of which is shifted while the next one
+        is being read.
+        """
+        size = 0
+        def count(chunks):
+            nonlocal size
+            for chunk in chunks:
+                size += len(chunk) * 8
+                yield chunk
         await self.lower.write_ir(IR_CFG_IN)
-        await self.lower.write_dr(bitstream)
+        await self.lower.write_dr_chunks(count(self._chunks(bitstream, byte_reverse)))
+        self._log("load size=%d [bits]", size)
 
     async def start(self):
         self._log("start")
         # Poll ISC_DONE, which corresponds to EOS, not DONE, which can be activated anywhere
         # during the configuration depending on the bitstream.
-        async for status in self._poll(IR_JSTART, limit=4):
-            await self.lower.run_test_idle(16)
-            if status.ISC_DONE:
-                return
+        async with contextlib.aclosing(self._poll(IR_JSTART, limit=4)) as statuses:
+            async for status in statuses:
+                await self.lower.run_test_idle(16)
+                if status.ISC_DONE:
+                    return
         raise GlasgowAppletError(f"configuration start failed: {status.bits_repr()}")
 
 
@@ -107,5 +136,5 @@ class ProgramXC6SApplet(JTAGProbeApplet):
         if args.bit_file:
             self.logger.info("configuring from %r", args.bit_file.name)
             await xc6s_iface.reconfigure()
-            await xc6s_iface.load_bitstream(args.bit_file.read())
+            await xc6s_iface.load_bitstream(args.bit_file)
             await xc6s_iface.start()
@@ -0,0 +1,116 @@
+import unittest
+import importlib_resources
+
+from ....support.bits import *
+from ....arch.xilinx.xc6s import *
+from ... import *
+from ...interface.jtag_probe import JTAGProbeInterface, TAPInterface
+from ...interface.jtag_probe.test import JTAGProbeModel
+from . import ProgramXC6SApplet, XC6SJTAGInterface
+
+
+class XC6SModel:
+    """A behavioral model of the configuration logic of a Spartan-6 device, accessed via JTAG.
+
+    Selecting JPROGRAM clears the configuration, and INIT_B rises once another instruction is
+    selected. Configuration data shifted into CFG_IN is collected in :py:`config`. Selecting
+    JSTART completes the startup sequence if the configuration includes the synchronization word.
+    """
+
+    ir_length = 6
+
+    # Upper bound on the length of a single shift into CFG_IN.
+    cfg_in_length = 1 << 16
+
+    def __init__(self):
+        self.config  = bytearray()
+        self.done    = False
+
+        self._ir     = IR_BYPASS
+        self._init_b = True
+
+    def capture_ir(self):
+        return IR_CAPTURE(ISC_DONE=self.done, INIT_B=self._init_b, DONE=self.done).to_int() | 0b01
+
+    def update_ir(self, value):
+        self._ir = bits(value, self.ir_length)
+        if self._ir == IR_JPROGRAM:
+            self.config.clear()
+            self.done    = False
+            self._init_b = False
+        else:
+            self._init_b = True
+        if self._ir == IR_JSTART and b"\xaa\x99\x55\x66" in self.config:
+            self.done = True
+
+    def capture_dr(self):
+        if self._ir == IR_CFG_IN:
+            # The marker bit is shifted towards the LSB, which makes the shift length known.
+            return 1 << (self.cfg_in_length - 1), self.cfg_in_length
+        return 0, 1
+
+    def update_dr(self, value):
+        if self._ir == IR_CFG_IN:
+            marker = (value & -value).bit_length() - 1
+            length = self.cfg_in_length - 1 - marker
+            data   = bits(value >> (marker + 1), length)
+            # Configuration data is shifted in MSB first.
+            self.config += bytes(data.byte_reversed())
+
+
+class ProgramXC6SAppletTestCase(GlasgowAppletTestCase, applet=ProgramXC6SApplet):
+    @synthesis_test
+    def test_build(self):
+        self.assertBuilds()
+
+
+class XC6SJTAGInterfaceTestCase(unittest.TestCase):
+    def setUp(self):
+        with importlib_resources.open_binary(__name__, "fixtures/bitstream.bin") as file:
+            self.bitstream = file.read()
+
+    async def make_iface(self):
+        self.model = XC6SModel()
+        self.probe = JTAGProbeModel(self.model)
+        jtag_iface = JTAGProbeInterface(self.probe, ProgramXC6SApplet.logger)
+        tap_iface  = TAPInterface(jtag_iface, ir_length=6)
+        await tap_iface.test_reset()
+        iface = XC6SJTAGInterface(tap_iface, ProgramXC6SApplet.logger)
+        iface.chunk_size = 64
+        return iface
+
+    async def configure(self, iface, bitstream):
+        await iface.reconfigure()
+        reads = self.probe.reads
+        await iface.load_bitstream(bitstream)
+        self.assertEqual(self.probe.reads, reads)
+        await iface.start()
+
+    @async_test
+    async def test_load_bytes(self):
+        iface = await self.make_iface()
+        await self.configure(iface, self.bitstream)
+        self.assertEqual(self.model.config, self.bitstream)
+        self.assertTrue(self.model.done)
+
+    @async_test
+    async def test_load_file(self):
+        iface = await self.make_iface()
+        with importlib_resources.open_binary(__name__, "fixtures/bitstream.bin") as file:
+            await self.configure(iface, file)
+        self.assertEqual(self.model.config, self.bitstream)
+
+    @async_test
+    async def test_reconfigure(self):
+        iface = await self.make_iface()
+        await self.configure(iface, self.bitstream)
+        await self.configure(iface, bytearray(self.bitstream))
+        self.assertEqual(self.model.config, self.bitstream)
+        self.assertTrue(self.model.done)
+
+    @async_test
+    async def test_start_failed(self):
+        iface = await self.make_iface()
+        with self.assertRaisesRegex(GlasgowAppletError, r"^configuration start failed: "):
+            await self.configure(iface, self.bitstream[:16])
+        self.assertFalse(self.model.done)
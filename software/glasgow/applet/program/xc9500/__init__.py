@@ -191,17 +191,39 @@ class XC95xxInterface:
         await self.lower.write_ir(IR_BYPASS)
         await self.lower.run_test_idle(1)
 
-    async def _dr_isconfiguration(self, control, address, data=0):
+    async def _queue_isconfiguration(self, control, address, data=0):
         isconf = DR_ISCONFIGURATION(control=control, address=address, data=data)
-        isconf_bits = await self.lower.exchange_dr(isconf.to_bits())
-        isconf = DR_ISCONFIGURATION.from_bits(isconf_bits)
-        return isconf
+        return await self.lower.exchange_dr(isconf.to_bits(), defer=True)
 
-    async def _dr_isdata(self, control, data=0):
+    async def _queue_isdata(self, control, data=0):
         isdata = DR_ISDATA(control=control, data=data)
-        isdata_bits = await self.lower.exchange_dr(isdata.to_bits())
-        isdata = DR_ISDATA.from_bits(isdata_bits)
-        return isdata
+        return await self.lower.exchange_dr(isdata.to_bits(), defer=True)
+
+    async def _dr_isconfiguration(self, control, address, data=0):
+        result = await self._queue_isconfiguration(control, address, data)
+        return DR_ISCONFIGURATION.from_bits(await result.get())
+
+    async def _dr_isdata(self, control, data=0):
+        result = await self._queue_isdata(control, data)
+        return DR_ISDATA.from_bits(await result.get())
+
+    async def _check_queued(self, queued, action, *, program=False):
+        # Each entry is `(coords, layout, result)`; the results are only retrieved once
+        # the entire sequence has been queued, and all failures are reported together.
+        data     = []
+        failures = []
+        for coords, layout, result in queued:
+            res = layout.from_bits(await result.get())
+            if program and res.control == CTRL_WPROT:
+                raise XC9500Error(f"{action} failed: device is write protected")
+            elif res.control != CTRL_OK:
+                failures.append((coords, res))
+            else:
+                data.append(res.data)
+        if failures:
+            locations = ", ".join(str(coords) for coords, res in failures)
+            raise XC9500Error(f"{action} failed {failures[0][1].bits_repr()} at {locations}")
+        return data
 
     async def read(self, fast=True):
         self._log("device read")
@@ -211,32 +233,29 @@ class XC95xxInterface:
         if status.read_protect:
             raise XC9500Error("read failed: device is read protected")
 
+        queued = []
         if fast:
             # Use FVFY just to set the address counter.
-            await self._dr_isconfiguration(CTRL_START, 0)
+            await self._queue_isconfiguration(CTRL_START, 0)
             await self.lower.write_ir(IR_FVFYI)
             for _, coords in device_addresses(self.device):
                 await self.lower.run_test_idle(1)
-                res = await self._dr_isdata(CTRL_START)
-                if res.control != CTRL_OK:
-                    raise XC9500Error(f"fast read failed {res.bits_repr()} at {coords}")
-                bs.put_byte(coords, res.data)
+                queued.append((coords, DR_ISDATA, await self._queue_isdata(CTRL_START)))
         else:
             # Use FVFY for all reads.
             prev_coords = None
             for addr, coords in device_addresses(self.device):
-                res = await self._dr_isconfiguration(CTRL_START, addr)
+                result = await self._queue_isconfiguration(CTRL_START, addr)
                 if prev_coords is not None:
-                    if res.control != CTRL_OK:
-                        raise XC9500Error(f"read failed {res.bits_repr()} at {prev_coords}")
-                    bs.put_byte(prev_coords, res.data)
+                    queued.append((prev_coords, DR_ISCONFIGURATION, result))
                 await self.lower.run_test_idle(1)
                 prev_coords = coords
-            res = await self._dr_isconfiguration(CTRL_OK, 0)
-            if res.control != CTRL_OK:
-                raise XC9500Error(f"read failed {res.bits_repr()} at {prev_coords}")
-            bs.put_byte(prev_coords, res.data)
+            queued.append((prev_coords, DR_ISCONFIGURATION,
+                await self._queue_isconfiguration(CTRL_OK, 0)))
 
+        data = await self._check_queued(queued, "fast read" if fast else "read")
+        for (coords, _, _), byte in zip(queued, data):
+            bs.put_byte(coords, byte)
         return bs
 
     async def erase(self):
@@ -244,7 +263,7 @@ class XC95xxInterface:
 
         await self.lower.write_ir(IR_FERASE)
         for fb in range(self.device.fbs):
-            await self._dr_isconfiguration(CTRL_START, fb << 13)
+            await self._queue_isconfiguration(CTRL_START, fb << 13)
             await self.lower.run_test_idle(self._time_us(WAIT_ERASE))
             res = await self._dr_isconfiguration(CTRL_START, fb << 13 | 0x1000)
             if res.control == CTRL_WPROT:
@@ -262,7 +281,7 @@ class XC95xxInterface:
         self._log("bulk erase")
 
         await self.lower.write_ir(IR_FBULK)
-        await self._dr_isconfiguration(CTRL_START, 0)
+        await self._queue_isconfiguration(CTRL_START, 0)
         await self.lower.run_test_idle(self._time_us(WAIT_ERASE))
         res = await self._dr_isconfiguration(CTRL_START, 0x1000)
         if res.control == CTRL_WPROT:
@@ -283,6 +302,7 @@ class XC95xxInterface:
 
     async def program(self, bs, fast=True):
         self._log("program device")
+        queued = []
         if fast:
             # Use FPGM to program first word and set the address counter.
             # Use FPGMI for much faster following writes.
@@ -291,43 +311,32 @@ class XC95xxInterface:
             for addr, coords in device_addresses(self.device):
                 byte = bs.get_byte(coords)
                 if addr == 0:
-                    await self._dr_isconfiguration(CTRL_START, addr, byte)
+                    await self._queue_isconfiguration(CTRL_START, addr, byte)
                     await self.lower.write_ir(IR_FPGMI)
                 else:
-                    res = await self._dr_isdata(CTRL_START, byte)
+                    result = await self._queue_isdata(CTRL_START, byte)
                     if prev_coords is not None:
-                        if res.control == CTRL_WPROT:
-                            raise XC9500Error("fast programming failed: device is write protected")
-                        elif res.control != CTRL_OK:
-                            raise XC9500Error(f"fast programming failed {res.bits_repr()} at {prev_coords}")
+                        queued.append((prev_coords, DR_ISDATA, result))
                 await self.lower.run_test_idle(self._time_us(WAIT_PROGRAM))
                 prev_coords = coords
 
-            res = await self._dr_isdata(CTRL_OK)
-            if res.control == CTRL_WPROT:
-                raise XC9500Error("fast programming failed: device is write protected")
-            elif res.control != CTRL_OK:
-                raise XC9500Error(f"fast programming failed {res.bits_repr()} at {prev_coords}")
+            queued.append((prev_coords, DR_ISDATA, await self._queue_isdata(CTRL_OK)))
+            await self._check_queued(queued, "fast programming", program=True)
         else:
             # Use FPGM for all writes.
             await self.lower.write_ir(IR_FPGM)
             prev_coords = None
             for addr, coords in device_addresses(self.device):
                 byte = bs.get_byte(coords)
-                res = await self._dr_isconfiguration(CTRL_START, addr, byte)
+                result = await self._queue_isconfiguration(CTRL_START, addr, byte)
                 if prev_coords is not None:
-                    if res.control == CTRL_WPROT:
-                        raise XC9500Error("programming failed: device is write protected")
-                    elif res.control != CTRL_OK:
-                        raise XC9500Error(f"programming failed {res.bits_repr()} at row {prev_coords}")
+                    queued.append((prev_coords, DR_ISCONFIGURATION, result))
                 await self.lower.run_test_idle(self._time_us(WAIT_PROGRAM))
                 prev_coords = coords
 
-            res = await self._dr_isconfiguration(CTRL_OK, 0)
-            if res.control == CTRL_WPROT:
-                raise XC9500Error("programming failed: device is write protected")
-            elif res.control != CTRL_OK:
-                raise XC9500Error(f"programming failed {res.bits_repr()} at {prev_coords}")
+            queued.append((prev_coords, DR_ISCONFIGURATION,
+                await self._queue_isconfiguration(CTRL_OK, 0)))
+            await self._check_queued(queued, "programming", program=True)
 
     async def program_prot(self, bs, fast=True, read_protect=False, write_protect=False):
         bits = []
@@ -347,11 +356,11 @@ class XC95xxInterface:
                 addr = bs_main_address(fb, row, col)
                 byte = bs.fbs[fb][row][col]
                 byte &= ~(1 << bit)
-                await self._dr_isconfiguration(CTRL_START, addr, byte)
+                await self._queue_isconfiguration(CTRL_START, addr, byte)
                 await self.lower.run_test_idle(self._time_us(WAIT_PROGRAM))
                 res = await self._dr_isconfiguration(CTRL_OK, 0)
                 if res.control != CTRL_OK:
-                    raise XC9500Error(f"programming protection bits failed {isaddr.bits_repr()}")
+                    raise XC9500Error(f"programming protection bits failed {res.bits_repr()}")
 
 
 class ProgramXC9500Applet(JTAGProbeApplet):
@@ -505,6 +514,11 @@ class ProgramXC9500Applet(JTAGProbeApplet):
         finally:
             await xc95xx_iface.programming_disable()
 
+    @classmethod
+    def tests(cls):
+        from . import test
+        return test.ProgramXC9500AppletTestCase
+
 # -------------------------------------------------------------------------------------------------
 
 class ProgramXC9500AppletTool(GlasgowAppletTool, applet=ProgramXC9500Applet):
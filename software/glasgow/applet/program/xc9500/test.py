@@ -0,0 +1,142 @@
+import random
+import unittest
+
+from ....support.bits import *
+from ....arch.xilinx.xc9500 import *
+from ....database.xilinx.xc9500 import devices_by_name
+from ... import *
+from ...interface.jtag_probe import JTAGProbeInterface, TAPInterface
+from ...interface.jtag_probe.test import JTAGProbeModel
+from . import ProgramXC9500Applet, XC95xxInterface, XC9500Bitstream, XC9500Error
+from . import device_addresses
+
+
+class XC9500Model:
+    """A behavioral model of the in-system configuration registers of an XC9500 device.
+
+    Programming any byte at one of :py:`failed_coords` reports a failure in the status returned
+    by the next DR capture.
+    """
+
+    ir_length = 8
+
+    def __init__(self, device, *, failed_coords=(), write_protect=False, read_protect=False):
+        self.bytes         = {}
+        self.failed_coords = set(failed_coords)
+        self.write_protect = write_protect
+        self.read_protect  = read_protect
+
+        self._coords    = [coords for addr, coords in device_addresses(device)]
+        self._addresses = {addr: index for index, (addr, coords)
+                           in enumerate(device_addresses(device))}
+        self._ir     = IR_IDCODE
+        self._index  = 0
+        self._status = CTRL_OK
+
+    def capture_ir(self):
+        return 0b01 | self.write_protect << 2 | self.read_protect << 3
+
+    def update_ir(self, value):
+        self._ir = bits(value, self.ir_length)
+
+    def _program(self, control, index, data):
+        if control != CTRL_START or index >= len(self._coords):
+            return
+        if self.write_protect:
+            self._status = CTRL_WPROT
+        elif self._coords[index] in self.failed_coords:
+            self._status = CTRL_WORKING
+        else:
+            self._status = CTRL_OK
+            self.bytes[index] = data
+
+    def capture_dr(self):
+        if self._ir in (IR_FVFY, IR_FVFYI):
+            control, data = CTRL_OK, self.bytes.get(self._index, 0)
+        elif self._ir in (IR_FPGM, IR_FPGMI):
+            control, data = self._status, 0
+        else:
+            return 0, 1
+        if self._ir in (IR_FVFY, IR_FPGM):
+            isconf = DR_ISCONFIGURATION(control=control, data=data)
+            return isconf.to_int(), isconf.bit_length()
+        else:
+            isdata = DR_ISDATA(control=control, data=data)
+            return isdata.to_int(), isdata.bit_length()
+
+    def update_dr(self, value):
+        if self._ir in (IR_FVFY, IR_FPGM):
+            isconf = DR_ISCONFIGURATION.from_int(value)
+            self._index = self._addresses[isconf.address]
+            if self._ir == IR_FPGM:
+                self._program(isconf.control, self._index, isconf.data)
+        elif self._ir == IR_FVFYI:
+            self._index += 1
+        elif self._ir == IR_FPGMI:
+            self._index += 1
+            isdata = DR_ISDATA.from_int(value)
+            self._program(isdata.control, self._index, isdata.data)
+
+
+class ProgramXC9500AppletTestCase(GlasgowAppletTestCase, applet=ProgramXC9500Applet):
+    @synthesis_test
+    def test_build(self):
+        self.assertBuilds()
+
+
+class XC95xxInterfaceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.device = devices_by_name["XC9536"]
+        self.bitstream = XC9500Bitstream(self.device)
+        for _, coords in device_addresses(self.device):
+            self.bitstream.put_byte(coords, random.getrandbits(8))
+
+    def make_iface(self, **kwargs):
+        self.model = XC9500Model(self.device, **kwargs)
+        self.probe = JTAGProbeModel(self.model)
+        jtag_iface = JTAGProbeInterface(self.probe, ProgramXC9500Applet.logger)
+        tap_iface  = TAPInterface(jtag_iface, ir_length=8)
+        return XC95xxInterface(tap_iface, ProgramXC9500Applet.logger,
+                               frequency=1_000_000, device=self.device)
+
+    async def round_trip(self, fast):
+        iface = self.make_iface()
+        await iface.lower.test_reset()
+        await iface.program(self.bitstream, fast=fast)
+        self.assertEqual(self.probe.reads, 1)
+        bitstream = await iface.read(fast=fast)
+        self.assertEqual(self.probe.reads, 3)
+        bitstream.verify(self.bitstream)
+
+    @async_test
+    async def test_round_trip_fast(self):
+        await self.round_trip(fast=True)
+
+    @async_test
+    async def test_round_trip_slow(self):
+        await self.round_trip(fast=False)
+
+    @async_test
+    async def test_program_failed(self):
+        iface = self.make_iface(failed_coords=(("main", 0, 3, 7), ("uim", 1, 0, 2, 4)))
+        await iface.lower.test_reset()
+        with self.assertRaisesRegex(XC9500Error,
+                r"^fast programming failed control=00 data=[01]+ at "
+                r"\('main', 0, 3, 7\), \('uim', 1, 0, 2, 4\)$"):
+            await iface.program(self.bitstream)
+
+    @async_test
+    async def test_program_write_protected(self):
+        iface = self.make_iface(write_protect=True)
+        await iface.lower.test_reset()
+        with self.assertRaisesRegex(XC9500Error,
+                r"^programming failed: device is write protected$"):
+            await iface.program(self.bitstream, fast=False)
+
+    @async_test
+    async def test_read_protected(self):
+        iface = self.make_iface(read_protect=True)
+        await iface.lower.test_reset()
+        with self.assertRaisesRegex(XC9500Error,
+                r"^read failed: device is read protected$"):
+            await iface.read()
@@ -394,17 +394,39 @@ class XC95xxXLInterface:
         else:
             raise XC9500XLError(f"blank check failed {isaddr.bits_repr()}")
 
-    async def _dr_isconfiguration(self, control, address, data=0):
+    async def _queue_isconfiguration(self, control, address, data=0):
         isconf = self.DR_ISCONFIGURATION(control=control, address=address, data=data)
-        isconf_bits = await self.lower.exchange_dr(isconf.to_bits())
-        isconf = self.DR_ISCONFIGURATION.from_bits(isconf_bits)
-        return isconf
+        return await self.lower.exchange_dr(isconf.to_bits(), defer=True)
 
-    async def _dr_isdata(self, control, data=0):
+    async def _queue_isdata(self, control, data=0):
         isdata = self.DR_ISDATA(control=control, data=data)
-        isdata_bits = await self.lower.exchange_dr(isdata.to_bits())
-        isdata = self.DR_ISDATA.from_bits(isdata_bits)
-        return isdata
+        return await self.lower.exchange_dr(isdata.to_bits(), defer=True)
+
+    async def _dr_isconfiguration(self, control, address, data=0):
+        result = await self._queue_isconfiguration(control, address, data)
+        return self.DR_ISCONFIGURATION.from_bits(await result.get())
+
+    async def _dr_isdata(self, control, data=0):
+        result = await self._queue_isdata(control, data)
+        return self.DR_ISDATA.from_bits(await result.get())
+
+    async def _check_queued(self, queued, action, *, program=False):
+        # Each entry is `(location, layout, result)`; the results are only retrieved once
+        # the entire sequence has been queued, and all failures are reported together.
+        data     = []
+        failures = []
+        for location, layout, result in queued:
+            res = layout.from_bits(await result.get())
+            if program and res.control == CTRL_WPROT:
+                raise XC9500XLError(f"{action} failed: device is write protected")
+            elif res.control != CTRL_OK:
+                failures.append((location, res))
+            else:
+                data.append(res.data)
+        if failures:
+            locations = ", ".join(location for location, res in failures)
+            raise XC9500XLError(f"{action} failed {failures[0][1].bits_repr()} at {locations}")
+        return data
 
     async def read(self, fast=True):
         self._log("device read")
@@ -414,36 +436,35 @@ class XC95xxXLInterface:
         if status.read_protect:
             raise XC9500XLError("read failed: device is read protected")
 
+        queued = []
         if fast:
             # Use FVFY just to set the address counter.
-            await self._dr_isconfiguration(CTRL_START, 0)
+            await self._queue_isconfiguration(CTRL_START, 0)
             await self.lower.write_ir(IR_FVFYI)
             for row in range(BS_ROWS):
                 for col in range(BS_COLS):
                     await self.lower.run_test_idle(1)
                     last = row == BS_ROWS - 1 and col == BS_COLS - 1
-                    res = await self._dr_isdata(CTRL_OK if last else CTRL_START)
-                    if res.control != CTRL_OK:
-                        raise XC9500XLError(f"fast read failed {res.bits_repr()} at ({row}, {col})")
-                    bs.put_word(row, col, res.data)
+                    queued.append((f"({row}, {col})", self.DR_ISDATA,
+                        await self._queue_isdata(CTRL_OK if last else CTRL_START)))
         else:
             # Use FVFY for all reads.
             prev_row = prev_col = None
             for row in range(BS_ROWS):
                 for col in range(BS_COLS):
-                    res = await self._dr_isconfiguration(CTRL_START, bs_address(row, col))
+                    result = await self._queue_isconfiguration(CTRL_START, bs_address(row, col))
                     if prev_row is not None:
-                        if res.control != CTRL_OK:
-                            raise XC9500XLError(f"read failed {res.bits_repr()} at ({prev_row}, {prev_col})")
-                        bs.put_word(prev_row, prev_col, res.data)
+                        queued.append((f"({prev_row}, {prev_col})", self.DR_ISCONFIGURATION,
+                                       result))
                     await self.lower.run_test_idle(1)
                     prev_row = row
                     prev_col = col
-            res = await self._dr_isconfiguration(CTRL_OK, 0)
-            if res.control != CTRL_OK:
-                raise XC9500XLError(f"read failed {res.bits_repr()} at ({prev_row}, {prev_col})")
-            bs.put_word(prev_row, prev_col, res.data)
+            queued.append((f"({prev_row}, {prev_col})", self.DR_ISCONFIGURATION,
+                await self._queue_isconfiguration(CTRL_OK, 0)))
 
+        data = await self._check_queued(queued, "fast read" if fast else "read")
+        for index, word in enumerate(data):
+            bs.put_word(*divmod(index, BS_COLS), word)
         return bs
 
     async def bulk_erase(self):
@@ -470,6 +491,7 @@ class XC95xxXLInterface:
 
     async def program(self, bs, fast=True):
         self._log("program device")
+        queued = []
         if fast:
             # Use FPGM to program first word and set the address counter.
             # Use FPGMI for much faster following writes.
@@ -479,28 +501,23 @@ class XC95xxXLInterface:
                 for col in range(BS_COLS):
                     word = bs.get_word(row, col)
                     if row == 0 and col == 0:
-                        await self._dr_isconfiguration(
+                        await self._queue_isconfiguration(
                             CTRL_START if col == BS_COLS - 1 else CTRL_OK,
                             address=bs_address(row, col),
                             data=word)
                         await self.lower.write_ir(IR_FPGMI)
                     else:
-                        res = await self._dr_isdata(
+                        result = await self._queue_isdata(
                             CTRL_START if col == BS_COLS - 1 else CTRL_OK,
                             data=word)
                         if col == 0 and prev_row is not None:
-                            if res.control == CTRL_WPROT:
-                                raise XC9500XLError("fast programming failed: device is write protected")
-                            elif res.control != CTRL_OK:
-                                raise XC9500XLError(f"fast programming failed {res.bits_repr()} at row {prev_row}")
+                            queued.append((f"row {prev_row}", self.DR_ISDATA, result))
                 await self.lower.run_test_idle(self._time_us(WAIT_PROGRAM))
                 prev_row = row
 
-            res = await self._dr_isdata(CTRL_OK)
-            if res.control == CTRL_WPROT:
-                raise XC9500XLError("fast programming failed: device is write protected")
-            elif res.control != CTRL_OK:
-                raise XC9500XLError(f"fast programming failed {res.bits_repr()} at row {prev_row}")
+            queued.append((f"row {prev_row}", self.DR_ISDATA,
+                await self._queue_isdata(CTRL_OK)))
+            await self._check_queued(queued, "fast programming", program=True)
         else:
             # Use FPGM for all writes.
             await self.lower.write_ir(IR_FPGM)
@@ -508,23 +525,18 @@ class XC95xxXLInterface:
             for row in range(BS_ROWS):
                 for col in range(BS_COLS):
                     word = bs.get_word(row, col)
-                    res = await self._dr_isconfiguration(
+                    result = await self._queue_isconfiguration(
                         CTRL_START if col == BS_COLS - 1 else CTRL_OK,
                         address=bs_address(row, col),
                         data=word)
                     if col == 0 and prev_row is not None:
-                        if res.control == CTRL_WPROT:
-                            raise XC9500XLError("programming failed: device is write protected")
-                        elif res.control != CTRL_OK:
-                            raise XC9500XLError(f"programming failed {res.bits_repr()} at row {prev_row}")
+                        queued.append((f"row {prev_row}", self.DR_ISCONFIGURATION, result))
                 await self.lower.run_test_idle(self._time_us(WAIT_PROGRAM))
                 prev_row = row
 
-            res = await self._dr_isconfiguration(CTRL_OK, 0)
-            if res.control == CTRL_WPROT:
-                raise XC9500XLError("programming failed: device is write protected")
-            elif res.control != CTRL_OK:
-                raise XC9500XLError(f"programming failed {res.bits_repr()} at row {prev_row}")
+            queued.append((f"row {prev_row}", self.DR_ISCONFIGURATION,
+                await self._queue_isconfiguration(CTRL_OK, 0)))
+            await self._check_queued(queued, "programming", program=True)
 
     async def program_prot_done(self, bs, fast=True, read_protect=False, write_protect=False):
         if not read_protect and not write_protect and self.device.kind != "xv":
@@ -547,14 +559,14 @@ class XC95xxXLInterface:
                 word |= 1 << (DONE_BIT[3] + 8 * DONE_BIT[0])
 
             if col == 0 or not fast:
-                await self._dr_isconfiguration(
+                await self._queue_isconfiguration(
                     CTRL_START if col == BS_COLS - 1 else CTRL_OK,
                     address=bs_address(row, col),
                     data=word)
                 if fast:
                     await self.lower.write_ir(IR_FPGMI)
             else:
-                await self._dr_isdata(
+                await self._queue_isdata(
                     CTRL_START if col == BS_COLS - 1 else CTRL_OK,
                     data=word)
 
@@ -565,7 +577,7 @@ class XC95xxXLInterface:
         else:
             res = await self._dr_isconfiguration(CTRL_OK, 0)
         if res.control != CTRL_OK:
-            raise XC9500XLError(f"programming protection and DONE bits failed {isaddr.bits_repr()}")
+            raise XC9500XLError(f"programming protection and DONE bits failed {res.bits_repr()}")
 
 
 class ProgramXC9500XLApplet(JTAGProbeApplet):
@@ -719,6 +731,11 @@ class ProgramXC9500XLApplet(JTAGProbeApplet):
         finally:
             await xc95xx_iface.programming_disable()
 
+    @classmethod
+    def tests(cls):
+        from . import test
+        return test.ProgramXC9500XLAppletTestCase
+
 # -------------------------------------------------------------------------------------------------
 
 class ProgramXC9500XLAppletTool(GlasgowAppletTool, applet=ProgramXC9500XLApplet):
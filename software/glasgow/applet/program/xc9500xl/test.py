@@ -0,0 +1,150 @@
+import random
+import unittest
+
+from ....support.bits import *
+from ....arch.xilinx.xc9500xl import *
+from ....database.xilinx.xc9500xl import devices_by_name
+from ... import *
+from ...interface.jtag_probe import JTAGProbeInterface, TAPInterface
+from ...interface.jtag_probe.test import JTAGProbeModel
+from . import ProgramXC9500XLApplet, XC95xxXLInterface, XC9500XLBitstream, XC9500XLError
+
+
+class XC9500XLModel:
+    """A behavioral model of the in-system configuration registers of an XC9500XL device.
+
+    Words shifted in for programming are buffered until a word with the ``CTRL_START`` control
+    field is shifted in. Programming any word in one of :py:`failed_rows` reports a failure in
+    the status returned by the next DR capture.
+    """
+
+    ir_length = 8
+
+    def __init__(self, device, *, failed_rows=(), write_protect=False, read_protect=False):
+        self.DR_ISDATA          = DR_ISDATA(device.fbs)
+        self.DR_ISCONFIGURATION = DR_ISCONFIGURATION(device.fbs)
+        self.words         = [0] * (BS_ROWS * BS_COLS)
+        self.failed_rows   = set(failed_rows)
+        self.write_protect = write_protect
+        self.read_protect  = read_protect
+
+        self._addresses = {
+            bs_address(row, col): row * BS_COLS + col
+            for row in range(BS_ROWS) for col in range(BS_COLS)
+        }
+        self._ir     = IR_IDCODE
+        self._index  = 0
+        self._buffer = {}
+        self._status = CTRL_OK
+
+    def capture_ir(self):
+        return 0b01 | self.write_protect << 2 | self.read_protect << 3
+
+    def update_ir(self, value):
+        self._ir = bits(value, self.ir_length)
+
+    def _program(self, control, index, data):
+        self._buffer[index] = data
+        if control != CTRL_START:
+            return
+        if self.write_protect:
+            self._status = CTRL_WPROT
+        elif any(index // BS_COLS in self.failed_rows for index in self._buffer):
+            self._status = CTRL_WORKING
+        else:
+            self._status = CTRL_OK
+            for index, data in self._buffer.items():
+                self.words[index] = data
+        self._buffer.clear()
+
+    def capture_dr(self):
+        if self._ir in (IR_FVFY, IR_FVFYI):
+            control = CTRL_OK
+            data    = self.words[self._index] if self._index < len(self.words) else 0
+        elif self._ir in (IR_FPGM, IR_FPGMI):
+            control, data = self._status, 0
+        else:
+            return 0, 1
+        if self._ir in (IR_FVFY, IR_FPGM):
+            isconf = self.DR_ISCONFIGURATION(control=control, data=data)
+            return isconf.to_int(), isconf.bit_length()
+        else:
+            isdata = self.DR_ISDATA(control=control, data=data)
+            return isdata.to_int(), isdata.bit_length()
+
+    def update_dr(self, value):
+        if self._ir in (IR_FVFY, IR_FPGM):
+            isconf = self.DR_ISCONFIGURATION.from_int(value)
+            self._index = self._addresses[isconf.address]
+            if self._ir == IR_FPGM:
+                self._program(isconf.control, self._index, isconf.data)
+        elif self._ir == IR_FVFYI:
+            self._index += 1
+        elif self._ir == IR_FPGMI:
+            self._index += 1
+            isdata = self.DR_ISDATA.from_int(value)
+            self._program(isdata.control, self._index, isdata.data)
+
+
+class ProgramXC9500XLAppletTestCase(GlasgowAppletTestCase, applet=ProgramXC9500XLApplet):
+    @synthesis_test
+    def test_build(self):
+        self.assertBuilds()
+
+
+class XC95xxXLInterfaceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.device = devices_by_name["XC9536XL"]
+        self.bitstream = XC9500XLBitstream(self.device)
+        for row in range(BS_ROWS):
+            for col in range(BS_COLS):
+                self.bitstream.put_word(row, col, random.getrandbits(self.device.fbs * 8))
+
+    def make_iface(self, **kwargs):
+        self.model = XC9500XLModel(self.device, **kwargs)
+        self.probe = JTAGProbeModel(self.model)
+        jtag_iface = JTAGProbeInterface(self.probe, ProgramXC9500XLApplet.logger)
+        tap_iface  = TAPInterface(jtag_iface, ir_length=8)
+        return XC95xxXLInterface(tap_iface, ProgramXC9500XLApplet.logger,
+                                 frequency=1_000_000, device=self.device)
+
+    async def round_trip(self, fast):
+        iface = self.make_iface()
+        await iface.lower.test_reset()
+        await iface.program(self.bitstream, fast=fast)
+        self.assertEqual(self.probe.reads, 1)
+        bitstream = await iface.read(fast=fast)
+        self.assertEqual(self.probe.reads, 3)
+        bitstream.verify(self.bitstream)
+
+    @async_test
+    async def test_round_trip_fast(self):
+        await self.round_trip(fast=True)
+
+    @async_test
+    async def test_round_trip_slow(self):
+        await self.round_trip(fast=False)
+
+    @async_test
+    async def test_program_failed(self):
+        iface = self.make_iface(failed_rows=(3, 70))
+        await iface.lower.test_reset()
+        with self.assertRaisesRegex(XC9500XLError,
+                r"^fast programming failed control=10 data=[01]+ at row 3, row 70$"):
+            await iface.program(self.bitstream)
+
+    @async_test
+    async def test_program_write_protected(self):
+        iface = self.make_iface(write_protect=True)
+        await iface.lower.test_reset()
+        with self.assertRaisesRegex(XC9500XLError,
+                r"^programming failed: device is write protected$"):
+            await iface.program(self.bitstream, fast=False)
+
+    @async_test
+    async def test_read_protected(self):
+        iface = self.make_iface(read_protect=True)
+        await iface.lower.test_reset()
+        with self.assertRaisesRegex(XC9500XLError,
+                r"^read failed: device is read protected$"):
+            await iface.read()
@@ -474,24 +474,28 @@ class SensorBMx280Applet(GlasgowAppletV2):
             if self.bmx280_iface.has_humidity:
                 field_names.update(rh="RH(%)")
             data_logger = await DataLogger(self.logger, args, field_names=field_names)
-            while True:
-                async def report():
-                    fields = dict(t=await self.bmx280_iface.get_temperature(),
-                                  p=await self.bmx280_iface.get_pressure())
-                    if args.report_altitude:
-                        fields.update(h=await self.bmx280_iface.get_altitude(p0=args.sea_level_pressure))
-                    if self.bmx280_iface.has_humidity:
-                        fields.update(rh=await self.bmx280_iface.get_humidity())
-                    await data_logger.report_data(fields)
-                try:
-                    await asyncio.wait_for(report(), args.interval * 2)
-                except BMx280Error as error:
-                    await data_logger.report_error(str(error), exception=error)
-                    await self.bmx280_iface.reset()
-                except asyncio.TimeoutError as error:
-                    await data_logger.report_error("timeout", exception=error)
-                    await self.bmx280_iface.reset()
-                await asyncio.sleep(args.interval)
+            try:
+                while True:
+                    async def report():
+                        fields = dict(t=await self.bmx280_iface.get_temperature(),
+                                      p=await self.bmx280_iface.get_pressure())
+                        if args.report_altitude:
+                            fields.update(h=await self.bmx280_iface.get_altitude(
+                                p0=args.sea_level_pressure))
+                        if self.bmx280_iface.has_humidity:
+                            fields.update(rh=await self.bmx280_iface.get_humidity())
+                        await data_logger.report_data(fields)
+                    try:
+                        await asyncio.wait_for(report(), args.interval * 2)
+                    except BMx280Error as error:
+                        await data_logger.report_error(str(error), exception=error)
+                        await self.bmx280_iface.reset()
+                    except asyncio.TimeoutError as error:
+                        await data_logger.report_error("timeout", exception=error)
+                        await self.bmx280_iface.reset()
+                    await asyncio.sleep(args.interval)
+            finally:
+                await data_logger.close()
 
     @classmethod
     def tests(cls):
@@ -205,9 +205,12 @@ class SensorHX711Applet(GlasgowApplet):
 
         if args.operation == "log":
             data_logger = await DataLogger(self.logger, args, field_names={"n": "count(LSB)"})
-            while True:
-                sample = await hx711.sample()
-                await data_logger.report_data(fields={"n": sample})
+            try:
+                while True:
+                    sample = await hx711.sample()
+                    await data_logger.report_data(fields={"n": sample})
+            finally:
+                await data_logger.close()
 
     @classmethod
     def tests(cls):
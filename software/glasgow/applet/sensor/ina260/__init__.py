@@ -141,18 +141,21 @@ class SensorINA260Applet(I2CInitiatorApplet):
         if args.operation == "log":
             field_names = dict(u="u(V)", i="i(A)", p="p(W)")
             data_logger = await DataLogger(self.logger, args, field_names=field_names)
-            while True:
-                async def report():
-                    fields = dict(u=await ina260.get_voltage(),
-                                  i=await ina260.get_current(),
-                                  p=await ina260.get_power())
-                    await data_logger.report_data(fields)
-                try:
-                    await asyncio.wait_for(report(), args.interval * 2)
-                except INA260Error as error:
-                    await data_logger.report_error(str(error), exception=error)
-                    await ina260.lower.reset()
-                except asyncio.TimeoutError as error:
-                    await data_logger.report_error("timeout", exception=error)
-                    await ina260.lower.reset()
-                await asyncio.sleep(args.interval)
+            try:
+                while True:
+                    async def report():
+                        fields = dict(u=await ina260.get_voltage(),
+                                      i=await ina260.get_current(),
+                                      p=await ina260.get_power())
+                        await data_logger.report_data(fields)
+                    try:
+                        await asyncio.wait_for(report(), args.interval * 2)
+                    except INA260Error as error:
+                        await data_logger.report_error(str(error), exception=error)
+                        await ina260.lower.reset()
+                    except asyncio.TimeoutError as error:
+                        await data_logger.report_error("timeout", exception=error)
+                        await ina260.lower.reset()
+                    await asyncio.sleep(args.interval)
+            finally:
+                await data_logger.close()
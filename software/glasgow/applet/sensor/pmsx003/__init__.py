@@ -152,17 +152,21 @@ class SensorPMSx003Applet(GlasgowApplet):
                 p10="P10(n/dL)",
             )
             data_logger = await DataLogger(self.logger, args, field_names=field_names)
-            while True:
-                try:
-                    sample = await pmsx003.read_measurement()
-                    fields = dict(
-                        pm1_0=sample.pm1_0_ug_m3, pm2_5=sample.pm2_5_ug_m3, pm10=sample.pm10_ug_m3,
-                        p0_3=sample.p0_3_n_dL, p0_5=sample.p0_5_n_dL, p1_0=sample.p1_0_n_dL,
-                        p2_5=sample.p2_5_n_dL, p5_0=sample.p5_0_n_dL, p10=sample.p10_n_dL,
-                    )
-                    await data_logger.report_data(fields)
-                except PMSx003Error as error:
-                    await data_logger.report_error(str(error), exception=error)
+            try:
+                while True:
+                    try:
+                        sample = await pmsx003.read_measurement()
+                        fields = dict(
+                            pm1_0=sample.pm1_0_ug_m3, pm2_5=sample.pm2_5_ug_m3,
+                            pm10=sample.pm10_ug_m3,
+                            p0_3=sample.p0_3_n_dL, p0_5=sample.p0_5_n_dL, p1_0=sample.p1_0_n_dL,
+                            p2_5=sample.p2_5_n_dL, p5_0=sample.p5_0_n_dL, p10=sample.p10_n_dL,
+                        )
+                        await data_logger.report_data(fields)
+                    except PMSx003Error as error:
+                        await data_logger.report_error(str(error), exception=error)
+            finally:
+                await data_logger.close()
 
     @classmethod
     def tests(cls):
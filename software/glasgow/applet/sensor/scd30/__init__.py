@@ -295,24 +295,27 @@ class SensorSCD30Applet(GlasgowAppletV2):
         if args.operation == "log":
             field_names = dict(co2="CO₂(ppm)", t="T(°C)", rh="RH(%)")
             data_logger = await DataLogger(self.logger, args, field_names=field_names)
-            meas_interval = await self.scd30_iface.get_measurement_interval()
-            while True:
-                async def report():
-                    while not await self.scd30_iface.is_data_ready():
-                        await asyncio.sleep(meas_interval / 2)
-
-                    sample = await self.scd30_iface.read_measurement()
-                    fields = dict(co2=sample.co2_ppm, t=sample.temp_degC, rh=sample.rh_pct)
-                    await data_logger.report_data(fields)
-                try:
-                    await asyncio.wait_for(report(), meas_interval * 3)
-                except SCD30Error as error:
-                    await data_logger.report_error(str(error), exception=error)
-                    await self.scd30_iface.lower.reset()
-                    await asyncio.sleep(meas_interval)
-                except asyncio.TimeoutError as error:
-                    await data_logger.report_error("timeout", exception=error)
-                    await self.scd30_iface.lower.reset()
+            try:
+                meas_interval = await self.scd30_iface.get_measurement_interval()
+                while True:
+                    async def report():
+                        while not await self.scd30_iface.is_data_ready():
+                            await asyncio.sleep(meas_interval / 2)
+
+                        sample = await self.scd30_iface.read_measurement()
+                        fields = dict(co2=sample.co2_ppm, t=sample.temp_degC, rh=sample.rh_pct)
+                        await data_logger.report_data(fields)
+                    try:
+                        await asyncio.wait_for(report(), meas_interval * 3)
+                    except SCD30Error as error:
+                        await data_logger.report_error(str(error), exception=error)
+                        await self.scd30_iface.lower.reset()
+                        await asyncio.sleep(meas_interval)
+                    except asyncio.TimeoutError as error:
+                        await data_logger.report_error("timeout", exception=error)
+                        await self.scd30_iface.lower.reset()
+            finally:
+                await data_logger.close()
 
     @classmethod
     def tests(cls):
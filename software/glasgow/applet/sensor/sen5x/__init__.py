@@ -226,24 +226,27 @@ class SensorSEN5xApplet(GlasgowAppletV2):
                 nox_index="NOx"
             )
             data_logger = await DataLogger(self.logger, args, field_names=field_names)
-            meas_interval = 1.0
-            while True:
-                async def report():
-                    while not await self.sen5x_iface.is_data_ready():
-                        await asyncio.sleep(meas_interval / 2)
-
-                    sample = await self.sen5x_iface.read_measurement()
-                    fields = asdict(sample)
-                    await data_logger.report_data(fields)
-                try:
-                    await asyncio.wait_for(report(), meas_interval * 3)
-                except SEN5xError as error:
-                    await data_logger.report_error(str(error), exception=error)
-                    await self.sen5x_iface.lower.reset()
-                    await asyncio.sleep(meas_interval)
-                except asyncio.TimeoutError as error:
-                    await data_logger.report_error("timeout", exception=error)
-                    await self.sen5x_iface.lower.reset()
+            try:
+                meas_interval = 1.0
+                while True:
+                    async def report():
+                        while not await self.sen5x_iface.is_data_ready():
+                            await asyncio.sleep(meas_interval / 2)
+
+                        sample = await self.sen5x_iface.read_measurement()
+                        fields = asdict(sample)
+                        await data_logger.report_data(fields)
+                    try:
+                        await asyncio.wait_for(report(), meas_interval * 3)
+                    except SEN5xError as error:
+                        await data_logger.report_error(str(error), exception=error)
+                        await self.sen5x_iface.lower.reset()
+                        await asyncio.sleep(meas_interval)
+                    except asyncio.TimeoutError as error:
+                        await data_logger.report_error("timeout", exception=error)
+                        await self.sen5x_iface.lower.reset()
+            finally:
+                await data_logger.close()
 
     @classmethod
     def tests(cls):
@@ -4,8 +4,8 @@
 
 from enum import IntEnum
 
-from ...support.bits import *
-from ...support.bitstruct import *
+from ....support.bits import *
+from ....support.bitstruct import *
 
 
 __all__ = [
@@ -5,32 +5,21 @@ import ast
 import logging
 import contextlib
 import asyncio
+import time
 import signal
 import argparse
 import textwrap
 import platform
-import unittest
-import importlib.metadata
+import importlib.resources
 from datetime import datetime
 
-from vcd import VCDWriter
-from amaranth import UnusedElaboratable
-from fx2 import FX2Config, FX2Device, FX2DeviceError, VID_CYPRESS, PID_FX2
-from fx2.format import input_data, diff_data
-
+# Only the modules required to build the argument parser are imported here; Amaranth, the hardware
+# support code, and the applets are imported once it is known that they will be used. This keeps
+# commands such as `glasgow list`, `glasgow --help`, and tab completion fast.
 from . import __version__
-from .support.logging import *
 from .support.asignal import *
 from .support.plugin import PluginRequirementsUnmet, PluginLoadError
-from .abstract import ClockingError
-from .hardware.device import GlasgowDeviceError, GlasgowDevice, GlasgowDeviceConfig
-from .hardware.device import VID_QIHW, PID_GLASGOW
-from .hardware.toolchain import ToolchainNotFound
-from .hardware.build_plan import GatewareBuildError
-from .hardware.assembly import HardwareAssembly
-from .legacy import DeprecatedTarget, DeprecatedMultiplexer
-from .legacy import DeprecatedDevice, DeprecatedDemultiplexer
-from .applet import *
+from .plugins import GlasgowAppletMetadata, GlasgowAppletToolMetadata
 
 
 # When running as `-m glasgow.cli`, `__name__` is `__main__`, and the real name
@@ -185,36 +174,37 @@ def get_argparser():
         subparsers = add_subparsers(
             parser, dest="applet", metavar="APPLET", required=required, parser_class=LazyParser)
 
+        # The applets are described using cached metadata, and an applet is only imported once
+        # its subparser is used.
         for handle, metadata in GlasgowAppletMetadata.all().items():
             if not metadata.loadable:
                 add_stub_parser(subparsers, handle, metadata)
                 continue
-            applet_cls = metadata.load()
 
-            # Don't do `.tests() is None`, as this has the overhead of importing the tests module
-            # (about 5ms per applet, which adds up). Instead, check if the function was overridden,
-            # as it's pointless to override it just to return `None`.
-            if mode == "test" and applet_cls.tests is GlasgowApplet.tests:
+            if mode == "test" and not metadata.has_tests:
                 continue
 
-            help        = applet_cls.help
-            description = applet_cls.description
-            if applet_cls.preview:
+            help        = metadata.synopsis
+            description = metadata.description
+            if metadata.preview:
                 help += " (PREVIEW QUALITY APPLET)"
                 description = "    This applet is PREVIEW QUALITY and may CORRUPT DATA or " \
                               "have missing features. Use at your own risk.\n" + description
-            if applet_cls.required_revision > "A0":
-                help += f" (rev{applet_cls.required_revision}+)"
+            if metadata.required_revision > "A0":
+                help += f" (rev{metadata.required_revision}+)"
                 description += "\n    This applet requires Glasgow rev{} or later." \
-                               .format(applet_cls.required_revision)
+                               .format(metadata.required_revision)
 
             p_applet = subparsers.add_parser(
                 handle, help=help, description=description,
                 formatter_class=TextHelpFormatter)
 
-            def p_applet_build_factory(p_applet, handle, applet_cls, mode):
+            def p_applet_build_factory(p_applet, handle, metadata, mode):
                 # factory function for proper closure
                 def p_applet_build():
+                    from .applet import GlasgowAppletArguments, GlasgowAppletV2
+                    applet_cls = metadata.load()
+
                     if mode == "test":
                         p_applet.add_argument(
                             "tests", metavar="TEST", nargs="*",
@@ -248,15 +238,15 @@ def get_argparser():
                         # is passed to the repo / script environment
                         p_applet.add_argument('script_args', nargs=argparse.REMAINDER)
                 return p_applet_build
-            p_applet.add_build_func(p_applet_build_factory(p_applet, handle, applet_cls, mode))
+            p_applet.add_build_func(p_applet_build_factory(p_applet, handle, metadata, mode))
 
     def add_applet_tool_arg(parser, *, required=False):
         subparsers = add_subparsers(
             parser, dest="tool", metavar="TOOL", required=required, parser_class=LazyParser)
 
-        def p_tool_build_factory(p_tool, tool_cls):
+        def p_tool_build_factory(p_tool, metadata):
             def p_tool_build():
-                tool_cls.add_arguments(p_tool)
+                metadata.load().add_arguments(p_tool)
             return p_tool_build
 
         for handle, metadata in GlasgowAppletToolMetadata.all().items():
@@ -264,11 +254,10 @@ def get_argparser():
                 add_stub_parser(subparsers, handle, metadata)
                 continue
 
-            tool_cls = metadata.load()
             p_tool = subparsers.add_parser(
-                handle, help=tool_cls.help, description=tool_cls.description,
+                handle, help=metadata.synopsis, description=metadata.description,
                 formatter_class=TextHelpFormatter)
-            p_tool.add_build_func(p_tool_build_factory(p_tool, tool_cls))
+            p_tool.add_build_func(p_tool_build_factory(p_tool, metadata))
 
     parser = create_argparser()
 
@@ -416,7 +405,16 @@ def get_argparser():
     p_test = subparsers.add_parser(
         "test", formatter_class=TextHelpFormatter,
         help="(advanced) test applet logic without target hardware")
-    p_test.add_build_func(lambda: add_applet_arg(p_test, mode="test", required=True))
+    p_test.add_argument(
+        "--all", default=False, action="store_true",
+        help="run the tests of every applet instead of a single one")
+    p_test.add_argument(
+        "-j", "--jobs", metavar="N", type=int, default=os.cpu_count(),
+        help="with --all, run tests in N worker processes (default: %(default)s)")
+    p_test.add_argument(
+        "--slowest", metavar="N", type=int, default=10,
+        help="with --all, report N slowest tests (default: %(default)s)")
+    p_test.add_build_func(lambda: add_applet_arg(p_test, mode="test"))
 
     def factory_serial(arg):
         if re.match(r"^\d{8}T\d{6}Z$", arg):
@@ -460,8 +458,32 @@ def get_argparser():
     return parser
 
 
+def _applet_test_shards():
+    import unittest
+
+    shards = {}
+    loader = unittest.TestLoader()
+    for handle, metadata in GlasgowAppletMetadata.all().items():
+        if not metadata.loadable:
+            logger.warning("skipping tests for applet %r: unmet requirements: %s", handle,
+                           ", ".join(str(r) for r in metadata.unmet_requirements))
+            continue
+        if not metadata.has_tests:
+            continue
+        if (tests_cls := metadata.load().tests()) is None:
+            continue
+        shards[handle] = [
+            f"{tests_cls.__module__}.{tests_cls.__qualname__}.{name}"
+            for name in loader.getTestCaseNames(tests_cls)
+        ]
+    return shards
+
+
 # The name of this function appears in Verilog output, so keep it tidy.
 def _applet(assembly, args):
+    from .applet import GlasgowAppletError, GlasgowAppletV2, GlasgowApplet
+    from .legacy import DeprecatedTarget
+
     try:
         applet_cls = GlasgowAppletMetadata.get(args.applet).load()
         match applet := applet_cls(assembly):
@@ -550,6 +572,7 @@ def configure_logger(args, term_handler):
 
     level = logging.INFO + args.quiet * 10 - args.verbose * 10
     if level < 0 or args.no_shorten:
+        from .support.logging import dump_hex, dump_bin, dump_seq, dump_mapseq
         dump_hex.limit = dump_bin.limit = dump_seq.limit = dump_mapseq.limit = None
 
     if args.log_file or args.filter_log:
@@ -590,17 +613,24 @@ async def wait_for_sigint():
     raise SIGINTCaught
 
 
-async def main() -> int:
-    term_handler = file_handler = device = None
-    try:
-        # Handle log messages emitted during construction of the argument parser (e.g. by
-        # the plugin subsystem).
-        term_handler = create_logger()
-        args = get_argparser().parse_args()
-        file_handler = configure_logger(args, term_handler)
+async def _main(args) -> int:
+    import unittest
+    from amaranth import UnusedElaboratable
+    from fx2 import FX2Config, FX2Device, FX2DeviceError, VID_CYPRESS, PID_FX2
+    from fx2.format import input_data, diff_data
 
-        logger.debug(version_info()) # print version info if verbose
+    from .support.test_runner import run_shards, format_report
+    from .abstract import ClockingError
+    from .hardware.device import GlasgowDeviceError, GlasgowDevice, GlasgowDeviceConfig
+    from .hardware.device import VID_QIHW, PID_GLASGOW
+    from .hardware.toolchain import ToolchainNotFound
+    from .hardware.build_plan import GatewareBuildError
+    from .hardware.assembly import HardwareAssembly
+    from .legacy import DeprecatedDevice, DeprecatedDemultiplexer
+    from .applet import GlasgowAppletError, GlasgowAppletArguments, GlasgowAppletV2, GlasgowApplet
 
+    device = None
+    try:
         if args.action not in ("build", "test", "tool", "factory", "list"):
             device = await GlasgowDevice.find(args.serial)
             assembly = HardwareAssembly(device=device)
@@ -942,7 +972,31 @@ async def main() -> int:
                     f.write(plan.bitstream_id)
                     f.write(await plan.get_bitstream())
 
-        if args.action == "test":
+        if args.action == "test" and args.all:
+            if args.applet is not None:
+                logger.error("an applet cannot be specified together with --all")
+                return 1
+            shards = _applet_test_shards()
+            logger.info("testing %d applets in %d processes", len(shards), args.jobs)
+            def report_shard(shard_result):
+                counts = f"{len(shard_result.outcomes)} tests"
+                if skipped := shard_result.count("skip"):
+                    counts += f", {skipped} skipped"
+                if failed := len(shard_result.failed):
+                    counts += f", {failed} FAILED"
+                logger.info("applet %r: %s in %.3fs",
+                            shard_result.name, counts, shard_result.duration)
+            started = time.perf_counter()
+            results = run_shards(shards, jobs=args.jobs, on_result=report_shard)
+            print(format_report(results, wall_time=time.perf_counter() - started,
+                                slowest=args.slowest), file=sys.stderr)
+            if any(shard_result.failed for shard_result in results):
+                return 1
+
+        elif args.action == "test":
+            if args.applet is None:
+                logger.error("an applet or --all must be specified")
+                return 1
             logger.info("testing applet %r", args.applet)
             applet_cls = GlasgowAppletMetadata.get(args.applet).load()
             loader = unittest.TestLoader()
@@ -1006,11 +1060,6 @@ async def main() -> int:
 
             logger.warning("power cycle the device to finish the operation")
 
-        if args.action == "list":
-            for serial in sorted(await GlasgowDevice.enumerate()):
-                print(serial)
-            return 0
-
     # Device-related errors
     except GlasgowDeviceError as e:
         logger.error(e)
@@ -1022,15 +1071,46 @@ async def main() -> int:
         applet.logger.error(e)
         return 2
 
+    except ToolchainNotFound as e:
+        return 3
+
+    finally:
+        if device is not None:
+            await device.close()
+
+    return 0
+
+
+async def main() -> int:
+    term_handler = file_handler = None
+    try:
+        # Handle log messages emitted during construction of the argument parser (e.g. by
+        # the plugin subsystem).
+        term_handler = create_logger()
+        args = get_argparser().parse_args()
+        file_handler = configure_logger(args, term_handler)
+
+        logger.debug(version_info()) # print version info if verbose
+
+        if args.action == "list":
+            # Enumerating devices requires neither Amaranth nor any of the applets.
+            from .hardware.device import GlasgowDeviceError, GlasgowDevice
+            try:
+                for serial in sorted(await GlasgowDevice.enumerate()):
+                    print(serial)
+            except GlasgowDeviceError as e:
+                logger.error(e)
+                return 1
+            return 0
+
+        return await _main(args)
+
     # Environment-related errors
     except (PluginRequirementsUnmet, PluginLoadError) as e:
         logger.error(e)
         print(e.metadata.description)
         return 3
 
-    except ToolchainNotFound as e:
-        return 3
-
     # User interruption
     except KeyboardInterrupt:
         logger.warning("interrupted")
@@ -1045,11 +1125,6 @@ async def main() -> int:
         if file_handler is not None:
             root_logger.removeHandler(file_handler)
 
-        if device is not None:
-            await device.close()
-
-    return 0
-
 
 # This entry point is invoked via `project.scripts.glasgow` when installing the package with `pipx`.
 def run_main():
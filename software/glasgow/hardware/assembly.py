@@ -176,8 +176,9 @@ class HardwareInPipe(AbstractInPipe):
 
         # Return exactly the requested length.
         while len(self._in_buffer) < length:
-            self._logger.trace(f"IN pipe {self._in_interface}: need %d bytes",
-                length - len(self._in_buffer))
+            if self._logger.isEnabledFor(logging.TRACE):
+                self._logger.trace(f"IN pipe {self._in_interface}: need %d bytes",
+                    length - len(self._in_buffer))
             self._in_stalls += 1
             assert self._in_tasks
             await self._in_tasks.wait_one()
@@ -198,14 +199,16 @@ class HardwareInPipe(AbstractInPipe):
             # Always return a memoryview object, to avoid hard to detect edge cases downstream.
             result = memoryview(b"".join(chunks))
 
-        self._logger.trace(f"IN pipe {self._in_interface}: read <%s>", dump_hex(result))
+        if self._logger.isEnabledFor(logging.TRACE):
+            self._logger.trace(f"IN pipe {self._in_interface}: read <%s>", dump_hex(result))
         return result
 
     async def recv_until(self, delimiter) -> bytes:
         assert len(delimiter) >= 1
 
-        self._logger.trace(f"IN pipe {self._in_interface}: need <%s> delimiter",
-            dump_hex(delimiter))
+        if self._logger.isEnabledFor(logging.TRACE):
+            self._logger.trace(f"IN pipe {self._in_interface}: need <%s> delimiter",
+                dump_hex(delimiter))
 
         chunks = []
         while True:
@@ -223,7 +226,8 @@ class HardwareInPipe(AbstractInPipe):
                 break
 
         result = b"".join(chunks)
-        self._logger.trace(f"IN pipe {self._in_interface}: read <%s>", dump_hex(result))
+        if self._logger.isEnabledFor(logging.TRACE):
+            self._logger.trace(f"IN pipe {self._in_interface}: read <%s>", dump_hex(result))
         return result
 
     async def reset(self):
@@ -335,7 +339,8 @@ class HardwareOutPipe(AbstractOutPipe):
         # Eagerly check if any of our previous queued writes errored out.
         await self._out_tasks.poll()
 
-        self._logger.trace(f"OUT pipe {self._out_interface}: write <%s>", dump_hex(data))
+        if self._logger.isEnabledFor(logging.TRACE):
+            self._logger.trace(f"OUT pipe {self._out_interface}: write <%s>", dump_hex(data))
         self._out_buffer.write(data)
 
         # The write scheduling algorithm attempts to satisfy several partially conflicting goals:
@@ -366,7 +371,8 @@ class HardwareOutPipe(AbstractOutPipe):
     # TODO: we should not in principle need `_wait=False` as flushes of large batches of data
     # should happen automatically as data is sent
     async def flush(self, *, _wait=True):
-        self._logger.trace(f"OUT pipe {self._out_interface}: flush")
+        if self._logger.isEnabledFor(logging.TRACE):
+            self._logger.trace(f"OUT pipe {self._out_interface}: flush")
 
         # First, we ensure we can submit one more task. (There can be more tasks than
         # _xfers_per_queue because a task may spawn another one just before it terminates.)
@@ -388,7 +394,8 @@ class HardwareOutPipe(AbstractOutPipe):
             self._out_tasks.submit(self._out_task(data))
 
         if _wait:
-            self._logger.trace(f"OUT pipe {self._out_interface}: wait for flush")
+            if self._logger.isEnabledFor(logging.TRACE):
+                self._logger.trace(f"OUT pipe {self._out_interface}: wait for flush")
             if self._out_tasks:
                 self._out_stalls += 1
             while self._out_tasks:
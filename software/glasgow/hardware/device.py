@@ -66,113 +66,162 @@ class GlasgowDevice:
         with cls.firmware_file().open() as file:
             return input_data(file, fmt="ihex")
 
+    # The device disconnects from the bus for ~1 second after the firmware is loaded, but OS and
+    # platform delays vary widely. Windows seems particularly slow, with a 5-second timeout being
+    # insufficient.
+    RE_ENUMERATION_TIMEOUT = 10.0
+
+    @classmethod
+    async def _load_firmware(cls, device: usb.Device, firmware):
+        await device.control_transfer_out(
+            usb.RequestType.Vendor, usb.Recipient.Device, REQ_RAM, REG_CPUCS, 0, bytes([1]))
+        for address, data in firmware:
+            for offset in range(0, len(data), 4096):
+                await device.control_transfer_out(
+                    usb.RequestType.Vendor, usb.Recipient.Device,
+                    REQ_RAM, address + offset, 0, bytes(data[offset:offset + 4096]))
+        await device.control_transfer_out(
+            usb.RequestType.Vendor, usb.Recipient.Device, REQ_RAM, REG_CPUCS, 0, bytes([0]))
+
+    @classmethod
+    async def _probe_device(cls, device: usb.Device, firmware) -> Optional[str]:
+        """Open :py:`device` and load the firmware if necessary.
+
+        Returns ``"ready"`` if the device runs the current firmware, ``"loaded"`` if the firmware
+        was loaded and the device will re-enumerate, or ``None`` if the device cannot be used.
+        """
+        if device.vendor_id == VID_QIHW and device.product_id == PID_GLASGOW:
+            revision  = GlasgowDeviceConfig.decode_revision(device.version & 0xFF)
+            api_level = device.version >> 8
+        else:
+            return None
+
+        try:
+            await device.open()
+        except usb.ErrorAccess:
+            logger.error("missing permissions to open device %s", device.location)
+            return None
+        if api_level == 0:
+            logger.debug("found rev%s device without firmware", revision)
+        elif api_level != CUR_API_LEVEL:
+            try:
+                # Make sure nobody else is using the device, otherwise reloading the firmware
+                # will crash an existing session.
+                for interface in device.configuration.interfaces:
+                    await device.claim_interface(interface.number)
+                logger.info("found rev%s device with API level %d (supported API level is %d)",
+                    revision, api_level, CUR_API_LEVEL)
+                # Updating the firmware is not strictly required. However, re-enumeration tends
+                # to expose all kinds of issues related to hotplug (especially on Windows,
+                # where libusb does not listen to hotplug events) and the more you do it,
+                # the more likely it is to eventually cause misery.
+                logger.warning("please run `glasgow flash` to update firmware of device %s",
+                    device.serial_number)
+            except usb.ErrorBusy:
+                logger.debug("found busy rev%s device with unsupported API level %d",
+                    revision, api_level)
+                await device.close()
+                return None
+        else: # api_level == CUR_API_LEVEL
+            await device.close()
+            return "ready"
+
+        # If the device has no firmware or the firmware is too old (or, potentially, too new),
+        # load the firmware that we know will work.
+        logger.debug("loading firmware from %r to rev%s device",
+            str(cls.firmware_file()), revision)
+        await cls._load_firmware(device, firmware)
+        await device.close()
+        return "loaded"
+
     @classmethod
     async def _enumerate_devices(cls, context: usb.Context):
-        devices: list[usb.Device] = []
+        arrived: list[usb.Device] = []
         devices_by_serial: dict[str, usb.Device] = {}
 
         def on_connected(device):
             if device.vendor_id == VID_QIHW and device.product_id == PID_GLASGOW:
-                devices.append(device)
+                arrived.append(device)
         context.add_connect_callback(on_connected)
 
         # No especially good way to handle the case where multiple devices are connected without
         # also making it very annoying to use a single device only.
         if len(await context.get_devices()) == 0:
             await context.request_device(VID_QIHW, PID_GLASGOW)
-        devices.extend(await context.get_devices())
-
-        while any(devices):
-            device = devices.pop()
-
-            if device.vendor_id == VID_QIHW and device.product_id == PID_GLASGOW:
-                revision  = GlasgowDeviceConfig.decode_revision(device.version & 0xFF)
-                api_level = device.version >> 8
-            else:
-                continue
-
-            try:
-                await device.open()
-            except usb.ErrorAccess:
-                logger.error("missing permissions to open device %s", device.location)
-                continue
-            if api_level == 0:
-                logger.debug("found rev%s device without firmware", revision)
-            elif api_level != CUR_API_LEVEL:
-                try:
-                    # Make sure nobody else is using the device, otherwise reloading the firmware
-                    # will crash an existing session.
-                    for interface in device.configuration.interfaces:
-                        await device.claim_interface(interface.number)
-                    logger.info("found rev%s device with API level %d (supported API level is %d)",
-                        revision, api_level, CUR_API_LEVEL)
-                    # Updating the firmware is not strictly required. However, re-enumeration tends
-                    # to expose all kinds of issues related to hotplug (especially on Windows,
-                    # where libusb does not listen to hotplug events) and the more you do it,
-                    # the more likely it is to eventually cause misery.
-                    logger.warning("please run `glasgow flash` to update firmware of device %s",
-                        device.serial_number)
-                except usb.ErrorBusy:
-                    logger.debug("found busy rev%s device with unsupported API level %d",
-                        revision, api_level)
-                    await device.close()
-                    continue
-            else: # api_level == CUR_API_LEVEL
-                if device.serial_number not in devices_by_serial:
+        devices = await context.get_devices()
+
+        # Devices are probed, and the firmware is loaded into them, all at once. Devices that
+        # re-enumerate after the firmware is loaded are then awaited together, and matched by their
+        # serial number (or, for devices without firmware, which have no serial number, by count).
+        firmware  = None
+        reloading: list[usb.Device] = []
+        returning = False
+        deadline  = None
+
+        def match_reloaded(serial):
+            for device in reloading:
+                if device.serial_number == serial:
+                    return device
+            for device in reloading:
+                if device.serial_number is None:
+                    return device
+
+        while True:
+            devices_by_location = {device.location: device for device in devices}
+            devices = list(devices_by_location.values())
+            if any(device.version >> 8 != CUR_API_LEVEL for device in devices) and firmware is None:
+                firmware = cls.firmware_data()
+            results = await asyncio.gather(*(cls._probe_device(device, firmware)
+                                             for device in devices))
+            for device, result in zip(devices, results):
+                if result == "loaded":
+                    reloading.append(device)
+                elif result == "ready" and device.serial_number not in devices_by_serial:
                     logger.debug("found rev%s device with serial %s",
-                        revision, device.serial_number)
+                        GlasgowDeviceConfig.decode_revision(device.version & 0xFF),
+                        device.serial_number)
                     devices_by_serial[device.serial_number] = device
-                await device.close()
-                continue
-
-            # If the device has no firmware or the firmware is too old (or, potentially, too new),
-            # load the firmware that we know will work.
-            logger.debug("loading firmware from %r to rev%s device",
-                str(cls.firmware_file()), revision)
-            await device.control_transfer_out(
-                usb.RequestType.Vendor, usb.Recipient.Device, REQ_RAM, REG_CPUCS, 0, bytes([1]))
-            for address, data in cls.firmware_data():
-                for offset in range(0, len(data), 4096):
-                    await device.control_transfer_out(
-                        usb.RequestType.Vendor, usb.Recipient.Device,
-                        REQ_RAM, address + offset, 0, bytes(data[offset:offset + 4096]))
-            await device.control_transfer_out(
-                usb.RequestType.Vendor, usb.Recipient.Device, REQ_RAM, REG_CPUCS, 0, bytes([0]))
-            await device.close()
-
-            RE_ENUMERATION_TIMEOUT = 10.0
+                    if returning and (reloaded := match_reloaded(device.serial_number)):
+                        reloading.remove(reloaded)
+            if not reloading or returning and not context.has_hotplug_support:
+                break
+            returning = True
 
             if context.has_hotplug_support:
-                # Hotplug is available; process hotplug events for a while looking for the device
-                # that re-enumerates after firmware upload. We expect two events (one detach and
-                # one attach event), but allow for a bit more than that. (It is not possible to
-                # wait for re-enumeration without some guesswork because USB lacks geographical
-                # addressing.)
-                logger.debug(f"waiting for re-enumeration (hotplug event)")
-                devices_len = len(devices)
-                deadline = time.time() + RE_ENUMERATION_TIMEOUT
-                while deadline > time.time():
+                # Hotplug is available; process hotplug events for a while looking for the devices
+                # that re-enumerate after firmware upload. (It is not possible to wait for
+                # re-enumeration without some guesswork because USB lacks geographical addressing.)
+                if deadline is None:
+                    logger.debug("waiting for re-enumeration of %d device(s) (hotplug event)",
+                        len(reloading))
+                    deadline = time.time() + cls.RE_ENUMERATION_TIMEOUT
+                while True:
                     await asyncio.sleep(0.5)
                     if len(await context.get_devices()) == 0:
                         await context.request_device(VID_QIHW, PID_GLASGOW)
-                    if devices_len < len(devices):
-                        break # Found it!
-                else:
-                    logger.warning("device %s did not re-enumerate after firmware upload",
-                        device.location)
+                    if arrived or deadline <= time.time():
+                        break
+                if not arrived:
+                    break
+                # The hotplug callback may be running on another thread.
+                devices = []
+                while arrived:
+                    devices.append(arrived.pop(0))
 
             else:
                 # No hotplug capability (most likely because we're running on Windows with an older
-                # version of libusb); give the device a bit of time to re-enumerate. The device
-                # disconnects from the bus for ~1 second, so we should wait a few times that
-                # to allow for the variable OS and platform delays. Windows seems particularly slow
-                # with a 5-second timeout being insufficient.
-                logger.debug(f"waiting for re-enumeration (fixed delay)")
-                await asyncio.sleep(RE_ENUMERATION_TIMEOUT)
+                # version of libusb); give the devices a bit of time to re-enumerate.
+                logger.debug("waiting for re-enumeration of %d device(s) (fixed delay)",
+                    len(reloading))
+                await asyncio.sleep(cls.RE_ENUMERATION_TIMEOUT)
 
                 if len(await context.get_devices()) == 0:
                     await context.request_device(VID_QIHW, PID_GLASGOW)
-                devices.extend(await context.get_devices())
+                devices = await context.get_devices()
+
+        for device in reloading:
+            logger.warning("device %s did not re-enumerate after firmware upload",
+                device.location)
 
         return devices_by_serial
 
@@ -0,0 +1,37 @@
+# This module is separate from `glasgow.applet` so that the command line interface can list
+# applets and applet tools without importing Amaranth and the rest of the applet infrastructure.
+
+from .support.plugin import PluginMetadata
+
+
+__all__ = ["GlasgowAppletMetadata", "GlasgowAppletToolMetadata"]
+
+
+class GlasgowAppletMetadata(PluginMetadata):
+    # A Glasgow applet is defined by a class; known applets are taken from a
+    # list of entry points in package metadata.  (In the Glasgow package, they
+    # are enumerated in the `[project.entry-points."glasgow.applet"]` section of
+    # the pyproject.toml.
+    GROUP_NAME = "glasgow.applet"
+
+    @classmethod
+    def _describe(cls, applet_cls):
+        from .applet import GlasgowApplet, GlasgowAppletV2
+        return {
+            **super()._describe(applet_cls),
+            "preview":           applet_cls.preview,
+            "required_revision": applet_cls.required_revision,
+            # Don't do `.tests() is None`, as this has the overhead of importing the tests module
+            # (about 5ms per applet, which adds up). Instead, check if the function was overridden,
+            # as it's pointless to override it just to return `None`.
+            "has_tests":         applet_cls.tests not in (GlasgowApplet.tests,
+                                                          GlasgowAppletV2.tests),
+        }
+
+
+class GlasgowAppletToolMetadata(PluginMetadata):
+    # A Glasgow applet tool is defined by a class; known applets are taken from a
+    # list of entry points in package metadata.  (In the Glasgow package, they
+    # are enumerated in the `[project.entry-points."glasgow.applet.tool"]` section of
+    # the pyproject.toml.
+    GROUP_NAME = "glasgow.applet.tool"
@@ -146,11 +146,12 @@ class SimulationAssembly(AbstractAssembly):
                 packet = bytearray()
                 ctx.set(in_stream.ready, 1)
                 while True:
-                    clk_hit, rst_hit, payload_smp, valid_smp, flush_smp = \
-                        await ctx.tick().sample(in_stream.payload, in_stream.valid, in_flush)
+                    clk_hit, rst_hit, payload_smp, valid_smp, ready_smp, flush_smp = \
+                        await ctx.tick().sample(in_stream.payload, in_stream.valid,
+                                                in_stream.ready, in_flush)
                     assert not rst_hit
                     if clk_hit:
-                        if valid_smp:
+                        if valid_smp and ready_smp:
                             packet.append(payload_smp)
                             timer = 0
                         if len(packet) >= 512 or flush_smp or timer >= 100:
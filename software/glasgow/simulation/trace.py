@@ -0,0 +1,230 @@
+"""Waveform capture for simulation tests.
+
+Capturing a waveform of every signal in the design is expensive: for long simulation tests, writing
+the VCD file takes more time than the simulation itself. Because of this, waveforms are only written
+when explicitly requested using the following environment variables:
+
+``GLASGOW_TEST_VCD``
+    Unset, empty, or ``0`` disables waveform capture (the default). ``1`` writes ``<test>.vcd`` and
+    ``<test>.gtkw`` files to the current directory; any other value is used as the output directory.
+
+``GLASGOW_TEST_VCD_FILTER``
+    A comma-separated list of glob patterns matched against the hierarchical path of each scope
+    (relative to the toplevel, with components separated by ``.``, e.g. ``jtag_probe.bus``).
+    Only signals within a matching scope (or its descendants) are written. By default, all signals
+    are written.
+
+``GLASGOW_TEST_VCD_WINDOW``
+    A time window in the form ``START:STOP`` (e.g. ``10us:250us``), where either bound may be
+    omitted. Only value changes within the window are written; the state of every signal at
+    the beginning of the window is written as a snapshot. By default, the entire simulation is
+    written.
+"""
+
+from typing import Optional, TextIO
+from contextlib import contextmanager
+import os
+import re
+import fnmatch
+
+
+__all__ = ["VCDFilter", "parse_time", "trace_files"]
+
+
+_TIME_UNITS = {
+    "s":  1,
+    "ms": 1e-3,
+    "us": 1e-6,
+    "ns": 1e-9,
+    "ps": 1e-12,
+    "fs": 1e-15,
+}
+
+
+def parse_time(value: str) -> float:
+    """Parse a time specification such as ``10us`` or ``1.5e-3`` (in seconds)."""
+    match = re.fullmatch(r"\s*([0-9.eE+-]+)\s*([munpf]?s)?\s*", value)
+    if match is None:
+        raise ValueError(f"{value!r} is not a valid time")
+    number, unit = match.groups()
+    try:
+        return float(number) * _TIME_UNITS[unit or "s"]
+    except ValueError:
+        raise ValueError(f"{value!r} is not a valid time") from None
+
+
+class VCDFilter:
+    """A file-like object that filters a VCD stream before writing it to :py:`file`.
+
+    Only variables whose scope path (without the ``bench.top`` prefix added by the simulator)
+    matches one of the glob patterns in :py:`scopes` are kept. Only value changes between
+    :py:`start` and :py:`stop` (in seconds) are kept. The stream is processed line by line as it
+    is written, and never held in memory in its entirety.
+    """
+
+    _ROOT_SCOPE = ("bench", "top")
+
+    def __init__(self, file: TextIO, *, scopes: Optional[list[str]] = None,
+                 start: Optional[float] = None, stop: Optional[float] = None):
+        self._file    = file
+        self._scopes  = scopes
+        self._start   = start
+        self._stop    = stop
+        self._partial = ""
+
+        self._in_header   = True
+        self._scope_stack = [] # [[line, name, emitted]]
+        self._kept_ids    = set()
+        self._timescale   = 1e-15
+
+        self._start_ts    = None
+        self._stop_ts     = None
+        self._started     = start is None
+        self._stopped     = False
+        self._values      = {} # {id: line}, only tracked until the window starts
+
+    @property
+    def name(self) -> str:
+        return self._file.name
+
+    def _scope_matches(self, path: tuple[str, ...]) -> bool:
+        if self._scopes is None:
+            return True
+        if path[:len(self._ROOT_SCOPE)] == self._ROOT_SCOPE:
+            path = path[len(self._ROOT_SCOPE):]
+        for length in range(1, len(path) + 1):
+            prefix = ".".join(path[:length])
+            if any(fnmatch.fnmatchcase(prefix, pattern) for pattern in self._scopes):
+                return True
+        return False
+
+    def _emit(self, line: str):
+        self._file.write(line)
+        self._file.write("\n")
+
+    def _header_line(self, line: str):
+        words = line.split()
+        match words:
+            case ["$timescale", *timescale, "$end"]:
+                self._timescale = parse_time("".join(timescale))
+                if self._start is not None:
+                    self._start_ts = round(self._start / self._timescale)
+                if self._stop is not None:
+                    self._stop_ts = round(self._stop / self._timescale)
+                self._emit(line)
+            case ["$scope", _kind, name, "$end"]:
+                self._scope_stack.append([line, name, False])
+            case ["$upscope", "$end"]:
+                if self._scope_stack.pop()[2]:
+                    self._emit(line)
+            case ["$var", _type, _size, ident, *_name, "$end"]:
+                path = tuple(name for _line, name, _emitted in self._scope_stack)
+                if self._scope_matches(path):
+                    for scope in self._scope_stack:
+                        if not scope[2]:
+                            self._emit(scope[0])
+                            scope[2] = True
+                    self._kept_ids.add(ident)
+                    self._emit(line)
+            case ["$enddefinitions", "$end"]:
+                self._in_header = False
+                self._emit(line)
+            case _:
+                self._emit(line)
+
+    def _body_line(self, line: str):
+        if self._stopped:
+            return
+        if line.startswith("#"):
+            timestamp = int(line[1:])
+            if self._stop_ts is not None and timestamp > self._stop_ts:
+                self._stopped = True
+            elif not self._started and timestamp >= self._start_ts:
+                self._started = True
+                self._emit(line)
+                self._emit("$dumpvars")
+                for value_line in self._values.values():
+                    self._emit(value_line)
+                self._emit("$end")
+                self._values = None
+            elif self._started:
+                self._emit(line)
+        elif line[0] in "bBrRsS":
+            ident = line.rsplit(" ", 1)[1]
+            if ident in self._kept_ids:
+                if self._started:
+                    self._emit(line)
+                else:
+                    self._values[ident] = line
+        elif line[0] in "01xXzZ":
+            ident = line[1:]
+            if ident in self._kept_ids:
+                if self._started:
+                    self._emit(line)
+                else:
+                    self._values[ident] = line
+        elif self._started:
+            # `$dumpvars`, `$end`, `$comment`, etc.
+            self._emit(line)
+
+    def write(self, data: str) -> int:
+        lines = (self._partial + data).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            if not line:
+                continue
+            if self._in_header:
+                self._header_line(line)
+            else:
+                self._body_line(line)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._partial:
+            self.write("\n")
+        self._file.close()
+
+
+@contextmanager
+def trace_files(name: str):
+    """Open waveform files for the simulation test :py:`name`, if requested by the environment.
+
+    Yields a ``(vcd_file, gtkw_file)`` tuple that can be passed to :meth:`Simulator.write_vcd`,
+    or ``(None, None)`` if waveform capture is disabled. The files are closed on exit.
+    """
+    output = os.environ.get("GLASGOW_TEST_VCD", "")
+    if output in ("", "0"):
+        yield None, None
+        return
+    elif output == "1":
+        output = "."
+
+    scopes = None
+    if scopes_spec := os.environ.get("GLASGOW_TEST_VCD_FILTER", ""):
+        scopes = [pattern.strip() for pattern in scopes_spec.split(",") if pattern.strip()]
+
+    start = stop = None
+    if window_spec := os.environ.get("GLASGOW_TEST_VCD_WINDOW", ""):
+        start_spec, sep, stop_spec = window_spec.partition(":")
+        if not sep:
+            raise ValueError(f"time window {window_spec!r} must be in the form 'START:STOP'")
+        if start_spec:
+            start = parse_time(start_spec)
+        if stop_spec:
+            stop = parse_time(stop_spec)
+
+    os.makedirs(output, exist_ok=True)
+    with (open(os.path.join(output, f"{name}.vcd"), "w") as vcd_file,
+          open(os.path.join(output, f"{name}.gtkw"), "w") as gtkw_file):
+        if scopes is not None or start is not None or stop is not None:
+            vcd_file = VCDFilter(vcd_file, scopes=scopes, start=start, stop=stop)
+        try:
+            yield vcd_file, gtkw_file
+        finally:
+            vcd_file.close()
@@ -1,5 +1,4 @@
 import re
-import itertools
 import operator
 from collections.abc import Sequence, MutableSequence, Iterable
 from typing_extensions import Self
@@ -53,7 +52,15 @@ class _bits_base(amaranth.ValueCastable, Sequence):
         value  = re.sub(r"[\s_]", "", value)
         if not re.match(r"^[01]*$", value):
             raise ValueError(f"invalid input for {cls.__name__}(): '{value}'")
-        return cls.from_iter(int(x) for x in reversed(value))
+        return cls._from_int_unchecked(int(value, 2) if value else 0, len(value))
+
+    @classmethod
+    def _from_int_unchecked(cls, value, length) -> Self:
+        # `value` must be non-negative and less than `1 << length`.
+        res = object.__new__(cls)
+        res._bytes = cls._bytestype(value.to_bytes(_byte_len(length), 'little'))
+        res._len = length
+        return res
 
     @classmethod
     def from_iter(cls, iterator) -> Self:
@@ -178,6 +185,12 @@ class _bits_base(amaranth.ValueCastable, Sequence):
                 res._bytes = self._bytes[start // 8 : (stop + 7) // 8]
                 res._len = stop - start
                 return res
+            elif step == 1:
+                # unaligned fastpath
+                return self._from_int_unchecked(self._int_slice(start, stop), stop - start)
+            elif step == -1:
+                # unaligned reverse fastpath
+                return self[stop + 1 : start + 1].reversed()
             else:
                 # slow path
                 return self.from_iter(self[i] for i in range(start, stop, step))
@@ -192,13 +205,20 @@ class _bits_base(amaranth.ValueCastable, Sequence):
                 raise IndexError(f"{self.__class__.__name__} index out of range")
             return (self._bytes[key // 8] >> (key % 8)) & 1
 
+    def _int_slice(self, start, stop) -> int:
+        # Only the bytes that contain bits `start:stop` are converted.
+        value = int.from_bytes(self._bytes[start // 8 : (stop + 7) // 8], 'little')
+        return (value >> (start % 8)) & ~(-1 << (stop - start))
+
     def to_int(self) -> int:
         """Returns the value of this bit string as an integer."""
         return int.from_bytes(self._bytes, 'little')
 
     def to_str(self) -> str:
         """Returns the bit string as a human-readable string (MSB-first)."""
-        return ''.join(str(x) for x in reversed(self))
+        if not self._len:
+            return ''
+        return format(self.to_int(), f'0{self._len}b')
 
     def to_bytes(self) -> bytes:
         """Returns the bits packed into bytes. The bits are packed into bytes LSB-first.
@@ -219,39 +239,57 @@ class _bits_base(amaranth.ValueCastable, Sequence):
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}('{self}')"
 
+    @classmethod
+    def _concat(cls, first, second) -> Self:
+        res = object.__new__(cls)
+        if first._len % 8 == 0:
+            # byte-aligned fastpath
+            res._bytes = cls._bytestype(first._bytes + second._bytes)
+        else:
+            # unaligned fastpath; only the last (partial) byte of `first` is merged with `second`
+            head_len = first._len // 8
+            offset = first._len % 8
+            tail = first._bytes[head_len] | (second.to_int() << offset)
+            res._bytes = cls._bytestype(first._bytes[:head_len] +
+                tail.to_bytes(_byte_len(offset + second._len), 'little'))
+        res._len = first._len + second._len
+        return res
+
     def __add__(self, other) -> Self:
         if isinstance(other, (str, Iterable)):
             other = bits(other)
         elif not isinstance(other, _bits_base):
             return NotImplemented
-        if self._len % 8 == 0:
-            res = object.__new__(self.__class__)
-            res._bytes = self._bytes + other._bytes
-            res._len = self._len + other._len
-            return res
-        return self.from_iter(itertools.chain(self, other))
+        return self._concat(self, other)
 
     def __radd__(self, other) -> Self:
         if isinstance(other, (str, Iterable)):
             other = bits(other)
         elif not isinstance(other, _bits_base):
             return NotImplemented
-        if other._len % 8 == 0:
-            res = object.__new__(self.__class__)
-            res._bytes = other._bytes + self._bytes
-            res._len = other._len + self._len
-            return res
-        return self.from_iter(itertools.chain(other, self))
+        return self._concat(other, self)
 
     def __mul__(self, other) -> Self:
         if not isinstance(other, int):
             return NotImplemented
+        other = max(other, 0)
         if self._len % 8 == 0:
             res = object.__new__(self.__class__)
             res._bytes = self._bytes * other
             res._len = self._len * other
             return res
-        return self.from_iter(itertools.chain.from_iterable(itertools.repeat(self, other)))
+        # unaligned fastpath; square-and-multiply by concatenation
+        res_value, res_len = 0, 0
+        value, length = self.to_int(), self._len
+        count = other
+        while count:
+            if count & 1:
+                res_value |= value << res_len
+                res_len += length
+            value |= value << length
+            length *= 2
+            count >>= 1
+        return self._from_int_unchecked(res_value, res_len)
 
     __rmul__ = __mul__
 
@@ -304,7 +342,10 @@ class _bits_base(amaranth.ValueCastable, Sequence):
             res._len = self._len
             return res
         else:
-            return self.from_iter(reversed(self))
+            # Reversing the bits within each byte and then the order of the bytes leaves
+            # the padding at the LSB end, where it is shifted out.
+            value = int.from_bytes(self._bytes.translate(_byterev_lut), 'big')
+            return self._from_int_unchecked(value >> (8 - self._len % 8), self._len)
 
     def byte_reversed(self) -> Self:
         """Returns a copy of this bit string with bits reversed within each byte.
@@ -383,6 +424,28 @@ class bitarray(_bits_base, MutableSequence):
             self._bytes += bytes(blen - len(self._bytes))
             self._len = length
 
+    def _splice(self, start, stop, value):
+        # Replaces bits `start:stop` with `value`. Only the bytes that contain bits `start:stop` are
+        # rewritten if the length does not change; otherwise, every byte from `start` onwards is.
+        length = self._len - (stop - start) + value._len
+        bstart = start // 8
+        if value._len == stop - start:
+            bstop = _byte_len(stop)
+        else:
+            bstop = len(self._bytes)
+        offset = start % 8
+        window = int.from_bytes(self._bytes[bstart:bstop], 'little')
+        window = (
+            (window & ~(-1 << offset)) |
+            (value.to_int() << offset) |
+            ((window >> (stop - bstart * 8)) << (offset + value._len))
+        )
+        if value._len == stop - start:
+            self._bytes[bstart:bstop] = window.to_bytes(bstop - bstart, 'little')
+        else:
+            self._bytes[bstart:] = window.to_bytes(_byte_len(length) - bstart, 'little')
+        self._len = length
+
     def __setitem__(self, key, value) -> None:
         if isinstance(key, slice):
             start, stop, step = key.indices(self._len)
@@ -399,7 +462,10 @@ class bitarray(_bits_base, MutableSequence):
                     raise ValueError(f"atempt to assign sequence of size {len(value)} to extended slice of size {len(rng)}")
                 for di, bit in zip(rng, value):
                     self[di] = bit
-            elif start % 8 == 0 and stop % 8 == 0 and value._len % 8 == 0:
+                return
+            # like `list`, treat a slice with `stop < start` as an insertion at `start`
+            stop = max(start, stop)
+            if start % 8 == 0 and stop % 8 == 0 and value._len % 8 == 0:
                 # byte-aligned fastpath with aligned ends
                 self._bytes[start // 8 : stop // 8] = value._bytes
                 self._len += value._len - (stop - start)
@@ -407,21 +473,9 @@ class bitarray(_bits_base, MutableSequence):
                 # byte-aligned fastpath with no tail
                 self._bytes[start // 8 :] = value._bytes
                 self._len = start + value._len
-            elif stop - start == value._len:
-                # slow-ish path, no resize
-                for di, bit in zip(rng, value):
-                    self[di] = bit
-            elif stop == self._len:
-                # slow-ish path, extend/truncate
-                self._resize(start + value._len)
-                for di, bit in enumerate(value, start=start):
-                    self[di] = bit
             else:
-                # slow path
-                tail = self[stop:]
-                self._resize(start)
-                self += value
-                self += tail
+                # unaligned fastpath
+                self._splice(start, stop, value)
         else:
             try:
                 key = operator.index(key)
@@ -466,10 +520,8 @@ class bitarray(_bits_base, MutableSequence):
                 # simple trim
                 self._resize(start)
             else:
-                # slow path
-                tail = self[stop:]
-                self._resize(start)
-                self += tail
+                # unaligned fastpath
+                self._splice(start, stop, bits())
         else:
             try:
                 key = operator.index(key)
@@ -506,7 +558,7 @@ class bitarray(_bits_base, MutableSequence):
             self._bytes = self._bytes.translate(_byterev_lut)
             self._bytes.reverse()
         else:
-            super().reverse()
+            self._bytes = self.reversed()._bytes
 
     def byte_reverse(self) -> None:
         """Reverses the bits within every byte of this bitarray in-place. The length
@@ -520,7 +572,7 @@ class bitarray(_bits_base, MutableSequence):
         if isinstance(values, (str, _bits_base)):
             self[self._len:] = values
         else:
-            super().extend(values)
+            self[self._len:] = bits.from_iter(values)
 
     def __imul__(self, other) -> Self:
         other = operator.index(other)
@@ -530,9 +582,8 @@ class bitarray(_bits_base, MutableSequence):
         elif other < 0:
             raise ValueError("cannot multiply bitarray by negative count")
         elif other != 1:
-            val = self[:]
-            for _ in range(other - 1):
-                self += val
+            self._bytes = (self * other)._bytes
+            self._len *= other
         return self
 
     def _ibitop(self, other, op):
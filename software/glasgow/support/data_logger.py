@@ -1,16 +1,29 @@
 import argparse
 import asyncio
 import logging
+import random
+import math
+import os
 import re
 import time
 import sys
 import csv
+import array
+import struct
+import collections
 try:
     import yarl
     import aiohttp
 except ImportError:
     yarl = None
     aiohttp = None
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.compute
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
 
 
 __all__ = ["DataLogger", "STDOUTDataLogger"]
@@ -19,8 +32,9 @@ __all__ = ["DataLogger", "STDOUTDataLogger"]
 class DataLogger:
     all_data_loggers = {}
 
-    def __init_subclass__(cls, name):
-        cls.all_data_loggers[name] = cls
+    def __init_subclass__(cls, name=None):
+        if name is not None:
+            cls.all_data_loggers[name] = cls
 
     help = "data logger help missing"
     description = "data logger description missing"
@@ -34,7 +48,7 @@ class DataLogger:
     def add_subparsers(cls, parser):
         p_data_logger = parser.add_subparsers(dest="data_logger", metavar="DATA-LOGGER")
         for name, subcls in cls.all_data_loggers.items():
-            if not subcls.available:
+            if not subcls.available():
                 continue
             p_data_logger_subcls = p_data_logger.add_parser(
                 name, help=subcls.help, description=subcls.description)
@@ -65,6 +79,9 @@ class DataLogger:
     async def report_error(self, message, *args, exception=None, **kwargs):
         self.logger.error(str(message).format(*args, **kwargs), exc_info=exception)
 
+    async def close(self):
+        pass
+
 
 class STDOUTDataLogger(DataLogger, name="stdout"):
     help = "log data to standard output"
@@ -118,12 +135,378 @@ class CSVDataLogger(DataLogger, name="csv"):
         self.file.flush()
 
 
-class InfluxDBDataLogger(DataLogger, name="influxdb"):
-    help = "log data to an InfluxDB 1.x endpoint"
+class _ColumnarDataLogger(DataLogger):
+    """Buffers samples in memory as rows of ``float64`` values, and writes them in groups.
+
+    Timestamps are stored as the number of seconds since the Unix epoch. Errors are stored as
+    samples where every field is NaN (or null, where supported). The file is synchronized to
+    stable storage at most every ``--sync-interval`` seconds instead of after every sample.
+    """
+
+    @classmethod
+    def add_arguments(cls, parser):
+        parser.add_argument(
+            "--row-group-size", metavar="ROWS", type=int, default=4096,
+            help="write data in groups of ROWS samples (default: %(default)s)")
+        parser.add_argument(
+            "--sync-interval", metavar="SECONDS", type=float, default=10.0,
+            help="write and synchronize buffered data at least every SECONDS "
+                 "(default: %(default)s)")
+
+    async def setup(self, args):
+        self.columns = ["timestamp", *self.field_names]
+        self._rows = array.array("d")
+        self._row_group_size = args.row_group_size
+        self._sync_interval = args.sync_interval
+        self._synced_at = time.monotonic()
+
+    def _append(self, values, timestamp):
+        if timestamp is None:
+            timestamp = time.time()
+        self._rows.append(timestamp)
+        self._rows.extend(values)
+        if (len(self._rows) >= self._row_group_size * len(self.columns) or
+                time.monotonic() - self._synced_at >= self._sync_interval):
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._write_rows(self._rows)
+            self._rows = array.array("d")
+        self._sync()
+        self._synced_at = time.monotonic()
+
+    def _write_rows(self, rows):
+        raise NotImplementedError
+
+    def _sync(self):
+        raise NotImplementedError
+
+    async def report_data(self, fields, timestamp=None):
+        assert set(fields) == set(self.field_names)
+        self._append([fields[key] for key in self.field_names], timestamp)
+
+    async def report_error(self, message, *args, exception=None, **kwargs):
+        await super().report_error(message, *args, **kwargs, exception=exception)
+        self._append([math.nan] * len(self.field_names), None)
+
+    async def close(self):
+        self._flush()
+
+
+class NPYDataLogger(_ColumnarDataLogger, name="npy"):
+    help = "log data to a NumPy .npy file"
     description = """
-    Log data to an InfluxDB 1.x endpoint over HTTP(S).
+    Log data to a NumPy .npy file containing a one-dimensional structured array with
+    a ``float64`` field for the timestamp (in seconds since the Unix epoch) and each measured
+    value. Samples for which an error was reported have every measured value set to NaN.
+
+    The file header is updated each time buffered data is written, so the file can be loaded
+    with ``numpy.load()`` at any time, even while logging is in progress or if it is interrupted.
+    Writing the file does not require NumPy.
     """
 
+    # Space reserved for the header, which is rewritten in place as the file grows. The header
+    # length (including the preamble) must be a multiple of 64 bytes for the array data to be
+    # aligned.
+    _HEADER_ALIGN = 64
+
+    @classmethod
+    def add_arguments(cls, parser):
+        def npy_file(arg):
+            # The header is rewritten in place, so the file must be seekable.
+            if arg == "-":
+                raise argparse.ArgumentTypeError("cannot write .npy data to standard output")
+            return arg
+        parser.add_argument(
+            "npy_file", metavar="NPY-FILE", type=npy_file,
+            help="write data to NPY-FILE")
+        super().add_arguments(parser)
+
+    def _header(self, count):
+        descr = ", ".join(f"({name!r}, '<f8')" for name in self.columns)
+        header = f"{{'descr': [{descr}], 'fortran_order': False, 'shape': ({count},), }}"
+        # Reserve space for a count of up to 20 decimal digits.
+        header_size = 10 + len(header) - len(str(count)) + 20 + 1
+        header_size = (header_size + self._HEADER_ALIGN - 1) // self._HEADER_ALIGN * \
+            self._HEADER_ALIGN
+        header = header.ljust(header_size - 10 - 1) + "\n"
+        return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin-1")
+
+    async def setup(self, args):
+        await super().setup(args)
+        self.file = open(args.npy_file, "wb")
+        self._count = 0
+        self.file.write(self._header(0))
+
+    def _write_rows(self, rows):
+        if sys.byteorder != "little":
+            rows = array.array("d", rows)
+            rows.byteswap()
+        self.file.seek(0, os.SEEK_END)
+        self.file.write(rows)
+        self._count += len(rows) // len(self.columns)
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        # Only update the header once the data it describes is on stable storage.
+        self.file.seek(0)
+        self.file.write(self._header(self._count))
+        self.file.flush()
+
+    async def close(self):
+        await super().close()
+        self.file.close()
+
+
+class ArrowDataLogger(_ColumnarDataLogger, name="arrow"):
+    help = "log data to an Apache Arrow or Parquet file"
+    description = """
+    Log data to an Apache Arrow IPC file (if the name ends with ``.arrow`` or ``.feather``),
+    Apache Arrow IPC stream (``.arrows``), or Apache Parquet file (``.parquet``). The file
+    contains a UTC ``timestamp`` column with microsecond resolution and a ``float64`` column
+    for each measured value. Samples for which an error was reported have every measured value
+    set to null.
+
+    Arrow IPC files and Parquet files are only readable after logging finishes; use an Arrow IPC
+    stream to be able to read data while logging is in progress. Requires ``pyarrow``.
+    """
+
+    @classmethod
+    def available(cls):
+        return pyarrow is not None
+
+    @classmethod
+    def add_arguments(cls, parser):
+        def arrow_file(arg):
+            if not arg.endswith((".arrow", ".feather", ".arrows", ".parquet")):
+                raise argparse.ArgumentTypeError(
+                    f"{arg!r} must end with one of: .arrow .feather .arrows .parquet")
+            return arg
+        parser.add_argument(
+            "arrow_file", metavar="ARROW-FILE", type=arrow_file,
+            help="write data to ARROW-FILE")
+        super().add_arguments(parser)
+
+    async def setup(self, args):
+        await super().setup(args)
+        self.schema = pyarrow.schema([
+            pyarrow.field("timestamp", pyarrow.timestamp("us", tz="UTC"), nullable=False),
+            *[pyarrow.field(key, pyarrow.float64()) for key in self.field_names]
+        ])
+        self.file = open(args.arrow_file, "wb")
+        if args.arrow_file.endswith(".parquet"):
+            self.writer = pyarrow.parquet.ParquetWriter(self.file, self.schema)
+        elif args.arrow_file.endswith(".arrows"):
+            self.writer = pyarrow.ipc.new_stream(self.file, self.schema)
+        else:
+            self.writer = pyarrow.ipc.new_file(self.file, self.schema)
+
+    def _write_rows(self, rows):
+        stride = len(self.columns)
+        count  = len(rows) // stride
+        def column(index):
+            return pyarrow.Array.from_buffers(pyarrow.float64(), count,
+                [None, pyarrow.py_buffer(rows[index::stride])])
+        timestamps = pyarrow.compute.multiply(column(0), 1e6) \
+            .cast(pyarrow.int64(), safe=False) \
+            .cast(pyarrow.timestamp("us", tz="UTC"))
+        columns = [timestamps]
+        for index in range(1, stride):
+            values = column(index)
+            columns.append(pyarrow.compute.if_else(pyarrow.compute.is_nan(values), None, values))
+        self.writer.write_table(pyarrow.Table.from_arrays(columns, schema=self.schema))
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    async def close(self):
+        await super().close()
+        self.writer.close()
+        self.file.close()
+
+
+class _InfluxDBWriter:
+    """Submits InfluxDB line protocol data points in the background.
+
+    Data points are queued by :meth:`submit`, which never waits for the network. A background
+    task submits them once :py:`batch_size` points are queued or :py:`flush_interval` seconds
+    have passed. If the submission fails due to a network or server error, it is retried with
+    exponential backoff while new points keep being queued. At most :py:`queue_size` points are
+    kept in memory; beyond that, points are appended to the journal file if one is configured,
+    or else the oldest points are discarded. Journaled points (including any left by a previous
+    run) are older than the queued ones, and are submitted first. On close, one more attempt is
+    made to submit the pending points, and any that remain are saved to the journal.
+    """
+
+    RETRY_DELAY_INITIAL = 1.0
+    RETRY_DELAY_MAX     = 60.0
+    # Once a submission is triggered, any backlog is submitted in requests of up to this many
+    # points, as recommended by InfluxDB documentation.
+    REQUEST_POINTS_MAX  = 5000
+
+    def __init__(self, logger, url, *, headers={}, batch_size, flush_interval, queue_size,
+                 journal_path=None):
+        self._logger         = logger
+        self._url            = url
+        self._headers        = headers
+        self._batch_size     = batch_size
+        self._flush_interval = flush_interval
+        self._queue_size     = max(queue_size, batch_size)
+
+        self._session        = aiohttp.ClientSession()
+        self._queue          = collections.deque()
+        self._in_flight      = []
+        self._dropped        = 0
+        self._wakeup         = asyncio.Event()
+
+        self._journal_path   = journal_path
+        self._journal_offset = 0
+        self._journal_lines  = 0
+        if journal_path is not None and os.path.exists(journal_path):
+            with open(journal_path, "rb") as journal:
+                self._journal_lines = sum(1 for _ in journal)
+            if self._journal_lines:
+                self._logger.info("InfluxDB: resubmitting %d points from journal %s",
+                                  self._journal_lines, journal_path)
+
+        self._task = asyncio.create_task(self._flush_task())
+        if self.pending >= self._batch_size:
+            self._wakeup.set()
+
+    @property
+    def pending(self):
+        return len(self._in_flight) + self._journal_lines + len(self._queue)
+
+    def submit(self, line):
+        self._logger.debug("InfluxDB: queue data=<%s>", line)
+        self._queue.append(line)
+        if len(self._queue) > self._queue_size:
+            self._spill()
+        if self.pending >= self._batch_size:
+            self._wakeup.set()
+
+    def _spill(self):
+        if self._journal_path is not None:
+            with open(self._journal_path, "a") as journal:
+                journal.writelines(line + "\n" for line in self._queue)
+            self._logger.warning("InfluxDB: queue full, spilled %d points to journal %s",
+                                 len(self._queue), self._journal_path)
+            self._journal_lines += len(self._queue)
+            self._queue.clear()
+        else:
+            if self._dropped == 0:
+                self._logger.warning("InfluxDB: queue full, discarding oldest points")
+            while len(self._queue) > self._queue_size:
+                self._queue.popleft()
+                self._dropped += 1
+
+    def _take_batch(self):
+        count = max(self._batch_size, self.REQUEST_POINTS_MAX)
+        # Points from the journal are older than the ones in the queue, so submit them first.
+        if self._journal_lines:
+            with open(self._journal_path, "r") as journal:
+                journal.seek(self._journal_offset)
+                while len(self._in_flight) < count:
+                    if not (line := journal.readline()):
+                        break
+                    self._in_flight.append(line.rstrip("\n"))
+                self._journal_offset = journal.tell()
+            self._journal_lines -= len(self._in_flight)
+            if self._journal_lines == 0:
+                self._journal_offset = 0
+                os.truncate(self._journal_path, 0)
+        while self._queue and len(self._in_flight) < count:
+            self._in_flight.append(self._queue.popleft())
+
+    async def _post(self, data):
+        """Returns ``True`` if the data has been accepted or rejected permanently, ``False`` if
+        the submission should be retried."""
+        try:
+            async with self._session.post(self._url, data=data, headers=self._headers) \
+                    as response:
+                if response.status in range(200, 300):
+                    return True
+                body = (await response.text()).strip()
+                if response.status in (408, 429) or response.status >= 500:
+                    self._logger.warning("InfluxDB: write status=%d body=%s, will retry",
+                                         response.status, body)
+                    return False
+                self._logger.error("InfluxDB: write status=%d body=%s, discarding %d points",
+                                   response.status, body, len(self._in_flight))
+                return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            self._logger.warning("InfluxDB: http error=%s, will retry", str(error) or repr(error))
+            return False
+
+    async def _flush_task(self):
+        retry_delay = self.RETRY_DELAY_INITIAL
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                while self.pending:
+                    if not self._in_flight:
+                        self._take_batch()
+                    if await self._post("\n".join(self._in_flight)):
+                        self._in_flight.clear()
+                        retry_delay = self.RETRY_DELAY_INITIAL
+                        if self.pending < self._batch_size:
+                            break
+                    else:
+                        await asyncio.sleep(retry_delay * random.uniform(1.0, 1.25))
+                        retry_delay = min(retry_delay * 2, self.RETRY_DELAY_MAX)
+            except Exception:
+                # Keep the task running; the points stay pending and are retried on next wakeup.
+                self._logger.exception("InfluxDB: cannot submit points")
+
+    def _rewrite_journal(self):
+        # The in-flight points are the oldest ones, followed by the points from the journal that
+        # have not been taken yet, followed by the queued points. The points before the journal
+        # offset have already been submitted and are dropped.
+        lines = list(self._in_flight)
+        if self._journal_lines:
+            with open(self._journal_path, "r") as journal:
+                journal.seek(self._journal_offset)
+                lines.extend(line.rstrip("\n") for line in journal)
+        lines.extend(self._queue)
+        temp_path = f"{self._journal_path}.tmp"
+        with open(temp_path, "w") as journal:
+            journal.writelines(line + "\n" for line in lines)
+        os.replace(temp_path, self._journal_path)
+        self._in_flight.clear()
+        self._queue.clear()
+        self._journal_offset = 0
+        self._journal_lines  = len(lines)
+        self._logger.warning("InfluxDB: saved %d points to journal %s",
+                             len(lines), self._journal_path)
+
+    async def close(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        while self.pending:
+            if not self._in_flight:
+                self._take_batch()
+            if not await self._post("\n".join(self._in_flight)):
+                break
+            self._in_flight.clear()
+        if self.pending:
+            if self._journal_path is not None:
+                self._rewrite_journal()
+            else:
+                self._logger.error("InfluxDB: discarding %d points on exit", self.pending)
+        await self._session.close()
+
+
+class _InfluxDBDataLoggerBase(DataLogger):
     @staticmethod
     def _escape_name(charset, value):
         return re.sub(fr"([{charset}])", r"\\\1", value)
@@ -160,18 +543,6 @@ class InfluxDBDataLogger(DataLogger, name="influxdb"):
 
     @classmethod
     def add_arguments(cls, parser):
-        parser.add_argument(
-            "endpoint", metavar="ENDPOINT", type=str,
-            help="write to endpoint URL //ENDPOINT/write")
-        parser.add_argument(
-            "database", metavar="DATABASE", type=str,
-            help="write to database DATABASE")
-        parser.add_argument(
-            "-r", "--retention-policy", metavar="POLICY",
-            help="write to retention policy POLICY")
-        parser.add_argument(
-            "measurement", metavar="SERIES", type=str,
-            help="write to measurement SERIES")
         def tag(arg):
             if "=" not in arg:
                 raise argparse.ArgumentTypeError(f"{arg} is not a valid tag")
@@ -188,25 +559,27 @@ class InfluxDBDataLogger(DataLogger, name="influxdb"):
         parser.add_argument(
             "--batch-size", metavar="BATCH-SIZE", type=int, default=1,
             help="submit data in groups of BATCH-SIZE points")
+        parser.add_argument(
+            "--flush-interval", metavar="SECONDS", type=float, default=10.0,
+            help="submit queued data at least every SECONDS (default: %(default)s)")
+        parser.add_argument(
+            "--queue-size", metavar="POINTS", type=int, default=100000,
+            help="keep at most POINTS unsubmitted data points in memory (default: %(default)s)")
+        parser.add_argument(
+            "--journal", metavar="JOURNAL-FILE", type=str, default=None,
+            help="save data points that do not fit in memory to JOURNAL-FILE instead of "
+                 "discarding them, and submit any saved data points on startup")
 
-    async def setup(self, args):
-        url = yarl.URL(args.endpoint)
-        url = url.with_path("/write")
-        url = url.with_query(db=args.database)
-        if args.retention_policy:
-            url = url.update_query(rp=args.retention_policy)
-        if args.precision:
-            url = url.update_query(precision=args.precision)
-        self.url = url
+    def _setup_writer(self, args, url, *, headers={}):
         self.series = ",".join([
             self._escape_name(", ", args.measurement),
             *[self._escape_name(",= ", key) + "=" + self._escape_name(",= ", value)
               for key, value in args.tags]
         ])
         self.precision = args.precision
-        self.session = aiohttp.ClientSession()
-        self._queue = []
-        self._batch_size = args.batch_size
+        self._writer = _InfluxDBWriter(self.logger, url, headers=headers,
+            batch_size=args.batch_size, flush_interval=args.flush_interval,
+            queue_size=args.queue_size, journal_path=args.journal)
 
     async def _report(self, fields, timestamp=None):
         data_parts = [self.series]
@@ -223,21 +596,7 @@ class InfluxDBDataLogger(DataLogger, name="influxdb"):
             # submission regardless of whether batching is enabled.
             timestamp = time.time()
         data_parts.append(str(self._timestamp(self.precision, timestamp)))
-        data = " ".join(data_parts)
-
-        self.logger.debug("InfluxDB: queue data=<%s>", data)
-        self._queue.append(data)
-
-        if len(self._queue) >= self._batch_size:
-            try:
-                async with self.session.post(self.url, data="\n".join(self._queue)) as response:
-                    if response.status not in range(200, 300):
-                        self.logger.error("InfluxDB: write status=%d body=%s",
-                                          response.status, (await response.text()).strip())
-                    self._queue.clear()
-            except aiohttp.ClientError as error:
-                self.logger.error("InfluxDB: http error=%s", str(error), exc_info=error)
-                # don't clear queue on network error
+        self._writer.submit(" ".join(data_parts))
 
     async def report_data(self, fields, timestamp=None):
         assert set(fields) == set(self.field_names)
@@ -247,8 +606,45 @@ class InfluxDBDataLogger(DataLogger, name="influxdb"):
         await super().report_error(message, *args, **kwargs, exception=exception)
         await self._report({"error": True})
 
+    async def close(self):
+        await self._writer.close()
+
+
+class InfluxDBDataLogger(_InfluxDBDataLoggerBase, name="influxdb"):
+    help = "log data to an InfluxDB 1.x endpoint"
+    description = """
+    Log data to an InfluxDB 1.x endpoint over HTTP(S).
+    """
 
-class InfluxDB2DataLogger(DataLogger, name="influxdb2"):
+    @classmethod
+    def add_arguments(cls, parser):
+        parser.add_argument(
+            "endpoint", metavar="ENDPOINT", type=str,
+            help="write to endpoint URL //ENDPOINT/write")
+        parser.add_argument(
+            "database", metavar="DATABASE", type=str,
+            help="write to database DATABASE")
+        parser.add_argument(
+            "-r", "--retention-policy", metavar="POLICY",
+            help="write to retention policy POLICY")
+        parser.add_argument(
+            "measurement", metavar="SERIES", type=str,
+            help="write to measurement SERIES")
+        super().add_arguments(parser)
+
+    async def setup(self, args):
+        url = yarl.URL(args.endpoint)
+        url = url.with_path("/write")
+        url = url.with_query(db=args.database)
+        if args.retention_policy:
+            url = url.update_query(rp=args.retention_policy)
+        if args.precision:
+            url = url.update_query(precision=args.precision)
+        self.url = url
+        self._setup_writer(args, url)
+
+
+class InfluxDB2DataLogger(_InfluxDBDataLoggerBase, name="influxdb2"):
     help = "log data to an InfluxDB 2.x endpoint"
     description = """
     Log data to an InfluxDB 2.x endpoint over HTTP(S).
@@ -257,10 +653,6 @@ class InfluxDB2DataLogger(DataLogger, name="influxdb2"):
     # see https://docs.influxdata.com/influxdb/v2.0/query-data/execute-queries/influx-api/
     # see https://docs.influxdata.com/influxdb/cloud/api/#tag/Write
 
-    @classmethod
-    def available(cls):
-        return aiohttp is not None
-
     @classmethod
     def add_arguments(cls, parser):
         parser.add_argument(
@@ -275,22 +667,7 @@ class InfluxDB2DataLogger(DataLogger, name="influxdb2"):
         parser.add_argument(
             "measurement", metavar="SERIES", type=str,
             help="write to measurement SERIES")
-        def tag(arg):
-            if "=" not in arg:
-                raise argparse.ArgumentTypeError(f"{arg} is not a valid tag")
-            key, value = arg.split("=", 1)
-            return key, value
-        parser.add_argument(
-            "-t", "--tag", metavar="TAG=VALUE", dest="tags", type=tag,
-            action="append", default=[],
-            help="attach TAG=VALUE to all data points")
-        parser.add_argument(
-            "-p", "--precision", metavar="PRECISION",
-            choices=["ns", "us", "ms", "s", "m", "h"], required=True,
-            help="set timestamp precision to PRECISION")
-        parser.add_argument(
-            "--batch-size", metavar="BATCH-SIZE", type=int, default=1,
-            help="submit data in groups of BATCH-SIZE points")
+        super().add_arguments(parser)
         parser.add_argument(
             "--token", metavar="TOKEN", type=str, required=True,
             help="set the Token to use for Authentication")
@@ -303,52 +680,4 @@ class InfluxDB2DataLogger(DataLogger, name="influxdb2"):
             url = url.update_query(precision=args.precision)
         self.url = url
         self.token = args.token
-        self.series = ",".join([
-            InfluxDBDataLogger._escape_name(", ", args.measurement),
-            *[InfluxDBDataLogger._escape_name(",= ", key) + "=" + InfluxDBDataLogger._escape_name(",= ", value)
-              for key, value in args.tags]
-        ])
-        self.precision = args.precision
-        self.session = aiohttp.ClientSession()
-        self._queue = []
-        self._batch_size = args.batch_size
-
-    async def _report(self, fields, timestamp=None):
-        data_parts = [self.series]
-        data_parts.append(",".join(InfluxDBDataLogger._escape_name(",= ", key) + "=" +
-                                   InfluxDBDataLogger._escape_value(fields[key])
-                                   for key in fields))
-        if timestamp is None:
-            # If the timestamp is not specified, InfluxDB will timestamp the data point with
-            # the request timestamp. This works just fine with one data point per request, but
-            # if batching is enabled, then, since the series is always same, only one point per
-            # batch will ever be recorded. To avoid that, batched requests must be timestamped
-            # during submission. To achieve consistent behavior in case the local clock and
-            # the InfluxDB server clock are different, all requests are timestamped during
-            # submission regardless of whether batching is enabled.
-            timestamp = time.time()
-        data_parts.append(str(InfluxDBDataLogger._timestamp(self.precision, timestamp)))
-        data = " ".join(data_parts)
-
-        self.logger.debug("InfluxDB: queue data=<%s>", data)
-        self._queue.append(data)
-
-        if len(self._queue) >= self._batch_size:
-            try:
-                authHeader = 'Token ' + self.token
-                async with self.session.post(self.url, data="\n".join(self._queue), headers= {'Authorization': authHeader}) as response:
-                    if response.status not in range(200, 300):
-                        self.logger.error("InfluxDB: write status=%d body=%s",
-                                          response.status, (await response.text()).strip())
-                    self._queue.clear()
-            except aiohttp.ClientError as error:
-                self.logger.error("InfluxDB: http error=%s", str(error), exc_info=error)
-                # don't clear queue on network error
-
-    async def report_data(self, fields, timestamp=None):
-        assert set(fields) == set(self.field_names)
-        await self._report({"error": False, **fields}, timestamp)
-
-    async def report_error(self, message, *args, exception=None, **kwargs):
-        await super().report_error(message, *args, **kwargs, exception=exception)
-        await self._report({"error": True})
+        self._setup_writer(args, url, headers={"Authorization": "Token " + self.token})
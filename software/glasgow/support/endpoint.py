@@ -111,7 +111,8 @@ class ServerEndpoint(aobject, asyncio.Protocol):
         self._check_future()
 
     def data_received(self, data):
-        self._log(logging.TRACE, "endpoint received %d bytes", len(data))
+        if self._logger.isEnabledFor(logging.TRACE):
+            self._log(logging.TRACE, "endpoint received %d bytes", len(data))
         self._queue.append(data)
         self._queued += len(data)
         self._check_pushback()
@@ -154,11 +155,22 @@ class ServerEndpoint(aobject, asyncio.Protocol):
             else:
                 raise EOFError
 
+    @property
+    def readable(self):
+        """Number of bytes that can be received from the current connection without waiting."""
+        readable = len(self._buffer) if self._buffer else 0
+        for item in self._queue:
+            if not isinstance(item, (bytes, bytearray)):
+                break
+            readable += len(item)
+        return readable
+
     async def recv(self, length=0):
         data = bytearray()
         while length == 0 or len(data) < length:
             if not self._buffer:
-                self._log(logging.TRACE, "recv waits for %d bytes", length - len(data))
+                if self._logger.isEnabledFor(logging.TRACE):
+                    self._log(logging.TRACE, "recv waits for %d bytes", length - len(data))
                 await self._refill()
 
             if length == 0:
@@ -170,7 +182,8 @@ class ServerEndpoint(aobject, asyncio.Protocol):
             self._check_pushback()
             data += chunk
 
-        self._log(logging.TRACE, "recv <%s>", dump_hex(data))
+        if self._logger.isEnabledFor(logging.TRACE):
+            self._log(logging.TRACE, "recv <%s>", dump_hex(data))
         return data
 
     async def recv_until(self, separator):
@@ -178,7 +191,8 @@ class ServerEndpoint(aobject, asyncio.Protocol):
         data = bytearray()
         while True:
             if not self._buffer:
-                self._log(logging.TRACE, "recv waits for <%s>", separator.hex())
+                if self._logger.isEnabledFor(logging.TRACE):
+                    self._log(logging.TRACE, "recv waits for <%s>", separator.hex())
                 await self._refill()
 
             try:
@@ -196,7 +210,8 @@ class ServerEndpoint(aobject, asyncio.Protocol):
                 self._check_pushback()
                 self._buffer = None
 
-        self._log(logging.TRACE, "recv <%s%s>", dump_hex(data), separator.hex())
+        if self._logger.isEnabledFor(logging.TRACE):
+            self._log(logging.TRACE, "recv <%s%s>", dump_hex(data), separator.hex())
         return data
 
     async def recv_wait(self):
@@ -207,7 +222,8 @@ class ServerEndpoint(aobject, asyncio.Protocol):
     async def send(self, data):
         data = bytes(data)
         if self._transport is not None and self._send_epoch == self._recv_epoch:
-            self._log(logging.TRACE, "send <%s>", dump_hex(data))
+            if self._logger.isEnabledFor(logging.TRACE):
+                self._log(logging.TRACE, "send <%s>", dump_hex(data))
             self._transport.write(data)
             return True
         else:
@@ -1,37 +1,61 @@
 import operator
 
 from .lazy import *
-from .bits import bits
 
 
 __all__ = ["dump_hex", "dump_bin", "dump_seq", "dump_mapseq"]
 
 
-def dump_hex(data):
-    def to_hex(data):
+class _HexDump:
+    # Constructed for every logged buffer, including the ones that are never rendered, so this is
+    # deliberately much lighter than a `lazy` object.
+    __slots__ = ("_data",)
+
+    def __init__(self, data):
+        self._data = data
+
+    def __str__(self):
         try:
-            data = memoryview(data)
+            data = memoryview(self._data)
         except TypeError:
-            data = memoryview(bytes(data))
+            data = memoryview(bytes(self._data))
         if dump_hex.limit is None or len(data) <= dump_hex.limit:
             return data.hex()
         else:
             return "{}... ({} bytes total)".format(
                 data[:dump_hex.limit].hex(), len(data))
-    return lazy(lambda: to_hex(data))
+
+    __repr__ = __str__
+
+
+def dump_hex(data):
+    return _HexDump(data)
 
 dump_hex.limit = 64
 
 
-def dump_bin(data):
-    def to_bin(data):
-        data = bits(data)
+class _BinDump:
+    __slots__ = ("_data",)
+
+    def __init__(self, data):
+        self._data = data
+
+    def __str__(self):
+        # Imported here because `bits` depends on Amaranth, which is slow to import and is not
+        # otherwise needed by e.g. `glasgow list`.
+        from .bits import bits
+        data = bits(self._data)
         if dump_bin.limit is None or len(data) <= dump_bin.limit:
             return str(data)[::-1]
         else:
             return "{}... ({} bits total)".format(
                 str(data[:dump_bin.limit])[::-1], len(data))
-    return lazy(lambda: to_bin(data))
+
+    __repr__ = __str__
+
+
+def dump_bin(data):
+    return _BinDump(data)
 
 dump_bin.limit = 64
 
@@ -1,23 +1,37 @@
-from typing import Any, Optional, TextIO
+from typing import Any, Optional, TextIO, BinaryIO
 from contextlib import AbstractAsyncContextManager, asynccontextmanager
+import io
+import os
 import sys
+import mmap
+import enum
 import json
+import zlib
+import struct
 import inspect
+import argparse
 import unittest
 
 
-__all__ = ["MockRecorder", "MockReplayer"]
+__all__ = [
+    "JSONFixtureWriter", "JSONFixtureReader", "BinaryFixtureWriter", "BinaryFixtureReader",
+    "open_fixture", "convert_fixture",
+    "MockRecorder", "MockReplayer",
+]
 
 
-class MockRecorder:
-    def __init__(self, case: unittest.TestCase, fixture: TextIO, name: str, mocked: Any):
-        self.__case    = case
-        self.__fixture = fixture
-        self.__name    = name
-        self.__mocked  = mocked
+class JSONFixtureWriter:
+    """Writes each stanza as a JSON line, with binary data hex-encoded.
+
+    This format is human-readable and produces meaningful diffs, but is slow to replay
+    when the fixture contains a lot of data.
+    """
+
+    def __init__(self, file: TextIO):
+        self._file = file
 
     @staticmethod
-    def __dump_object(obj):
+    def _dump_object(obj):
         if isinstance(obj, bytes):
             return {"__class__": "bytes", "hex": obj.hex()}
         if isinstance(obj, bytearray):
@@ -26,15 +40,274 @@ class MockRecorder:
             return {"__class__": "memoryview", "hex": obj.hex()}
         raise TypeError("%s is not serializable" % type(obj))
 
+    def write(self, stanza: dict):
+        json.dump(fp=self._file, default=self._dump_object, obj=stanza)
+        self._file.write("\n")
+
+    def close(self):
+        self._file.close()
+
+
+class JSONFixtureReader:
+    def __init__(self, file: TextIO):
+        self._file    = file
+        # `json.loads` with an object hook constructs a new decoder on every call, which
+        # dominates the time spent loading small stanzas.
+        self._decoder = json.JSONDecoder(object_hook=self._load_object)
+
+    @staticmethod
+    def _load_object(obj):
+        if "__class__" not in obj:
+            return obj
+        if obj["__class__"] == "bytes":
+            return bytes.fromhex(obj["hex"])
+        if obj["__class__"] == "bytearray":
+            return bytearray.fromhex(obj["hex"])
+        if obj["__class__"] == "memoryview":
+            return memoryview(bytes.fromhex(obj["hex"]))
+        assert False
+
+    def read(self) -> dict:
+        if not (line := self._file.readline()):
+            raise EOFError("end of fixture")
+        return self._decoder.decode(line)
+
+    def close(self):
+        self._file.close()
+
+
+# The binary fixture format consists of a header followed by a (possibly compressed) body:
+#
+#   header: b"GLMOCK" version:u8 compression:u8
+#   body:   record*
+#   record: json_length:u32le blob_count:u32le blob_length:u32le*blob_count json blob*
+#
+# The JSON part of each record encodes the structure of the stanza, with each binary object
+# replaced by `{"__class__": <type>, "blob": <index>}`. The blobs follow the JSON part without
+# any encoding. Since all lengths are known upfront, an uncompressed fixture can be memory-mapped
+# and parsed without copying anything but the payloads that are returned to the caller.
+_BINARY_MAGIC   = b"GLMOCK"
+_BINARY_VERSION = 1
+_BINARY_HEADER  = struct.Struct("<6sBB")
+_RECORD_HEADER  = struct.Struct("<II")
+
+
+class _Compression(enum.IntEnum):
+    NONE = 0
+    ZLIB = 1
+    ZSTD = 2
+
+
+_COMPRESSION_NAMES = {
+    None:   _Compression.NONE,
+    "zlib": _Compression.ZLIB,
+    "zstd": _Compression.ZSTD,
+}
+
+_BINARY_CLASSES = {
+    bytes:      "bytes",
+    bytearray:  "bytearray",
+    memoryview: "memoryview",
+}
+
+
+def _import_zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd compression requires the 'zstandard' package") from None
+    return zstandard
+
+
+class BinaryFixtureWriter:
+    """Writes each stanza as a length-prefixed record, with binary data stored as raw blobs.
+
+    If :py:`compression` is ``"zlib"`` or ``"zstd"``, the body of the fixture is compressed as
+    a single stream.
+    """
+
+    def __init__(self, file: BinaryIO, *, compression: Optional[str] = None):
+        if compression not in _COMPRESSION_NAMES:
+            raise ValueError(f"unknown fixture compression {compression!r}")
+        self._file = file
+        match compression:
+            case None:
+                self._compressor = None
+            case "zlib":
+                self._compressor = zlib.compressobj()
+            case "zstd":
+                self._compressor = _import_zstd().ZstdCompressor().compressobj()
+        self._file.write(_BINARY_HEADER.pack(
+            _BINARY_MAGIC, _BINARY_VERSION, _COMPRESSION_NAMES[compression]))
+
+    def write(self, stanza: dict):
+        blobs = []
+        def dump_object(obj):
+            if type(obj) in _BINARY_CLASSES:
+                blobs.append(obj)
+                return {"__class__": _BINARY_CLASSES[type(obj)], "blob": len(blobs) - 1}
+            raise TypeError("%s is not serializable" % type(obj))
+        header = json.dumps(stanza, default=dump_object, separators=(",", ":")).encode()
+        chunks = [
+            _RECORD_HEADER.pack(len(header), len(blobs)),
+            struct.pack(f"<{len(blobs)}I", *(len(blob) for blob in blobs)),
+            header,
+            *blobs
+        ]
+        for chunk in chunks:
+            if self._compressor is not None:
+                chunk = self._compressor.compress(chunk)
+            self._file.write(chunk)
+
+    def close(self):
+        if self._compressor is not None:
+            self._file.write(self._compressor.flush())
+        self._file.close()
+
+
+class BinaryFixtureReader:
+    def __init__(self, file: BinaryIO):
+        self._file    = file
+        self._mmap    = None
+        # Most stanzas contain no binary data; these are decoded without the (slow) object hook.
+        self._plain_decoder = json.JSONDecoder()
+        self._blob_decoder  = json.JSONDecoder(object_hook=self._load_object)
+        self._blobs   = ()
+        magic, version, compression = _BINARY_HEADER.unpack(file.read(_BINARY_HEADER.size))
+        if magic != _BINARY_MAGIC:
+            raise ValueError("not a binary fixture")
+        if version != _BINARY_VERSION:
+            raise ValueError(f"unsupported binary fixture version {version}")
+        match compression:
+            case _Compression.NONE:
+                try:
+                    self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                    self._data = memoryview(self._mmap)
+                except (AttributeError, OSError, io.UnsupportedOperation, ValueError):
+                    # Not backed by a file, or the file is empty.
+                    self._data = memoryview(_BINARY_HEADER.pack(
+                        magic, version, compression) + file.read())
+                self._offset = _BINARY_HEADER.size
+            case _Compression.ZLIB:
+                self._data = memoryview(zlib.decompress(file.read()))
+                self._offset = 0
+            case _Compression.ZSTD:
+                self._data = memoryview(
+                    _import_zstd().ZstdDecompressor().decompressobj().decompress(file.read()))
+                self._offset = 0
+            case _:
+                raise ValueError(f"unsupported binary fixture compression {compression}")
+
+    def _load_object(self, obj):
+        if "__class__" not in obj:
+            return obj
+        blob = self._blobs[obj["blob"]]
+        if obj["__class__"] == "bytes":
+            return bytes(blob)
+        if obj["__class__"] == "bytearray":
+            return bytearray(blob)
+        if obj["__class__"] == "memoryview":
+            return memoryview(bytes(blob))
+        assert False
+
+    def read(self) -> dict:
+        data, offset = self._data, self._offset
+        if offset >= len(data):
+            raise EOFError("end of fixture")
+        header_length, blob_count = _RECORD_HEADER.unpack_from(data, offset)
+        offset += _RECORD_HEADER.size
+        if blob_count == 0:
+            header = str(data[offset:offset + header_length], "utf-8")
+            self._offset = offset + header_length
+            return self._plain_decoder.decode(header)
+        blob_lengths = struct.unpack_from(f"<{blob_count}I", data, offset)
+        offset += 4 * blob_count
+        header = str(data[offset:offset + header_length], "utf-8")
+        offset += header_length
+        blobs = []
+        for blob_length in blob_lengths:
+            blobs.append(data[offset:offset + blob_length])
+            offset += blob_length
+        self._offset = offset
+        self._blobs = blobs
+        try:
+            return self._blob_decoder.decode(header)
+        finally:
+            self._blobs = ()
+
+    def close(self):
+        self._data.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+
+def open_fixture(path: str, mode: str = "r", *, compression: Optional[str] = None):
+    """Open a fixture at :py:`path` for reading (:py:`mode` is ``"r"``) or writing (``"w"``).
+
+    The format is determined by the file extension: ``.json`` fixtures use
+    :class:`JSONFixtureWriter`/:class:`JSONFixtureReader`, and all other fixtures use
+    :class:`BinaryFixtureWriter`/:class:`BinaryFixtureReader`.
+    """
+    is_json = path.endswith(".json") or path.endswith(".json.new")
+    match mode:
+        case "r" if is_json:
+            return JSONFixtureReader(open(path, "r"))
+        case "r":
+            file = open(path, "rb")
+            try:
+                return BinaryFixtureReader(file)
+            except:
+                file.close()
+                raise
+        case "w" if is_json:
+            return JSONFixtureWriter(open(path, "w"))
+        case "w":
+            return BinaryFixtureWriter(open(path, "wb"), compression=compression)
+        case _:
+            raise ValueError(f"invalid fixture mode {mode!r}")
+
+
+def convert_fixture(src_path: str, dst_path: str, *, compression: Optional[str] = None):
+    """Convert the fixture at :py:`src_path` to the format implied by :py:`dst_path`.
+
+    Stanzas in the old schema are upgraded while converting.
+    """
+    reader = open_fixture(src_path, "r")
+    try:
+        writer = open_fixture(dst_path, "w", compression=compression)
+        try:
+            while True:
+                try:
+                    stanza = reader.read()
+                except EOFError:
+                    break
+                writer.write(MockReplayer._upgrade(stanza))
+        finally:
+            writer.close()
+    finally:
+        reader.close()
+
+
+class MockRecorder:
+    def __init__(self, case: unittest.TestCase,
+                 fixture: TextIO | JSONFixtureWriter | BinaryFixtureWriter,
+                 name: str, mocked: Any):
+        if isinstance(fixture, io.TextIOBase):
+            fixture = JSONFixtureWriter(fixture)
+        self.__case    = case
+        self.__fixture = fixture
+        self.__name    = name
+        self.__mocked  = mocked
+
     def __dump_stanza(self, stanza):
         # TODO: remove once applets are migrated to V2 API
         if hasattr(self.__case, "_recording") and not self.__case._recording:
             return
-        json.dump(fp=self.__fixture, default=self.__dump_object, obj={
+        self.__fixture.write({
             "self": self.__name,
             **stanza
         })
-        self.__fixture.write("\n")
 
     def __dump_method(self, call, kind, args, kwargs, result):
         self.__dump_stanza({
@@ -54,7 +327,7 @@ class MockRecorder:
                     @asynccontextmanager
                     async def cmgr_wrapper():
                         value = await result.__aenter__()
-                        self.__dump_method(attr, "asynccontext.enter", (), {}, value)
+                        self.__dump_method(attr, "asynccontext.enter", args, kwargs, value)
                         try:
                             yield value
                         finally:
@@ -77,28 +350,19 @@ class MockRecorder:
 
 
 class MockReplayer:
-    def __init__(self, case: unittest.TestCase, fixture: TextIO, name: str):
+    def __init__(self, case: unittest.TestCase,
+                 fixture: TextIO | JSONFixtureReader | BinaryFixtureReader, name: str):
+        if isinstance(fixture, io.TextIOBase):
+            fixture = JSONFixtureReader(fixture)
         self.__case    = case
         self.__fixture = fixture
         self.__name    = name
 
-    @staticmethod
-    def __load_object(obj):
-        if "__class__" not in obj:
-            return obj
-        if obj["__class__"] == "bytes":
-            return bytes.fromhex(obj["hex"])
-        if obj["__class__"] == "bytearray":
-            return bytearray.fromhex(obj["hex"])
-        if obj["__class__"] == "memoryview":
-            return memoryview(bytes.fromhex(obj["hex"]))
-        assert False
-
     def __load(self):
-        return json.loads(self.__fixture.readline(), object_hook=self.__load_object)
+        return self.__fixture.read()
 
     @staticmethod
-    def __upgrade(stanza):
+    def _upgrade(stanza):
         """Upgrade an object to the latest schema."""
         if "method" in stanza:
             stanza["call"] = stanza.pop("method")
@@ -109,15 +373,15 @@ class MockReplayer:
         return stanza
 
     def __getattr__(self, attr):
-        stanza = self.__upgrade(self.__load())
+        stanza = self._upgrade(self.__load())
         if "self" in stanza: # old fixtures lack a sense of self
             self.__case.assertEqual(self.__name, stanza["self"])
         self.__case.assertEqual(attr, stanza["call"])
         if stanza["kind"] == "asynccontext.enter":
             @asynccontextmanager
-            async def mock():
-                assert () == tuple(stanza["args"])
-                assert {} == stanza["kwargs"]
+            async def mock(*args, **kwargs):
+                self.__case.assertEqual(args, tuple(stanza["args"]))
+                self.__case.assertEqual(kwargs, stanza["kwargs"])
                 try:
                     yield stanza["result"]
                 finally:
@@ -141,3 +405,21 @@ class MockReplayer:
         else:
             assert False, f"unknown stanza {stanza['kind']}"
         return mock
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert mock fixtures between the JSON and the binary format.")
+    parser.add_argument(
+        "-c", "--compression", choices=("zlib", "zstd"), default=None,
+        help="compress the binary fixture (not memory-mappable)")
+    parser.add_argument(
+        "input", metavar="INPUT", nargs="+",
+        help="fixture to convert; '*.json' is converted to '*.mock' and vice versa")
+    args = parser.parse_args()
+    for src_path in args.input:
+        base_path, extension = os.path.splitext(src_path)
+        dst_path = base_path + (".mock" if extension == ".json" else ".json")
+        convert_fixture(src_path, dst_path, compression=args.compression)
+        print(f"{src_path} ({os.path.getsize(src_path)} bytes) -> "
+              f"{dst_path} ({os.path.getsize(dst_path)} bytes)")
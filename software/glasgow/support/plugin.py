@@ -1,8 +1,11 @@
 import re
 import os
 import sys
+import json
+import hashlib
 import traceback
 import importlib.metadata
+import importlib.machinery
 import packaging.requirements
 import pathlib
 import sysconfig
@@ -54,6 +57,108 @@ def _install_command_for_requirements(requirements):
         return f"pip install --user {requirement_args}"
 
 
+def _cache_path():
+    # `platformdirs` is imported here rather than at the top of the module because this function
+    # is not called when the cache is disabled.
+    import platformdirs
+    return platformdirs.user_cache_path("GlasgowEmbedded", appauthor=False) / "plugins.json"
+
+
+def _module_path(module_name):
+    # Locates the module without importing it or its parent packages, which can be slow.
+    search_path = None
+    parts = module_name.split(".")
+    for index in range(len(parts)):
+        spec = importlib.machinery.PathFinder.find_spec(".".join(parts[:index + 1]), search_path)
+        if spec is None:
+            return None
+        search_path = spec.submodule_search_locations
+        if search_path is None and index + 1 < len(parts):
+            return None
+    return spec.origin
+
+
+class _PluginCache:
+    """On-disk cache of plugin metadata.
+
+    Loading every plugin to retrieve its help text takes a significant fraction of a second, which
+    is paid on every invocation of the command line interface (including tab completion). Instead,
+    the metadata is retrieved once and stored together with a key identifying the set of entry
+    points and the installed packages; if anything changes, the cache is discarded.
+
+    The cache is disabled if the ``GLASGOW_PLUGIN_CACHE`` environment variable is set to ``0``.
+    """
+
+    def __init__(self):
+        self._path = None
+        self._data = None
+
+    @property
+    def enabled(self):
+        return os.getenv("GLASGOW_PLUGIN_CACHE", "1") != "0"
+
+    @staticmethod
+    def key(entry_points):
+        digest = hashlib.blake2s()
+        dist_versions = {}
+        for entry_point in sorted(entry_points, key=lambda entry_point: entry_point.name):
+            dist = entry_point.dist
+            if dist.name not in dist_versions:
+                dist_versions[dist.name] = dist.version
+            digest.update(f"{entry_point.name}={entry_point.value} "
+                          f"{dist.name}=={dist_versions[dist.name]}\n".encode())
+            # Editing a plugin in an editable install changes neither the version of its package
+            # nor the modification time of any directory on `sys.path`.
+            try:
+                if (module_path := _module_path(entry_point.module)) is not None:
+                    digest.update(f"{module_path} {os.stat(module_path).st_mtime_ns}\n".encode())
+            except (OSError, ValueError):
+                pass
+        # Installing or removing a package changes the modification time of the directory it is
+        # installed into, which invalidates cached results of requirement checks.
+        for path in sys.path:
+            try:
+                digest.update(f"{path} {os.stat(path or '.').st_mtime_ns}\n".encode())
+            except OSError:
+                pass
+        return digest.hexdigest()
+
+    def _load(self):
+        if self._data is None:
+            self._path = _cache_path()
+            try:
+                with open(self._path) as file:
+                    self._data = json.load(file)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def get(self, group, key):
+        if not self.enabled:
+            return {}
+        section = self._load().get(group)
+        if section is None or section.get("key") != key:
+            return {}
+        return section["plugins"]
+
+    def put(self, group, key, plugins):
+        if not self.enabled:
+            return
+        data = self._load()
+        data[group] = {"key": key, "plugins": plugins}
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self._path.with_suffix(f".{os.getpid()}.tmp")
+            with open(temp_path, "w") as file:
+                json.dump(data, file)
+            os.replace(temp_path, self._path)
+        except OSError as exn:
+            logger.debug("cannot write plugin metadata cache %s: %s", self._path, exn)
+
+
+_plugin_cache = _PluginCache()
+
+
 class PluginRequirementsUnmet(Exception):
     def __init__(self, metadata):
         self.metadata = metadata
@@ -94,38 +199,74 @@ class PluginMetadata:
             return True
         return False
 
+    @classmethod
+    def _cached(cls, entry_points):
+        key = _plugin_cache.key(importlib.metadata.entry_points(group=cls.GROUP_NAME))
+        cached = _plugin_cache.get(cls.GROUP_NAME, key)
+        plugins = {ep.name: cls(ep, cached=cached.get(ep.name)) for ep in entry_points}
+        updated = {handle: plugin._cache_entry for handle, plugin in plugins.items()
+                   if plugin._cache_entry is not None}
+        if any(cached.get(handle) != entry for handle, entry in updated.items()):
+            _plugin_cache.put(cls.GROUP_NAME, key, {**cached, **updated})
+        return plugins
+
     @classmethod
     def get(cls, handle):
         entry_point, *_ = importlib.metadata.entry_points(group=cls.GROUP_NAME, name=handle)
-        return cls(entry_point)
+        return cls._cached([entry_point])[handle]
 
     @classmethod
     def all(cls):
-        return {
-            ep.name: cls(ep)
-            for ep in importlib.metadata.entry_points(group=cls.GROUP_NAME)
+        return cls._cached([
+            ep for ep in importlib.metadata.entry_points(group=cls.GROUP_NAME)
             if cls._loadable(ep)
+        ])
+
+    @classmethod
+    def _describe(cls, plugin_cls):
+        """Extract the metadata displayed to the user from :py:`plugin_cls`.
+
+        The result must be serializable to JSON; its items become attributes of the metadata object.
+        Subclasses may override this method to extract additional metadata.
+        """
+        return {
+            "synopsis":    plugin_cls.help,
+            "description": plugin_cls.description,
         }
 
-    def __init__(self, entry_point):
+    def __init__(self, entry_point, *, cached=None):
         assert self._loadable(entry_point)
 
         # Python-side metadata (how to load it, etc.)
         self.module = entry_point.module
         self.cls_name = entry_point.attr
         self.dist_name = entry_point.dist.name
-        self.requirements = _requirements_for_optional_dependencies(
-            entry_point.dist, entry_point.extras)
+        self._entry_point = entry_point
+        self._cls = None
+        self._cache_entry = None
+        if cached is not None:
+            self.unmet_requirements = set(map(packaging.requirements.Requirement, cached["unmet"]))
+        else:
+            self.unmet_requirements = _unmet_requirements_in(
+                _requirements_for_optional_dependencies(entry_point.dist, entry_point.extras))
 
         # Person-side metadata (how to display it, etc.)
         self.handle = entry_point.name
         if not self.unmet_requirements:
             try:
-                self._cls = entry_point.load()
-                self.synopsis = self._cls.help
-                self.description = self._cls.description
+                if cached is not None:
+                    metadata = cached["metadata"]
+                else:
+                    # The plugin is only loaded here if its metadata isn't cached; otherwise, it is
+                    # loaded once it is used.
+                    self._cls = entry_point.load()
+                    metadata = self._describe(self._cls)
+                    self._cache_entry = {"unmet": [], "metadata": metadata}
+                for name, value in metadata.items():
+                    setattr(self, name, value)
+                self._loaded = True
             except Exception as exn:
-                self._cls = None
+                self._loaded = False
                 # traceback.format_exception_only can return multiple lines
                 self.synopsis = (
                     f"/!\\ unavailable due to a load error: "
@@ -136,7 +277,8 @@ class PluginMetadata:
                     f"an exception. The exception is:\n\n    " +
                     "".join(traceback.format_exception(exn)).replace("\n", "\n    "))
         else:
-            self._cls = None
+            self._loaded = False
+            self._cache_entry = {"unmet": sorted(map(str, self.unmet_requirements))}
             self.synopsis = (
                 f"/!\\ unavailable due to unmet requirements: "
                 f"{', '.join(str(r) for r in self.unmet_requirements)}")
@@ -147,8 +289,9 @@ class PluginMetadata:
                 f"\n")
 
     @property
-    def unmet_requirements(self):
-        return _unmet_requirements_in(self.requirements)
+    def requirements(self):
+        return _requirements_for_optional_dependencies(
+            self._entry_point.dist, self._entry_point.extras)
 
     @property
     def available(self):
@@ -156,13 +299,20 @@ class PluginMetadata:
 
     @property
     def loadable(self):
-        return self._cls is not None
+        return self._loaded
 
     def load(self):
         if self.unmet_requirements:
             raise PluginRequirementsUnmet(self)
-        if self._cls is None:
+        if not self._loaded:
             raise PluginLoadError(self)
+        if self._cls is None:
+            # If the metadata was cached, the plugin has not been loaded yet, and may fail to load.
+            try:
+                self._cls = self._entry_point.load()
+            except Exception as exn:
+                self._loaded = False
+                raise PluginLoadError(self) from exn
         return self._cls
 
     def __repr__(self):
@@ -0,0 +1,157 @@
+from dataclasses import dataclass, field
+import time
+import unittest
+import traceback
+import multiprocessing
+import concurrent.futures
+
+
+__all__ = ["CaseOutcome", "ShardResult", "run_shard", "run_shards", "format_report"]
+
+
+@dataclass(frozen=True)
+class CaseOutcome:
+    test_id:  str
+    status:   str # one of: "ok", "fail", "error", "skip", "xfail", "xpass"
+    duration: float
+    details:  str = ""
+
+
+@dataclass
+class ShardResult:
+    name:     str
+    outcomes: list[CaseOutcome] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def failed(self) -> list[CaseOutcome]:
+        return [outcome for outcome in self.outcomes
+                if outcome.status in ("fail", "error", "xpass")]
+
+    def count(self, status) -> int:
+        return sum(1 for outcome in self.outcomes if outcome.status == status)
+
+
+class _RecordingTestResult(unittest.TestResult):
+    """Records the outcome and duration of each test in a form that can be sent between processes
+    (i.e. without references to test case objects or tracebacks)."""
+
+    def __init__(self):
+        super().__init__()
+        self.outcomes = []
+        self._started = None
+
+    def startTest(self, test):
+        super().startTest(test)
+        self._started = time.perf_counter()
+
+    def _record(self, test, status, details=""):
+        duration = time.perf_counter() - self._started if self._started is not None else 0.0
+        self.outcomes.append(CaseOutcome(test.id(), status, duration, details))
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._record(test, "ok")
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, "fail", self.failures[-1][1])
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._record(test, "error", self.errors[-1][1])
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._record(test, "skip", reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._record(test, "xfail")
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._record(test, "xpass")
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            status = "fail" if issubclass(err[0], test.failureException) else "error"
+            self._record(subtest, status, self._exc_info_to_string(err, test))
+
+
+def run_shard(name: str, test_names: list[str]) -> ShardResult:
+    """Run the tests in :py:`test_names` (dotted names, as accepted by
+    :meth:`unittest.TestLoader.loadTestsFromName`) and return their outcomes.
+
+    This function is the unit of work executed by the worker processes, and it does not raise
+    exceptions: an error loading a test is reported as the outcome of that test.
+    """
+    loader = unittest.TestLoader()
+    result = _RecordingTestResult()
+    started = time.perf_counter()
+    for test_name in test_names:
+        try:
+            suite = loader.loadTestsFromName(test_name)
+        except Exception:
+            result.outcomes.append(CaseOutcome(test_name, "error", 0.0, traceback.format_exc()))
+            continue
+        suite.run(result)
+    return ShardResult(name, result.outcomes, time.perf_counter() - started)
+
+
+def run_shards(shards: dict[str, list[str]], *, jobs: int, on_result=None) -> list[ShardResult]:
+    """Run each shard in :py:`shards` in one of :py:`jobs` worker processes.
+
+    Shards are dispatched to workers as they become idle, largest first, so that a few large
+    shards submitted last do not extend the total run time. If :py:`on_result` is provided,
+    it is called with each :class:`ShardResult` as soon as it is available.
+    """
+    # Worker processes are spawned rather than forked: the parent may have running threads and an
+    # event loop, neither of which survive a fork in a usable state.
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, mp_context=context) as executor:
+        futures = {}
+        for name, test_names in sorted(shards.items(), key=lambda item: -len(item[1])):
+            futures[executor.submit(run_shard, name, test_names)] = name
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                shard_result = future.result()
+            except Exception:
+                # The worker process has crashed (e.g. due to a segfault in a native extension).
+                shard_result = ShardResult(futures[future], [
+                    CaseOutcome(futures[future], "error", 0.0, traceback.format_exc())
+                ])
+            results.append(shard_result)
+            if on_result is not None:
+                on_result(shard_result)
+    return sorted(results, key=lambda shard_result: shard_result.name)
+
+
+def format_report(results: list[ShardResult], *, wall_time: float, slowest: int = 10) -> str:
+    """Format a summary of :py:`results`: details of each failure, total counts and timing,
+    and the :py:`slowest` tests."""
+    outcomes = [outcome for shard_result in results for outcome in shard_result.outcomes]
+    lines = []
+    for outcome in outcomes:
+        if outcome.status in ("fail", "error", "xpass"):
+            lines.append("=" * 70)
+            lines.append(f"{outcome.status.upper()}: {outcome.test_id}")
+            lines.append("-" * 70)
+            if outcome.details:
+                lines.append(outcome.details.rstrip("\n"))
+    if slowest and outcomes:
+        lines.append("=" * 70)
+        lines.append(f"slowest {min(slowest, len(outcomes))} tests:")
+        for outcome in sorted(outcomes, key=lambda outcome: -outcome.duration)[:slowest]:
+            lines.append(f"  {outcome.duration:8.3f}s  {outcome.test_id}")
+    cpu_time = sum(shard_result.duration for shard_result in results)
+    counts = {}
+    for outcome in outcomes:
+        counts[outcome.status] = counts.get(outcome.status, 0) + 1
+    lines.append("-" * 70)
+    lines.append(f"ran {len(outcomes)} tests from {len(results)} shards "
+                 f"in {wall_time:.3f}s (sum of shard times: {cpu_time:.3f}s)")
+    lines.append(", ".join(f"{status}={count}" for status, count in sorted(counts.items())))
+    return "\n".join(lines)
@@ -0,0 +1,147 @@
+import time
+import types
+import asyncio
+import unittest
+import unittest.mock
+
+from fx2 import REQ_RAM, REG_CPUCS
+
+from glasgow.hardware.device import GlasgowDevice, VID_QIHW, PID_GLASGOW, CUR_API_LEVEL
+
+
+REVISION_C3 = 0x33
+
+
+class FakeUSBDevice:
+    """A stand-in for :class:`glasgow.support.usb.AbstractDevice` that behaves like a Glasgow
+    board: after the firmware is loaded and the CPU is released from reset, it disconnects and
+    re-enumerates (with a different location) running the current firmware."""
+
+    def __init__(self, context, *, location, serial, api_level, reenumerates=True):
+        self.context         = context
+        self.vendor_id       = VID_QIHW
+        self.product_id      = PID_GLASGOW
+        self.version         = (api_level << 8) | REVISION_C3
+        self.serial_number   = serial if api_level != 0 else None
+        self.location        = location
+        self.configuration   = types.SimpleNamespace(interfaces=[])
+        self._serial         = serial
+        self._reenumerates   = reenumerates
+        self._in_reset       = False
+
+    async def open(self):
+        self.context.open_devices += 1
+        self.context.max_open_devices = max(self.context.max_open_devices,
+                                            self.context.open_devices)
+
+    async def close(self):
+        self.context.open_devices -= 1
+
+    async def claim_interface(self, number):
+        pass
+
+    async def control_transfer_out(self, request_type, recipient, request, value, index, data):
+        assert request == REQ_RAM
+        await asyncio.sleep(self.context.transfer_time)
+        if value == REG_CPUCS:
+            if data == b"\x01":
+                self._in_reset = True
+            elif self._in_reset:
+                self._in_reset = False
+                self.context.loads.append(self._serial)
+                if self._reenumerates:
+                    asyncio.get_running_loop().call_later(
+                        self.context.reenumeration_time, self.context.reenumerate, self)
+
+
+class FakeUSBContext:
+    """A stand-in for :class:`glasgow.support.usb.AbstractContext`."""
+
+    def __init__(self, *, has_hotplug_support=True, transfer_time=0.001, reenumeration_time=0.2):
+        self.has_hotplug_support = has_hotplug_support
+        self.transfer_time       = transfer_time
+        self.reenumeration_time  = reenumeration_time
+        self.devices             = []
+        self.loads               = []
+        self.open_devices        = 0
+        self.max_open_devices    = 0
+        self._on_connect         = []
+        self._next_location      = 1
+
+    def add_device(self, serial, api_level, **kwargs):
+        device = FakeUSBDevice(self, location=f"1-{self._next_location}", serial=serial,
+                               api_level=api_level, **kwargs)
+        self._next_location += 1
+        self.devices.append(device)
+        return device
+
+    def reenumerate(self, device):
+        self.devices.remove(device)
+        device = self.add_device(device._serial, CUR_API_LEVEL)
+        if self.has_hotplug_support:
+            for callback in self._on_connect:
+                callback(device)
+
+    async def request_device(self, vendor_id, product_id):
+        pass
+
+    async def get_devices(self):
+        return list(self.devices)
+
+    def add_connect_callback(self, callback):
+        self._on_connect.append(callback)
+
+    def add_disconnect_callback(self, callback):
+        pass
+
+
+class GlasgowDeviceEnumerationTestCase(unittest.TestCase):
+    def enumerate(self, context, *, timeout=5.0):
+        async def run():
+            started = time.monotonic()
+            with unittest.mock.patch.object(GlasgowDevice, "RE_ENUMERATION_TIMEOUT", timeout):
+                devices = await GlasgowDevice._enumerate_devices(context)
+            return devices, time.monotonic() - started
+        return asyncio.run(run())
+
+    def test_ready(self):
+        context = FakeUSBContext()
+        for index in range(4):
+            context.add_device(f"C3-{index}", CUR_API_LEVEL)
+        devices, _elapsed = self.enumerate(context)
+        self.assertEqual(sorted(devices), ["C3-0", "C3-1", "C3-2", "C3-3"])
+        self.assertEqual(context.loads, [])
+
+    def test_parallel_load(self):
+        context = FakeUSBContext()
+        serials = [f"C3-{index:02}" for index in range(16)]
+        for index, serial in enumerate(serials):
+            context.add_device(serial, api_level=0 if index % 2 else CUR_API_LEVEL - 1)
+        with self.assertLogs("glasgow.hardware.device", "WARNING"):
+            devices, elapsed = self.enumerate(context)
+        self.assertEqual(sorted(devices), serials)
+        self.assertEqual(sorted(context.loads), serials)
+        self.assertEqual(context.max_open_devices, 16)
+        # Loading the firmware takes ~0.1 s and re-enumeration takes 0.2 s (then 0.5 s for
+        # the hotplug poll) per device; done one after another, this would take >10 s.
+        self.assertLess(elapsed, 2.0)
+
+    def test_missing(self):
+        context = FakeUSBContext()
+        context.add_device("C3-0", 0)
+        context.add_device("C3-1", 0, reenumerates=False)
+        with self.assertLogs("glasgow.hardware.device", "WARNING") as logs:
+            devices, elapsed = self.enumerate(context, timeout=1.0)
+        self.assertEqual(list(devices), ["C3-0"])
+        self.assertRegex(logs.output[0], r"device 1-2 did not re-enumerate")
+        self.assertLess(elapsed, 2.0)
+
+    def test_no_hotplug(self):
+        context = FakeUSBContext(has_hotplug_support=False)
+        serials = [f"C3-{index}" for index in range(8)]
+        for serial in serials:
+            context.add_device(serial, 0)
+        devices, elapsed = self.enumerate(context, timeout=0.5)
+        self.assertEqual(sorted(devices), serials)
+        # A single fixed delay is shared by every device.
+        self.assertLess(elapsed, 1.5)
@@ -0,0 +1,94 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from amaranth import *
+from amaranth.sim import Simulator
+
+from glasgow.simulation.trace import VCDFilter, parse_time, trace_files
+
+
+def _simulate(**kwargs):
+    m = Module()
+    counter = Signal(4)
+    m.d.sync += counter.eq(counter + 1)
+    m.submodules.toggle = toggle = Module()
+    flop = Signal()
+    toggle.d.sync += flop.eq(~flop)
+
+    sim = Simulator(m)
+    sim.add_clock(1e-6)
+    output = io.StringIO()
+    output.name = "test.vcd"
+    with sim.write_vcd(VCDFilter(output, **kwargs), io.StringIO()):
+        sim.run_until(10e-6)
+    return output.getvalue()
+
+
+class ParseTimeTestCase(unittest.TestCase):
+    def test_units(self):
+        self.assertEqual(parse_time("2"), 2)
+        self.assertAlmostEqual(parse_time("10us"), 10e-6)
+        self.assertAlmostEqual(parse_time("1 fs"), 1e-15)
+        self.assertAlmostEqual(parse_time("1.5e-3"), 1.5e-3)
+
+    def test_invalid(self):
+        with self.assertRaisesRegex(ValueError, r"'10 furlongs' is not a valid time"):
+            parse_time("10 furlongs")
+
+
+class VCDFilterTestCase(unittest.TestCase):
+    def test_passthrough(self):
+        contents = _simulate()
+        self.assertIn(" counter $end", contents)
+        self.assertIn(" flop $end", contents)
+        self.assertIn("#9500000000", contents)
+
+    def test_scopes(self):
+        contents = _simulate(scopes=["toggle"])
+        self.assertNotIn(" counter $end", contents)
+        self.assertIn(" flop $end", contents)
+        self.assertIn("$scope module toggle $end", contents)
+
+    def test_scopes_empty(self):
+        contents = _simulate(scopes=["nonexistent"])
+        self.assertNotIn("$var", contents)
+        self.assertNotIn("$scope", contents)
+        self.assertIn("$enddefinitions $end", contents)
+
+    def test_window(self):
+        contents = _simulate(start=3e-6, stop=5e-6)
+        timestamps = [int(line[1:]) for line in contents.splitlines() if line.startswith("#")]
+        self.assertEqual(timestamps[0], 3_000_000_000)
+        self.assertLessEqual(timestamps[-1], 5_000_000_000)
+        body = contents.split("$enddefinitions $end\n")[1]
+        self.assertTrue(body.startswith("#3000000000\n$dumpvars\n"))
+
+
+class OpenTraceFilesTestCase(unittest.TestCase):
+    def test_disabled(self):
+        with mock.patch.dict(os.environ, {"GLASGOW_TEST_VCD": "0"}):
+            with trace_files("test") as files:
+                self.assertEqual(files, (None, None))
+
+    def test_enabled(self):
+        with tempfile.TemporaryDirectory() as output:
+            with mock.patch.dict(os.environ, {
+                "GLASGOW_TEST_VCD": output,
+                "GLASGOW_TEST_VCD_WINDOW": "1us:",
+            }):
+                with trace_files("test") as (vcd_file, gtkw_file):
+                    self.assertIsInstance(vcd_file, VCDFilter)
+            self.assertTrue(os.path.exists(os.path.join(output, "test.vcd")))
+            self.assertTrue(os.path.exists(os.path.join(output, "test.gtkw")))
+
+    def test_window_invalid(self):
+        with mock.patch.dict(os.environ, {
+            "GLASGOW_TEST_VCD": "1",
+            "GLASGOW_TEST_VCD_WINDOW": "1us",
+        }):
+            with self.assertRaisesRegex(ValueError, r"must be in the form 'START:STOP'"):
+                with trace_files("test"):
+                    pass
@@ -0,0 +1,58 @@
+"""
+Measures the cost of TRACE messages in hot paths when TRACE is disabled.
+
+Run with ``python -m tests.support.bench_logging`` from the ``software`` directory.
+"""
+
+import logging
+import timeit
+
+from glasgow.support.lazy import lazy
+from glasgow.support.logging import dump_hex
+
+
+__all__ = ["benchmark"]
+
+
+def _lazy_dump_hex(data):
+    # The way `dump_hex` used to wrap its result, for comparison.
+    return lazy(lambda: memoryview(data).hex())
+
+
+def benchmark(*, number=100_000, repeat=5):
+    """Return the time per call, in seconds, of each logging pattern with TRACE disabled."""
+    logger = logging.getLogger(f"{__name__}.disabled")
+    logger.setLevel(logging.DEBUG)
+    interface = 2
+    data = bytes(range(64))
+
+    def pipe_send_unguarded():
+        logger.trace(f"OUT pipe {interface}: write <%s>", _lazy_dump_hex(data))
+
+    def pipe_send_guarded():
+        if logger.isEnabledFor(logging.TRACE):
+            logger.trace(f"OUT pipe {interface}: write <%s>", dump_hex(data))
+
+    def dump_hex_lazy():
+        logger.trace("data=<%s>", _lazy_dump_hex(data))
+
+    def dump_hex_unguarded():
+        logger.trace("data=<%s>", dump_hex(data))
+
+    try:
+        return {
+            name: min(timeit.repeat(func, number=number, repeat=repeat)) / number
+            for name, func in [
+                ("pipe send trace (unguarded, lazy)",   pipe_send_unguarded),
+                ("pipe send trace (guarded)",           pipe_send_guarded),
+                ("dump_hex log (unguarded, lazy)",      dump_hex_lazy),
+                ("dump_hex log (unguarded)",            dump_hex_unguarded),
+            ]
+        }
+    finally:
+        logger.setLevel(logging.NOTSET)
+
+
+if __name__ == "__main__":
+    for name, seconds in benchmark().items():
+        print(f"{name + ':':36} {seconds * 1e9:7.0f} ns")
@@ -1,3 +1,4 @@
+import random
 import unittest
 
 from amaranth import *
@@ -470,3 +471,98 @@ class BitarrayTestCase(unittest.TestCase):
         some = bitarray("1010")
         some ^= 0xc
         self.assertBitarray(some, 4, 0b0110)
+
+
+class BitsPropertyTestCase(unittest.TestCase):
+    # Checks the word-level fast paths against a list of bits as the reference model, across
+    # randomly chosen lengths and offsets that are deliberately not aligned to bytes.
+    ITERATIONS = 500
+
+    def setUp(self):
+        self.random = random.Random(0x5eed)
+
+    def random_list(self, max_length=80):
+        return [self.random.randrange(2) for _ in range(self.random.randrange(max_length))]
+
+    def random_index(self, length):
+        return self.random.randrange(-length - 4, length + 5)
+
+    def assertModel(self, value, model, msg=None):
+        self.assertEqual(list(value), model, msg)
+        self.assertEqual(len(value), len(model), msg)
+        # padding bits must be zero, or equality and hashing would depend on history
+        self.assertEqual(value, bits.from_iter(model), msg)
+        self.assertIsInstance(value._bytes, type(value)._bytestype, msg)
+
+    def test_getitem_slice(self):
+        for _ in range(self.ITERATIONS):
+            model = self.random_list()
+            start = self.random_index(len(model))
+            stop  = self.random_index(len(model))
+            step  = self.random.choice([None, 1, -1, 2, -3])
+            key   = slice(start, stop, step)
+            self.assertModel(bits.from_iter(model)[key], model[key], key)
+            self.assertModel(bitarray.from_iter(model)[key], model[key], key)
+
+    def test_add(self):
+        for _ in range(self.ITERATIONS):
+            first, second = self.random_list(), self.random_list()
+            self.assertModel(bits.from_iter(first) + bits.from_iter(second), first + second)
+            self.assertModel(first + bits.from_iter(second), first + second)
+            self.assertModel(bitarray.from_iter(first) + second, first + second)
+
+    def test_mul(self):
+        for _ in range(self.ITERATIONS // 5):
+            model, count = self.random_list(20), self.random.randrange(-1, 10)
+            self.assertModel(bits.from_iter(model) * count, model * count)
+            value = bitarray.from_iter(model)
+            value *= max(count, 0)
+            self.assertModel(value, model * max(count, 0))
+
+    def test_reversed(self):
+        for _ in range(self.ITERATIONS):
+            model = self.random_list()
+            self.assertModel(bits.from_iter(model).reversed(), model[::-1])
+            value = bitarray.from_iter(model)
+            value.reverse()
+            self.assertModel(value, model[::-1])
+
+    def test_str(self):
+        for _ in range(self.ITERATIONS):
+            model = self.random_list()
+            string = "".join(str(bit) for bit in reversed(model))
+            self.assertEqual(bits.from_iter(model).to_str(), string)
+            self.assertModel(bits.from_str(string), model)
+
+    def test_setitem_slice(self):
+        for _ in range(self.ITERATIONS):
+            model, replacement = self.random_list(), self.random_list(20)
+            start = self.random_index(len(model))
+            stop  = self.random_index(len(model))
+            if self.random.randrange(2):
+                # same length, no resize
+                start, stop, _ = slice(start, stop).indices(len(model))
+                replacement = replacement[:max(0, stop - start)]
+                replacement += [0] * (max(0, stop - start) - len(replacement))
+            value = bitarray.from_iter(model)
+            value[start:stop] = bits.from_iter(replacement)
+            model[start:stop] = replacement
+            self.assertModel(value, model, (start, stop))
+
+    def test_delitem_slice(self):
+        for _ in range(self.ITERATIONS):
+            model = self.random_list()
+            start = self.random_index(len(model))
+            stop  = self.random_index(len(model))
+            value = bitarray.from_iter(model)
+            del value[start:stop]
+            del model[start:stop]
+            self.assertModel(value, model, (start, stop))
+
+    def test_extend(self):
+        for _ in range(self.ITERATIONS):
+            model, extension = self.random_list(), self.random_list()
+            value = bitarray.from_iter(model)
+            value.extend(iter(extension))
+            value += bits.from_iter(extension)
+            self.assertModel(value, model + extension + extension)
@@ -0,0 +1,412 @@
+import ast
+import os
+import math
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+import unittest
+import unittest.mock
+
+from glasgow.support.data_logger import DataLogger, _InfluxDBWriter
+
+try:
+    import aiohttp.web
+except ImportError:
+    aiohttp = None
+try:
+    import numpy
+except ImportError:
+    numpy = None
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class _InfluxDBServer:
+    """A stand-in for an InfluxDB server that records submitted lines and can be told to fail."""
+
+    def __init__(self):
+        self.lines    = []
+        self.requests = []
+        self.failures = [] # statuses to respond with before accepting data
+        self.accept   = None # number of requests to accept before failing all of them
+        self.delay    = 0.0
+
+    async def handle_write(self, request):
+        self.requests.append(request)
+        body = await request.text()
+        await asyncio.sleep(self.delay)
+        if self.failures:
+            return aiohttp.web.Response(status=self.failures.pop(0), text="failure")
+        if self.accept is not None:
+            if self.accept == 0:
+                return aiohttp.web.Response(status=503, text="failure")
+            self.accept -= 1
+        self.lines += body.split("\n")
+        return aiohttp.web.Response(status=204)
+
+    async def __aenter__(self):
+        app = aiohttp.web.Application()
+        app.router.add_post("/write", self.handle_write)
+        app.router.add_post("/api/v2/write", self.handle_write)
+        self._runner = aiohttp.web.AppRunner(app)
+        await self._runner.setup()
+        site = aiohttp.web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.endpoint = f"http://{host}:{port}"
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._runner.cleanup()
+
+
+async def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        await asyncio.sleep(0.01)
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp not installed")
+class InfluxDBDataLoggerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger(__name__)
+        self.retry_delay = _InfluxDBWriter.RETRY_DELAY_INITIAL
+        _InfluxDBWriter.RETRY_DELAY_INITIAL = 0.01
+        self.request_points_max = _InfluxDBWriter.REQUEST_POINTS_MAX
+
+    def tearDown(self):
+        _InfluxDBWriter.RETRY_DELAY_INITIAL = self.retry_delay
+        _InfluxDBWriter.REQUEST_POINTS_MAX  = self.request_points_max
+
+    async def make_data_logger(self, server, *args):
+        parser = argparse.ArgumentParser()
+        DataLogger.add_subparsers(parser)
+        parsed_args = parser.parse_args([
+            "influxdb", server.endpoint, "db", "series", "-p", "s", "-t", "board=a 1", *args])
+        return await DataLogger(self.logger, parsed_args, field_names={"v": "V"})
+
+    def run_async(self, coro):
+        asyncio.run(asyncio.wait_for(coro, 10))
+
+    def test_batch(self):
+        async def case():
+            async with _InfluxDBServer() as server:
+                data_logger = await self.make_data_logger(server, "--batch-size", "2")
+                await data_logger.report_data({"v": 1}, timestamp=100)
+                await data_logger.report_data({"v": 2}, timestamp=101)
+                await _wait_until(lambda: len(server.lines) == 2)
+                self.assertEqual(server.lines, [
+                    "series,board=a\\ 1 error=False,v=1 100",
+                    "series,board=a\\ 1 error=False,v=2 101",
+                ])
+                self.assertEqual(len(server.requests), 1)
+                self.assertEqual(server.requests[0].query["db"], "db")
+                await data_logger.close()
+        self.run_async(case())
+
+    def test_non_blocking(self):
+        async def case():
+            async with _InfluxDBServer() as server:
+                server.delay = 0.5
+                data_logger = await self.make_data_logger(server)
+                started = time.monotonic()
+                for value in range(10):
+                    await data_logger.report_data({"v": value})
+                self.assertLess(time.monotonic() - started, 0.1)
+                await _wait_until(lambda: len(server.lines) == 10)
+                await data_logger.close()
+        self.run_async(case())
+
+    def test_flush_interval(self):
+        async def case():
+            async with _InfluxDBServer() as server:
+                data_logger = await self.make_data_logger(server,
+                    "--batch-size", "100", "--flush-interval", "0.05")
+                await data_logger.report_data({"v": 1})
+                await _wait_until(lambda: len(server.lines) == 1)
+                await data_logger.close()
+        self.run_async(case())
+
+    def test_close_flushes(self):
+        async def case():
+            async with _InfluxDBServer() as server:
+                data_logger = await self.make_data_logger(server, "--batch-size", "100")
+                await data_logger.report_data({"v": 1})
+                await data_logger.close()
+                self.assertEqual(len(server.lines), 1)
+        self.run_async(case())
+
+    def test_retry(self):
+        async def case():
+            async with _InfluxDBServer() as server:
+                server.failures = [503, 500, 429]
+                data_logger = await self.make_data_logger(server)
+                await data_logger.report_data({"v": 1}, timestamp=100)
+                await _wait_until(lambda: len(server.lines) == 1)
+                self.assertEqual(len(server.requests), 4)
+                await data_logger.close()
+        self.run_async(case())
+
+    def test_discard_rejected(self):
+        async def case():
+            async with _InfluxDBServer() as server:
+                server.failures = [400]
+                data_logger = await self.make_data_logger(server)
+                with self.assertLogs(self.logger, "ERROR") as logs:
+                    await data_logger.report_data({"v": 1}, timestamp=100)
+                    await _wait_until(lambda: len(server.requests) == 1)
+                    await data_logger.report_data({"v": 2}, timestamp=101)
+                    await _wait_until(lambda: len(server.lines) == 1)
+                self.assertIn("discarding 1 points", logs.output[0])
+                self.assertEqual(server.lines, ["series,board=a\\ 1 error=False,v=2 101"])
+                await data_logger.close()
+        self.run_async(case())
+
+    def test_queue_bounded(self):
+        async def case():
+            async with _InfluxDBServer() as server:
+                server.failures = [503] * 1000
+                data_logger = await self.make_data_logger(server, "--queue-size", "5")
+                with self.assertLogs(self.logger, "WARNING"):
+                    for value in range(20):
+                        await data_logger.report_data({"v": value}, timestamp=value)
+                self.assertLessEqual(data_logger._writer.pending, 6)
+                server.failures.clear()
+                await _wait_until(lambda: data_logger._writer.pending == 0)
+                # The oldest points are discarded.
+                self.assertEqual(server.lines[-1], "series,board=a\\ 1 error=False,v=19 19")
+                await data_logger.close()
+        self.run_async(case())
+
+    def test_journal(self):
+        async def case(journal_path):
+            async with _InfluxDBServer() as server:
+                server.failures = [503] * 1000
+                data_logger = await self.make_data_logger(server,
+                    "--queue-size", "5", "--batch-size", "3", "--journal", journal_path)
+                with self.assertLogs(self.logger, "WARNING"):
+                    for value in range(20):
+                        await data_logger.report_data({"v": value}, timestamp=value)
+                self.assertLessEqual(len(data_logger._writer._queue), 5)
+                self.assertGreater(os.path.getsize(journal_path), 0)
+                server.failures.clear()
+                await _wait_until(lambda: data_logger._writer.pending == 0)
+                self.assertEqual(server.lines, [
+                    f"series,board=a\\ 1 error=False,v={value} {value}" for value in range(20)
+                ])
+                self.assertEqual(os.path.getsize(journal_path), 0)
+                await data_logger.close()
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.run_async(case(os.path.join(directory, "journal")))
+
+    def test_journal_resume(self):
+        async def case(journal_path):
+            async with _InfluxDBServer() as server:
+                server.failures = [503] * 1000
+                data_logger = await self.make_data_logger(server, "--journal", journal_path)
+                await data_logger.report_data({"v": 1}, timestamp=1)
+                with self.assertLogs(self.logger, "WARNING"):
+                    await data_logger.close()
+                self.assertGreater(os.path.getsize(journal_path), 0)
+
+                server.failures.clear()
+                data_logger = await self.make_data_logger(server, "--journal", journal_path)
+                await _wait_until(lambda: len(server.lines) == 1)
+                self.assertEqual(server.lines, ["series,board=a\\ 1 error=False,v=1 1"])
+                await data_logger.close()
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.run_async(case(os.path.join(directory, "journal")))
+
+    def test_journal_close(self):
+        def line(value):
+            return f"series,board=a\\ 1 error=False,v={value} {value}"
+
+        async def case(journal_path):
+            _InfluxDBWriter.REQUEST_POINTS_MAX = 2
+            async with _InfluxDBServer() as server:
+                server.failures = [503] * 1000
+                data_logger = await self.make_data_logger(server,
+                    "--queue-size", "2", "--batch-size", "2", "--journal", journal_path)
+                with self.assertLogs(self.logger, "WARNING"):
+                    for value in range(10):
+                        await data_logger.report_data({"v": value}, timestamp=value)
+                    server.failures.clear()
+                    server.accept = 2
+                    await _wait_until(lambda: len(server.lines) == 4)
+                    await data_logger.close()
+                self.assertEqual(server.lines, [line(value) for value in range(4)])
+                # Submitted points are removed, and the rest stay in order.
+                with open(journal_path) as journal:
+                    self.assertEqual(journal.read().splitlines(),
+                                     [line(value) for value in range(4, 10)])
+
+                server.accept = None
+                data_logger = await self.make_data_logger(server, "--journal", journal_path)
+                await _wait_until(lambda: len(server.lines) == 10)
+                self.assertEqual(server.lines, [line(value) for value in range(10)])
+                await data_logger.close()
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.run_async(case(os.path.join(directory, "journal")))
+
+    def test_close_journal_submits(self):
+        async def case(journal_path):
+            async with _InfluxDBServer() as server:
+                data_logger = await self.make_data_logger(server,
+                    "--batch-size", "100", "--journal", journal_path)
+                await data_logger.report_data({"v": 1}, timestamp=1)
+                await data_logger.close()
+                self.assertEqual(server.lines, ["series,board=a\\ 1 error=False,v=1 1"])
+                self.assertFalse(os.path.exists(journal_path))
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.run_async(case(os.path.join(directory, "journal")))
+
+    def test_flush_error(self):
+        async def case():
+            async with _InfluxDBServer() as server:
+                data_logger = await self.make_data_logger(server, "--batch-size", "1")
+                with self.assertLogs(self.logger, "ERROR") as logs, \
+                        unittest.mock.patch.object(data_logger._writer, "_take_batch",
+                                                   side_effect=OSError("disk full")):
+                    await data_logger.report_data({"v": 1}, timestamp=1)
+                    await _wait_until(lambda: logs.output)
+                self.assertIn("cannot submit points", logs.output[0])
+                # The flush task keeps running.
+                await data_logger.report_data({"v": 2}, timestamp=2)
+                await _wait_until(lambda: len(server.lines) == 2)
+                await data_logger.close()
+        self.run_async(case())
+
+    def test_influxdb2(self):
+        async def case():
+            async with _InfluxDBServer() as server:
+                parser = argparse.ArgumentParser()
+                DataLogger.add_subparsers(parser)
+                parsed_args = parser.parse_args([
+                    "influxdb2", server.endpoint, "org", "bucket", "series", "-p", "s",
+                    "--token", "secret"])
+                data_logger = await DataLogger(self.logger, parsed_args, field_names={"v": "V"})
+                await data_logger.report_data({"v": 1}, timestamp=100)
+                await _wait_until(lambda: len(server.lines) == 1)
+                self.assertEqual(server.requests[0].headers["Authorization"], "Token secret")
+                self.assertEqual(server.requests[0].query["bucket"], "bucket")
+                await data_logger.close()
+        self.run_async(case())
+
+
+class _ColumnarDataLoggerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger(__name__)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    async def log_samples(self, *args, count=10, close=True):
+        parser = argparse.ArgumentParser()
+        DataLogger.add_subparsers(parser)
+        parsed_args = parser.parse_args(list(args))
+        data_logger = await DataLogger(self.logger, parsed_args,
+                                       field_names={"u": "U(V)", "i": "I(A)"})
+        for index in range(count):
+            await data_logger.report_data({"u": index * 0.5, "i": index}, 1700000000 + index)
+        with self.assertLogs(self.logger, "ERROR"):
+            await data_logger.report_error("sensor unplugged")
+        if close:
+            await data_logger.close()
+        return data_logger
+
+
+class NPYDataLoggerTestCase(_ColumnarDataLoggerTestCase):
+    def read_header(self, path):
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(8), b"\x93NUMPY\x01\x00")
+            header_length = int.from_bytes(file.read(2), "little")
+            self.assertEqual((10 + header_length) % 64, 0)
+            self.data_offset = 10 + header_length
+            return ast.literal_eval(file.read(header_length).decode("latin-1"))
+
+    def test_header(self):
+        asyncio.run(self.log_samples("npy", self.path("log.npy"), count=10))
+        self.assertEqual(self.read_header(self.path("log.npy")), {
+            "descr": [("timestamp", "<f8"), ("u", "<f8"), ("i", "<f8")],
+            "fortran_order": False,
+            "shape": (11,),
+        })
+        self.assertEqual(os.path.getsize(self.path("log.npy")), self.data_offset + 11 * 3 * 8)
+
+    def test_row_groups(self):
+        async def case():
+            data_logger = await self.log_samples(
+                "npy", self.path("log.npy"), "--row-group-size", "4", count=10, close=False)
+            # Two complete row groups are on disk, and three more rows are in memory.
+            self.assertEqual(self.read_header(self.path("log.npy"))["shape"], (8,))
+            await data_logger.close()
+            self.assertEqual(self.read_header(self.path("log.npy"))["shape"], (11,))
+        asyncio.run(case())
+
+    def test_stdout(self):
+        parser = argparse.ArgumentParser()
+        DataLogger.add_subparsers(parser)
+        with self.assertRaises(SystemExit):
+            with unittest.mock.patch("sys.stderr"):
+                parser.parse_args(["npy", "-"])
+
+    @unittest.skipIf(numpy is None, "numpy not installed")
+    def test_numpy_load(self):
+        asyncio.run(self.log_samples("npy", self.path("log.npy"), count=10))
+        data = numpy.load(self.path("log.npy"))
+        self.assertEqual(data.dtype.names, ("timestamp", "u", "i"))
+        self.assertEqual(len(data), 11)
+        self.assertEqual(data["timestamp"][3], 1700000003)
+        self.assertEqual(data["u"][3], 1.5)
+        self.assertEqual(data["i"][9], 9)
+        self.assertTrue(math.isnan(data["u"][10]))
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow not installed")
+class ArrowDataLoggerTestCase(_ColumnarDataLoggerTestCase):
+    def check_table(self, table):
+        self.assertEqual(table.column_names, ["timestamp", "u", "i"])
+        self.assertEqual(table.num_rows, 11)
+        self.assertEqual(table["timestamp"][3].as_py().timestamp(), 1700000003)
+        self.assertEqual(table["u"][3].as_py(), 1.5)
+        self.assertEqual(table["i"][9].as_py(), 9)
+        self.assertIsNone(table["u"][10].as_py())
+
+    def test_arrow_file(self):
+        asyncio.run(self.log_samples("arrow", self.path("log.arrow"), "--row-group-size", "4"))
+        with pyarrow.ipc.open_file(self.path("log.arrow")) as reader:
+            self.assertEqual(reader.num_record_batches, 3)
+            self.check_table(reader.read_all())
+
+    def test_arrow_stream(self):
+        asyncio.run(self.log_samples("arrow", self.path("log.arrows")))
+        with pyarrow.ipc.open_stream(self.path("log.arrows")) as reader:
+            self.check_table(reader.read_all())
+
+    def test_parquet(self):
+        asyncio.run(self.log_samples("arrow", self.path("log.parquet"), "--row-group-size", "4"))
+        self.assertEqual(pyarrow.parquet.ParquetFile(self.path("log.parquet")).num_row_groups, 3)
+        self.check_table(pyarrow.parquet.read_table(self.path("log.parquet")))
+
+    def test_wrong_extension(self):
+        parser = argparse.ArgumentParser()
+        DataLogger.add_subparsers(parser)
+        with self.assertRaises(SystemExit):
+            with unittest.mock.patch("sys.stderr"):
+                parser.parse_args(["arrow", self.path("log.csv")])
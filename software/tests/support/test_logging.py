@@ -0,0 +1,58 @@
+import logging
+import unittest
+
+from glasgow.support.logging import dump_hex, dump_bin
+
+
+class DumpTestCase(unittest.TestCase):
+    def test_dump_hex(self):
+        self.assertEqual(str(dump_hex(b"\x01\xab")), "01ab")
+        self.assertEqual("<%s>" % dump_hex(bytearray(b"\x10")), "<10>")
+        self.assertEqual("{}".format(dump_hex(memoryview(b"\xff"))), "ff")
+        self.assertEqual(str(dump_hex([1, 2])), "0102")
+
+    def test_dump_hex_limit(self):
+        self.assertEqual(str(dump_hex(bytes(range(100)))),
+                         bytes(range(64)).hex() + "... (100 bytes total)")
+
+    def test_dump_bin(self):
+        self.assertEqual(str(dump_bin(b"\x05")), "10100000")
+        self.assertEqual(str(dump_bin(b"\xff" * 9)), "1" * 64 + "... (72 bits total)")
+
+    def test_deferred(self):
+        class Data:
+            rendered = False
+            def __bytes__(self):
+                self.rendered = True
+                return b"\x00"
+
+        logger = logging.getLogger(__name__)
+        logger.setLevel(logging.INFO)
+        self.addCleanup(logger.setLevel, logging.NOTSET)
+        data = Data()
+        logger.debug("data=<%s>", dump_hex(data))
+        self.assertFalse(data.rendered)
+        with self.assertLogs(logger, logging.DEBUG) as logs:
+            logger.debug("data=<%s>", dump_hex(data))
+        self.assertTrue(data.rendered)
+        self.assertEqual(logs.output, [f"DEBUG:{__name__}:data=<00>"])
+
+    def test_deferred_bin(self):
+        class Data:
+            rendered = False
+            def __bytes__(self):
+                self.rendered = True
+                return b"\x00"
+
+        logger = logging.getLogger(__name__)
+        logger.setLevel(logging.INFO)
+        self.addCleanup(logger.setLevel, logging.NOTSET)
+        data = Data()
+        logger.debug("data=<%s>", dump_bin(data))
+        self.assertFalse(data.rendered)
+
+    def test_benchmark(self):
+        # Only checks that the benchmark still runs; see `bench_logging` for the numbers.
+        from .bench_logging import benchmark
+        results = benchmark(number=10, repeat=1)
+        self.assertEqual(len(results), 4)
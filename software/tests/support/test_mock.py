@@ -0,0 +1,134 @@
+import os
+import asyncio
+import tempfile
+import contextlib
+import unittest
+
+from glasgow.support.mock import open_fixture, convert_fixture, MockRecorder, MockReplayer
+
+
+_STANZAS = [
+    {"self": "iface", "call": "read", "kind": "asyncmethod",
+     "args": [3], "kwargs": {}, "result": b"\x00\x01\x02"},
+    {"self": "iface", "call": "write", "kind": "asyncmethod",
+     "args": [bytearray(b"\xff" * 1000), memoryview(b"ab")], "kwargs": {"flush": True},
+     "result": None},
+    {"self": "iface", "call": "status", "kind": "method",
+     "args": [], "kwargs": {}, "result": [1, "ok", 2.5]},
+]
+
+
+class _Interface:
+    async def read(self, length):
+        return bytes(range(length))
+
+    def status(self):
+        return 0x42
+
+    @contextlib.asynccontextmanager
+    async def select(self, index=0):
+        yield index
+
+
+class MockFixtureTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def write_stanzas(self, path, **kwargs):
+        writer = open_fixture(path, "w", **kwargs)
+        for stanza in _STANZAS:
+            writer.write(stanza)
+        writer.close()
+
+    def read_stanzas(self, path):
+        reader = open_fixture(path, "r")
+        stanzas = []
+        try:
+            while True:
+                stanzas.append(reader.read())
+        except EOFError:
+            pass
+        finally:
+            reader.close()
+        return stanzas
+
+    def assertStanzasEqual(self, stanzas):
+        self.assertEqual(len(stanzas), len(_STANZAS))
+        for actual, expected in zip(stanzas, _STANZAS):
+            self.assertEqual(actual, expected)
+        self.assertIsInstance(stanzas[0]["result"], bytes)
+        self.assertIsInstance(stanzas[1]["args"][0], bytearray)
+        self.assertIsInstance(stanzas[1]["args"][1], memoryview)
+
+    def test_json(self):
+        self.write_stanzas(self.path("test.json"))
+        self.assertStanzasEqual(self.read_stanzas(self.path("test.json")))
+
+    def test_binary(self):
+        self.write_stanzas(self.path("test.mock"))
+        self.assertStanzasEqual(self.read_stanzas(self.path("test.mock")))
+
+    def test_binary_zlib(self):
+        self.write_stanzas(self.path("test.mock"), compression="zlib")
+        self.assertStanzasEqual(self.read_stanzas(self.path("test.mock")))
+
+    def test_binary_empty(self):
+        open_fixture(self.path("test.mock"), "w").close()
+        self.assertEqual(self.read_stanzas(self.path("test.mock")), [])
+
+    def test_binary_wrong_magic(self):
+        with open(self.path("test.mock"), "wb") as file:
+            file.write(b"NOTMOCK\x00")
+        with self.assertRaisesRegex(ValueError, r"not a binary fixture"):
+            open_fixture(self.path("test.mock"), "r")
+
+    def test_convert(self):
+        self.write_stanzas(self.path("test.json"))
+        convert_fixture(self.path("test.json"), self.path("test.mock"))
+        self.assertStanzasEqual(self.read_stanzas(self.path("test.mock")))
+        convert_fixture(self.path("test.mock"), self.path("back.json"))
+        with open(self.path("test.json")) as expected, open(self.path("back.json")) as actual:
+            self.assertEqual(expected.read(), actual.read())
+
+    def test_convert_upgrade(self):
+        with open(self.path("old.json"), "w") as file:
+            file.write('{"method": "status", "async": false, '
+                       '"args": [], "kwargs": {}, "result": 1}\n')
+        convert_fixture(self.path("old.json"), self.path("new.mock"))
+        self.assertEqual(self.read_stanzas(self.path("new.mock")), [
+            {"call": "status", "kind": "method", "args": [], "kwargs": {}, "result": 1}
+        ])
+
+    def test_record_replay(self):
+        writer = open_fixture(self.path("test.mock"), "w")
+        recorder = MockRecorder(self, writer, "iface", _Interface())
+        self.assertEqual(asyncio.run(recorder.read(4)), b"\x00\x01\x02\x03")
+        self.assertEqual(recorder.status(), 0x42)
+        writer.close()
+
+        reader = open_fixture(self.path("test.mock"), "r")
+        replayer = MockReplayer(self, reader, "iface")
+        self.assertEqual(asyncio.run(replayer.read(4)), b"\x00\x01\x02\x03")
+        self.assertEqual(replayer.status(), 0x42)
+        reader.close()
+
+    def test_record_replay_context(self):
+        async def use(iface):
+            async with iface.select(3) as value:
+                return value
+
+        writer = open_fixture(self.path("test.json"), "w")
+        recorder = MockRecorder(self, writer, "iface", _Interface())
+        self.assertEqual(asyncio.run(use(recorder)), 3)
+        writer.close()
+
+        reader = open_fixture(self.path("test.json"), "r")
+        replayer = MockReplayer(self, reader, "iface")
+        self.assertEqual(asyncio.run(use(replayer)), 3)
+        reader.close()
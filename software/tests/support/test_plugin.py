@@ -0,0 +1,106 @@
+import os
+import sys
+import json
+import types
+import pathlib
+import tempfile
+import unittest
+import unittest.mock
+
+from glasgow.support import plugin
+from glasgow.plugins import GlasgowAppletMetadata, GlasgowAppletToolMetadata
+
+
+class PluginCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_path = pathlib.Path(self.directory.name) / "plugins.json"
+        patches = [
+            unittest.mock.patch.object(plugin, "_cache_path", lambda: self.cache_path),
+            unittest.mock.patch.object(plugin, "_plugin_cache", plugin._PluginCache()),
+            unittest.mock.patch.dict(os.environ, {"GLASGOW_PLUGIN_CACHE": "1"}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def reset(self):
+        # Simulates a new process.
+        plugin._plugin_cache._data = None
+
+    def test_cold_and_warm(self):
+        cold = GlasgowAppletToolMetadata.all()
+        self.assertTrue(os.path.exists(self.cache_path))
+        self.assertTrue(any(metadata._cls is not None for metadata in cold.values()))
+
+        self.reset()
+        with unittest.mock.patch("importlib.metadata.EntryPoint.load") as load:
+            warm = GlasgowAppletToolMetadata.all()
+            load.assert_not_called()
+        self.assertEqual(cold.keys(), warm.keys())
+        for handle in cold:
+            self.assertEqual(warm[handle].synopsis, cold[handle].synopsis)
+            self.assertEqual(warm[handle].description, cold[handle].description)
+            self.assertEqual(warm[handle].loadable, cold[handle].loadable)
+            self.assertEqual(warm[handle].unmet_requirements, cold[handle].unmet_requirements)
+            self.assertIsNone(warm[handle]._cls)
+
+        # The plugin is loaded once it is used.
+        handle, metadata = next((handle, metadata) for handle, metadata in warm.items()
+                                if metadata.loadable)
+        self.assertIs(metadata.load(), cold[handle].load())
+
+    def test_applet_metadata(self):
+        GlasgowAppletMetadata.get("uart")
+        self.reset()
+        metadata = GlasgowAppletMetadata.get("uart")
+        self.assertIsNone(metadata._cls)
+        self.assertEqual(metadata.synopsis, "communicate via UART")
+        self.assertFalse(metadata.preview)
+        self.assertEqual(metadata.required_revision, "A0")
+        self.assertTrue(metadata.has_tests)
+
+    def test_invalidate(self):
+        GlasgowAppletToolMetadata.all()
+        self.reset()
+        with unittest.mock.patch.object(plugin._PluginCache, "key", return_value="changed"):
+            metadata = GlasgowAppletToolMetadata.all()
+        self.assertTrue(any(metadata._cls is not None for metadata in metadata.values()))
+        with open(self.cache_path) as file:
+            self.assertEqual(json.load(file)["glasgow.applet.tool"]["key"], "changed")
+
+    def test_invalidate_module_mtime(self):
+        # Stands in for a plugin in an editable install.
+        package_path = pathlib.Path(self.directory.name) / "plugin_test_package"
+        package_path.mkdir()
+        (package_path / "__init__.py").write_text("")
+        (package_path / "applet.py").write_text("")
+        sys.path.insert(0, self.directory.name)
+        self.addCleanup(sys.path.remove, self.directory.name)
+        entry_point = types.SimpleNamespace(name="test", value="plugin_test_package.applet:Applet",
+            module="plugin_test_package.applet", dist=types.SimpleNamespace(name="d", version="1"))
+
+        key = plugin._PluginCache.key([entry_point])
+        self.assertEqual(plugin._PluginCache.key([entry_point]), key)
+        self.assertNotIn("plugin_test_package", sys.modules)
+        stat = os.stat(package_path / "applet.py")
+        os.utime(package_path / "applet.py", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        self.assertNotEqual(plugin._PluginCache.key([entry_point]), key)
+
+    def test_load_error(self):
+        GlasgowAppletToolMetadata.all()
+        self.reset()
+        metadata = next(metadata for metadata in GlasgowAppletToolMetadata.all().values()
+                        if metadata.loadable)
+        with unittest.mock.patch("importlib.metadata.EntryPoint.load", side_effect=ImportError):
+            with self.assertRaises(plugin.PluginLoadError):
+                metadata.load()
+        self.assertFalse(metadata.loadable)
+
+    def test_disabled(self):
+        with unittest.mock.patch.dict(os.environ, {"GLASGOW_PLUGIN_CACHE": "0"}):
+            GlasgowAppletToolMetadata.all()
+        self.assertFalse(os.path.exists(self.cache_path))
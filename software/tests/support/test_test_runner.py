@@ -0,0 +1,54 @@
+import unittest
+
+from glasgow.support.test_runner import run_shard, run_shards, format_report
+
+
+class _Samples:
+    # Nested within a class so that the test loader does not discover these test cases.
+    class Sample(unittest.TestCase):
+        def test_ok(self):
+            pass
+
+        def test_fail(self):
+            self.assertEqual(1, 2)
+
+        @unittest.skip("skipped")
+        def test_skip(self):
+            pass
+
+
+_SAMPLE = f"{__name__}._Samples.Sample"
+
+
+class TestRunnerTestCase(unittest.TestCase):
+    def test_run_shard(self):
+        result = run_shard("sample", [f"{_SAMPLE}.test_ok", f"{_SAMPLE}.test_fail",
+                                      f"{_SAMPLE}.test_skip", f"{_SAMPLE}.test_missing"])
+        self.assertEqual(result.name, "sample")
+        self.assertEqual([(outcome.test_id.rsplit(".", 1)[1], outcome.status)
+                          for outcome in result.outcomes], [
+            ("test_ok", "ok"),
+            ("test_fail", "fail"),
+            ("test_skip", "skip"),
+            ("test_missing", "error"),
+        ])
+        self.assertIn("AssertionError: 1 != 2", result.outcomes[1].details)
+        self.assertEqual(len(result.failed), 2)
+        self.assertEqual(result.count("skip"), 1)
+
+    def test_run_shards(self):
+        reported = []
+        results = run_shards({
+            "b": [f"{_SAMPLE}.test_ok", f"{_SAMPLE}.test_skip"],
+            "a": [f"{_SAMPLE}.test_fail"],
+        }, jobs=2, on_result=lambda result: reported.append(result.name))
+        self.assertEqual(sorted(reported), ["a", "b"])
+        self.assertEqual([result.name for result in results], ["a", "b"])
+        self.assertEqual([outcome.status for outcome in results[0].outcomes], ["fail"])
+        self.assertEqual([outcome.status for outcome in results[1].outcomes], ["ok", "skip"])
+
+        report = format_report(results, wall_time=1.0, slowest=2)
+        self.assertIn(f"FAIL: {_SAMPLE}.test_fail", report)
+        self.assertIn("slowest 2 tests:", report)
+        self.assertIn("ran 3 tests from 2 shards in 1.000s", report)
+        self.assertIn("fail=1, ok=1, skip=1", report)
@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+import subprocess
+
+
+class CLIImportTestCase(unittest.TestCase):
+    """Checks that the command line interface only imports what it needs for the given command.
+    The plugin metadata cache is warmed up first, since otherwise every applet is imported once."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.env = {**os.environ,
+            "XDG_CACHE_HOME": cls.directory.name,
+            "GLASGOW_PLUGIN_CACHE": "1"}
+        cls.run_cli("run", "--help")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    @classmethod
+    def run_cli(cls, *args, patch=""):
+        modules_path = os.path.join(cls.directory.name, "modules.json")
+        code = "\n".join([
+            "import sys, json, asyncio",
+            patch,
+            "from glasgow.cli import main",
+            f"sys.argv = ['glasgow', *{args!r}]",
+            "asyncio.run(main())",
+            f"json.dump(sorted(sys.modules), open({modules_path!r}, 'w'))",
+        ])
+        subprocess.run([sys.executable, "-c", code], env=cls.env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(modules_path) as file:
+            return set(json.load(file))
+
+    def assertNotImported(self, modules, prefix):
+        self.assertEqual([module for module in modules
+                          if module == prefix or module.startswith(prefix + ".")], [])
+
+    def test_help(self):
+        modules = self.run_cli("--help")
+        self.assertNotImported(modules, "amaranth")
+        self.assertNotImported(modules, "usb1")
+        self.assertNotImported(modules, "glasgow.applet")
+        self.assertNotImported(modules, "glasgow.hardware")
+
+    def test_run_help(self):
+        modules = self.run_cli("run", "--help")
+        self.assertNotImported(modules, "amaranth")
+        self.assertNotImported(modules, "glasgow.applet")
+
+    def test_run_applet_help(self):
+        modules = self.run_cli("run", "uart", "--help")
+        self.assertIn("glasgow.applet.interface.uart", modules)
+        self.assertNotImported(modules, "glasgow.applet.interface.spi_controller")
+        self.assertNotImported(modules, "glasgow.applet.program")
+
+    def test_list(self):
+        modules = self.run_cli("list", patch="\n".join([
+            "from glasgow.hardware.device import GlasgowDevice",
+            "async def enumerate(): return []",
+            "GlasgowDevice.enumerate = enumerate",
+        ]))
+        self.assertIn("glasgow.hardware.device", modules)
+        self.assertNotImported(modules, "amaranth")
+        self.assertNotImported(modules, "glasgow.applet")